@@ -0,0 +1,430 @@
+"""
+Extractor Benchmark - SpinAnalyzer v2.0
+
+Micro-benchmark do ContextExtractor em mãos longas (guerras de raise e
+all-in): compara o walker incremental atual com a implementação
+original, que reconstruía sequência/agressor/pot sobre o prefixo a cada
+ação do vilão (O(n²) por mão).
+
+Usage:
+    python benchmarks/extractor_benchmark.py [--repeat N] [--hands N] [--raises 10 50 200]
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from src.context.board_texture import board_texture_code
+from src.context.context_extractor import ContextExtractor, DecisionPoint
+
+
+# ============================================
+# REFERÊNCIA: EXTRAÇÃO ORIGINAL
+# ============================================
+
+class LegacyContextExtractor(ContextExtractor):
+    """
+    ContextExtractor com a extração original (varreduras completas do
+    prefixo por decision point), mantido aqui apenas como referência de "antes"
+    """
+
+    def _extract_decision_points(self, phh: Dict, hero_name: str, villain_name: str) -> List[DecisionPoint]:
+        """
+        Extrai todos os decision points do vilão em uma mão
+
+        Args:
+            phh: Dicionário PHH
+            hero_name: Nome do hero
+            villain_name: Nome do vilão
+
+        Returns:
+            Lista de DecisionPoint objects
+        """
+        decision_points = []
+
+        # Metadata
+        hand_id = phh.get('metadata', {}).get('hand_id', 'unknown')
+        bb = phh.get('metadata', {}).get('bb', 0)
+
+        # Players
+        players = {p['name']: p for p in phh.get('players', [])}
+
+        if villain_name not in players:
+            return []
+
+        # Stacks iniciais
+        hero_stack = players[hero_name]['stack'] if hero_name in players else 0
+        villain_stack = players[villain_name]['stack']
+        eff_stack_bb = min(hero_stack, villain_stack) / bb if bb > 0 else 0
+
+        # Position
+        villain_is_btn = players[villain_name].get('is_btn', False)
+        hero_is_btn = players[hero_name].get('is_btn', False) if hero_name in players else False
+
+        # Actions
+        actions = phh.get('actions', [])
+
+        # Agrupar ações por street
+        actions_by_street = self._group_actions_by_street(actions)
+
+        # Board cards por street
+        board_by_street = self._extract_board_by_street(phh)
+
+        # Processar cada street
+        for street in ['preflop', 'flop', 'turn', 'river']:
+            street_actions = actions_by_street.get(street, [])
+
+            # Board atual
+            board_cards = board_by_street.get(street, [])
+
+            # Filtrar ações do vilão nesta street
+            # Ignorar blinds/antes (sb, bb, ante) - apenas ações de decisão (call, raise, fold, bet, check)
+            decision_actions = ['call', 'raise', 'fold', 'bet', 'check', 'all_in']
+            villain_actions_in_street = [
+                a for a in street_actions
+                if a.get('player') == villain_name and a.get('action') in decision_actions
+            ]
+
+            # Para cada ação do vilão, criar um decision point
+            for action_idx, villain_action in enumerate(villain_actions_in_street):
+                # Pot antes da ação do vilão
+                pot_bb = self._calculate_pot_before_action(
+                    actions_by_street, street, villain_action
+                ) / bb if bb > 0 else 0
+
+                dp = self._create_decision_point(
+                    hand_id=hand_id,
+                    villain_name=villain_name,
+                    hero_name=hero_name,
+                    street=street,
+                    action_idx=action_idx,
+                    villain_action=villain_action,
+                    all_street_actions=street_actions,
+                    board_cards=board_cards,
+                    pot_bb=pot_bb,
+                    eff_stack_bb=eff_stack_bb,
+                    villain_is_btn=villain_is_btn,
+                    hero_is_btn=hero_is_btn,
+                    actions_by_street=actions_by_street,
+                    phh=phh
+                )
+
+                if dp:
+                    decision_points.append(dp)
+                    self.stats['by_street'][street] += 1
+
+        return decision_points
+
+    def _create_decision_point(
+        self,
+        hand_id: str,
+        villain_name: str,
+        hero_name: str,
+        street: str,
+        action_idx: int,
+        villain_action: Dict,
+        all_street_actions: List[Dict],
+        board_cards: List[str],
+        pot_bb: float,
+        eff_stack_bb: float,
+        villain_is_btn: bool,
+        hero_is_btn: bool,
+        actions_by_street: Dict,
+        phh: Dict
+    ) -> Optional[DecisionPoint]:
+        """
+        Cria um DecisionPoint a partir do contexto
+
+        (Função auxiliar para _extract_decision_points)
+        """
+        try:
+            # Decision ID
+            step_idx = villain_action.get('step_idx', action_idx)
+            decision_id = f"{hand_id}_{step_idx}"
+
+            # Ação do vilão
+            action_type = villain_action.get('action', 'unknown')
+            amount_bb = villain_action.get('amount', 0) / phh.get('metadata', {}).get('bb', 1)
+
+            # Bet size % pot
+            bet_size_pot_pct = (amount_bb / pot_bb * 100) if pot_bb > 0 and amount_bb > 0 else None
+
+            # Position
+            if street == 'preflop':
+                villain_pos = 'BTN' if villain_is_btn else 'BB'
+                hero_pos = 'BTN' if hero_is_btn else 'BB'
+            else:
+                villain_pos = 'IP' if villain_is_btn else 'OOP'
+                hero_pos = 'IP' if hero_is_btn else 'OOP'
+
+            # Ações da street antes desta (varredura até a ação do vilão)
+            position = next(i for i, action in enumerate(all_street_actions) if action is villain_action)
+            street_prefix = all_street_actions[:position]
+            preflop_actions = street_prefix if street == 'preflop' else actions_by_street.get('preflop', [])
+
+            # Action sequences
+            preflop_seq = self._build_action_sequence(
+                preflop_actions,
+                hero_name,
+                villain_name
+            )
+
+            current_seq = self._build_action_sequence(
+                street_prefix,  # Até esta ação
+                hero_name,
+                villain_name
+            )
+
+            # Agressor
+            preflop_aggressor = self._identify_last_aggressor(
+                preflop_actions,
+                hero_name,
+                villain_name
+            )
+
+            current_aggressor = self._identify_last_aggressor(
+                street_prefix,
+                hero_name,
+                villain_name
+            )
+
+            # Board texture
+            texture_code = board_texture_code(board_cards)
+
+            # SPR
+            spr = eff_stack_bb / pot_bb if pot_bb > 0 else None
+
+            # Mão do vilão (se conhecida)
+            villain_hand, villain_strength, villain_draws = self._extract_villain_hand_info(
+                phh, villain_name, board_cards
+            )
+
+            # Showdown
+            went_to_showdown, villain_won = self._check_showdown(phh, villain_name)
+
+            # Criar DecisionPoint
+            dp = DecisionPoint(
+                decision_id=decision_id,
+                hand_id=hand_id,
+                villain_name=villain_name,
+                step_idx=step_idx,
+                street=street,
+                action_number_in_street=action_idx,
+                pot_bb=pot_bb,
+                eff_stack_bb=eff_stack_bb,
+                spr=spr,
+                villain_position=villain_pos,
+                hero_position=hero_pos,
+                preflop_sequence=preflop_seq,
+                current_street_sequence=current_seq,
+                preflop_aggressor=preflop_aggressor,
+                current_aggressor=current_aggressor,
+                board_cards=board_cards,
+                texture_code=texture_code,
+                villain_hand=villain_hand,
+                villain_hand_strength=villain_strength,
+                villain_draws=villain_draws,
+                villain_action=action_type,
+                villain_bet_size_bb=amount_bb if amount_bb > 0 else None,
+                villain_bet_size_pot_pct=bet_size_pot_pct,
+                went_to_showdown=went_to_showdown,
+                villain_won=villain_won
+            )
+
+            return dp
+
+        except Exception as e:
+            logger.debug(f"Erro ao criar decision point: {e}")
+            return None
+    def _calculate_pot_before_action(
+        self, actions_by_street: Dict, current_street: str, current_action: Dict
+    ) -> float:
+        """Calcula pot size antes de uma ação (varredura completa do prefixo)"""
+        pot = 0
+
+        street_order = ['preflop', 'flop', 'turn', 'river']
+        current_idx = street_order.index(current_street)
+
+        # Somar TODAS as ações (incluindo blinds/antes) das streets anteriores
+        # e da atual até a ação
+        for street in street_order[:current_idx + 1]:
+            for action in actions_by_street.get(street, []):
+                if action is current_action:
+                    return pot
+                pot += action.get('amount', 0)
+
+        return pot
+
+    def _build_action_sequence(
+        self, actions: List[Dict], hero_name: str, villain_name: str
+    ) -> List[str]:
+        """
+        Constrói sequência de ações em formato legível
+
+        Ex: ["BTN_raise_3bb", "BB_call", "BB_check", "BTN_bet_8bb"]
+        """
+        sequence = []
+
+        for action in actions:
+            player = action.get('player', '')
+            action_type = action.get('action', '')
+            amount = action.get('amount', 0)
+
+            # Mapear player para hero/villain
+            if player == hero_name:
+                player_label = 'HERO'
+            elif player == villain_name:
+                player_label = 'VILLAIN'
+            else:
+                player_label = player
+
+            # Formato: HERO_bet_8 ou VILLAIN_call
+            if action_type in ['bet', 'raise'] and amount > 0:
+                sequence.append(f"{player_label}_{action_type}_{int(amount)}")
+            else:
+                sequence.append(f"{player_label}_{action_type}")
+
+        return sequence
+
+    def _identify_last_aggressor(
+        self, actions: List[Dict], hero_name: str, villain_name: str
+    ) -> Optional[str]:
+        """
+        Identifica o último agressor (quem deu bet/raise por último)
+
+        Returns:
+            'hero', 'villain', ou None
+        """
+        last_aggressor = None
+
+        for action in actions:
+            player = action.get('player', '')
+            action_type = action.get('action', '')
+
+            if action_type in ['bet', 'raise']:
+                if player == hero_name:
+                    last_aggressor = 'hero'
+                elif player == villain_name:
+                    last_aggressor = 'villain'
+
+        return last_aggressor
+
+
+# ============================================
+# MÃOS SINTÉTICAS
+# ============================================
+
+def raise_war_hand(hand_id: int, raises: int) -> Dict:
+    """
+    Mão HU com `raises` re-raises alternados e all-in no final
+
+    Args:
+        hand_id: ID da mão
+        raises: Número de raises de cada jogador
+
+    Returns:
+        Dict PHH
+    """
+    actions = [
+        {'player': 'Hero', 'action': 'ante', 'amount': 5.0},
+        {'player': 'Villain', 'action': 'ante', 'amount': 5.0},
+        {'player': 'Hero', 'action': 'sb', 'amount': 10.0},
+        {'player': 'Villain', 'action': 'bb', 'amount': 20.0},
+    ]
+
+    for i in range(raises):
+        actions.append({'player': 'Hero', 'action': 'raise', 'amount': 40.0 + i})
+        actions.append({'player': 'Villain', 'action': 'raise', 'amount': 40.0 + i})
+
+    actions.append({'player': 'Hero', 'action': 'all_in', 'amount': 500.0})
+    actions.append({'player': 'Villain', 'action': 'call', 'amount': 480.0})
+
+    return {
+        'metadata': {'hand_id': str(hand_id), 'game': 'NLHE', 'room': 'iPoker',
+                     'sb': 10.0, 'bb': 20.0, 'ante': 5.0, 'hero': 'Hero'},
+        'players': [
+            {'name': 'Hero', 'seat': 1, 'stack': 100_000.0, 'is_btn': True},
+            {'name': 'Villain', 'seat': 2, 'stack': 100_000.0, 'is_btn': False},
+        ],
+        'board': ['7d', 'Th', 'Ks', '2c', '3s'],
+        'actions': actions,
+        'showdown': {'winners': ['Villain'], 'hands': [{'player': 'Villain', 'cards': ['As', 'Ah']}]},
+    }
+
+
+def measure(extractor_cls, hands: List[Dict], repeat: int) -> Tuple[float, List[Dict]]:
+    """Melhor tempo de extração (segundos) e os decision points da última execução"""
+    best = float('inf')
+    rows = []
+
+    for _ in range(repeat):
+        extractor = extractor_cls()
+        start = time.perf_counter()
+        decision_points = [dp for phh in hands for dp in extractor.extract_from_phh(phh)]
+        best = min(best, time.perf_counter() - start)
+        rows = [dp.to_dict() for dp in decision_points]
+
+    return best, rows
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark do ContextExtractor em mãos longas")
+
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medida (usa a melhor)")
+    parser.add_argument("--hands", type=int, default=200, help="Mãos por medida")
+    parser.add_argument(
+        "--raises",
+        type=int,
+        nargs="+",
+        default=[5, 25, 100, 250],
+        help="Raises por jogador em cada mão"
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    results = []
+
+    for raises in args.raises:
+        hands = [raise_war_hand(i, raises) for i in range(args.hands)]
+
+        before, legacy_rows = measure(LegacyContextExtractor, hands, args.repeat)
+        after, rows = measure(ContextExtractor, hands, args.repeat)
+
+        if rows != legacy_rows:
+            logger.error(f"Saída diferente da referência com {raises} raises")
+            sys.exit(1)
+
+        results.append({
+            "raises": raises,
+            "actions_per_hand": len(hands[0]['actions']),
+            "decision_points": len(rows),
+            "before_hands_per_sec": len(hands) / before,
+            "after_hands_per_sec": len(hands) / after,
+            "speedup": before / after,
+        })
+
+    logger.info(f"\n{'='*60}")
+    for result in results:
+        logger.info(
+            f"{result['actions_per_hand']:>5} ações/mão: "
+            f"antes {result['before_hands_per_sec']:>9,.0f} mãos/s  "
+            f"depois {result['after_hands_per_sec']:>9,.0f} mãos/s  "
+            f"({result['speedup']:.1f}x)"
+        )
+    logger.info(f"{'='*60}")
+    logger.info(json.dumps(results))
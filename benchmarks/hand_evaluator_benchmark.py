@@ -0,0 +1,85 @@
+"""
+Hand Evaluator Benchmark - SpinAnalyzer v2.0
+
+Mede avaliações por segundo do avaliador por tabelas
+(src/context/hand_evaluator.py) em mãos aleatórias de 5, 6 e 7 cartas:
+
+- evaluate_batch: lote inteiro em uma chamada NumPy
+- evaluate: caminho escalar usado pelo extrator por mão
+- draws_batch: draws de flop/turn em lote
+
+Usage:
+    python benchmarks/hand_evaluator_benchmark.py [--hands N] [--repeat N] [--seed N]
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from src.context.hand_evaluator import RANKS, SUITS, draws_batch, evaluate, evaluate_batch
+
+
+def random_hands(count: int, cards: int, rng: np.random.Generator) -> np.ndarray:
+    """Matriz (count, cards) de cartas distintas por mão"""
+    return np.argsort(rng.random((count, 52)), axis=1)[:, :cards]
+
+
+def best_time(fn, repeat: int) -> float:
+    """Melhor tempo (segundos) de `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark do avaliador de mãos por tabelas")
+
+    parser.add_argument("--hands", type=int, default=1_000_000, help="Mãos por lote")
+    parser.add_argument("--scalar-hands", type=int, default=50_000, help="Mãos no caminho escalar")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por medida (usa a melhor)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das mãos aleatórias")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    rng = np.random.default_rng(args.seed)
+    names = [RANKS[i >> 2] + SUITS[i & 3] for i in range(52)]
+    results = []
+
+    for cards in (5, 6, 7):
+        hands = random_hands(args.hands, cards, rng)
+        seconds = best_time(lambda: evaluate_batch(hands), args.repeat)
+        results.append({"api": "evaluate_batch", "cards": cards, "evals_per_sec": args.hands / seconds})
+
+    scalar_hands = [[names[c] for c in hand] for hand in random_hands(args.scalar_hands, 7, rng).tolist()]
+    seconds = best_time(lambda: [evaluate(hand) for hand in scalar_hands], args.repeat)
+    results.append({"api": "evaluate", "cards": 7, "evals_per_sec": args.scalar_hands / seconds})
+
+    for board_cards in (3, 4):
+        hands = random_hands(args.hands, 2 + board_cards, rng)
+        seconds = best_time(lambda: draws_batch(hands[:, :2], hands[:, 2:]), args.repeat)
+        results.append({"api": "draws_batch", "cards": 2 + board_cards, "evals_per_sec": args.hands / seconds})
+
+    logger.info(f"\n{'='*60}")
+    for result in results:
+        logger.info(f"{result['api']:<15} {result['cards']} cartas  {result['evals_per_sec']:>13,.0f} avaliações/s")
+    logger.info(f"{'='*60}")
+    logger.info(json.dumps(results))
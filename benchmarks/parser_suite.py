@@ -0,0 +1,301 @@
+"""
+Parser Benchmark Suite - SpinAnalyzer v2.0
+
+Roda o UnifiedParser (parse_directory, como no pipeline) sobre os corpora
+do dataset e mede, por formato:
+
+- mãos/segundo e MB/segundo (melhor de N execuções)
+- pico de RSS do processo (cada formato roda em um processo novo)
+
+Formatos:
+- ipoker_xml: sessões XML de dataset/original_hands
+- ipoker_txt: exportações iPoker em texto (sintéticas se o dataset não tiver)
+- pokerstars_txt: dataset/villain_hands_pokerstars
+
+O resultado é salvo em JSON. Com --baseline, compara com uma execução
+anterior e sai com código 1 se algum formato perder mais que --threshold
+de mãos/segundo.
+
+Usage:
+    python benchmarks/parser_suite.py [--repeat N] [--output-format store|phh]
+                                      [--output results.json]
+                                      [--baseline old.json] [--threshold 0.10]
+"""
+
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from src.parsers.unified_parser import UnifiedParser, HandFormat
+from parser_throughput import find_corpus, synthetic_ipoker_txt_hands
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+FORMATS = {
+    "ipoker_xml": HandFormat.XML_IPOKER,
+    "ipoker_txt": HandFormat.TXT_IPOKER,
+    "pokerstars_txt": HandFormat.TXT_POKERSTARS,
+}
+
+
+# ============================================
+# MEDIÇÃO (PROCESSO FILHO)
+# ============================================
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS do processo atual em MB (None se indisponível)"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+def stage_corpus(files: List[Path], staging_dir: Path) -> Path:
+    """Espelha os arquivos do corpus em um diretório plano (symlinks)"""
+    staging_dir.mkdir(parents=True)
+
+    for i, file_path in enumerate(files):
+        link = staging_dir / f"{i:06d}{file_path.suffix}"
+        try:
+            link.symlink_to(file_path.resolve())
+        except OSError:
+            # Sem permissão para symlink (Windows): copia
+            link.write_bytes(file_path.read_bytes())
+
+    return staging_dir
+
+
+def run_format(
+    name: str,
+    files: List[str],
+    repeat: int,
+    output_format: str,
+    workers: int
+) -> Dict:
+    """
+    Executa parse_directory sobre os arquivos de um formato
+
+    Roda em um processo novo para que o pico de RSS reflita só este formato.
+
+    Returns:
+        Dict com mãos, bytes, tempos e pico de RSS
+    """
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    paths = [Path(f) for f in files]
+    total_bytes = sum(p.stat().st_size for p in paths)
+    rss_before = peak_rss_mb()
+
+    timings = []
+    stats = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = stage_corpus(paths, Path(temp_dir) / "input")
+
+        for run in range(repeat):
+            run_dir = Path(temp_dir) / f"run_{run}"
+            parser = UnifiedParser(
+                output_dir=run_dir / "phh",
+                store_dir=run_dir / "store" if output_format == "store" else None
+            )
+
+            start = time.perf_counter()
+            parser.parse_directory(input_dir, workers=workers)
+            timings.append(time.perf_counter() - start)
+            stats = dict(parser.stats)
+
+    best = min(timings)
+
+    return {
+        "format": name,
+        "files": len(paths),
+        "bytes": total_bytes,
+        "hands": stats.get("total_hands", 0),
+        "converted": stats.get("converted", 0),
+        "errors": stats.get("errors", 0),
+        "best_seconds": best,
+        "timings": timings,
+        "hands_per_sec": stats.get("total_hands", 0) / best if best > 0 else 0.0,
+        "mb_per_sec": total_bytes / (1024 * 1024) / best if best > 0 else 0.0,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# ============================================
+# CORPUS
+# ============================================
+
+def collect_corpora(synthetic_hands: int, synthetic_dir: Path) -> Dict[str, List[str]]:
+    """
+    Arquivos de cada formato no dataset
+
+    iPoker TXT cai para um arquivo sintético quando o dataset não tem o formato.
+    """
+    detector = UnifiedParser(output_dir=synthetic_dir / "unused")
+    corpora = {}
+
+    for name, fmt in FORMATS.items():
+        files = find_corpus(fmt, detector)
+
+        if not files and fmt == HandFormat.TXT_IPOKER and synthetic_hands > 0:
+            logger.warning(f"Nenhum arquivo iPoker TXT no dataset; usando {synthetic_hands} mãos sintéticas")
+            synthetic_path = synthetic_dir / "ipoker_synthetic.txt"
+            synthetic_path.write_text("\n\n".join(synthetic_ipoker_txt_hands(synthetic_hands)), encoding="utf-8")
+            files = [synthetic_path]
+
+        if not files:
+            logger.warning(f"Nenhum arquivo para {name}; formato ignorado")
+            continue
+
+        corpora[name] = [str(f) for f in files]
+
+    return corpora
+
+
+# ============================================
+# BASELINE
+# ============================================
+
+def compare_with_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compara mãos/segundo com uma execução anterior
+
+    Returns:
+        Lista de mensagens de regressão (vazia se nenhuma)
+    """
+    regressions = []
+
+    for name, current in results["formats"].items():
+        previous = baseline.get("formats", {}).get(name)
+        if not previous or not previous.get("hands_per_sec"):
+            continue
+
+        ratio = current["hands_per_sec"] / previous["hands_per_sec"]
+        current["baseline_ratio"] = ratio
+
+        if ratio < 1.0 - threshold:
+            regressions.append(
+                f"{name}: {current['hands_per_sec']:,.0f} mãos/s vs "
+                f"{previous['hands_per_sec']:,.0f} no baseline ({(ratio - 1) * 100:+.1f}%)"
+            )
+
+    return regressions
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Suite de benchmarks do UnifiedParser")
+
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por formato (usa a melhor)")
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(FORMATS),
+        default=list(FORMATS),
+        help="Formatos a medir"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["store", "phh"],
+        default="store",
+        help="Saída do parser: hand store colunar ou um arquivo .phh por mão"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Workers do parse_directory")
+    parser.add_argument(
+        "--synthetic-hands",
+        type=int,
+        default=20000,
+        help="Mãos sintéticas quando o dataset não tem iPoker TXT"
+    )
+    parser.add_argument("--output", type=Path, help="Arquivo JSON de resultados")
+    parser.add_argument("--baseline", type=Path, help="JSON de uma execução anterior para comparar")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Queda máxima tolerada de mãos/s em relação ao baseline (0.10 = 10%%)"
+    )
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "output_format": args.output_format,
+        "workers": args.workers,
+        "repeat": args.repeat,
+        "formats": {},
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpora = collect_corpora(args.synthetic_hands, Path(temp_dir))
+
+        for name in args.formats:
+            if name not in corpora:
+                continue
+
+            logger.info(f"Medindo {name} ({len(corpora[name])} arquivos)...")
+
+            # Processo novo por formato: pico de RSS isolado
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results["formats"][name] = executor.submit(
+                    run_format, name, corpora[name], args.repeat, args.output_format, args.workers
+                ).result()
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+
+    output_path = args.output or RESULTS_DIR / f"parser_suite_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    logger.info(f"\n{'='*60}")
+    for name, result in results["formats"].items():
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "n/d"
+        logger.info(
+            f"{name:<15} {result['hands']:>7} mãos  "
+            f"{result['hands_per_sec']:>9,.0f} mãos/s  "
+            f"{result['mb_per_sec']:>6.1f} MB/s  pico RSS {rss}"
+        )
+    logger.info(f"Resultados salvos em {output_path}")
+    logger.info(f"{'='*60}")
+
+    if regressions:
+        for message in regressions:
+            logger.error(f"Regressão: {message}")
+        sys.exit(1)
@@ -0,0 +1,160 @@
+"""
+Recall Benchmark - SpinAnalyzer v2.0
+
+Mede o recall@k da busca FAISS contra a métrica exata (similaridade
+ponderada do Vectorizer, calculada para todos os candidatos pelo
+WeightedSimilarityKernel), para cada combinação de:
+
+- embedding do índice: raw (L2 nos vetores brutos) ou weighted (blocos
+  normalizados * sqrt(peso), produto interno) com cada crédito τ de bloco
+  ausente em --missing-credits (0 = só blocos normalizados e ponderados)
+- tipo de índice: Flat (busca exata no espaço do índice) ou HNSW
+- rerank exato dos k * RERANK_FACTOR candidatos (on/off)
+
+Os vetores têm muitos empates (one-hots iguais), então o recall conta um
+resultado como acerto quando seu score exato alcança o k-ésimo melhor
+score exato da query.
+
+Sem --dp-file, vetoriza decision points sintéticos (os do
+vectorizer_benchmark).
+
+Usage:
+    python benchmarks/recall_benchmark.py [--candidates N] [--queries Q] [--k K] [--dp-file decision_points.parquet]
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from src.indexing.build_indices import IndexBuilder
+from src.vectorization.feature_schema import DEFAULT_MISSING_BLOCK_CREDIT, FeatureSchema
+from src.vectorization.similarity import WeightedSimilarityKernel
+from src.vectorization.vectorizer import Vectorizer
+from vectorizer_benchmark import synthetic_decision_points
+
+
+def tie_aware_recall(exact_scores: np.ndarray, results: list, k: int) -> float:
+    """Fração média dos k resultados cujo score exato alcança o k-ésimo melhor"""
+    thresholds = -np.partition(-exact_scores, k - 1, axis=1)[:, k - 1]
+    hits = [
+        np.count_nonzero(exact_scores[q, positions] >= thresholds[q] - 1e-5)
+        for q, positions in enumerate(results)
+    ]
+    return float(np.mean(hits)) / k
+
+
+def run_config(
+    candidates: np.ndarray,
+    queries: np.ndarray,
+    embedding: str,
+    missing_credit: float,
+    index_type: str,
+    k: int
+) -> dict:
+    """Constrói um índice e mede busca com e sem rerank"""
+    vectorizer = Vectorizer()
+    schema = FeatureSchema.from_vectorizer(vectorizer, embedding=embedding, missing_block_credit=missing_credit)
+    df = pd.DataFrame({
+        'villain_name': 'bench',
+        'decision_id': [str(i) for i in range(len(candidates))],
+        'context_vector': list(candidates),
+    })
+
+    results = {}
+    with tempfile.TemporaryDirectory() as indices_dir:
+        builder = IndexBuilder(Path(indices_dir), schema=schema)
+
+        start = time.perf_counter()
+        builder.build_indices_from_df(df, index_type=index_type)
+        results['build_seconds'] = time.perf_counter() - start
+
+        for rerank in (False, True):
+            start = time.perf_counter()
+            positions = [builder.search('bench', query, k=k, rerank=rerank)[1] for query in queries]
+            results[f"rerank={rerank}"] = {
+                'positions': positions,
+                'query_ms': (time.perf_counter() - start) / len(queries) * 1000,
+            }
+
+    return results
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Recall@k da busca FAISS contra a similaridade ponderada exata")
+
+    parser.add_argument("--candidates", type=int, default=20_000, help="Vetores no índice")
+    parser.add_argument("--queries", type=int, default=200, help="Queries")
+    parser.add_argument("--k", type=int, default=10, help="Top-k")
+    parser.add_argument("--index-types", nargs="+", default=["Flat", "HNSW"], help="Tipos de índice")
+    parser.add_argument("--missing-credits", nargs="+", type=float, default=[0.0, DEFAULT_MISSING_BLOCK_CREDIT],
+                        help="Créditos τ de bloco ausente testados no embedding weighted")
+    parser.add_argument("--dp-file", type=Path, default=None, help="Parquet de decision points (em vez de sintéticos)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Só o relatório do benchmark (o IndexBuilder loga cada etapa)
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", filter=lambda record: record["name"] == "__main__")
+
+    rng = np.random.default_rng(args.seed)
+
+    if args.dp_file:
+        base = pd.read_parquet(args.dp_file)
+    else:
+        base = synthetic_decision_points(min(args.candidates, 50_000), rng)
+
+    vectorizer = Vectorizer()
+    pool = vectorizer.vectorize_batch(base)
+    candidates = pool[rng.integers(len(pool), size=args.candidates)]
+    queries = pool[rng.integers(len(pool), size=args.queries)]
+    logger.info(f"{len(candidates):,} candidatos, {len(queries)} queries, k={args.k}")
+
+    # Verdade: similaridade ponderada exata contra todos os candidatos
+    exact_scores = WeightedSimilarityKernel(candidates, vectorizer.config).scores(queries)
+
+    variants = [("raw", 0.0)] + [("weighted", credit) for credit in args.missing_credits]
+
+    report = []
+    for embedding, credit in variants:
+        for index_type in args.index_types:
+            results = run_config(candidates, queries, embedding, credit, index_type, args.k)
+
+            for rerank in (False, True):
+                run = results[f"rerank={rerank}"]
+                report.append({
+                    "embedding": embedding,
+                    "missing_credit": credit if embedding == "weighted" else None,
+                    "index_type": index_type,
+                    "rerank": rerank,
+                    f"recall@{args.k}": tie_aware_recall(exact_scores, run['positions'], args.k),
+                    "query_ms": run['query_ms'],
+                    "build_seconds": results['build_seconds'],
+                })
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"{'embedding':<14} {'índice':<6} {'rerank':<7} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    for row in report:
+        label = row['embedding'] if row['missing_credit'] is None else f"weighted τ={row['missing_credit']:g}"
+        logger.info(
+            f"{label:<14} {row['index_type']:<6} {'sim' if row['rerank'] else 'não':<7} "
+            f"{row[f'recall@{args.k}']:>10.3f} {row['query_ms']:>10.3f}"
+        )
+    logger.info(f"{'='*60}")
+    logger.info(json.dumps(report))
@@ -0,0 +1,107 @@
+"""
+Similarity Benchmark - SpinAnalyzer v2.0
+
+Compara o WeightedSimilarityKernel (scores em lote por multiplicação de
+matrizes) com o Vectorizer.calculate_weighted_similarity par a par:
+
+- escalar: uma query contra uma amostra (--scalar-sample) de candidatos
+- kernel: montagem uma vez por conjunto de candidatos, depois scores e
+  top-k de uma query e de --queries queries contra --candidates candidatos
+
+Sem --dp-file, vetoriza decision points sintéticos (os do
+vectorizer_benchmark). A amostra escalar também confere os scores do kernel.
+
+Usage:
+    python benchmarks/similarity_benchmark.py [--candidates N] [--queries Q] [--k K] [--dp-file decision_points.parquet]
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from loguru import logger
+
+from src.vectorization.vectorizer import Vectorizer
+from vectorizer_benchmark import best_time, synthetic_decision_points
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark da similaridade ponderada (kernel vs par a par)")
+
+    parser.add_argument("--candidates", type=int, default=10_000, help="Candidatos (ex: resultados a reranquear)")
+    parser.add_argument("--queries", type=int, default=64, help="Queries no lote (Q, N)")
+    parser.add_argument("--k", type=int, default=50, help="Top-k")
+    parser.add_argument("--scalar-sample", type=int, default=2_000, help="Pares no caminho escalar")
+    parser.add_argument("--dp-file", type=Path, default=None, help="Parquet de decision points (em vez de sintéticos)")
+    parser.add_argument("--repeat", type=int, default=200, help="Execuções de cada medida (usa a melhor)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    rng = np.random.default_rng(args.seed)
+
+    if args.dp_file:
+        base = pd.read_parquet(args.dp_file)
+    else:
+        base = synthetic_decision_points(min(args.candidates, 50_000), rng)
+
+    vectorizer = Vectorizer()
+    pool = vectorizer.vectorize_batch(base)
+    candidates = pool[rng.integers(len(pool), size=args.candidates)]
+    queries = pool[rng.integers(len(pool), size=args.queries)]
+    logger.info(f"{len(candidates):,} candidatos, {len(queries)} queries, {candidates.shape[1]} dimensões")
+
+    # Escalar: uma query contra a amostra
+    sample = candidates[:args.scalar_sample]
+    start = time.perf_counter()
+    expected = np.array([vectorizer.calculate_weighted_similarity(queries[0], c) for c in sample])
+    scalar_seconds = time.perf_counter() - start
+
+    kernel = vectorizer.similarity_kernel(candidates)
+    if not np.allclose(kernel.scores(queries[0])[:len(sample)], expected, atol=1e-5):
+        logger.error("Kernel difere de calculate_weighted_similarity")
+        sys.exit(1)
+
+    build_seconds = best_time(lambda: vectorizer.similarity_kernel(candidates), max(1, args.repeat // 20))
+    score_seconds = best_time(lambda: kernel.scores(queries[0]), args.repeat)
+    top_k_seconds = best_time(lambda: kernel.top_k(queries[0], args.k), args.repeat)
+    batch_seconds = best_time(lambda: kernel.top_k(queries, args.k), max(1, args.repeat // 10))
+
+    scalar_rate = len(sample) / scalar_seconds
+    results = {
+        "candidates": len(candidates),
+        "queries": len(queries),
+        "k": args.k,
+        "scalar_pairs_per_sec": scalar_rate,
+        "kernel_build_ms": build_seconds * 1000,
+        "scores_ms": score_seconds * 1000,
+        "top_k_ms": top_k_seconds * 1000,
+        "batch_top_k_ms": batch_seconds * 1000,
+        "speedup": (len(candidates) / top_k_seconds) / scalar_rate,
+    }
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Par a par (escalar):     {scalar_rate:>13,.0f} pares/s")
+    logger.info(f"Montagem do kernel:      {results['kernel_build_ms']:>13.2f} ms")
+    logger.info(f"Scores, 1 query:         {results['scores_ms']:>13.3f} ms")
+    logger.info(f"Top-k, 1 query:          {results['top_k_ms']:>13.3f} ms")
+    logger.info(f"Top-k, Q queries:        {results['batch_top_k_ms']:>13.3f} ms")
+    logger.info(f"Speedup (top-k, 1 query):{results['speedup']:>13.0f}x")
+    logger.info(f"{'='*60}")
+    logger.info(json.dumps(results))
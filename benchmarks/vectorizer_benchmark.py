@@ -0,0 +1,164 @@
+"""
+Vectorizer Benchmark - SpinAnalyzer v2.0
+
+Compara o vectorize_batch coluna a coluna com o caminho original linha a
+linha (iterrows + to_dict + vectorize_decision_point) em um DataFrame de
+decision points:
+
+- por linha: medido em uma amostra (--row-sample) e extrapolado em linhas/s
+- lote: DataFrame inteiro (--rows) em uma chamada
+
+Sem --dp-file, gera decision points sintéticos (boards, sequências, draws e
+texturas no formato do ContextExtractor) e reamostra até --rows linhas.
+A amostra por linha também confere que os dois caminhos dão vetores idênticos.
+
+Usage:
+    python benchmarks/vectorizer_benchmark.py [--rows N] [--row-sample N] [--dp-file decision_points.parquet]
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from src.context.board_texture import analyze_board
+from src.context.hand_evaluator import DRAW_FLAGS, RANKS, SUITS
+from src.vectorization.vectorizer import HAND_STRENGTHS, STREETS, Vectorizer
+
+
+DECK = [rank + suit for rank in RANKS for suit in SUITS]
+
+TOKENS = [
+    'HERO_check', 'HERO_call', 'HERO_bet_8', 'HERO_raise_40', 'HERO_all_in_250',
+    'VILLAIN_check', 'VILLAIN_call', 'VILLAIN_bet_12', 'VILLAIN_raise_60', 'VILLAIN_fold'
+]
+
+
+# ============================================
+# DADOS
+# ============================================
+
+def synthetic_decision_points(count: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Decision points aleatórios com as colunas que o Vectorizer lê"""
+    rows = []
+
+    for _ in range(count):
+        street_idx = int(rng.integers(4))
+        board = [DECK[i] for i in rng.permutation(52)[:(0, 3, 4, 5)[street_idx]]]
+        sequence = [TOKENS[i] for i in rng.integers(len(TOKENS), size=int(rng.integers(8)))]
+        shown = street_idx > 0 and rng.random() < 0.2
+
+        rows.append({
+            'street': STREETS[street_idx],
+            'action_number_in_street': len(sequence),
+            'pot_bb': float(rng.uniform(2, 200)),
+            'eff_stack_bb': float(rng.uniform(1, 100)),
+            'spr': float(rng.uniform(0, 20)) if rng.random() < 0.9 else None,
+            'villain_position': ['IP', 'OOP', 'BTN', 'BB'][int(rng.integers(4))],
+            'current_street_sequence': sequence,
+            'current_aggressor': [None, 'hero', 'villain'][int(rng.integers(3))],
+            'board_cards': board,
+            'board_texture': analyze_board(board),
+            'villain_hand_strength': HAND_STRENGTHS[int(rng.integers(9))] if shown else None,
+            'villain_draws': {flag: bool(rng.random() < 0.3) for flag in DRAW_FLAGS} if shown else None,
+            'villain_bet_size_pot_pct': float(rng.uniform(10, 200)) if rng.random() < 0.6 else None,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def per_row(vectorizer: Vectorizer, df: pd.DataFrame) -> np.ndarray:
+    """Caminho original: iterrows + to_dict + um encoder por bloco"""
+    vectors = []
+
+    for _, row in df.iterrows():
+        dp_dict = row.to_dict()
+
+        if isinstance(dp_dict.get('board_texture'), str):
+            dp_dict['board_texture'] = json.loads(dp_dict['board_texture'])
+
+        if isinstance(dp_dict.get('villain_draws'), str):
+            dp_dict['villain_draws'] = json.loads(dp_dict['villain_draws'])
+
+        vectors.append(vectorizer.vectorize_decision_point(dp_dict))
+
+    return np.array(vectors, dtype=np.float32)
+
+
+def best_time(fn, repeat: int) -> float:
+    """Melhor tempo (segundos) de `repeat` execuções"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark do Vectorizer (lote vs linha a linha)")
+
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas no lote")
+    parser.add_argument("--row-sample", type=int, default=20_000, help="Linhas no caminho por linha")
+    parser.add_argument("--unique", type=int, default=50_000, help="Decision points sintéticos distintos")
+    parser.add_argument("--dp-file", type=Path, default=None, help="Parquet de decision points (em vez de sintéticos)")
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções do lote (usa a melhor)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    rng = np.random.default_rng(args.seed)
+
+    if args.dp_file:
+        base = pd.read_parquet(args.dp_file)
+    else:
+        base = synthetic_decision_points(args.unique, rng)
+
+    df = base.iloc[rng.integers(len(base), size=args.rows)].reset_index(drop=True)
+    sample = df.iloc[:args.row_sample]
+    logger.info(f"{len(df):,} decision points ({len(base):,} distintos)")
+
+    vectorizer = Vectorizer()
+
+    start = time.perf_counter()
+    expected = per_row(vectorizer, sample)
+    row_seconds = time.perf_counter() - start
+
+    if not np.array_equal(vectorizer.vectorize_batch(sample), expected, equal_nan=True):
+        logger.error("vectorize_batch difere do caminho por linha")
+        sys.exit(1)
+
+    batch_seconds = best_time(lambda: vectorizer.vectorize_batch(df), args.repeat)
+
+    row_rate = len(sample) / row_seconds
+    batch_rate = len(df) / batch_seconds
+    results = {
+        "rows": len(df),
+        "per_row_rows_per_sec": row_rate,
+        "batch_rows_per_sec": batch_rate,
+        "batch_seconds": batch_seconds,
+        "speedup": batch_rate / row_rate,
+    }
+
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Por linha (iterrows): {row_rate:>13,.0f} linhas/s")
+    logger.info(f"Lote (colunas):       {batch_rate:>13,.0f} linhas/s  ({batch_seconds:.2f}s)")
+    logger.info(f"Speedup:              {results['speedup']:>13.1f}x")
+    logger.info(f"{'='*60}")
+    logger.info(json.dumps(results))
@@ -7,14 +7,25 @@ Executa pipeline completo:
 3. Vectorization (Decision Points → Vectors)
 4. FAISS Indexing (Vectors → Indices)
 
+Com --fused, as etapas 1 e 2 rodam em uma única passada: cada mão
+convertida vai direto para o ContextExtractor, sem gravar e reler PHH.
+
+Com --all-players, a extração gera decision points de todos os jogadores
+de cada mão (cada um como "vilão") em uma única passada pelo corpus.
+
 Usage:
-    python run_pipeline.py [--input-dir DIR] [--output-dir DIR]
+    python run_pipeline.py [--input-dir DIR] [--output-dir DIR] [--fused]
 """
 
 import sys
+import json
 import argparse
 from pathlib import Path
+from typing import Optional
 from loguru import logger
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import time
 
 # Add src to path
@@ -22,8 +33,17 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from parsers import UnifiedParser
 from context import ContextExtractor
-from vectorization import Vectorizer
+from context.context_extractor import EXTRACT_CHUNK_SIZE
+from vectorization import FeatureSchema, Vectorizer
+from vectorization.vectorizer import SCALER_FEATURES
 from indexing import IndexBuilder
+from instrumentation import Instrumentation, profile_run
+
+# Decision points por lote na vetorização (lidos do Parquet em streaming)
+VECTORIZE_BATCH_SIZE = 50_000
+
+# Colunas do Parquet vetorizado que a indexação usa
+INDEX_COLUMNS = ['decision_id', 'villain_name', 'context_vector']
 
 
 def setup_logging(log_file: Path):
@@ -53,6 +73,13 @@ def parse_args():
         help="Diretório para salvar arquivos PHH"
     )
 
+    parser.add_argument(
+        "--store-dir",
+        type=Path,
+        default=None,
+        help="Hand store colunar (shards Parquet) no lugar de um arquivo PHH por mão"
+    )
+
     parser.add_argument(
         "--dp-file",
         type=Path,
@@ -70,8 +97,74 @@ def parse_args():
     parser.add_argument(
         "--dimension",
         type=int,
-        default=99,
-        help="Dimensão dos vetores"
+        default=None,
+        help="Dimensão esperada dos vetores (padrão: a do feature schema)"
+    )
+
+    parser.add_argument(
+        "--embedding",
+        choices=["weighted", "raw"],
+        default="weighted",
+        help="Embedding do índice: weighted (pesos por bloco, produto interno) ou raw (L2 nos vetores brutos)"
+    )
+
+    parser.add_argument(
+        "--replace-indices",
+        action="store_true",
+        help="Apagar índices de outro feature schema em vez de recusar a construção"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos para o parsing e a extração (1 = sequencial, 0 = todos os núcleos)"
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=32,
+        help="Arquivos enviados a cada processo por lote"
+    )
+
+    parser.add_argument(
+        "--extract-chunk-size",
+        type=int,
+        default=EXTRACT_CHUNK_SIZE,
+        help="Arquivos PHH por lote na extração (limita a memória da extração)"
+    )
+
+    parser.add_argument(
+        "--all-players",
+        action="store_true",
+        help="Extrair decision points de todos os jogadores da mão em uma passada "
+             "(perfis de população), e não só do vilão"
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Processar apenas arquivos novos ou alterados e pular mãos já ingeridas "
+             "(manifest de ingestão + índice de hand_ids)"
+    )
+
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="No modo incremental, reprocessar arquivos que falharam antes"
+    )
+
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        help="Parsing e extração em uma passada (mãos vão direto ao extrator, sem PHH intermediário)"
+    )
+
+    parser.add_argument(
+        "--keep-phh",
+        action="store_true",
+        help="No modo --fused, gravar também os arquivos PHH como saída paralela"
     )
 
     parser.add_argument(
@@ -99,14 +192,175 @@ def parse_args():
         help="Tipo de índice FAISS"
     )
 
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Rodar sob cProfile e gravar .prof/.txt ao lado do log (só o processo principal)"
+    )
+
     return parser.parse_args()
 
 
-def run_pipeline(args):
-    """Executa pipeline completo"""
+def run_fused_parse_extract(args):
+    """
+    Etapas 1 + 2 fundidas: XML/TXT/ZIP → Decision Points sem PHH intermediário
+
+    PHH (--keep-phh) e hand store (--store-dir) continuam disponíveis como
+    saídas paralelas. No modo incremental só as mãos novas são extraídas, e
+    seus decision points são acrescentados aos já salvos em --dp-file.
+    """
+    import pandas as pd
+
+    logger.info("\n" + "="*80)
+    logger.info("ETAPAS 1+2: PARSING + CONTEXT EXTRACTION (XML/TXT/ZIP → Decision Points)")
+    logger.info("="*80)
+
+    output_root = args.store_dir or args.phh_dir
+    manifest_path = output_root / "ingest_manifest.json" if args.incremental else None
+    hand_index_path = output_root / "hand_index.npz" if args.incremental else None
+    parser = UnifiedParser(
+        output_dir=args.phh_dir if args.keep_phh else None,
+        manifest_path=manifest_path,
+        store_dir=args.store_dir,
+        hand_index_path=hand_index_path
+    )
+
+    if (args.workers or 0) != 1:
+        logger.warning("--fused processa sequencialmente (extração no processo principal)")
+
+    extractor = ContextExtractor(all_players=args.all_players)
+    df_decision_points = extractor.extract_from_parser(
+        parser,
+        args.input_dir,
+        filters={'heads_up_only': True}
+    )
+
+    if args.incremental and args.dp_file.exists():
+        df_existing = pd.read_parquet(args.dp_file)
+        df_existing = df_existing[~df_existing['decision_id'].isin(df_decision_points.get('decision_id', []))]
+        df_decision_points = pd.concat([df_existing, df_decision_points], ignore_index=True)
+        logger.info(f"Decision points acumulados com a execução anterior: {len(df_decision_points)}")
+
+    args.dp_file.parent.mkdir(parents=True, exist_ok=True)
+    df_decision_points.to_parquet(args.dp_file, index=False)
+
+    logger.success(
+        f"✅ Parsing + extração concluídos: {parser.stats['converted']} mãos, "
+        f"{len(df_decision_points)} decision points"
+    )
+    logger.success(f"📁 Salvo em: {args.dp_file}")
+
+    return df_decision_points, parser, extractor
+
+
+def vectorize_to_parquet(
+    vectorizer: Vectorizer,
+    dp_file: Path,
+    output_file: Path,
+    batch_size: int = VECTORIZE_BATCH_SIZE
+) -> int:
+    """
+    Vetoriza o Parquet de decision points lote a lote
+
+    O scaler é ajustado só com as colunas numéricas do arquivo; depois cada
+    lote lido com iter_batches é vetorizado (vectorize_batch) e gravado com
+    a coluna context_vector. A memória fica limitada pelo lote, não pelo
+    total de decision points.
+
+    Args:
+        vectorizer: Vectorizer (ajustado aqui)
+        dp_file: Parquet de decision points
+        output_file: Parquet vetorizado (sobrescrito)
+        batch_size: Decision points por lote
+
+    Returns:
+        Número de decision points vetorizados
+    """
+    import pandas as pd
+
+    source = pq.ParquetFile(dp_file)
+    fit_columns = [name for name in SCALER_FEATURES if name in source.schema_arrow.names]
+    vectorizer.fit(pd.read_parquet(dp_file, columns=fit_columns))
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = output_file.with_name(output_file.name + ".tmp")
+    rows = 0
+    writer = None
+
+    try:
+        for batch in source.iter_batches(batch_size=batch_size):
+            vectors = vectorizer.vectorize_batch(batch.to_pandas())
+
+            # (n, dim) -> list<float> sem um array Python por linha
+            offsets = np.arange(0, vectors.size + 1, vectors.shape[1], dtype=np.int32)
+            context_vector = pa.ListArray.from_arrays(pa.array(offsets), pa.array(vectors.ravel()))
+            table = pa.Table.from_batches([batch]).append_column('context_vector', context_vector)
+
+            if writer is None:
+                writer = pq.ParquetWriter(temp_file, table.schema)
+            writer.write_table(table)
+            rows += len(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # Arquivo sem decision points: vetorizado vazio com o mesmo schema
+        pq.write_table(
+            source.schema_arrow.empty_table().append_column(
+                'context_vector', pa.array([], type=pa.list_(pa.float32()))
+            ),
+            temp_file
+        )
+
+    temp_file.replace(output_file)
+    return rows
+
+
+def write_timing_report(
+    report_path: Optional[Path],
+    timings: Instrumentation,
+    components: dict,
+    elapsed_time: float
+):
+    """Loga o tempo por etapa e grava o relatório JSON ao lado do log (se houver)"""
+    logger.info("\nTempo por etapa do pipeline:")
+    timings.log_summary()
+
+    for name, instrumentation in components.items():
+        instrumentation.log_summary(f"\n{name}:")
+
+    report = {
+        "elapsed_seconds": elapsed_time,
+        "pipeline": timings.to_dict()["stages"],
+    }
+    report.update({name: instrumentation.to_dict() for name, instrumentation in components.items()})
+
+    if report_path is None:
+        return
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(f"📁 Relatório de tempos: {report_path}")
+
+
+def run_pipeline(args, report_path: Optional[Path] = None):
+    """
+    Executa pipeline completo
+
+    Args:
+        args: Argumentos da linha de comando
+        report_path: JSON com o tempo por etapa (None = só loga)
+    """
 
     start_time = time.time()
 
+    # Tempo de cada etapa do pipeline + instrumentação de parser/extrator
+    timings = Instrumentation()
+    components = {}
+
     logger.info("="*80)
     logger.info("SPINANALYZER v2.0 - PATTERN MATCHING ENGINE")
     logger.info("="*80)
@@ -118,19 +372,48 @@ def run_pipeline(args):
     # ETAPA 1: PARSING
     # ============================================
 
-    if not args.skip_parse:
+    extracted = False
+    stage_start = time.perf_counter()
+
+    if args.fused and not args.skip_parse and not args.skip_extract:
+        _, parser, extractor = run_fused_parse_extract(args)
+        extracted = True
+        timings.add('parse_extract', time.perf_counter() - stage_start)
+        components['parser'] = parser.instrumentation
+        components['extractor'] = extractor.instrumentation
+    elif not args.skip_parse:
         logger.info("\n" + "="*80)
         logger.info("ETAPA 1: PARSING (XML/TXT/ZIP → PHH)")
         logger.info("="*80)
 
-        parser = UnifiedParser(output_dir=args.phh_dir)
+        output_root = args.store_dir or args.phh_dir
+        manifest_path = output_root / "ingest_manifest.json" if args.incremental else None
+        hand_index_path = output_root / "hand_index.npz" if args.incremental else None
+        parser = UnifiedParser(
+            output_dir=args.phh_dir,
+            manifest_path=manifest_path,
+            store_dir=args.store_dir,
+            hand_index_path=hand_index_path
+        )
 
         phh_files = parser.parse_directory(
             input_dir=args.input_dir,
-            filters={'heads_up_only': True}
+            filters={'heads_up_only': True},
+            workers=args.workers or None,
+            chunk_size=args.chunk_size,
+            retry_failed=args.retry_failed
         )
 
-        logger.success(f"✅ Parsing concluído: {len(phh_files)} arquivos PHH gerados")
+        if args.store_dir:
+            logger.success(
+                f"✅ Parsing concluído: {parser.stats['converted']} mãos em "
+                f"{len(phh_files)} shards ({args.store_dir})"
+            )
+        else:
+            logger.success(f"✅ Parsing concluído: {len(phh_files)} arquivos PHH gerados")
+
+        timings.add('parse', time.perf_counter() - stage_start)
+        components['parser'] = parser.instrumentation
     else:
         logger.info("\n⏭ Pulando etapa de parsing (usando PHH existentes)")
 
@@ -138,32 +421,55 @@ def run_pipeline(args):
     # ETAPA 2: CONTEXT EXTRACTION
     # ============================================
 
-    if not args.skip_extract:
+    stage_start = time.perf_counter()
+
+    if extracted:
+        logger.info("\n⏭ Extração já feita na passada fundida")
+    elif not args.skip_extract:
         logger.info("\n" + "="*80)
         logger.info("ETAPA 2: CONTEXT EXTRACTION (PHH → Decision Points)")
         logger.info("="*80)
 
-        extractor = ContextExtractor()
-
-        df_decision_points = extractor.extract_from_directory(args.phh_dir)
-
-        # Salvar
-        args.dp_file.parent.mkdir(parents=True, exist_ok=True)
-        df_decision_points.to_parquet(args.dp_file, index=False)
-
-        logger.success(f"✅ Extração concluída: {len(df_decision_points)} decision points")
+        extractor = ContextExtractor(all_players=args.all_players)
+
+        if args.store_dir:
+            if args.workers != 1 or args.extract_chunk_size != EXTRACT_CHUNK_SIZE:
+                logger.warning(
+                    "--store-dir: extração shard a shard no processo principal "
+                    "(--workers e --extract-chunk-size valem só para PHH)"
+                )
+
+            # Uma tabela Arrow por shard, gravada como row group (memória limitada pelo shard)
+            extractor.extract_store_to_parquet(args.store_dir, args.dp_file)
+        else:
+            # Lotes gravados em streaming no Parquet (memória limitada pelo lote)
+            extractor.extract_directory_to_parquet(
+                args.phh_dir,
+                args.dp_file,
+                workers=args.workers or None,
+                chunk_size=args.extract_chunk_size
+            )
+
+        n_decision_points = pq.ParquetFile(args.dp_file).metadata.num_rows
+
+        logger.success(f"✅ Extração concluída: {n_decision_points} decision points")
         logger.success(f"📁 Salvo em: {args.dp_file}")
+
+        timings.add('extract', time.perf_counter() - stage_start)
+        components['extractor'] = extractor.instrumentation
     else:
         logger.info("\n⏭ Pulando etapa de extração (usando decision points existentes)")
 
-        import pandas as pd
-        df_decision_points = pd.read_parquet(args.dp_file)
-        logger.info(f"Carregados {len(df_decision_points)} decision points de {args.dp_file}")
+        n_decision_points = pq.ParquetFile(args.dp_file).metadata.num_rows
+        logger.info(f"Usando {n_decision_points} decision points de {args.dp_file}")
 
     # ============================================
     # ETAPA 3: VECTORIZATION
     # ============================================
 
+    stage_start = time.perf_counter()
+    vectorized_file = args.dp_file.parent / "decision_points_vectorized.parquet"
+
     if not args.skip_vectorize:
         logger.info("\n" + "="*80)
         logger.info("ETAPA 3: VECTORIZATION (Decision Points → Vectors)")
@@ -171,28 +477,25 @@ def run_pipeline(args):
 
         vectorizer = Vectorizer()
 
-        # Fit
-        vectorizer.fit(df_decision_points)
-
-        # Vetorizar
-        vectors = vectorizer.vectorize_batch(df_decision_points)
-
-        # Adicionar ao DataFrame
-        df_decision_points['context_vector'] = list(vectors)
+        # Fit + vetorização lote a lote do Parquet (o estado do fit vai para o
+        # feature schema gravado com os índices)
+        n_vectors = vectorize_to_parquet(vectorizer, args.dp_file, vectorized_file)
+        schema = FeatureSchema.from_vectorizer(vectorizer, embedding=args.embedding)
 
-        # Salvar versão vetorizada
-        vectorized_file = args.dp_file.parent / "decision_points_vectorized.parquet"
-        df_decision_points.to_parquet(vectorized_file, index=False)
-
-        logger.success(f"✅ Vetorização concluída: {vectors.shape}")
+        logger.success(
+            f"✅ Vetorização concluída: ({n_vectors}, {vectorizer.config.total_dimensions})"
+        )
         logger.success(f"📁 Salvo em: {vectorized_file}")
+
+        timings.add('vectorize', time.perf_counter() - stage_start)
     else:
         logger.info("\n⏭ Pulando etapa de vetorização")
 
-        import pandas as pd
-        vectorized_file = args.dp_file.parent / "decision_points_vectorized.parquet"
-        df_decision_points = pd.read_parquet(vectorized_file)
-        logger.info(f"Carregados {len(df_decision_points)} decision points vetorizados")
+        # Schema gravado com os índices (ou o da config padrão com --embedding, sem artefato)
+        if FeatureSchema.exists(args.indices_dir):
+            schema = FeatureSchema.load(args.indices_dir)
+        else:
+            schema = FeatureSchema.from_vectorizer(Vectorizer(), embedding=args.embedding)
 
     # ============================================
     # ETAPA 4: FAISS INDEXING
@@ -202,14 +505,24 @@ def run_pipeline(args):
     logger.info("ETAPA 4: FAISS INDEXING (Vectors → Indices)")
     logger.info("="*80)
 
-    builder = IndexBuilder(indices_dir=args.indices_dir, dimension=args.dimension)
+    stage_start = time.perf_counter()
+
+    # Só as colunas da indexação; os vetores vão inteiros para o FAISS
+    import pandas as pd
+    df_decision_points = pd.read_parquet(vectorized_file, columns=INDEX_COLUMNS)
+    logger.info(f"Carregados {len(df_decision_points)} decision points vetorizados")
+
+    builder = IndexBuilder(indices_dir=args.indices_dir, dimension=args.dimension, schema=schema)
 
     builder.build_indices_from_df(
         df_decision_points,
         index_type=args.index_type,
-        hnsw_m=32
+        hnsw_m=32,
+        replace=args.replace_indices
     )
 
+    timings.add('index', time.perf_counter() - stage_start)
+
     # ============================================
     # SUMÁRIO FINAL
     # ============================================
@@ -223,6 +536,7 @@ def run_pipeline(args):
     summary = builder.get_summary()
 
     logger.info(f"Tempo total: {elapsed_time:.2f}s ({elapsed_time/60:.2f} min)")
+    write_timing_report(report_path, timings, components, elapsed_time)
     logger.info(f"\nÍndices criados: {summary['total_indices']}")
     logger.info(f"Total de vetores: {summary['total_vectors']}")
     logger.info(f"\nVilões indexados:")
@@ -257,8 +571,9 @@ if __name__ == "__main__":
     setup_logging(log_file)
 
     try:
-        # Run pipeline
-        summary = run_pipeline(args)
+        # Run pipeline (perfil opcional gravado ao lado do log)
+        with profile_run(log_file if args.profile else None):
+            summary = run_pipeline(args, report_path=log_file.with_suffix(".json"))
 
         sys.exit(0)
 
@@ -12,6 +12,7 @@ from datetime import datetime
 from loguru import logger
 
 from src.parsers.unified_parser import UnifiedParser, HandFormat
+from src.context.context_extractor import ContextExtractor
 from src.services.index_builder import IndexBuilder
 
 router = APIRouter(prefix="/upload", tags=["upload"])
@@ -21,6 +22,7 @@ UPLOAD_DIR = Path("uploads")
 TEMP_DIR = UPLOAD_DIR / "temp"
 PROCESSED_DIR = UPLOAD_DIR / "processed"
 PHH_OUTPUT_DIR = Path("dataset/phh_hands")
+HAND_INDEX_PATH = PHH_OUTPUT_DIR / "hand_index.npz"
 INDICES_DIR = Path("indices")
 
 # Criar diretórios se não existirem
@@ -53,26 +55,30 @@ def process_uploaded_file(
 
         logger.info(f"Iniciando processamento: {original_filename}")
 
-        # Criar parser
-        parser = UnifiedParser(output_dir=PHH_OUTPUT_DIR)
+        # Criar parser (mãos já ingeridas em uploads anteriores são puladas)
+        parser = UnifiedParser(output_dir=PHH_OUTPUT_DIR, hand_index_path=HAND_INDEX_PATH)
 
-        # Processar arquivo
-        phh_files = parser.parse_file(file_path, filters=filters)
+        # Parsing e extração fundidos: as mãos vão direto para o ContextExtractor,
+        # os PHH ficam só como saída paralela (usada pelo rebuild completo)
+        extractor = ContextExtractor()
+        df_new_decision_points = extractor.extract_from_parser(parser, file_path, filters=filters)
+        converted = parser.stats["converted"]
 
         processing_jobs[job_id]["stage"] = "building_indices"
-        processing_jobs[job_id]["phh_files_generated"] = len(phh_files)
+        processing_jobs[job_id]["phh_files_generated"] = converted
+        processing_jobs[job_id]["duplicates_skipped"] = parser.stats["duplicates"]
 
-        # Reconstruir índices se houver novos arquivos PHH
-        if phh_files:
-            logger.info(f"Reconstruindo índices com {len(phh_files)} novos arquivos...")
+        # Reconstruir índices se houver mãos novas
+        if converted:
+            logger.info(f"Reconstruindo índices com {converted} mãos novas...")
 
-            # IndexBuilder reconstruirá todos os índices
+            # IndexBuilder incorpora os novos decision points aos existentes
             builder = IndexBuilder(
                 phh_dir=PHH_OUTPUT_DIR,
                 indices_dir=INDICES_DIR
             )
 
-            stats = builder.build_all_indices()
+            stats = builder.build_all_indices(new_decision_points=df_new_decision_points)
 
             processing_jobs[job_id]["index_stats"] = stats
 
@@ -116,14 +122,14 @@ async def upload_file(
     Upload de arquivo para processamento
 
     Args:
-        file: Arquivo .txt (PokerStars) ou .xml (iPoker)
+        file: Arquivo .txt (PokerStars), .xml (iPoker) ou .zip com vários históricos
         heads_up_only: Filtrar apenas mãos heads-up
 
     Returns:
         job_id para monitoramento do processamento
     """
     # Validar extensão
-    allowed_extensions = [".txt", ".xml", ".log"]
+    allowed_extensions = [".txt", ".xml", ".log", ".zip"]
     file_ext = Path(file.filename).suffix.lower()
 
     if file_ext not in allowed_extensions:
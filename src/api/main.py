@@ -19,7 +19,6 @@ from loguru import logger
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.indexing.build_indices import IndexBuilder
-from src.vectorization.vectorizer import Vectorizer
 from src.api.models import (
     SimilaritySearchRequest,
     ContextSearchRequest,
@@ -35,6 +34,7 @@ from src.api.models import (
     RangeAnalysisResponse,
 )
 from src.api.file_upload import router as upload_router
+from src.context.hand_evaluator import draw_label
 
 # Global state
 app_state = {
@@ -46,6 +46,72 @@ app_state = {
     "data_file": Path("dataset/decision_points/decision_points_vectorized.parquet"),
 }
 
+# Optional precomputed features from older pipelines (hand strength is now computed at extraction)
+LEGACY_STREET_FEATURES_FILE = Path("dataset/street_features.parquet")
+
+
+def prepare_hand_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize villain hand strength / draws for range analysis
+
+    Extraction fills villain_hand_strength and villain_draws (dict of draw
+    flags) for hands shown at showdown. Draws become a single label
+    ('flush_draw', 'oesd', ..., 'none'). Rows without a computed strength
+    (decision points extracted before the evaluator existed) are filled
+    from the legacy street_features.parquet when it is present.
+    """
+    if df.empty:
+        return df
+
+    if 'villain_hand_strength' not in df.columns:
+        df['villain_hand_strength'] = None
+    if 'villain_draws' not in df.columns:
+        df['villain_draws'] = None
+
+    df['villain_draws'] = df['villain_draws'].map(
+        lambda draws: draws if isinstance(draws, str) else draw_label(draws)
+    )
+
+    missing = df['villain_hand_strength'].isna()
+    if missing.any() and LEGACY_STREET_FEATURES_FILE.exists():
+        street_df = pd.read_parquet(LEGACY_STREET_FEATURES_FILE)
+        street_df = street_df[['hand_id', 'player', 'street', 'hand_strength_lbl', 'draw_type']]
+        street_df = street_df.rename(columns={'player': 'villain_name'}).drop_duplicates(
+            ['hand_id', 'villain_name', 'street']
+        )
+
+        legacy = df.loc[missing, ['hand_id', 'villain_name', 'street']].merge(
+            street_df, on=['hand_id', 'villain_name', 'street'], how='left'
+        )
+        df.loc[missing, 'villain_hand_strength'] = legacy['hand_strength_lbl'].to_numpy()
+        df.loc[missing, 'villain_draws'] = legacy['draw_type'].fillna('none').to_numpy()
+        logger.info(f"✓ Filled {int(legacy['hand_strength_lbl'].notna().sum())} rows from {LEGACY_STREET_FEATURES_FILE}")
+
+    df['villain_hand_strength'] = df['villain_hand_strength'].fillna('Unknown')
+
+    known = int((df['villain_hand_strength'] != 'Unknown').sum())
+    logger.info(f"✓ Hand strength available for {known} decision points")
+
+    return df
+
+
+def load_index_components():
+    """
+    Load the IndexBuilder and a Vectorizer from the feature schema in indices_dir
+
+    The vectorizer is rebuilt from the persisted schema (layout, weights and
+    fitted scaler) instead of being refit; a schema that does not match the
+    current encoders raises ValueError.
+    """
+    index_builder = IndexBuilder(indices_dir=app_state["indices_dir"])
+    app_state["index_builder"] = index_builder
+    app_state["vectorizer"] = index_builder.schema.to_vectorizer()
+
+    logger.info(
+        f"Feature schema {index_builder.schema.schema_hash[:12]} "
+        f"({index_builder.dimension} dims)"
+    )
+
 
 def reload_data():
     """
@@ -59,30 +125,14 @@ def reload_data():
         app_state["df"] = pd.read_parquet(app_state["data_file"])
         logger.info(f"✓ Recarregado {len(app_state['df'])} decision points")
 
-        # Recarregar street features
-        street_features_file = Path("dataset/street_features.parquet")
-        if street_features_file.exists():
-            street_df = pd.read_parquet(street_features_file)
-            street_df_subset = street_df[['hand_id', 'player', 'street', 'hand_strength_lbl', 'draw_type', 'fd_flag', 'oe_flag', 'gs_flag']].copy()
-            street_df_subset = street_df_subset.rename(columns={'player': 'villain_name'})
-
-            app_state["df"] = app_state["df"].merge(
-                street_df_subset,
-                on=['hand_id', 'villain_name', 'street'],
-                how='left'
-            )
-
-            app_state["df"]['villain_hand_strength'] = app_state["df"]['hand_strength_lbl'].fillna('Unknown')
-            app_state["df"]['villain_draws'] = app_state["df"]['draw_type'].fillna('none')
+        # Força de mão / draws (calculados na extração)
+        app_state["df"] = prepare_hand_features(app_state["df"])
     else:
         logger.warning(f"Arquivo de dados não encontrado: {app_state['data_file']}")
         app_state["df"] = pd.DataFrame()
 
-    # Recarregar índices FAISS
-    app_state["index_builder"] = IndexBuilder(
-        indices_dir=app_state["indices_dir"],
-        dimension=99
-    )
+    # Recarregar índices FAISS e o feature schema gravado com eles
+    load_index_components()
 
     summary = app_state["index_builder"].get_summary()
     logger.success(f"✓ Reload concluído! {summary['total_indices']} índices, {summary['total_vectors']} vetores")
@@ -106,42 +156,12 @@ async def lifespan(app: FastAPI):
         logger.info("Creating empty DataFrame - upload files to populate data")
         app_state["df"] = pd.DataFrame()  # Empty DataFrame for fresh deployment
 
-    # Load street features for hand strength and draws
-    street_features_file = Path("dataset/street_features.parquet")
-    if street_features_file.exists():
-        logger.info("Loading street features for hand strength analysis...")
-        street_df = pd.read_parquet(street_features_file)
-
-        # Merge hand strength and draw info into main dataframe
-        # street_df has: hand_id, player (villain), street, hand_strength_lbl, draw_type, fd_flag, oe_flag, gs_flag
-        merge_cols = ['hand_id', 'street', 'hand_strength_lbl', 'draw_type', 'fd_flag', 'oe_flag', 'gs_flag']
-        street_df_subset = street_df[['hand_id', 'player', 'street', 'hand_strength_lbl', 'draw_type', 'fd_flag', 'oe_flag', 'gs_flag']].copy()
-        street_df_subset = street_df_subset.rename(columns={'player': 'villain_name'})
-
-        # Merge on hand_id, villain_name, and street
-        app_state["df"] = app_state["df"].merge(
-            street_df_subset,
-            on=['hand_id', 'villain_name', 'street'],
-            how='left'
-        )
-
-        # Update villain_hand_strength and villain_draws from the merged data
-        app_state["df"]['villain_hand_strength'] = app_state["df"]['hand_strength_lbl'].fillna('Unknown')
-        app_state["df"]['villain_draws'] = app_state["df"]['draw_type'].fillna('none')
-
-        logger.info(f"✓ Merged hand strength data. {app_state['df']['hand_strength_lbl'].notna().sum()} rows with hand strength")
-    else:
-        logger.warning("street_features.parquet not found - hand strength analysis will be limited")
-
-    # Initialize components
-    logger.info("Initializing IndexBuilder...")
-    app_state["index_builder"] = IndexBuilder(
-        indices_dir=app_state["indices_dir"],
-        dimension=99
-    )
+    # Hand strength and draws are computed during extraction
+    app_state["df"] = prepare_hand_features(app_state["df"])
 
-    logger.info("Initializing Vectorizer...")
-    app_state["vectorizer"] = Vectorizer()  # Uses default config
+    # Initialize components (schema, vectorizer and indices from indices_dir)
+    logger.info("Initializing IndexBuilder and Vectorizer...")
+    load_index_components()
 
     # Load summary
     summary = app_state["index_builder"].get_summary()
@@ -284,20 +304,24 @@ async def search_similarity(request: SimilaritySearchRequest):
         # Convert query vector to numpy array
         query_vec = np.array(request.query_vector, dtype=np.float32)
 
-        # Validate vector dimension
-        if query_vec.shape[0] != 99:
+        # Validate vector dimension against the loaded feature schema
+        index_builder = app_state["index_builder"]
+        if query_vec.shape[0] != index_builder.dimension:
             raise HTTPException(
                 status_code=400,
-                detail=f"Query vector must be 99-dimensional, got {query_vec.shape[0]}"
+                detail=f"Query vector must be {index_builder.dimension}-dimensional, got {query_vec.shape[0]}"
             )
 
-        # Perform search
-        index_builder = app_state["index_builder"]
-        distances, indices, decision_ids = index_builder.search(
-            villain_name=request.villain_name,
-            query_vector=query_vec,
-            k=request.k
-        )
+        # Perform search (indices built with another feature schema are refused)
+        try:
+            distances, indices, decision_ids = index_builder.search(
+                villain_name=request.villain_name,
+                query_vector=query_vec,
+                k=request.k,
+                rerank=request.rerank
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
 
         # Get full decision point data
         results = []
@@ -311,7 +335,9 @@ async def search_similarity(request: SimilaritySearchRequest):
             query_info={
                 "villain_name": request.villain_name,
                 "k": request.k,
-                "vector_dimension": 99,
+                "vector_dimension": index_builder.dimension,
+                "schema_hash": index_builder.schema.schema_hash,
+                "metric": "weighted_similarity" if request.rerank else index_builder.schema.metric,
             },
             results=results,
             total_results=len(results),
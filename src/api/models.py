@@ -6,6 +6,11 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from src.vectorization.vectorizer import FeatureConfig
+
+# Vector size of the current encoders (indices built with another schema are refused at search time)
+QUERY_DIMENSION = FeatureConfig().total_dimensions
+
 
 class StreetEnum(str, Enum):
     """Street options"""
@@ -26,15 +31,25 @@ class PositionEnum(str, Enum):
 class SimilaritySearchRequest(BaseModel):
     """Request model for similarity search"""
     villain_name: str = Field(..., description="Name of the villain to search within")
-    query_vector: List[float] = Field(..., description="99-dimensional query vector", min_items=99, max_items=99)
+    query_vector: List[float] = Field(
+        ...,
+        description=f"{QUERY_DIMENSION}-dimensional query vector (feature schema layout)",
+        min_items=QUERY_DIMENSION,
+        max_items=QUERY_DIMENSION
+    )
     k: int = Field(default=10, description="Number of results to return", ge=1, le=100)
+    rerank: bool = Field(
+        default=False,
+        description="Rerank the ANN candidates by the exact weighted similarity (distance becomes that score)"
+    )
 
     class Config:
         schema_extra = {
             "example": {
                 "villain_name": "BahTOBUK",
-                "query_vector": [0.0] * 99,
-                "k": 10
+                "query_vector": [0.0] * QUERY_DIMENSION,
+                "k": 10,
+                "rerank": False
             }
         }
 
@@ -82,7 +97,10 @@ class DecisionPointResponse(BaseModel):
     current_street_sequence: Optional[List[str]]
     went_to_showdown: Optional[bool]
     villain_won: Optional[bool]
-    distance: Optional[float] = Field(None, description="Distance from query (in search results)")
+    distance: Optional[float] = Field(
+        None,
+        description="Distance (L2, lower is closer) or similarity score (IP / reranked, higher is closer) from query"
+    )
 
 
 class SearchResult(BaseModel):
@@ -3,5 +3,6 @@ Context module - Decision point extraction and context analysis
 """
 
 from .context_extractor import ContextExtractor, DecisionPoint
+from .columnar import ColumnarExtractor
 
-__all__ = ["ContextExtractor", "DecisionPoint"]
+__all__ = ["ContextExtractor", "DecisionPoint", "ColumnarExtractor"]
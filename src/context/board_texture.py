@@ -0,0 +1,235 @@
+"""
+Board Texture - Textura do board por tabela pré-calculada
+
+A textura de um board só depende de três coisas invariantes à troca de
+naipes: a máscara de ranks (13 bits), a multiplicidade (sem par / par /
+trinca+) e a classe de naipes (monotone, two-tone, rainbow, flush possível,
+flush draw, sem flush). A chave canônica junta as três em um inteiro e
+TEXTURE_TABLE guarda, para cada chave, os 10 flags empacotados em bits na
+ordem de TEXTURE_FLAGS (a mesma do Vectorizer). Todos os flops, turns e
+rivers caem em alguma entrada; a consulta por cartas inteiras
+(rank * 4 + naipe, como no hand_evaluator) é O(1).
+
+Flags:
+- monotone: todas as cartas do mesmo naipe (3+ cartas)
+- two_tone / rainbow: flop com 2 / 3 naipes
+- paired / trips: algum rank repetido 2+ / 3+ vezes
+- connected: 3+ ranks distintos em uma janela de 5 (sequência possível, A conta como 1)
+- disconnected: nenhum par de ranks distintos em uma janela de 5
+- high_broadway: 2+ ranks distintos entre T e A
+- low: carta mais alta 8 ou menor
+- wet: connected, 3+ cartas de um naipe, ou flush draw (2 de um naipe
+  antes do river) com ranks que não são disconnected
+
+Usado pelo ContextExtractor, pelo ColumnarExtractor e pelo Vectorizer.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+from .hand_evaluator import POPCOUNT, card_index
+
+
+# Mesma ordem do multi-hot de board texture no Vectorizer
+TEXTURE_FLAGS = (
+    'monotone', 'two_tone', 'rainbow', 'paired', 'trips',
+    'connected', 'disconnected', 'high_broadway', 'low', 'wet'
+)
+
+TEXTURE_BIT = {flag: 1 << i for i, flag in enumerate(TEXTURE_FLAGS)}
+
+# Classes de naipe (bits 15-17 da chave)
+SUIT_MONOTONE, SUIT_TWO_TONE, SUIT_RAINBOW, SUIT_FLUSH, SUIT_FLUSH_DRAW, SUIT_NONE = range(6)
+
+_BROADWAY = 0b1_1111_0000_0000
+_LOW = 0b0_0000_0111_1111
+_WINDOWS = [0b1_0000_0000_1111] + [0b11111 << low for low in range(9)]
+
+
+# ============================================
+# TABELA (uma vez, no import)
+# ============================================
+
+def _build_table() -> np.ndarray:
+    keys = np.arange(1 << 18, dtype=np.int64)
+    masks = keys & 0x1FFF
+    multiplicity = (keys >> 13) & 3
+    suit_class = keys >> 15
+
+    # Maior número de ranks distintos em uma janela de 5 (inclui a roda)
+    in_window = np.zeros(len(keys), dtype=np.int64)
+    for window in _WINDOWS:
+        in_window = np.maximum(in_window, POPCOUNT[masks & window])
+
+    connected = in_window >= 3
+    disconnected = in_window <= 1
+    flush_draw = (suit_class == SUIT_FLUSH_DRAW) | (suit_class == SUIT_TWO_TONE)
+    wet = (
+        connected
+        | (suit_class == SUIT_MONOTONE)
+        | (suit_class == SUIT_FLUSH)
+        | (flush_draw & ~disconnected)
+    )
+
+    flags = {
+        'monotone': suit_class == SUIT_MONOTONE,
+        'two_tone': suit_class == SUIT_TWO_TONE,
+        'rainbow': suit_class == SUIT_RAINBOW,
+        'paired': multiplicity >= 1,
+        'trips': multiplicity >= 2,
+        'connected': connected,
+        'disconnected': disconnected,
+        'high_broadway': POPCOUNT[masks & _BROADWAY] >= 2,
+        'low': (masks & ~_LOW) == 0,
+        'wet': wet,
+    }
+
+    table = np.zeros(len(keys), dtype=np.uint16)
+    for flag, values in flags.items():
+        table |= np.where(values, TEXTURE_BIT[flag], 0).astype(np.uint16)
+
+    return table
+
+
+TEXTURE_TABLE = _build_table()
+
+# Cópia em lista para consultas escalares
+_TEXTURE_TABLE = TEXTURE_TABLE.tolist()
+
+# Multi-hot float32 de cada bitmask possível (1024 x 10)
+_TEXTURE_VECTORS = (
+    (np.arange(1 << len(TEXTURE_FLAGS))[:, None] >> np.arange(len(TEXTURE_FLAGS))) & 1
+).astype(np.float32)
+
+# Por carta (índice -1 = padding -> 0): bit do rank e contador de naipe de 4 bits
+_CARD_RANK_BIT = np.array([1 << (card >> 2) for card in range(52)] + [0], dtype=np.int32)
+_CARD_SUIT_NIBBLE = np.array([1 << ((card & 3) << 2) for card in range(52)] + [0], dtype=np.int32)
+
+
+# ============================================
+# CHAVES E CONSULTAS
+# ============================================
+
+def _suit_class(size: int, suit_counts: Sequence[int]) -> int:
+    """Classe de naipes de um board com `size` cartas"""
+    suits = sum(1 for count in suit_counts if count)
+    longest = max(suit_counts)
+
+    if size >= 3 and suits == 1:
+        return SUIT_MONOTONE
+    if size == 3:
+        return SUIT_TWO_TONE if suits == 2 else SUIT_RAINBOW
+    if longest >= 3:
+        return SUIT_FLUSH
+    if longest == 2 and size < 5:
+        return SUIT_FLUSH_DRAW
+    return SUIT_NONE
+
+
+def texture_key(cards: Sequence[int]) -> int:
+    """Chave canônica (invariante a naipes) de um board em cartas inteiras; -1 é ignorado"""
+    rank_mask = pairs = trips = 0
+    suit_counts = [0, 0, 0, 0]
+    size = 0
+
+    for card in cards:
+        if card < 0:
+            continue
+        bit = 1 << (card >> 2)
+        if pairs & bit:
+            trips |= bit
+        if rank_mask & bit:
+            pairs |= bit
+        rank_mask |= bit
+        suit_counts[card & 3] += 1
+        size += 1
+
+    multiplicity = 2 if trips else 1 if pairs else 0
+
+    return rank_mask | (multiplicity << 13) | (_suit_class(size, suit_counts) << 15)
+
+
+def texture_code(cards: Sequence[int]) -> int:
+    """Bitmask de textura (bits na ordem de TEXTURE_FLAGS) de um board em cartas inteiras"""
+    return _TEXTURE_TABLE[texture_key(cards)]
+
+
+def board_texture_code(board_cards: Sequence[str]) -> int:
+    """Bitmask de textura de um board em texto (ex: ['Ah', 'Kd', '7c']); 0 sem board"""
+    cards = [card_index(card) for card in board_cards]
+    if not any(card >= 0 for card in cards):
+        return 0
+    return texture_code(cards)
+
+
+def texture_flags(code: int) -> Dict[str, bool]:
+    """Bitmask -> dict com os 10 flags"""
+    return {flag: bool(code & bit) for flag, bit in TEXTURE_BIT.items()}
+
+
+def analyze_board(board_cards: Sequence[str]) -> Dict:
+    """
+    Textura do board como dict (10 flags + board_size)
+
+    Vazio no preflop, como no formato do DecisionPoint.
+    """
+    if not len(board_cards):
+        return {}
+
+    texture = texture_flags(board_texture_code(board_cards))
+    texture['board_size'] = len(board_cards)
+    return texture
+
+
+def texture_codes_batch(boards: np.ndarray) -> np.ndarray:
+    """
+    Bitmasks de textura de um lote de boards
+
+    Args:
+        boards: Matriz int (n, até 5) de cartas, -1 como padding
+
+    Returns:
+        Array uint16 (n,); 0 para boards vazios
+    """
+    boards = np.asarray(boards, dtype=np.int64)
+    n = len(boards)
+
+    # Mesmas máscaras de texture_key, uma coluna de cartas por vez;
+    # as cópias por naipe vão em contadores de 4 bits empacotados
+    rank_mask = np.zeros(n, dtype=np.int32)
+    pairs = np.zeros(n, dtype=np.int32)
+    trips = np.zeros(n, dtype=np.int32)
+    packed_suits = np.zeros(n, dtype=np.int32)
+    for column in np.ascontiguousarray(np.where(boards >= 0, boards, -1).T):
+        bit = _CARD_RANK_BIT[column]
+        trips |= pairs & bit
+        pairs |= rank_mask & bit
+        rank_mask |= bit
+        packed_suits += _CARD_SUIT_NIBBLE[column]
+
+    suit_counts = np.stack([(packed_suits >> (4 * suit)) & 0xF for suit in range(4)])
+    size = suit_counts.sum(axis=0)
+    multiplicity = np.where(trips != 0, 2, np.where(pairs != 0, 1, 0))
+
+    suits_used = (suit_counts > 0).sum(axis=0)
+    longest = suit_counts.max(axis=0)
+    suit_class = np.select(
+        [
+            (size >= 3) & (suits_used == 1),
+            (size == 3) & (suits_used == 2),
+            size == 3,
+            longest >= 3,
+            (longest == 2) & (size < 5),
+        ],
+        [SUIT_MONOTONE, SUIT_TWO_TONE, SUIT_RAINBOW, SUIT_FLUSH, SUIT_FLUSH_DRAW],
+        default=SUIT_NONE
+    )
+
+    codes = TEXTURE_TABLE[rank_mask | (multiplicity << 13) | (suit_class << 15)]
+    return np.where(size > 0, codes, 0).astype(np.uint16)
+
+
+def texture_vectors(codes: np.ndarray) -> np.ndarray:
+    """Bitmasks -> multi-hot float32 (n, 10) na ordem de TEXTURE_FLAGS"""
+    return _TEXTURE_VECTORS[np.asarray(codes, dtype=np.int64)]
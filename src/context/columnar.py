@@ -0,0 +1,815 @@
+"""
+Columnar Extractor - Extração de decision points sobre uma tabela de ações
+
+Em vez de percorrer o dict PHH de cada mão, todas as ações de um lote de
+mãos ficam em uma única tabela colunar (mão, street, seq, jogador, ação,
+valor). Pot antes de cada ação, stacks efetivos, SPR, bet size em % do
+pot e a seleção das linhas de decisão do vilão saem de operações
+agrupadas do NumPy (cumsum exclusivo por mão, contagens acumuladas por grupo).
+
+A saída tem as colunas e os valores do ContextExtractor, linha a linha,
+montada direto como tabela Arrow (DECISION_POINT_SCHEMA): listas como
+fatias de arrays achatados (offsets), textura e draws como structs. No
+DataFrame, listas e structs viram list/dict por célula (None quando nulos).
+Entradas aceitas:
+
+- shards do HandStore (tabelas hands/players/actions lidas direto do Parquet)
+- qualquer iterável de dicts PHH (montado em colunas numa única passada)
+"""
+
+import itertools
+import json
+import time
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from loguru import logger
+
+from .board_texture import texture_codes_batch
+from .context_extractor import DECISION_POINT_SCHEMA, texture_array
+from .hand_evaluator import CATEGORIES, DRAW_FLAGS, card_index, draws_batch, evaluate_batch
+from src.instrumentation.stage_timer import Instrumentation
+
+
+STREETS = ('preflop', 'flop', 'turn', 'river')
+
+# Ações que geram decision point (blinds/antes ficam de fora)
+DECISION_ACTIONS = ('call', 'raise', 'fold', 'bet', 'check', 'all_in')
+
+# Ações que tornam o jogador agressor
+AGGRESSIVE_ACTIONS = ('bet', 'raise')
+
+# Cartas do board visíveis em cada street (se o board tiver ao menos o flop)
+_BOARD_CARDS_BY_STREET = np.array([0, 3, 4, 5])
+
+# Colunas lidas de cada tabela do store
+_HAND_COLUMNS = ['hand_id', 'bb', 'hero', 'board', 'winners', 'shown', 'street_offsets']
+_PLAYER_COLUMNS = ['hand_idx', 'name', 'stack', 'is_btn']
+_ACTION_COLUMNS = ['hand_idx', 'player', 'action', 'amount', 'attrs']
+
+_DRAWS_TYPE = DECISION_POINT_SCHEMA.field('villain_draws').type
+
+
+class ColumnarExtractor:
+    """
+    Extrai decision points de lotes de mãos com operações vetorizadas
+    """
+
+    def __init__(self, batch_size: int = 50_000, all_players: bool = False):
+        """
+        Args:
+            batch_size: Mãos por lote ao montar as colunas a partir de dicts PHH
+            all_players: Modo multi-perspectiva (ver ContextExtractor): uma
+                passada vetorizada por assento sobre as mesmas tabelas carregadas
+        """
+        self.batch_size = batch_size
+        self.all_players = all_players
+
+        self.stats = {
+            "hands_processed": 0,
+            "decision_points": 0,
+            "errors": 0,
+            "by_street": {street: 0 for street in STREETS}
+        }
+        self.instrumentation = Instrumentation()
+
+    # ============================================
+    # ENTRADAS
+    # ============================================
+
+    def extract_from_store(self, store_dir: Path, villain_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Extrai decision points de todas as mãos de um HandStore, shard a shard
+
+        Args:
+            store_dir: Diretório do HandStore
+            villain_name: Nome do vilão (se None, o jogador que não é o hero)
+
+        Returns:
+            DataFrame no mesmo formato do ContextExtractor
+        """
+        return self._frame(self.extract_table_from_store(store_dir, villain_name))
+
+    def extract_table_from_store(self, store_dir: Path, villain_name: Optional[str] = None) -> pa.Table:
+        """
+        Como extract_from_store, mas devolve a tabela Arrow (DECISION_POINT_SCHEMA)
+
+        Sem conversão para objetos Python por célula: é a saída para gravar
+        em Parquet (pq.write_table) ou processar em lotes.
+        """
+        return self._concat(list(self.iter_tables_from_store(store_dir, villain_name)))
+
+    def iter_tables_from_store(self, store_dir: Path, villain_name: Optional[str] = None) -> Iterator[pa.Table]:
+        """
+        Decision points de um HandStore como uma tabela Arrow por shard
+
+        Só um shard (e a tabela dele) fica em memória por vez; as estatísticas
+        acumulam em self.stats conforme os shards são consumidos.
+
+        Yields:
+            Tabela (DECISION_POINT_SCHEMA) de cada shard com decision points
+        """
+        from src.storage.hand_store import HandStore
+
+        store = HandStore(store_dir)
+
+        # Shards anteriores aos street_offsets não têm a coluna (omitida pelo store);
+        # mãos repetidas entre shards já vêm removidas
+        columns = {'hands': _HAND_COLUMNS, 'players': _PLAYER_COLUMNS, 'actions': _ACTION_COLUMNS}
+
+        start = time.perf_counter()
+        for _, shard_tables in store.iter_shard_tables(columns):
+            tables = {name: _numpy_columns(table) for name, table in shard_tables.items()}
+            self.instrumentation.add('load', time.perf_counter() - start)
+
+            table = self._extract_table(tables, villain_name)
+            if len(table):
+                yield table
+            start = time.perf_counter()
+
+    def extract_from_hands(self, hands: Iterable[Dict], villain_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        Extrai decision points de dicts PHH (montados em colunas por lote)
+
+        Args:
+            hands: Iterável de dicts PHH
+            villain_name: Nome do vilão (se None, o jogador que não é o hero)
+
+        Returns:
+            DataFrame no mesmo formato do ContextExtractor
+        """
+        return self._frame(self.extract_table_from_hands(hands, villain_name))
+
+    def extract_table_from_hands(self, hands: Iterable[Dict], villain_name: Optional[str] = None) -> pa.Table:
+        """Como extract_from_hands, mas devolve a tabela Arrow (DECISION_POINT_SCHEMA)"""
+        results = []
+        batch = []
+
+        for phh in hands:
+            batch.append(phh)
+            if len(batch) >= self.batch_size:
+                results.append(self._extract_table(self._tables_from_hands(batch), villain_name))
+                batch = []
+
+        if batch:
+            results.append(self._extract_table(self._tables_from_hands(batch), villain_name))
+
+        return self._concat(results)
+
+    def _tables_from_hands(self, hands: List[Dict]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Monta as tabelas hands/players/actions (layout do HandStore) a partir de dicts PHH"""
+        start = time.perf_counter()
+
+        h_cols = {name: [] for name in _HAND_COLUMNS}
+        p_cols = {name: [] for name in _PLAYER_COLUMNS}
+        a_cols = {name: [] for name in _ACTION_COLUMNS}
+
+        for hand_idx, phh in enumerate(hands):
+            metadata = phh.get('metadata', {})
+            showdown = phh.get('showdown', {})
+
+            h_cols['hand_id'].append(metadata.get('hand_id', 'unknown'))
+            h_cols['bb'].append(float(metadata.get('bb', 0) or 0))
+            h_cols['hero'].append(metadata.get('hero', ''))
+            h_cols['board'].append(phh.get('board', []))
+            h_cols['winners'].append(showdown.get('winners', []))
+            h_cols['shown'].append(showdown.get('hands', []))
+            h_cols['street_offsets'].append(phh.get('street_offsets'))
+
+            for player in phh.get('players', []):
+                p_cols['hand_idx'].append(hand_idx)
+                p_cols['name'].append(player['name'])
+                p_cols['stack'].append(float(player.get('stack', 0)))
+                p_cols['is_btn'].append(bool(player.get('is_btn', False)))
+
+            for action in phh.get('actions', []):
+                a_cols['hand_idx'].append(hand_idx)
+                a_cols['player'].append(action.get('player', ''))
+                a_cols['action'].append(action.get('action', ''))
+                a_cols['amount'].append(float(action.get('amount', 0)))
+                extra = {key: action[key] for key in ('step_idx', 'street') if key in action}
+                a_cols['attrs'].append(json.dumps(extra) if extra else None)
+
+        tables = {
+            'hands': _as_arrays(h_cols, {'bb': np.float64}),
+            'players': _as_arrays(p_cols, {'hand_idx': np.int64, 'stack': np.float64, 'is_btn': bool}),
+            'actions': _as_arrays(a_cols, {'hand_idx': np.int64, 'amount': np.float64}),
+        }
+
+        self.instrumentation.add('load', time.perf_counter() - start, len(hands))
+        return tables
+
+    # ============================================
+    # ENGINE
+    # ============================================
+
+    def extract_from_tables(
+        self,
+        tables: Dict[str, Dict[str, np.ndarray]],
+        villain_name: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Extrai decision points de um lote em layout colunar
+
+        Args:
+            tables: {'hands': {...}, 'players': {...}, 'actions': {...}}, colunas
+                como arrays NumPy; hand_idx de players/actions aponta para a
+                linha em hands, e as ações de cada mão estão em ordem
+            villain_name: Nome do vilão (se None, o jogador que não é o hero;
+                ignorado no modo all_players)
+
+        Returns:
+            DataFrame com as colunas do ContextExtractor (listas como list,
+            structs como dict)
+        """
+        return _to_frame(self._extract_table(tables, villain_name))
+
+    def _extract_table(
+        self,
+        tables: Dict[str, Dict[str, np.ndarray]],
+        villain_name: Optional[str] = None
+    ) -> pa.Table:
+        """Decision points de um lote como tabela Arrow (DECISION_POINT_SCHEMA)"""
+        start = time.perf_counter()
+
+        hands, players = tables['hands'], tables['players']
+        n_hands = len(hands['hand_id'])
+        self.stats['hands_processed'] += n_hands
+
+        hero = hands['hero']
+        p_hand = players['hand_idx'].astype(np.int64, copy=False)
+        p_name = players['name']
+
+        # Estado das ações que não depende da perspectiva (uma vez por lote)
+        shared = self._action_state(tables)
+
+        if self.all_players:
+            perspectives = self._perspectives(hero, p_hand, p_name, n_hands)
+        else:
+            if villain_name is None:
+                not_hero = np.flatnonzero(p_name != hero[p_hand])
+                villain_hands, first = np.unique(p_hand[not_hero], return_index=True)
+                villain = np.full(n_hands, None, dtype=object)
+                villain[villain_hands] = p_name[not_hero[first]]
+
+                missing = int((villain == None).sum())  # noqa: E711
+                if missing:
+                    logger.warning(f"Não foi possível identificar vilão em {missing} mãos")
+            else:
+                villain = np.full(n_hands, villain_name, dtype=object)
+
+            perspectives = [(hero, villain)]
+
+        self.instrumentation.add('numeric', time.perf_counter() - start)
+
+        if len(perspectives) == 1:
+            return self._extract_perspective(tables, shared, *perspectives[0])[0]
+
+        # Uma passada por assento; ordem final = por mão, depois por assento (como no extrator por mão)
+        perspective_tables, table_hands = [], []
+        for perspective_hero, villain in perspectives:
+            table, r_hand = self._extract_perspective(tables, shared, perspective_hero, villain)
+            perspective_tables.append(table)
+            table_hands.append(r_hand)
+
+        order = np.argsort(np.concatenate(table_hands), kind='stable')
+        return pa.concat_tables(perspective_tables).take(order)
+
+    def _perspectives(self, hero: np.ndarray, p_hand: np.ndarray, p_name: np.ndarray, n_hands: int):
+        """
+        (hero, vilão) por mão para cada assento, no modo all_players
+
+        O k-ésimo jogador de cada mão é o vilão da k-ésima perspectiva; o
+        oponente é o hero, ou o primeiro outro jogador quando o vilão é o
+        hero (ou o hero não está sentado). Mão sem oponente fica sem vilão.
+        """
+        seat = np.arange(len(p_hand)) - _group_starts(p_hand)
+
+        hero_seated = np.zeros(n_hands, dtype=bool)
+        hero_seated[p_hand[p_name == hero[p_hand]]] = True
+
+        seat_names = []
+        for k in range(int(seat.max()) + 1 if len(seat) else 0):
+            names = np.full(n_hands, None, dtype=object)
+            names[p_hand[seat == k]] = p_name[seat == k]
+            seat_names.append(names)
+
+        no_player = np.full(n_hands, None, dtype=object)
+        perspectives = []
+
+        for k, villain in enumerate(seat_names):
+            first_other = seat_names[1 if k == 0 else 0] if len(seat_names) > 1 else no_player
+            use_other = (villain == hero) | ~hero_seated
+            perspective_hero = np.where(use_other, first_other, hero)
+
+            villain = np.where(perspective_hero == None, None, villain)  # noqa: E711
+            perspectives.append((perspective_hero, villain))
+
+        return perspectives
+
+    def _action_state(self, tables: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """Ações ordenadas por (mão, street), pot antes de cada ação e limites do preflop"""
+        hands, actions = tables['hands'], tables['actions']
+        n_hands = len(hands['hand_id'])
+        bb = hands['bb']
+
+        # ---- Ações: ordenadas por (mão, street), ordem original dentro do grupo ----
+        a_hand = actions['hand_idx'].astype(np.int64, copy=False)
+        a_step, a_attr_street = _attr_overrides(actions['attrs'])
+        a_street = self._action_streets(hands, a_hand, a_attr_street)
+        order = np.argsort(a_hand * len(STREETS) + a_street, kind='stable')
+
+        a_hand = a_hand[order]
+        a_street = a_street[order]
+        a_action = actions['action'][order]
+        a_amount = actions['amount'][order]
+        n_actions = len(a_hand)
+
+        codes, uniques = pd.factorize(a_action, use_na_sentinel=False)
+        empty = np.zeros(0, dtype=bool)
+
+        group = a_hand * len(STREETS) + a_street
+
+        # Pot que cada ação encara: soma exclusiva das ações anteriores da mão
+        # (mesma regra de ContextExtractor._hand_state)
+        pot_after = np.cumsum(a_amount)
+        pot_before = pot_after - a_amount
+        if n_actions:
+            pot_before = pot_before - pot_before[_group_starts(a_hand)]
+        a_bb = bb[a_hand]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a_pot_bb = np.where(a_bb > 0, pot_before / a_bb, 0.0)
+
+        # Primeira e última ação preflop de cada mão
+        preflop_last = np.full(n_hands, -1, dtype=np.int64)
+        is_preflop = a_street == 0
+        preflop_last[a_hand[is_preflop]] = np.flatnonzero(is_preflop)
+        preflop_first = np.full(n_hands, -1, dtype=np.int64)
+        preflop_first[a_hand[is_preflop][::-1]] = np.flatnonzero(is_preflop)[::-1]
+
+        return {
+            'a_hand': a_hand,
+            'a_street': a_street,
+            'a_player': actions['player'][order],
+            'a_action': a_action,
+            'a_amount': a_amount,
+            'a_step': a_step[order],
+            'a_decision': np.isin(uniques, DECISION_ACTIONS)[codes] if n_actions else empty,
+            'a_aggressive_action': np.isin(uniques, AGGRESSIVE_ACTIONS)[codes] if n_actions else empty,
+            'group': group,
+            # Posição de cada ação dentro do seu grupo (mão, street)
+            'group_start': _group_starts(group),
+            'a_pot_bb': a_pot_bb,
+            'preflop_first': preflop_first,
+            'preflop_last': preflop_last,
+        }
+
+    def _extract_perspective(self, tables, shared, hero: np.ndarray, villain: np.ndarray):
+        """
+        Decision points de um vilão por mão sobre o estado compartilhado
+
+        Returns:
+            (tabela Arrow, mão de cada linha)
+        """
+        start = time.perf_counter()
+
+        hands, players = tables['hands'], tables['players']
+        n_hands = len(hands['hand_id'])
+        bb = hands['bb']
+
+        # ---- Jogadores: stacks e botão do hero/vilão por mão ----
+        p_hand = players['hand_idx'].astype(np.int64, copy=False)
+        p_name = players['name']
+        is_hero_row = p_name == hero[p_hand]
+        is_villain_row = p_name == villain[p_hand]
+        has_villain = np.zeros(n_hands, dtype=bool)
+        has_villain[p_hand[is_villain_row]] = True
+
+        # Última linha vence, como no dict {nome: jogador} do extrator por mão
+        hero_stack = np.zeros(n_hands)
+        hero_stack[p_hand[is_hero_row]] = players['stack'][is_hero_row]
+        villain_stack = np.zeros(n_hands)
+        villain_stack[p_hand[is_villain_row]] = players['stack'][is_villain_row]
+        hero_btn = np.zeros(n_hands, dtype=bool)
+        hero_btn[p_hand[is_hero_row]] = players['is_btn'][is_hero_row]
+        villain_btn = np.zeros(n_hands, dtype=bool)
+        villain_btn[p_hand[is_villain_row]] = players['is_btn'][is_villain_row]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eff_stack_bb = np.where(bb > 0, np.minimum(hero_stack, villain_stack) / bb, 0.0)
+
+        a_hand = shared['a_hand']
+        a_street = shared['a_street']
+        a_player = shared['a_player']
+        a_amount = shared['a_amount']
+        group = shared['group']
+        group_start = shared['group_start']
+        preflop_first = shared['preflop_first']
+        preflop_last = shared['preflop_last']
+        n_actions = len(a_hand)
+
+        a_is_hero = a_player == hero[a_hand]
+        a_is_villain = a_player == villain[a_hand]
+        a_aggressive = shared['a_aggressive_action'] & (a_is_hero | a_is_villain)
+
+        # Último agressor até cada ação (índice global, -1 = nenhum)
+        last_aggressor = np.maximum.accumulate(np.where(a_aggressive, np.arange(n_actions), -1)) \
+            if n_actions else np.zeros(0, dtype=np.int64)
+
+        # ---- Linhas de decisão do vilão ----
+        rows = np.flatnonzero(shared['a_decision'] & a_is_villain & has_villain[a_hand])
+        row_group = group[rows]
+        action_idx = np.arange(len(rows)) - _group_starts(row_group)
+        # Índice da decisão do vilão na mão inteira (step_idx padrão, único na mão)
+        decision_idx = np.arange(len(rows)) - _group_starts(a_hand[rows])
+
+        r_hand = a_hand[rows]
+        r_street = a_street[rows]
+        r_bb = bb[r_hand]
+
+        # amount / bb levanta ZeroDivisionError no extrator por mão: linha descartada
+        valid = r_bb != 0
+        if not valid.all():
+            rows, action_idx, decision_idx, r_hand, r_street, r_bb = (
+                rows[valid], action_idx[valid], decision_idx[valid], r_hand[valid], r_street[valid], r_bb[valid]
+            )
+
+        a_step = shared['a_step']
+        step_idx = np.where(a_step[rows] >= 0, a_step[rows], decision_idx)
+        pot_bb = shared['a_pot_bb'][rows]
+        amount_bb = a_amount[rows] / r_bb
+        r_eff = eff_stack_bb[r_hand]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spr = np.where(pot_bb > 0, r_eff / pot_bb, np.nan)
+            bet_pct = np.where((pot_bb > 0) & (amount_bb > 0), amount_bb / pot_bb * 100, np.nan)
+        bet_bb = np.where(amount_bb > 0, amount_bb, np.nan)
+
+        # Só as ações da street anteriores à decisão (a própria ação é o alvo)
+        street_first = group_start[rows]
+        current_aggr = last_aggressor[np.maximum(rows - 1, 0)] if len(rows) else rows
+        current_aggr = np.where((rows > street_first) & (current_aggr >= street_first), current_aggr, -1)
+
+        # Preflop: até a decisão (decisões preflop) ou o preflop inteiro;
+        # preflop_end é exclusivo
+        r_preflop_first = preflop_first[r_hand]
+        preflop_end = np.where(r_street == 0, rows, preflop_last[r_hand] + 1)
+        preflop_aggr = last_aggressor[np.maximum(preflop_end - 1, 0)] if len(rows) else preflop_end
+        preflop_aggr = np.where(
+            (preflop_end > r_preflop_first) & (r_preflop_first >= 0) & (preflop_aggr >= r_preflop_first),
+            preflop_aggr, -1
+        )
+
+        self.instrumentation.add('numeric', time.perf_counter() - start)
+
+        # ---- Colunas Arrow (listas por offsets, structs por bitmask) ----
+        start = time.perf_counter()
+        table = self._build_table(
+            hands=hands, villain=villain, villain_btn=villain_btn, hero_btn=hero_btn,
+            a_player=a_player, a_action=shared['a_action'], a_amount=a_amount,
+            a_aggressive_action=shared['a_aggressive_action'], a_is_hero=a_is_hero, a_is_villain=a_is_villain,
+            rows=rows, r_hand=r_hand, r_street=r_street, action_idx=action_idx,
+            step_idx=step_idx, pot_bb=pot_bb, eff=r_eff, spr=spr,
+            amount_bb=amount_bb, bet_bb=bet_bb, bet_pct=bet_pct,
+            street_first=street_first, current_aggr=current_aggr,
+            preflop_first=r_preflop_first, preflop_end=preflop_end,
+            preflop_aggr=preflop_aggr
+        )
+        self.instrumentation.add('build_frame', time.perf_counter() - start)
+
+        self.stats['decision_points'] += len(table)
+        for code, count in zip(*np.unique(r_street, return_counts=True)):
+            self.stats['by_street'][STREETS[code]] += int(count)
+
+        return table, r_hand
+
+    def _build_table(self, hands, villain, villain_btn, hero_btn, a_player, a_action, a_amount,
+                     a_aggressive_action, a_is_hero, a_is_villain, rows, r_hand, r_street, action_idx,
+                     step_idx, pot_bb, eff, spr, amount_bb, bet_bb, bet_pct, street_first, current_aggr,
+                     preflop_first, preflop_end, preflop_aggr) -> pa.Table:
+        """
+        Monta a tabela final (DECISION_POINT_SCHEMA) sem laço por linha
+
+        Colunas de listas são fatias de arrays achatados (tokens por ação,
+        cartas por mão): itens tomados por índice e offsets por linha.
+        """
+        n_rows = len(rows)
+        n_hands = len(hands['hand_id'])
+
+        # Tokens de sequência, uma vez por ação: {rótulo}_{ação}[_{valor}]
+        # Jogador ou ação ausente (None no store) vira '', como no extrator por mão
+        labels = np.where(a_is_hero, 'HERO', np.where(a_is_villain, 'VILLAIN', a_player))
+        tokens = pc.binary_join_element_wise(
+            pc.fill_null(pa.array(labels, type=pa.string()), ''),
+            pc.fill_null(pa.array(a_action, type=pa.string()), ''),
+            '_'
+        )
+        sized = a_aggressive_action & (a_amount > 0)
+        amounts = pa.array(np.where(sized, a_amount, 0).astype(np.int64)).cast(pa.string())
+        tokens = pc.if_else(sized, pc.binary_join_element_wise(tokens, amounts, '_'), tokens)
+
+        preflop_sequence = _list_array(tokens, preflop_first, np.where(preflop_first >= 0, preflop_end - preflop_first, 0))
+        current_sequence = _list_array(tokens, street_first, rows - street_first)
+
+        # Colunas escalares: lookups vetorizados
+        aggressor_names = np.array([None, 'hero', 'villain'], dtype=object)
+        current_aggressor = aggressor_names[
+            np.where(current_aggr >= 0, 2 - a_is_hero[np.maximum(current_aggr, 0)], 0)
+        ] if n_rows else np.zeros(0, dtype=object)
+        preflop_aggressor = aggressor_names[
+            np.where(preflop_aggr >= 0, 2 - a_is_hero[np.maximum(preflop_aggr, 0)], 0)
+        ] if n_rows else np.zeros(0, dtype=object)
+
+        streets = np.array(STREETS)[r_street]
+        is_preflop = r_street == 0
+        villain_position = np.where(
+            is_preflop,
+            np.where(villain_btn[r_hand], 'BTN', 'BB'),
+            np.where(villain_btn[r_hand], 'IP', 'OOP')
+        )
+        hero_position = np.where(
+            is_preflop,
+            np.where(hero_btn[r_hand], 'BTN', 'BB'),
+            np.where(hero_btn[r_hand], 'IP', 'OOP')
+        )
+
+        # ---- Board: cartas visíveis na street, textura pelos bitmasks ----
+        board_cards, board_len = _flatten_lists(hands['board'])
+        board_start = np.cumsum(board_len) - board_len
+        r_board_len = board_len[r_hand]
+        visible = np.where(r_board_len >= 3, np.minimum(_BOARD_CARDS_BY_STREET[r_street], r_board_len), 0)
+
+        # (linhas, 5) de índices de carta; posições fora do board apontam para o -1 final
+        card_table = np.append(_card_indices(board_cards), -1)
+        slots = np.arange(5)
+        positions = np.where(slots < visible[:, None], board_start[r_hand][:, None] + slots, len(card_table) - 1)
+        row_board = card_table[positions]
+
+        # ---- Mão do vilão: primeira entrada dele no showdown, por mão ----
+        shown, n_shown = _flatten_lists(hands['shown'])
+        shown_hand = np.repeat(np.arange(n_hands), n_shown)
+        shown_player = np.empty(len(shown), dtype=object)
+        shown_player[:] = list(map(itemgetter('player'), shown))
+        is_villain_entry = np.flatnonzero(shown_player == villain[shown_hand])
+        villain_hands, first = np.unique(shown_hand[is_villain_entry], return_index=True)
+        villain_entry = is_villain_entry[first]
+
+        shown_cards, cards_len = _flatten_lists(list(map(itemgetter('cards'), shown)))
+        cards_start = np.cumsum(cards_len) - cards_len
+        hand_cards_start = np.zeros(n_hands, dtype=np.int64)
+        hand_cards_start[villain_hands] = cards_start[villain_entry]
+        hand_cards_len = np.zeros(n_hands, dtype=np.int64)
+        hand_cards_len[villain_hands] = cards_len[villain_entry]
+
+        has_hand = hand_cards_len[r_hand] > 0
+        villain_hand = _list_array(
+            pa.array(shown_cards, type=pa.string()), hand_cards_start[r_hand], hand_cards_len[r_hand], mask=~has_hand
+        )
+
+        # Força e draws só com exatamente 2 cartas válidas (como no extrator por mão)
+        hole = np.full((n_hands, 2), -1, dtype=np.int64)
+        pair = hand_cards_len == 2
+        hole[pair] = np.append(_card_indices(shown_cards), -1)[hand_cards_start[pair][:, None] + np.arange(2)]
+        row_hole = hole[r_hand]
+        known = (row_hole >= 0).all(axis=1)
+
+        strength = np.full(n_rows, None, dtype=object)
+        draw_flags = np.zeros((n_rows, len(DRAW_FLAGS)), dtype=bool)
+        if known.any():
+            _, categories = evaluate_batch(np.concatenate([row_hole[known], row_board[known]], axis=1))
+            strength[known] = np.array(CATEGORIES, dtype=object)[categories]
+            draw_flags[known] = draws_batch(row_hole[known], row_board[known])
+        villain_draws = pa.StructArray.from_arrays(
+            [pa.array(draw_flags[:, j]) for j in range(len(DRAW_FLAGS))],
+            fields=list(_DRAWS_TYPE),
+            mask=pa.array(~(known & (visible > 0)))
+        )
+
+        # ---- Showdown: vilão entre os vencedores, por mão ----
+        winners, n_winners = _flatten_lists(hands['winners'])
+        winner_hand = np.repeat(np.arange(n_hands), n_winners)
+        winner_names = np.empty(len(winners), dtype=object)
+        winner_names[:] = winners
+        villain_won = np.zeros(n_hands, dtype=bool)
+        villain_won[winner_hand[winner_names == villain[winner_hand]]] = True
+        went_to_showdown = n_shown[r_hand] > 0
+
+        hand_ids = pa.array(hands['hand_id'][r_hand], type=pa.string())
+        villain_names = pa.array(villain[r_hand], type=pa.string())
+        step_idx = step_idx.astype(np.int64)
+
+        # Mesma ordem de colunas do DecisionPoint
+        columns = {
+            'decision_id': self._decision_ids(hand_ids, villain_names, step_idx),
+            'hand_id': hand_ids,
+            'villain_name': villain_names,
+            'step_idx': pa.array(step_idx),
+            'street': pa.array(streets, type=pa.string()),
+            'action_number_in_street': pa.array(action_idx.astype(np.int64)),
+            'pot_bb': pa.array(pot_bb, type=pa.float64()),
+            'eff_stack_bb': pa.array(eff, type=pa.float64()),
+            'spr': pa.array(spr, type=pa.float64(), from_pandas=True),
+            'villain_position': pa.array(villain_position, type=pa.string()),
+            'hero_position': pa.array(hero_position, type=pa.string()),
+            'preflop_sequence': preflop_sequence,
+            'current_street_sequence': current_sequence,
+            'preflop_aggressor': pa.array(preflop_aggressor, type=pa.string()),
+            'current_aggressor': pa.array(current_aggressor, type=pa.string()),
+            'board_cards': _list_array(pa.array(board_cards, type=pa.string()), board_start[r_hand], visible),
+            'board_texture': texture_array(texture_codes_batch(row_board), visible),
+            'villain_hand': villain_hand,
+            'villain_hand_strength': pa.array(strength, type=pa.string()),
+            'villain_draws': villain_draws,
+            'villain_action': pa.array(a_action[rows], type=pa.string()),
+            'villain_bet_size_bb': pa.array(bet_bb, type=pa.float64(), from_pandas=True),
+            'villain_bet_size_pot_pct': pa.array(bet_pct, type=pa.float64(), from_pandas=True),
+            'went_to_showdown': pa.array(went_to_showdown),
+            'villain_won': pa.array(villain_won[r_hand], mask=~went_to_showdown),
+        }
+
+        return pa.Table.from_arrays(
+            [columns[name] for name in DECISION_POINT_SCHEMA.names], schema=DECISION_POINT_SCHEMA
+        )
+
+    # ============================================
+    # HELPERS
+    # ============================================
+
+    def _action_streets(
+        self, hands: Dict[str, np.ndarray], a_hand: np.ndarray, attr_streets: np.ndarray
+    ) -> np.ndarray:
+        """
+        Street (0-3) de cada ação
+
+        Mesma regra de ContextExtractor._group_actions_by_street: posição da
+        ação na mão comparada aos street_offsets da mão; mãos sem offsets
+        (PHH legado) usam a chave 'street' da ação, ou preflop.
+
+        Args:
+            hands: Tabela de mãos (coluna opcional street_offsets)
+            a_hand: hand_idx de cada ação (ações de cada mão contíguas e em ordem)
+            attr_streets: Street da chave 'street' das ações (-1 = ausente)
+        """
+        n_hands = len(hands['hand_id'])
+        starts = np.full((n_hands, len(STREETS) - 1), np.iinfo(np.int64).max, dtype=np.int64)
+        has_offsets = np.zeros(n_hands, dtype=bool)
+
+        for h, offsets in enumerate(hands.get('street_offsets', ())):
+            if offsets is not None and len(offsets):
+                starts[h] = offsets[1:len(STREETS)]
+                has_offsets[h] = True
+
+        position = np.arange(len(a_hand)) - _group_starts(a_hand)
+        streets = (position[:, None] >= starts[a_hand]).sum(axis=1)
+
+        return np.where(has_offsets[a_hand], streets, np.maximum(attr_streets, 0))
+
+    def _decision_ids(self, hand_ids: pa.Array, villains: pa.Array, step_idx: np.ndarray) -> pa.Array:
+        """{hand_id}_{step_idx}; com o jogador no meio no modo all_players"""
+        parts = [hand_ids, villains] if self.all_players else [hand_ids]
+        return pc.binary_join_element_wise(*parts, pa.array(step_idx).cast(pa.string()), '_')
+
+    def _concat(self, tables: List[pa.Table]) -> pa.Table:
+        tables = [t for t in tables if len(t)]
+        table = pa.concat_tables(tables) if tables else DECISION_POINT_SCHEMA.empty_table()
+
+        logger.info(
+            f"Extração colunar: {self.stats['hands_processed']} mãos, "
+            f"{self.stats['decision_points']} decision points"
+        )
+        self.instrumentation.log_summary("Tempo por etapa:")
+        return table
+
+    def _frame(self, table: pa.Table) -> pd.DataFrame:
+        """DataFrame da tabela final (vazio, sem colunas, se não há decision points)"""
+        if len(table) == 0:
+            return pd.DataFrame()
+
+        start = time.perf_counter()
+        df = _to_frame(table)
+        self.instrumentation.add('to_dataframe', time.perf_counter() - start)
+        return df
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Para um array de chaves agrupadas (contíguas), o índice de início do grupo de cada posição"""
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(keys[1:], keys[:-1], out=is_start[1:])
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+
+def _attr_overrides(attrs: np.ndarray):
+    """
+    Chaves extras das ações (PHH legado)
+
+    Returns:
+        (step_idx explícito, -1 = usar o índice da ação do vilão na street;
+         street da chave 'street', -1 = ausente ou desconhecida)
+    """
+    steps = np.full(len(attrs), -1, dtype=np.int64)
+    streets = np.full(len(attrs), -1, dtype=np.int64)
+
+    for i, raw in enumerate(attrs):
+        if raw is None:
+            continue
+        extra = json.loads(raw)
+        if 'step_idx' in extra:
+            steps[i] = int(extra['step_idx'])
+        if extra.get('street') in STREETS:
+            streets[i] = STREETS.index(extra['street'])
+
+    return steps, streets
+
+
+def _numpy_columns(table) -> Dict[str, np.ndarray]:
+    """Converte uma tabela Arrow em {coluna: array NumPy} (strings/listas como object)"""
+    columns = {}
+
+    for name in table.column_names:
+        column = table.column(name)
+        if name in ('board', 'winners', 'shown', 'street_offsets'):
+            values = np.empty(len(column), dtype=object)
+            values[:] = column.to_pylist()
+        else:
+            values = column.to_numpy(zero_copy_only=False)
+            if values.dtype.kind in 'OUT' or name in ('hero', 'hand_id', 'player', 'action', 'name', 'attrs'):
+                values = values.astype(object)
+        columns[name] = values
+
+    return columns
+
+
+def _flatten_lists(values) -> Tuple[list, np.ndarray]:
+    """Coluna de listas (None = vazia) -> (itens concatenados, tamanho de cada lista)"""
+    try:
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    except TypeError:
+        values = [v if v is not None else () for v in values]
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+
+    return list(itertools.chain.from_iterable(values)), lengths
+
+
+def _card_indices(cards: list) -> np.ndarray:
+    """Índice 0-51 de cada carta (-1 se inválida); card_index uma vez por carta única"""
+    values = np.empty(len(cards), dtype=object)
+    values[:] = cards
+    codes, uniques = pd.factorize(values)
+    return np.array([card_index(card) for card in uniques] + [-1], dtype=np.int64)[codes]
+
+
+def _list_array(values: pa.Array, starts: np.ndarray, lengths: np.ndarray,
+                mask: Optional[np.ndarray] = None) -> pa.ListArray:
+    """
+    Coluna de listas em que a linha i é values[starts[i]:starts[i] + lengths[i]]
+
+    Itens tomados em um único take, listas delimitadas pelos offsets acumulados.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    index = np.arange(offsets[-1]) + np.repeat(np.asarray(starts, dtype=np.int64) - offsets[:-1], lengths)
+
+    return pa.ListArray.from_arrays(
+        pa.array(offsets, type=pa.int32()), values.take(pa.array(index, type=pa.int64())),
+        mask=None if mask is None else pa.array(mask)
+    )
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Tabela Arrow -> DataFrame; listas e structs como list/dict por célula
+
+    Sem pd.ArrowDtype: o dtype aninhado vai para os metadados do pandas no
+    to_parquet e o pd.read_parquet não consegue reconstruí-lo.
+    """
+    df = table.to_pandas()
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_nested(column.type):
+            df[name] = pd.Series(column.to_pylist(), index=df.index, dtype=object)
+    return df
+
+
+def _as_arrays(columns: Dict[str, list], dtypes: Dict[str, type]) -> Dict[str, np.ndarray]:
+    """Listas Python → arrays NumPy (object para o que não tem dtype numérico)"""
+    arrays = {}
+
+    for name, values in columns.items():
+        if name in dtypes:
+            arrays[name] = np.asarray(values, dtype=dtypes[name])
+        else:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            arrays[name] = array
+
+    return arrays
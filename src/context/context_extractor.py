@@ -7,21 +7,49 @@ Um "decision point" é um momento onde o vil
 Cada decision point contém o contexto completo do jogo naquele momento.
 """
 
+import os
+import sys
 import tomli
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Iterator, Optional, Tuple
+from dataclasses import dataclass
 from loguru import logger
 import json
+import time
 
+from src.instrumentation.stage_timer import Instrumentation
+from .board_texture import TEXTURE_FLAGS, board_texture_code, texture_flags
+from .hand_evaluator import card_index, evaluate, hand_draws
 
-@dataclass
+
+STREETS = ('preflop', 'flop', 'turn', 'river')
+
+# Ações de decisão do vilão (blinds/antes não contam)
+DECISION_ACTIONS = ('call', 'raise', 'fold', 'bet', 'check', 'all_in')
+
+# Arquivos .phh por tarefa na extração em lotes; o pico de memória é
+# limitado por (lotes em voo) x (decision points de um lote)
+EXTRACT_CHUNK_SIZE = 500
+
+
+@dataclass(slots=True)
 class DecisionPoint:
     """
     Representa um ponto de decisão completo
 
-    Contém todo o contexto necessário para vetorização e busca de similaridade
+    Contém todo o contexto necessário para vetorização e busca de similaridade.
+
+    Representação compacta (sem __dict__ por instância): tokens de sequência
+    internados, preflop_sequence e board_cards compartilhados entre os
+    decision points da mesma mão/street (não modificar), textura do board
+    como bitmask (board_texture é montado sob demanda) e context_json
+    gerado só quando lido.
     """
     # Identificação
     decision_id: str  # Único: {hand_id}_{step_idx}
@@ -52,12 +80,12 @@ class DecisionPoint:
 
     # Board
     board_cards: List[str]  # ["Kh", "9h", "4h"]
-    board_texture: Dict  # {monotone, paired, connected, etc}
+    texture_code: int  # Bitmask de board_texture.TEXTURE_FLAGS
 
     # Draws disponíveis (se mão do vilão for conhecida)
     villain_hand: Optional[List[str]]  # ["Ah", "Qh"] ou None
-    villain_hand_strength: Optional[str]  # "FLUSH_DRAW", "TOP_PAIR", etc
-    villain_draws: Optional[Dict]  # {flush_draw: True, oesd: False, ...}
+    villain_hand_strength: Optional[str]  # "ONE_PAIR", "FLUSH", etc (hand_evaluator.CATEGORIES)
+    villain_draws: Optional[Dict]  # {flush_draw: True, oesd: False, gutshot: False, combo_draw: False}
 
     # Ação tomada pelo vilão (TARGET)
     villain_action: str  # check, call, bet, raise, fold, all_in
@@ -68,12 +96,145 @@ class DecisionPoint:
     went_to_showdown: bool
     villain_won: Optional[bool]
 
-    # Context completo em JSON (para debug e storage)
-    context_json: str
+    @property
+    def board_texture(self) -> Dict:
+        """Textura do board como dict (10 flags + board_size; vazio no preflop)"""
+        if not self.board_cards:
+            return {}
+
+        texture = texture_flags(self.texture_code)
+        texture['board_size'] = len(self.board_cards)
+        return texture
+
+    @property
+    def context_json(self) -> str:
+        """Context completo em JSON (para debug), gerado sob demanda"""
+        return decision_context_json(self.to_dict())
 
     def to_dict(self) -> Dict:
-        """Converte para dicionário"""
-        return asdict(self)
+        """Converte para dicionário (colunas de DECISION_POINT_SCHEMA)"""
+        return {name: getattr(self, name) for name in _DECISION_POINT_FIELDS}
+
+
+def decision_context_json(row) -> str:
+    """
+    Context de um decision point em JSON
+
+    Args:
+        row: DecisionPoint.to_dict() ou linha do DataFrame de decision points
+    """
+    board = row['board_cards']
+
+    return json.dumps({
+        "hand_id": row['hand_id'],
+        "street": row['street'],
+        "board": list(board) if board is not None else [],
+        "pot_bb": row['pot_bb'],
+        "spr": row['spr'],
+        "villain_pos": row['villain_position'],
+        "action": row['villain_action'],
+        "amount_bb": row['villain_bet_size_bb'] or 0.0
+    })
+
+
+# Schema fixo dos decision points em Parquet/Arrow. Declarado (e não
+# inferido) para que todos os lotes da escrita em streaming tenham o mesmo
+# tipo, mesmo quando um lote só tem board_texture vazio ou draws None.
+# context_json não é gravado: decision_context_json() o gera de uma linha.
+DECISION_POINT_SCHEMA = pa.schema([
+    ("decision_id", pa.string()),
+    ("hand_id", pa.string()),
+    ("villain_name", pa.string()),
+    ("step_idx", pa.int64()),
+    ("street", pa.string()),
+    ("action_number_in_street", pa.int64()),
+    ("pot_bb", pa.float64()),
+    ("eff_stack_bb", pa.float64()),
+    ("spr", pa.float64()),
+    ("villain_position", pa.string()),
+    ("hero_position", pa.string()),
+    ("preflop_sequence", pa.list_(pa.string())),
+    ("current_street_sequence", pa.list_(pa.string())),
+    ("preflop_aggressor", pa.string()),
+    ("current_aggressor", pa.string()),
+    ("board_cards", pa.list_(pa.string())),
+    ("board_texture", pa.struct([
+        ("monotone", pa.bool_()),
+        ("two_tone", pa.bool_()),
+        ("rainbow", pa.bool_()),
+        ("paired", pa.bool_()),
+        ("trips", pa.bool_()),
+        ("connected", pa.bool_()),
+        ("disconnected", pa.bool_()),
+        ("high_broadway", pa.bool_()),
+        ("low", pa.bool_()),
+        ("wet", pa.bool_()),
+        ("board_size", pa.int64()),
+    ])),
+    ("villain_hand", pa.list_(pa.string())),
+    ("villain_hand_strength", pa.string()),
+    ("villain_draws", pa.struct([
+        ("flush_draw", pa.bool_()),
+        ("oesd", pa.bool_()),
+        ("gutshot", pa.bool_()),
+        ("combo_draw", pa.bool_()),
+    ])),
+    ("villain_action", pa.string()),
+    ("villain_bet_size_bb", pa.float64()),
+    ("villain_bet_size_pot_pct", pa.float64()),
+    ("went_to_showdown", pa.bool_()),
+    ("villain_won", pa.bool_()),
+])
+
+_DECISION_POINT_FIELDS = DECISION_POINT_SCHEMA.names
+_TEXTURE_TYPE = DECISION_POINT_SCHEMA.field("board_texture").type
+
+
+def decision_point_columns(decision_points: List[DecisionPoint]) -> Dict[str, list]:
+    """
+    Colunas (campo -> lista de valores) de uma lista de decision points
+
+    Lê os atributos diretamente, sem a cópia profunda de asdict().
+    """
+    return {
+        name: [getattr(dp, name) for dp in decision_points]
+        for name in _DECISION_POINT_FIELDS
+    }
+
+
+def texture_array(codes: np.ndarray, sizes: np.ndarray) -> pa.StructArray:
+    """
+    Coluna board_texture direto dos bitmasks (campos nulos no preflop)
+
+    Args:
+        codes: Bitmask de textura de cada linha
+        sizes: Cartas no board de cada linha (0 = preflop)
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    preflop = sizes == 0
+
+    children = [pa.array((codes >> bit) & 1 == 1, mask=preflop) for bit in range(len(TEXTURE_FLAGS))]
+    children.append(pa.array(sizes, mask=preflop))
+
+    return pa.StructArray.from_arrays(children, fields=list(_TEXTURE_TYPE))
+
+
+def decision_points_to_batch(decision_points: List[DecisionPoint]) -> pa.RecordBatch:
+    """Converte decision points em um RecordBatch com DECISION_POINT_SCHEMA"""
+    arrays = []
+
+    for field in DECISION_POINT_SCHEMA:
+        if field.name == "board_texture":
+            codes = np.fromiter((dp.texture_code for dp in decision_points), dtype=np.int64,
+                                count=len(decision_points))
+            sizes = np.fromiter((len(dp.board_cards) for dp in decision_points), dtype=np.int64,
+                                count=len(decision_points))
+            arrays.append(texture_array(codes, sizes))
+        else:
+            arrays.append(pa.array([getattr(dp, field.name) for dp in decision_points], type=field.type))
+
+    return pa.RecordBatch.from_arrays(arrays, schema=DECISION_POINT_SCHEMA)
 
 
 class ContextExtractor:
@@ -81,7 +242,18 @@ class ContextExtractor:
     Extrai decision points de arquivos PHH
     """
 
-    def __init__(self):
+    def __init__(self, all_players: bool = False):
+        """
+        Args:
+            all_players: Modo multi-perspectiva: cada jogador sentado vira o
+                "vilão" da mão (decisões de todos em uma única passada, para
+                perfis de população). O oponente de cada perspectiva é o hero,
+                ou o primeiro outro jogador quando a perspectiva é a do hero.
+                villain_name é ignorado, e decision_id inclui o jogador
+                ({hand_id}_{jogador}_{step_idx}) para continuar único na mão.
+        """
+        self.all_players = all_players
+
         self.stats = {
             "hands_processed": 0,
             "decision_points": 0,
@@ -94,6 +266,9 @@ class ContextExtractor:
             }
         }
 
+        # Tempo por etapa (load, extract, to_dataframe) e latência por arquivo
+        self.instrumentation = Instrumentation()
+
     def extract_from_phh_file(self, phh_path: Path, villain_name: Optional[str] = None) -> List[DecisionPoint]:
         """
         Extrai decision points de um arquivo PHH
@@ -105,16 +280,57 @@ class ContextExtractor:
         Returns:
             Lista de DecisionPoint objects
         """
+        start = time.perf_counter()
+
         try:
             # Carregar PHH
             with open(phh_path, 'rb') as f:
                 phh = tomli.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao processar {phh_path}: {e}")
+            self.stats["errors"] += 1
+            return []
+
+        self.instrumentation.add('load', time.perf_counter() - start)
+
+        decision_points = self.extract_from_phh(phh, villain_name, source=phh_path.name)
+        self.instrumentation.record_file(str(phh_path), time.perf_counter() - start, 1)
+
+        return decision_points
+
+    def extract_from_phh(
+        self,
+        phh: Dict,
+        villain_name: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> List[DecisionPoint]:
+        """
+        Extrai decision points de uma mão já carregada (dict PHH)
+
+        Args:
+            phh: Dicionário PHH (arquivo .phh ou hand store)
+            villain_name: Nome do vilão (se None, detecta automaticamente como não-hero)
+            source: Origem da mão, usada nas mensagens de log
+
+        Returns:
+            Lista de DecisionPoint objects
+        """
+        source = source or str(phh.get('metadata', {}).get('hand_id', '?'))
 
+        try:
             self.stats["hands_processed"] += 1
 
             # Identificar hero e villain
             hero_name = phh.get('metadata', {}).get('hero', '')
 
+            if self.all_players:
+                start = time.perf_counter()
+                decision_points = self._extract_all_players(phh, hero_name)
+                self.instrumentation.add('extract', time.perf_counter() - start)
+
+                self.stats["decision_points"] += len(decision_points)
+                return decision_points
+
             if villain_name is None:
                 # Detectar villain como o outro jogador
                 players = phh.get('players', [])
@@ -124,50 +340,368 @@ class ContextExtractor:
                         break
 
             if not villain_name:
-                logger.warning(f"Não foi possível identificar vilão em {phh_path.name}")
+                logger.warning(f"Não foi possível identificar vilão em {source}")
                 return []
 
             # Extrair decision points
+            start = time.perf_counter()
             decision_points = self._extract_decision_points(phh, hero_name, villain_name)
+            self.instrumentation.add('extract', time.perf_counter() - start)
 
             self.stats["decision_points"] += len(decision_points)
 
             return decision_points
 
         except Exception as e:
-            logger.error(f"Erro ao processar {phh_path}: {e}")
+            logger.error(f"Erro ao processar {source}: {e}")
             self.stats["errors"] += 1
             return []
 
-    def extract_from_directory(self, phh_dir: Path, villain_name: Optional[str] = None) -> pd.DataFrame:
+    def extract_from_directory(
+        self,
+        phh_dir: Path,
+        villain_name: Optional[str] = None,
+        workers: int = 1,
+        chunk_size: int = EXTRACT_CHUNK_SIZE
+    ) -> pd.DataFrame:
         """
         Extrai decision points de todos os arquivos .phh em um diretório
 
         Args:
             phh_dir: Diretório com arquivos .phh
             villain_name: Nome do vilão (opcional)
+            workers: Processos de extração (1 = sequencial, None = todos os núcleos)
+            chunk_size: Arquivos .phh por lote
+
+        Returns:
+            DataFrame com todos os decision points
+        """
+        frames = [
+            frame for frame in self._iter_directory_chunks(
+                phh_dir, villain_name, workers, chunk_size, as_arrow=False
+            )
+            if len(frame) > 0
+        ]
+
+        # Um lote só com None infere dtype object; reinferir após juntar
+        df = pd.concat(frames, ignore_index=True).infer_objects() if frames else pd.DataFrame()
+        self._log_summary()
+
+        return df
+
+    def extract_directory_to_parquet(
+        self,
+        phh_dir: Path,
+        output_file: Path,
+        villain_name: Optional[str] = None,
+        workers: int = 1,
+        chunk_size: int = EXTRACT_CHUNK_SIZE
+    ) -> int:
+        """
+        Extrai decision points de um diretório .phh direto para Parquet
+
+        Cada lote de arquivos vira um RecordBatch Arrow (no processo worker,
+        quando workers > 1) que é gravado como um row group assim que chega,
+        na ordem dos lotes. Nenhum DataFrame com todos os decision points é
+        montado: a memória fica limitada pelo tamanho do lote.
+
+        Args:
+            phh_dir: Diretório com arquivos .phh
+            output_file: Arquivo Parquet de saída (sobrescrito)
+            villain_name: Nome do vilão (opcional)
+            workers: Processos de extração (1 = sequencial, None = todos os núcleos)
+            chunk_size: Arquivos .phh por lote
+
+        Returns:
+            Número de decision points gravados
+        """
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Grava em arquivo temporário: uma extração interrompida não deixa Parquet truncado
+        temp_file = output_file.with_name(output_file.name + ".tmp")
+        rows = 0
+
+        with pq.ParquetWriter(temp_file, DECISION_POINT_SCHEMA) as writer:
+            for batch in self._iter_directory_chunks(
+                phh_dir, villain_name, workers, chunk_size, as_arrow=True
+            ):
+                if batch.num_rows == 0:
+                    continue
+
+                with self.instrumentation.stage('write'):
+                    writer.write_batch(batch)
+                rows += batch.num_rows
+
+        os.replace(temp_file, output_file)
+        self._log_summary()
+
+        return rows
+
+    def _iter_directory_chunks(
+        self,
+        phh_dir: Path,
+        villain_name: Optional[str],
+        workers: Optional[int],
+        chunk_size: int,
+        as_arrow: bool
+    ) -> Iterator:
+        """
+        Extrai os .phh de um diretório em lotes, sequencialmente ou em processos
+
+        No modo paralelo no máximo 2 lotes por worker ficam em voo, e os
+        resultados são entregues na ordem dos arquivos.
+
+        Yields:
+            Um RecordBatch (as_arrow=True) ou DataFrame por lote
+        """
+        phh_files = sorted(Path(phh_dir).glob("*.phh"))
+
+        chunk_size = max(1, chunk_size)
+        chunks = [
+            phh_files[i:i + chunk_size]
+            for i in range(0, len(phh_files), chunk_size)
+        ]
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(chunks)))
+
+        logger.info(
+            f"Processando {len(phh_files)} arquivos PHH em {workers} processo(s) "
+            f"({len(chunks)} lotes de até {chunk_size})..."
+        )
+
+        done = 0
+
+        if workers == 1:
+            for chunk in chunks:
+                decision_points = []
+                for phh_path in chunk:
+                    decision_points.extend(self.extract_from_phh_file(phh_path, villain_name))
+
+                done += len(chunk)
+                logger.info(f"  Processados: {done}/{len(phh_files)}")
+
+                yield self._convert_chunk(decision_points, as_arrow)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_chunk = 0
+
+            while next_chunk < len(chunks) or pending:
+                while next_chunk < len(chunks) and len(pending) < workers * 2:
+                    pending.append((
+                        len(chunks[next_chunk]),
+                        executor.submit(
+                            _extract_files_chunk, chunks[next_chunk], villain_name, as_arrow, self.all_players
+                        )
+                    ))
+                    next_chunk += 1
+
+                chunk_files, future = pending.popleft()
+                result, worker_stats, worker_timings = future.result()
+                self._merge_worker(worker_stats, worker_timings)
+
+                done += chunk_files
+                logger.info(f"  Processados: {done}/{len(phh_files)}")
+
+                yield result
+
+    def _convert_chunk(self, decision_points: List[DecisionPoint], as_arrow: bool):
+        """Converte os decision points de um lote em RecordBatch ou DataFrame"""
+        if as_arrow:
+            with self.instrumentation.stage('to_arrow'):
+                return decision_points_to_batch(decision_points)
+
+        with self.instrumentation.stage('to_dataframe'):
+            return pd.DataFrame(decision_point_columns(decision_points)) if decision_points else pd.DataFrame()
+
+    def _merge_worker(self, stats: Dict, timings: Dict):
+        """Incorpora os stats e a instrumentação de outro extractor/processo"""
+        for key in ("hands_processed", "decision_points", "errors"):
+            self.stats[key] += stats[key]
+        for street, count in stats["by_street"].items():
+            self.stats["by_street"][street] += count
+        self.instrumentation.merge(timings)
+
+    def extract_table_from_store(self, store_dir: Path, villain_name: Optional[str] = None) -> pa.Table:
+        """
+        Extrai decision points de um hand store como tabela Arrow
+
+        Engine colunar sem conversão para DataFrame: a tabela já segue o
+        DECISION_POINT_SCHEMA e vai direto para pq.write_table.
+
+        Args:
+            store_dir: Diretório do HandStore
+            villain_name: Nome do vilão (opcional)
+
+        Returns:
+            Tabela com todos os decision points
+        """
+        from .columnar import ColumnarExtractor
+
+        engine = ColumnarExtractor(all_players=self.all_players)
+        table = engine.extract_table_from_store(store_dir, villain_name)
+        self._merge_worker(engine.stats, engine.instrumentation.to_dict())
+
+        return table
+
+    def extract_store_to_parquet(
+        self,
+        store_dir: Path,
+        output_file: Path,
+        villain_name: Optional[str] = None
+    ) -> int:
+        """
+        Extrai decision points de um hand store direto para Parquet
+
+        Engine colunar, shard a shard: a tabela de cada shard é gravada como
+        row group assim que fica pronta, então a memória fica limitada pelo
+        tamanho do shard e não pelo total do store.
+
+        Args:
+            store_dir: Diretório do HandStore
+            output_file: Arquivo Parquet de saída (sobrescrito)
+            villain_name: Nome do vilão (opcional)
+
+        Returns:
+            Número de decision points gravados
+        """
+        from .columnar import ColumnarExtractor
+
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Grava em arquivo temporário: uma extração interrompida não deixa Parquet truncado
+        temp_file = output_file.with_name(output_file.name + ".tmp")
+        engine = ColumnarExtractor(all_players=self.all_players)
+        rows = 0
+
+        with pq.ParquetWriter(temp_file, DECISION_POINT_SCHEMA) as writer:
+            for table in engine.iter_tables_from_store(store_dir, villain_name):
+                with self.instrumentation.stage('write'):
+                    writer.write_table(table)
+                rows += table.num_rows
+
+        os.replace(temp_file, output_file)
+        self._merge_worker(engine.stats, engine.instrumentation.to_dict())
+        self._log_summary()
+
+        return rows
+
+    def extract_from_store(
+        self,
+        store_dir: Path,
+        villain_name: Optional[str] = None,
+        columnar: bool = True
+    ) -> pd.DataFrame:
+        """
+        Extrai decision points de todas as mãos de um hand store colunar
+
+        As mãos são lidas diretamente dos shards Parquet, sem arquivos .phh
+        intermediários. Por padrão usa a engine colunar (src/context/columnar.py),
+        que processa cada shard com operações vetorizadas; columnar=False
+        reconstrói e percorre o dict de cada mão.
+
+        Args:
+            store_dir: Diretório do HandStore
+            villain_name: Nome do vilão (opcional)
+            columnar: Usar a engine colunar
 
         Returns:
             DataFrame com todos os decision points
         """
-        phh_dir = Path(phh_dir)
+        from src.storage.hand_store import HandStore
+
+        if columnar:
+            from .columnar import ColumnarExtractor
+
+            engine = ColumnarExtractor(all_players=self.all_players)
+            df = engine.extract_from_store(store_dir, villain_name)
+            self._merge_worker(engine.stats, engine.instrumentation.to_dict())
+
+            return df
+
+        store = HandStore(store_dir)
         all_decision_points = []
 
-        # Processar todos os .phh
-        phh_files = list(phh_dir.glob("*.phh"))
+        logger.info(f"Processando hand store {store.root} ({len(store.shards())} shards)...")
 
-        logger.info(f"Processando {len(phh_files)} arquivos PHH...")
+        start = time.perf_counter()
+        extract_before = self.instrumentation.seconds('extract')
+        hands = 0
 
-        for i, phh_path in enumerate(phh_files):
-            if (i + 1) % 100 == 0:
-                logger.info(f"  Processados: {i+1}/{len(phh_files)}")
+        for i, phh in enumerate(store.iter_hands()):
+            if (i + 1) % 1000 == 0:
+                logger.info(f"  Processadas: {i+1} mãos")
 
-            dps = self.extract_from_phh_file(phh_path, villain_name)
-            all_decision_points.extend(dps)
+            all_decision_points.extend(self.extract_from_phh(phh, villain_name))
+            hands += 1
 
-        # Converter para DataFrame
-        df = pd.DataFrame([dp.to_dict() for dp in all_decision_points])
+        # Leitura dos shards = tempo do loop fora da extração
+        extract_seconds = self.instrumentation.seconds('extract') - extract_before
+        self.instrumentation.add('load', time.perf_counter() - start - extract_seconds, hands)
+
+        return self._to_dataframe(all_decision_points)
+
+    def extract_from_parser(
+        self,
+        parser,
+        input_path: Path,
+        filters: Optional[Dict] = None,
+        villain_name: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Parsing e extração fundidos: cada mão convertida pelo UnifiedParser
+        vai direto para a extração, sem serializar/reler PHH
 
+        Os destinos configurados no parser (PHH, hand store) continuam sendo
+        gravados como saída paralela; com output_dir=None nada é gravado.
+
+        Args:
+            parser: UnifiedParser já configurado
+            input_path: Arquivo ou diretório de input
+            filters: Filtros do parser (ex: {'heads_up_only': True})
+            villain_name: Nome do vilão (opcional)
+
+        Returns:
+            DataFrame com os decision points das mãos convertidas nesta execução
+        """
+        input_path = Path(input_path)
+        all_decision_points = []
+        seen_hand_ids = set()
+
+        def sink(phh: Dict):
+            # Mesma mão em mais de um arquivo: no modo PHH o arquivo seria sobrescrito
+            hand_id = str(phh.get('metadata', {}).get('hand_id', ''))
+            if hand_id in seen_hand_ids:
+                return
+            seen_hand_ids.add(hand_id)
+            all_decision_points.extend(self.extract_from_phh(phh, villain_name))
+
+        parser.hand_sink = sink
+
+        try:
+            if input_path.is_dir():
+                parser.parse_directory(input_path, filters=filters, workers=1)
+            else:
+                parser.parse_file(input_path, filters=filters)
+        finally:
+            parser.hand_sink = None
+
+        return self._to_dataframe(all_decision_points)
+
+    def _to_dataframe(self, decision_points: List[DecisionPoint]) -> pd.DataFrame:
+        """Converte decision points em DataFrame e loga o resumo da extração"""
+        df = self._convert_chunk(decision_points, as_arrow=False)
+        self._log_summary()
+
+        return df
+
+    def _log_summary(self):
+        """Loga o resumo da extração"""
         logger.info(f"\n{'='*60}")
         logger.info(f"EXTRAÇÃO COMPLETA")
         logger.info(f"{'='*60}")
@@ -177,31 +711,116 @@ class ContextExtractor:
         logger.info(f"\nPor street:")
         for street, count in self.stats['by_street'].items():
             logger.info(f"  {street}: {count}")
+        self.instrumentation.log_summary("\nTempo por etapa:")
         logger.info(f"{'='*60}\n")
 
-        return df
+    def _extract_all_players(self, phh: Dict, hero_name: str) -> List[DecisionPoint]:
+        """
+        Decision points de todos os jogadores sentados em uma passada pela mão
+
+        O estado da mão (streets, pot, board, textura, tokens das ações) é
+        calculado uma vez e compartilhado; cada perspectiva só refaz os
+        rótulos HERO/VILLAIN e o agressor.
+        """
+        hand = self._hand_state(phh)
+        names = list(hand['players'])
+        decision_points = []
+
+        for villain_name in names:
+            if villain_name != hero_name and hero_name in hand['players']:
+                opponent = hero_name
+            else:
+                opponent = next((name for name in names if name != villain_name), None)
+
+            if opponent is None:
+                continue
+
+            decision_points.extend(self._extract_decision_points(
+                phh, opponent, villain_name, hand=hand, id_prefix=f"{hand['hand_id']}_{villain_name}"
+            ))
+
+        return decision_points
+
+    def _hand_state(self, phh: Dict) -> Dict:
+        """
+        Estado da mão que não depende de quem é o vilão
+
+        Returns:
+            {'hand_id', 'bb', 'amount_divisor', 'players': {nome: jogador},
+             'streets': {street: {'actions', 'tokens', 'pot_bb_before', 'board', 'texture_code'}}}
+        """
+        metadata = phh.get('metadata', {})
+        bb = metadata.get('bb', 0)
+
+        # Agrupar ações por street (offsets gravados pelo parser)
+        actions_by_street = self._group_actions_by_street(phh.get('actions', []), phh.get('street_offsets'))
+
+        # Board cards por street
+        board_by_street = self._extract_board_by_street(phh)
+
+        # Pot que cada ação encara: tudo o que entrou antes dela na mão
+        # (streets anteriores + ações anteriores da street, incluindo blinds)
+        pot = 0
+        streets = {}
+
+        for street in STREETS:
+            street_actions = actions_by_street.get(street, [])
+
+            pot_before = []
+            for action in street_actions:
+                pot_before.append(pot / bb if bb > 0 else 0)
+                pot += action.get('amount', 0)
+
+            board_cards = board_by_street.get(street, [])
+            streets[street] = {
+                'actions': street_actions,
+                'tokens': self._street_tokens(street_actions),
+                'pot_bb_before': pot_before,
+                'board': board_cards,
+                'texture_code': board_texture_code(board_cards),
+            }
+
+        return {
+            'hand_id': metadata.get('hand_id', 'unknown'),
+            'bb': bb,
+            'amount_divisor': metadata.get('bb', 1),
+            'players': {p['name']: p for p in phh.get('players', [])},
+            'streets': streets,
+        }
 
-    def _extract_decision_points(self, phh: Dict, hero_name: str, villain_name: str) -> List[DecisionPoint]:
+    def _extract_decision_points(
+        self,
+        phh: Dict,
+        hero_name: str,
+        villain_name: str,
+        hand: Optional[Dict] = None,
+        id_prefix: Optional[str] = None
+    ) -> List[DecisionPoint]:
         """
         Extrai todos os decision points do vilão em uma mão
 
+        Percorre a mão uma única vez: pot, sequência de ações e último
+        agressor são carregados adiante street a street, em vez de
+        recalculados sobre o prefixo a cada ação do vilão.
+
         Args:
             phh: Dicionário PHH
             hero_name: Nome do hero
             villain_name: Nome do vilão
+            hand: Estado da mão já calculado por _hand_state (modo multi-perspectiva)
+            id_prefix: Prefixo do decision_id (padrão: hand_id)
 
         Returns:
             Lista de DecisionPoint objects
         """
         decision_points = []
 
-        # Metadata
-        hand_id = phh.get('metadata', {}).get('hand_id', 'unknown')
-        sb = phh.get('metadata', {}).get('sb', 0)
-        bb = phh.get('metadata', {}).get('bb', 0)
+        if hand is None:
+            hand = self._hand_state(phh)
 
-        # Players
-        players = {p['name']: p for p in phh.get('players', [])}
+        hand_id = hand['hand_id']
+        bb = hand['bb']
+        players = hand['players']
 
         if villain_name not in players:
             return []
@@ -215,90 +834,118 @@ class ContextExtractor:
         villain_is_btn = players[villain_name].get('is_btn', False)
         hero_is_btn = players[hero_name].get('is_btn', False) if hero_name in players else False
 
-        # Actions
-        actions = phh.get('actions', [])
+        # Sequência/agressor do preflop (uma vez) e showdown
+        streets = hand['streets']
+        preflop_seq, preflop_aggressors = self._walk_street(streets['preflop']['tokens'], hero_name, villain_name)
+        went_to_showdown, villain_won = self._check_showdown(phh, villain_name)
 
-        # Agrupar ações por street
-        actions_by_street = self._group_actions_by_street(actions)
-
-        # Board cards por street
-        board_by_street = self._extract_board_by_street(phh)
+        # Decisões do vilão nas streets anteriores (step_idx único na mão)
+        decisions_before = 0
 
         # Processar cada street
-        for street in ['preflop', 'flop', 'turn', 'river']:
-            street_actions = actions_by_street.get(street, [])
-
-            # Pot size no início da street
-            pot_bb = self._calculate_pot_at_street_start(
-                actions_by_street, street, sb, bb
-            ) / bb if bb > 0 else 0
-
-            # Board atual
-            board_cards = board_by_street.get(street, [])
+        for street in STREETS:
+            street_state = streets[street]
 
             # Filtrar ações do vilão nesta street
             # Ignorar blinds/antes (sb, bb, ante) - apenas ações de decisão (call, raise, fold, bet, check)
-            decision_actions = ['call', 'raise', 'fold', 'bet', 'check', 'all_in']
+            # (posição da ação na street, ação, pot antes dela)
             villain_actions_in_street = [
-                a for a in street_actions
-                if a.get('player') == villain_name and a.get('action') in decision_actions
+                (position, a, pot_bb)
+                for position, (a, pot_bb) in enumerate(zip(street_state['actions'], street_state['pot_bb_before']))
+                if a.get('player') == villain_name and a.get('action') in DECISION_ACTIONS
             ]
 
+            if not villain_actions_in_street:
+                continue
+
+            # Estado da street em uma passada; cada decisão lê o prefixo já pronto
+            if street == 'preflop':
+                street_seq, street_aggressors = preflop_seq, preflop_aggressors
+            else:
+                street_seq, street_aggressors = self._walk_street(street_state['tokens'], hero_name, villain_name)
+
+            # Board atual e mão do vilão (uma vez por street)
+            board_cards = street_state['board']
+            villain_hand_info = self._extract_villain_hand_info(phh, villain_name, board_cards)
+
             # Para cada ação do vilão, criar um decision point
-            for action_idx, villain_action in enumerate(villain_actions_in_street):
+            for action_idx, (position, villain_action, pot_bb) in enumerate(villain_actions_in_street):
+                # Só as ações anteriores à decisão (a própria ação é o alvo);
+                # decisões pós-flop compartilham a lista do preflop inteiro
+                if street == 'preflop':
+                    decision_preflop_seq, preflop_end = preflop_seq[:position], position
+                else:
+                    decision_preflop_seq, preflop_end = preflop_seq, len(preflop_seq)
+
                 dp = self._create_decision_point(
                     hand_id=hand_id,
                     villain_name=villain_name,
-                    hero_name=hero_name,
                     street=street,
                     action_idx=action_idx,
+                    decision_idx=decisions_before + action_idx,
                     villain_action=villain_action,
-                    all_street_actions=street_actions,
+                    amount_divisor=hand['amount_divisor'],
                     board_cards=board_cards,
+                    texture_code=street_state['texture_code'],
                     pot_bb=pot_bb,
                     eff_stack_bb=eff_stack_bb,
                     villain_is_btn=villain_is_btn,
                     hero_is_btn=hero_is_btn,
-                    actions_by_street=actions_by_street,
-                    phh=phh
+                    preflop_seq=decision_preflop_seq,
+                    current_seq=street_seq[:position],
+                    preflop_aggressor=preflop_aggressors[preflop_end],
+                    current_aggressor=street_aggressors[position],
+                    villain_hand_info=villain_hand_info,
+                    went_to_showdown=went_to_showdown,
+                    villain_won=villain_won,
+                    id_prefix=id_prefix
                 )
 
                 if dp:
                     decision_points.append(dp)
                     self.stats['by_street'][street] += 1
 
+            decisions_before += len(villain_actions_in_street)
+
         return decision_points
 
     def _create_decision_point(
         self,
         hand_id: str,
         villain_name: str,
-        hero_name: str,
         street: str,
         action_idx: int,
+        decision_idx: int,
         villain_action: Dict,
-        all_street_actions: List[Dict],
+        amount_divisor: float,
         board_cards: List[str],
+        texture_code: int,
         pot_bb: float,
         eff_stack_bb: float,
         villain_is_btn: bool,
         hero_is_btn: bool,
-        actions_by_street: Dict,
-        phh: Dict
+        preflop_seq: List[str],
+        current_seq: List[str],
+        preflop_aggressor: Optional[str],
+        current_aggressor: Optional[str],
+        villain_hand_info: Tuple[Optional[List[str]], Optional[str], Optional[Dict]],
+        went_to_showdown: bool,
+        villain_won: Optional[bool],
+        id_prefix: Optional[str] = None
     ) -> Optional[DecisionPoint]:
         """
-        Cria um DecisionPoint a partir do contexto
+        Cria um DecisionPoint a partir do contexto já calculado pelo walker
 
         (Função auxiliar para _extract_decision_points)
         """
         try:
             # Decision ID
-            step_idx = villain_action.get('step_idx', action_idx)
-            decision_id = f"{hand_id}_{step_idx}"
+            step_idx = villain_action.get('step_idx', decision_idx)
+            decision_id = f"{id_prefix or hand_id}_{step_idx}"
 
             # Ação do vilão
-            action_type = villain_action.get('action', 'unknown')
-            amount_bb = villain_action.get('amount', 0) / phh.get('metadata', {}).get('bb', 1)
+            action_type = sys.intern(villain_action.get('action', 'unknown'))
+            amount_bb = villain_action.get('amount', 0) / amount_divisor
 
             # Bet size % pot
             bet_size_pot_pct = (amount_bb / pot_bb * 100) if pot_bb > 0 and amount_bb > 0 else None
@@ -311,57 +958,11 @@ class ContextExtractor:
                 villain_pos = 'IP' if villain_is_btn else 'OOP'
                 hero_pos = 'IP' if hero_is_btn else 'OOP'
 
-            # Action sequences
-            preflop_seq = self._build_action_sequence(
-                actions_by_street.get('preflop', []),
-                hero_name,
-                villain_name
-            )
-
-            current_seq = self._build_action_sequence(
-                all_street_actions[:action_idx],  # Até esta ação
-                hero_name,
-                villain_name
-            )
-
-            # Agressor
-            preflop_aggressor = self._identify_last_aggressor(
-                actions_by_street.get('preflop', []),
-                hero_name,
-                villain_name
-            )
-
-            current_aggressor = self._identify_last_aggressor(
-                all_street_actions[:action_idx],
-                hero_name,
-                villain_name
-            )
-
-            # Board texture
-            board_texture = self._analyze_board_texture(board_cards)
-
             # SPR
             spr = eff_stack_bb / pot_bb if pot_bb > 0 else None
 
             # Mão do vilão (se conhecida)
-            villain_hand, villain_strength, villain_draws = self._extract_villain_hand_info(
-                phh, villain_name, board_cards
-            )
-
-            # Showdown
-            went_to_showdown, villain_won = self._check_showdown(phh, villain_name)
-
-            # Context JSON
-            context_json = json.dumps({
-                "hand_id": hand_id,
-                "street": street,
-                "board": board_cards,
-                "pot_bb": pot_bb,
-                "spr": spr,
-                "villain_pos": villain_pos,
-                "action": action_type,
-                "amount_bb": amount_bb
-            })
+            villain_hand, villain_strength, villain_draws = villain_hand_info
 
             # Criar DecisionPoint
             dp = DecisionPoint(
@@ -381,7 +982,7 @@ class ContextExtractor:
                 preflop_aggressor=preflop_aggressor,
                 current_aggressor=current_aggressor,
                 board_cards=board_cards,
-                board_texture=board_texture,
+                texture_code=texture_code,
                 villain_hand=villain_hand,
                 villain_hand_strength=villain_strength,
                 villain_draws=villain_draws,
@@ -389,8 +990,7 @@ class ContextExtractor:
                 villain_bet_size_bb=amount_bb if amount_bb > 0 else None,
                 villain_bet_size_pot_pct=bet_size_pot_pct,
                 went_to_showdown=went_to_showdown,
-                villain_won=villain_won,
-                context_json=context_json
+                villain_won=villain_won
             )
 
             return dp
@@ -403,22 +1003,29 @@ class ContextExtractor:
     # HELPERS
     # ============================================
 
-    def _group_actions_by_street(self, actions: List[Dict]) -> Dict[str, List[Dict]]:
+    def _group_actions_by_street(
+        self, actions: List[Dict], street_offsets: Optional[List[int]] = None
+    ) -> Dict[str, List[Dict]]:
         """
         Agrupa ações por street
 
-        Como o PHH atual não tem campo 'street', todas as ações são tratadas como preflop
-        TODO: Implementar detecção de streets baseado em padrões de ação
+        Com street_offsets (início de [preflop, flop, turn, river] na lista de
+        ações, gravado pelo parser) cada street é uma fatia da lista. PHH
+        legado sem offsets usa a chave 'street' de cada ação, se existir;
+        sem nenhum dos dois, todas as ações contam como preflop.
         """
-        by_street = {
-            'preflop': [],
-            'flop': [],
-            'turn': [],
-            'river': []
-        }
+        if street_offsets:
+            bounds = list(street_offsets) + [len(actions)]
+            return {
+                street: actions[bounds[i]:bounds[i + 1]]
+                for i, street in enumerate(STREETS)
+            }
 
-        # Por ora, tratar todas as ações como preflop
-        by_street['preflop'] = actions
+        by_street = {street: [] for street in STREETS}
+
+        for action in actions:
+            street = action.get('street', 'preflop')
+            by_street[street if street in by_street else 'preflop'].append(action)
 
         return by_street
 
@@ -452,112 +1059,90 @@ class ContextExtractor:
 
         return board
 
-    def _calculate_pot_at_street_start(
-        self, actions_by_street: Dict, current_street: str, sb: float, bb: float
-    ) -> float:
-        """Calcula pot size no início de uma street"""
-        pot = 0
-
-        street_order = ['preflop', 'flop', 'turn', 'river']
-        current_idx = street_order.index(current_street)
-
-        # Somar TODAS as ações (incluindo blinds/antes) de streets anteriores e atual
-        for street in street_order[:current_idx + 1]:
-            for action in actions_by_street.get(street, []):
-                pot += action.get('amount', 0)
-
-        return pot
-
-    def _build_action_sequence(
-        self, actions: List[Dict], hero_name: str, villain_name: str
-    ) -> List[str]:
+    def _street_tokens(self, actions: List[Dict]) -> List[Tuple[str, str, bool]]:
         """
-        Constrói sequência de ações em formato legível
+        Partes das ações de uma street que não dependem da perspectiva
 
-        Ex: ["BTN_raise_3bb", "BB_call", "BB_check", "BTN_bet_8bb"]
+        Returns:
+            Lista de (jogador, sufixo do token, ex: "_raise_40", é bet/raise)
         """
-        sequence = []
+        tokens = []
 
         for action in actions:
-            player = action.get('player', '')
             action_type = action.get('action', '')
             amount = action.get('amount', 0)
 
-            # Mapear player para hero/villain
-            if player == hero_name:
-                player_label = 'HERO'
-            elif player == villain_name:
-                player_label = 'VILLAIN'
-            else:
-                player_label = player
-
             # Formato: HERO_bet_8 ou VILLAIN_call
-            if action_type in ['bet', 'raise'] and amount > 0:
-                sequence.append(f"{player_label}_{action_type}_{int(amount)}")
+            if action_type in ['bet', 'raise']:
+                suffix = f"_{action_type}_{int(amount)}" if amount > 0 else f"_{action_type}"
+                tokens.append((action.get('player', ''), suffix, True))
             else:
-                sequence.append(f"{player_label}_{action_type}")
+                tokens.append((action.get('player', ''), f"_{action_type}", False))
 
-        return sequence
+        return tokens
 
-    def _identify_last_aggressor(
-        self, actions: List[Dict], hero_name: str, villain_name: str
-    ) -> Optional[str]:
+    def _walk_street(
+        self, tokens: List[Tuple[str, str, bool]], hero_name: str, villain_name: str
+    ) -> Tuple[List[str], List[Optional[str]]]:
         """
-        Identifica o último agressor (quem deu bet/raise por último)
+        Percorre as ações de uma street (de _street_tokens) uma única vez
+
+        Tokens são internados: a mesma string é compartilhada entre mãos.
 
         Returns:
-            'hero', 'villain', ou None
+            (sequência legível, ex: ["HERO_raise_40", "VILLAIN_call"],
+             último agressor após cada prefixo: aggressors[i] considera as
+             i primeiras ações; len = len(tokens) + 1)
         """
+        # Mapear player para hero/villain (hero tem precedência)
+        labels = {villain_name: 'VILLAIN', hero_name: 'HERO'}
+
+        sequence = []
+        aggressors = [None]
         last_aggressor = None
 
-        for action in actions:
-            player = action.get('player', '')
-            action_type = action.get('action', '')
+        for player, suffix, aggressive in tokens:
+            sequence.append(sys.intern(f"{labels.get(player, player)}{suffix}"))
 
-            if action_type in ['bet', 'raise']:
+            # Último agressor (quem deu bet/raise por último)
+            if aggressive:
                 if player == hero_name:
                     last_aggressor = 'hero'
                 elif player == villain_name:
                     last_aggressor = 'villain'
 
-        return last_aggressor
-
-    def _analyze_board_texture(self, board_cards: List[str]) -> Dict:
-        """
-        Analisa textura do board
-
-        (Simplificado - versão completa em src/classification/classifiers.py)
-        """
-        if not board_cards:
-            return {}
+            aggressors.append(last_aggressor)
 
-        # Extrair naipes e ranks
-        suits = [card[1] for card in board_cards if len(card) == 2]
-        ranks = [card[0] for card in board_cards if len(card) == 2]
-
-        # Análise básica
-        texture = {
-            "monotone": len(set(suits)) == 1 and len(suits) >= 3,
-            "two_tone": len(set(suits)) == 2 and len(suits) == 3,
-            "rainbow": len(set(suits)) == 3 and len(suits) == 3,
-            "paired": len(ranks) != len(set(ranks)),
-            "board_size": len(board_cards)
-        }
-
-        return texture
+        return sequence, aggressors
 
     def _extract_villain_hand_info(
         self, phh: Dict, villain_name: str, board_cards: List[str]
     ) -> Tuple[Optional[List[str]], Optional[str], Optional[Dict]]:
         """
-        Extrai informações da mão do vilão (se conhecida)
+        Extrai informações da mão do vilão (se mostrada no showdown)
+
+        Força e draws vêm do avaliador por tabelas (hand_evaluator); draws
+        ficam None no preflop.
 
         Returns:
             (villain_hand, hand_strength, draws)
         """
-        # TODO: Implementar extração de cartas do showdown
-        # Por ora, retornar None
-        return None, None, None
+        villain_hand = None
+        for shown in phh.get('showdown', {}).get('hands', []):
+            if shown.get('player') == villain_name:
+                villain_hand = list(shown.get('cards', []))
+                break
+
+        if not villain_hand:
+            return None, None, None
+
+        if len(villain_hand) != 2 or min(card_index(card) for card in villain_hand) < 0:
+            return villain_hand, None, None
+
+        _, strength = evaluate(villain_hand + list(board_cards))
+        draws = hand_draws(villain_hand, board_cards) if board_cards else None
+
+        return villain_hand, strength, draws
 
     def _check_showdown(self, phh: Dict, villain_name: str) -> Tuple[bool, Optional[bool]]:
         """
@@ -575,13 +1160,35 @@ class ContextExtractor:
         return went_to_showdown, villain_won
 
 
+# ============================================
+# WORKERS (PROCESSAMENTO PARALELO)
+# ============================================
+
+def _extract_files_chunk(
+    phh_paths: List[Path], villain_name: Optional[str], as_arrow: bool, all_players: bool = False
+) -> Tuple[object, Dict, Dict]:
+    """
+    Extrai um lote de arquivos .phh em um processo worker
+
+    Returns:
+        (RecordBatch ou DataFrame do lote, stats do extractor do worker,
+         instrumentação do worker)
+    """
+    extractor = ContextExtractor(all_players=all_players)
+    decision_points = []
+
+    for phh_path in phh_paths:
+        decision_points.extend(extractor.extract_from_phh_file(phh_path, villain_name))
+
+    result = extractor._convert_chunk(decision_points, as_arrow)
+    return result, extractor.stats, extractor.instrumentation.to_dict()
+
+
 # ============================================
 # SCRIPT DE TESTE
 # ============================================
 
 if __name__ == "__main__":
-    import sys
-
     # Configurar logging
     logger.remove()
     logger.add(sys.stderr, level="INFO")
@@ -595,16 +1202,15 @@ if __name__ == "__main__":
     # Criar extractor
     extractor = ContextExtractor()
 
-    # Processar diretório
-    df = extractor.extract_from_directory(PHH_DIR)
+    # Processar diretório (streaming em lotes, todos os núcleos)
+    total = extractor.extract_directory_to_parquet(PHH_DIR, OUTPUT_FILE, workers=None)
 
-    # Salvar como Parquet
-    if len(df) > 0:
-        df.to_parquet(OUTPUT_FILE, index=False)
+    if total > 0:
         logger.success(f"\n✅ Decision points salvos em: {OUTPUT_FILE}")
-        logger.success(f"📊 Total de decision points: {len(df)}")
+        logger.success(f"📊 Total de decision points: {total}")
 
         # Mostrar amostra
+        df = pd.read_parquet(OUTPUT_FILE)
         logger.info(f"\nAmostra dos dados:")
         logger.info(f"\n{df.head()}")
         logger.info(f"\nColunas: {list(df.columns)}")
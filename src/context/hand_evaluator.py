@@ -0,0 +1,389 @@
+"""
+Hand Evaluator - Força de mão e draws por tabelas pré-calculadas
+
+Cartas viram inteiros (rank * 4 + naipe) e cada mão vira máscaras de 13
+bits (uma por naipe + a união dos ranks). Tudo o que depende só de uma
+máscara é tabelado uma vez no import (8192 entradas cada):
+
+- POPCOUNT: cartas na máscara
+- STRAIGHT_HIGH: rank mais alto da maior sequência (-1 = nenhuma; inclui a roda A-5)
+- STRAIGHT_OUTS: ranks que completariam uma sequência que ainda não existe
+- TOP_BITS[n]: a máscara só com os n ranks mais altos (kickers)
+
+Pares, trincas e quadras saem das interseções das máscaras de naipe (um
+rank presente em 2, 3 ou 4 naipes). Com isso a avaliação de 5, 6 ou 7
+cartas é um punhado de lookups e operações bit a bit, vetorizados em
+NumPy para lotes inteiros (evaluate_batch / draws_batch). O score é
+comparável entre mãos:
+categoria << 26 | ranks principais << 13 | kickers.
+
+Versões escalares (evaluate / hand_draws) usam as mesmas tabelas para o
+extrator por mão.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+
+# Mesma ordem do one-hot de hand strength no Vectorizer
+CATEGORIES = (
+    'HIGH_CARD', 'ONE_PAIR', 'TWO_PAIR', 'THREE_OF_A_KIND',
+    'STRAIGHT', 'FLUSH', 'FULL_HOUSE', 'FOUR_OF_A_KIND',
+    'STRAIGHT_FLUSH'
+)
+
+# Mesma ordem dos flags de draws no Vectorizer
+DRAW_FLAGS = ('flush_draw', 'oesd', 'gutshot', 'combo_draw')
+
+_CARD_INDEX = {
+    rank + suit: r * 4 + s
+    for r, rank in enumerate(RANKS)
+    for s, suit in enumerate(SUITS)
+}
+
+
+# ============================================
+# TABELAS (uma vez, no import)
+# ============================================
+
+def _build_tables():
+    masks = np.arange(1 << 13, dtype=np.int64)
+
+    popcount = np.zeros(len(masks), dtype=np.int64)
+    high_bit = np.full(len(masks), -1, dtype=np.int64)
+    for bit in range(13):
+        has_bit = (masks >> bit) & 1
+        popcount += has_bit
+        high_bit = np.where(has_bit == 1, bit, high_bit)
+
+    # Sequências: 5 ranks consecutivos; a roda (A-2-3-4-5) tem o 5 como carta alta
+    straight_high = np.full(len(masks), -1, dtype=np.int64)
+    windows = [(0b1_0000_0000_1111, 3)] + [(0b11111 << (high - 4), high) for high in range(4, 13)]
+    for window, high in windows:
+        straight_high = np.where((masks & window) == window, high, straight_high)
+
+    # Ranks que completam uma sequência (só enquanto ela não existe)
+    straight_outs = np.zeros(len(masks), dtype=np.int64)
+    for bit in range(13):
+        completes = ((masks >> bit) & 1 == 0) & (straight_high[masks | (1 << bit)] >= 0)
+        straight_outs |= np.where(completes, 1 << bit, 0)
+    straight_outs[straight_high >= 0] = 0
+
+    top_bits = [np.zeros(len(masks), dtype=np.int64)]
+    top_one = np.where(high_bit >= 0, np.left_shift(1, np.maximum(high_bit, 0)), 0)
+    for _ in range(5):
+        previous = top_bits[-1]
+        top_bits.append(previous | top_one[masks & ~previous])
+
+    return popcount, high_bit, straight_high, straight_outs, top_bits
+
+
+POPCOUNT, HIGH_BIT, STRAIGHT_HIGH, STRAIGHT_OUTS, TOP_BITS = _build_tables()
+
+# Cópias em listas Python para o caminho escalar (indexar ndarray com int é lento)
+_POPCOUNT = POPCOUNT.tolist()
+_STRAIGHT_HIGH = STRAIGHT_HIGH.tolist()
+_STRAIGHT_OUTS = STRAIGHT_OUTS.tolist()
+_TOP_BITS = [table.tolist() for table in TOP_BITS]
+
+
+# ============================================
+# CARTAS
+# ============================================
+
+def card_index(card: str) -> int:
+    """'As' -> índice 0-51 (rank * 4 + naipe); -1 se inválida"""
+    if not isinstance(card, str) or len(card) != 2:
+        return -1
+    return _CARD_INDEX.get(card[0].upper() + card[1].lower(), -1)
+
+
+def encode_cards(hands: Sequence[Sequence[str]], width: int) -> np.ndarray:
+    """
+    Lista de mãos (cartas em texto) -> matriz int (n, width), -1 como padding
+
+    Cartas além de `width` são ignoradas.
+    """
+    encoded = np.full((len(hands), width), -1, dtype=np.int64)
+
+    for i, cards in enumerate(hands):
+        for j, card in enumerate(cards[:width]):
+            encoded[i, j] = card_index(card)
+
+    return encoded
+
+
+# ============================================
+# AVALIAÇÃO EM LOTE
+# ============================================
+
+def _suit_masks(cards: np.ndarray) -> np.ndarray:
+    """Máscara de ranks por naipe, shape (n, 4); cartas -1 são ignoradas"""
+    valid = cards >= 0
+    bits = np.where(valid, np.left_shift(1, np.maximum(cards, 0) >> 2), 0)
+    suits = cards & 3
+
+    masks = np.zeros((len(cards), 4), dtype=np.int64)
+    for suit in range(4):
+        masks[:, suit] = np.bitwise_or.reduce(np.where(valid & (suits == suit), bits, 0), axis=1)
+
+    return masks
+
+
+def _rank_groups(c, d, h, s):
+    """
+    Máscaras de quadras, trincas e pares a partir das máscaras de naipe
+
+    Funciona com ints e com arrays: um rank em k naipes aparece k vezes.
+    """
+    quads = c & d & h & s
+    at_least_3 = (c & d & h) | (c & d & s) | (c & h & s) | (d & h & s)
+    at_least_2 = (c & d) | (c & h) | (c & s) | (d & h) | (d & s) | (h & s)
+    return quads, at_least_3 & ~quads, at_least_2 & ~at_least_3
+
+
+def evaluate_batch(cards: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Avalia um lote de mãos de até 7 cartas
+
+    Args:
+        cards: Matriz int (n, k) de índices de carta, -1 como padding
+            (mãos de 5, 6 ou 7 cartas no mesmo lote; com menos de 5 só
+            pares/trincas/quadras contam)
+
+    Returns:
+        (scores comparáveis int64 (n,), categoria 0-8 (n,) — índice em CATEGORIES)
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2:
+        raise ValueError("cards deve ter shape (n, k)")
+
+    suit_masks = _suit_masks(cards)
+    rank_mask = np.bitwise_or.reduce(suit_masks, axis=1)
+
+    quads, trips, pairs = _rank_groups(*suit_masks.T)
+
+    # Flush: naipe com 5+ cartas (só um é possível com até 7 cartas)
+    suit_count = POPCOUNT[suit_masks]
+    flush_mask = suit_masks[np.arange(len(cards)), suit_count.argmax(axis=1)]
+    is_flush = suit_count.max(axis=1, initial=0) >= 5
+
+    straight_flush_high = np.where(is_flush, STRAIGHT_HIGH[flush_mask], -1)
+    straight_high = STRAIGHT_HIGH[rank_mask]
+
+    trips_top = TOP_BITS[1][trips]
+    full_house_pair = TOP_BITS[1][(trips & ~trips_top) | pairs]
+    two_pairs = TOP_BITS[2][pairs]
+
+    conditions = [
+        straight_flush_high >= 0,
+        quads > 0,
+        (trips > 0) & (full_house_pair > 0),
+        is_flush,
+        straight_high >= 0,
+        trips > 0,
+        POPCOUNT[pairs] >= 2,
+        pairs > 0,
+    ]
+    category = np.select(conditions, [8, 7, 6, 5, 4, 3, 2, 1], default=0)
+
+    primary = np.select(conditions, [
+        np.left_shift(1, np.maximum(straight_flush_high, 0)),
+        quads,
+        trips_top,
+        TOP_BITS[5][flush_mask],
+        np.left_shift(1, np.maximum(straight_high, 0)),
+        trips_top,
+        two_pairs,
+        pairs,
+    ], default=TOP_BITS[5][rank_mask])
+
+    kickers = np.select(conditions, [
+        0,
+        TOP_BITS[1][rank_mask & ~quads],
+        full_house_pair,
+        0,
+        0,
+        TOP_BITS[2][rank_mask & ~trips],
+        TOP_BITS[1][rank_mask & ~two_pairs],
+        TOP_BITS[3][rank_mask & ~pairs],
+    ], default=0)
+
+    scores = (category << 26) | (primary << 13) | kickers
+    return scores, category
+
+
+def draws_batch(hole: np.ndarray, board: np.ndarray) -> np.ndarray:
+    """
+    Draws de um lote de mãos (flop/turn)
+
+    Um draw só conta se usar carta da mão: flush draw exige carta do naipe
+    na mão, e os outs de sequência são os que o board sozinho não tem.
+
+    Args:
+        hole: Matriz int (n, 2) das cartas da mão
+        board: Matriz int (n, k) do board, -1 como padding
+
+    Returns:
+        Matriz bool (n, 4) na ordem de DRAW_FLAGS (tudo False sem flop ou no river)
+    """
+    hole = np.asarray(hole, dtype=np.int64)
+    board = np.asarray(board, dtype=np.int64)
+
+    hole_suits = _suit_masks(hole)
+    board_suits = _suit_masks(board)
+    combined_suits = hole_suits | board_suits
+
+    board_cards = (board >= 0).sum(axis=1)
+    open_street = (board_cards >= 3) & (board_cards <= 4)
+
+    combined_count = POPCOUNT[combined_suits]
+    made_flush = combined_count.max(axis=1) >= 5
+    flush_draw = ((combined_count == 4) & (hole_suits > 0)).any(axis=1) & ~made_flush
+
+    board_ranks = np.bitwise_or.reduce(board_suits, axis=1)
+    combined_ranks = np.bitwise_or.reduce(combined_suits, axis=1)
+    outs = POPCOUNT[STRAIGHT_OUTS[combined_ranks] & ~STRAIGHT_OUTS[board_ranks]]
+
+    oesd = outs >= 2
+    gutshot = outs == 1
+
+    flags = np.stack([flush_draw, oesd, gutshot, flush_draw & (oesd | gutshot)], axis=1)
+    return flags & open_street[:, None]
+
+
+def classify_batch(
+    hole_cards: Sequence[Sequence[str]],
+    boards: Sequence[Sequence[str]]
+) -> Tuple[List[Optional[str]], List[Optional[Dict]]]:
+    """
+    Força de mão e draws de um lote (cartas em texto)
+
+    Args:
+        hole_cards: Cartas de cada mão (ex: [['Ah', 'Qh'], ...])
+        boards: Board visível de cada mão (vazio no preflop)
+
+    Returns:
+        (categoria em CATEGORIES ou None se a mão for inválida,
+         dict de DRAW_FLAGS ou None no preflop)
+    """
+    if not len(hole_cards):
+        return [], []
+
+    hole = encode_cards(hole_cards, 2)
+    board = encode_cards(boards, 5)
+
+    _, categories = evaluate_batch(np.concatenate([hole, board], axis=1))
+    flags = draws_batch(hole, board)
+
+    known = (hole >= 0).all(axis=1)
+    has_board = (board >= 0).any(axis=1)
+
+    labels = [CATEGORIES[c] if ok else None for c, ok in zip(categories.tolist(), known.tolist())]
+    draws = [
+        dict(zip(DRAW_FLAGS, row)) if ok and on_board else None
+        for row, ok, on_board in zip(flags.tolist(), known.tolist(), has_board.tolist())
+    ]
+
+    return labels, draws
+
+
+# ============================================
+# AVALIAÇÃO ESCALAR
+# ============================================
+
+def evaluate(cards: Sequence[str]) -> Tuple[int, str]:
+    """
+    Avalia uma mão de até 7 cartas (mesmo score de evaluate_batch)
+
+    Returns:
+        (score comparável, categoria em CATEGORIES)
+    """
+    suit_masks = [0, 0, 0, 0]
+
+    for card in cards:
+        index = card_index(card)
+        if index >= 0:
+            suit_masks[index & 3] |= 1 << (index >> 2)
+
+    rank_mask = suit_masks[0] | suit_masks[1] | suit_masks[2] | suit_masks[3]
+    quads, trips, pairs = _rank_groups(*suit_masks)
+
+    flush_mask = max(suit_masks, key=lambda mask: _POPCOUNT[mask])
+    is_flush = _POPCOUNT[flush_mask] >= 5
+    straight_flush_high = _STRAIGHT_HIGH[flush_mask] if is_flush else -1
+    straight_high = _STRAIGHT_HIGH[rank_mask]
+
+    top1, top2, top3, top5 = _TOP_BITS[1], _TOP_BITS[2], _TOP_BITS[3], _TOP_BITS[5]
+    trips_top = top1[trips]
+    full_house_pair = top1[(trips & ~trips_top) | pairs]
+
+    if straight_flush_high >= 0:
+        category, primary, kickers = 8, 1 << straight_flush_high, 0
+    elif quads:
+        category, primary, kickers = 7, quads, top1[rank_mask & ~quads]
+    elif trips and full_house_pair:
+        category, primary, kickers = 6, trips_top, full_house_pair
+    elif is_flush:
+        category, primary, kickers = 5, top5[flush_mask], 0
+    elif straight_high >= 0:
+        category, primary, kickers = 4, 1 << straight_high, 0
+    elif trips:
+        category, primary, kickers = 3, trips_top, top2[rank_mask & ~trips]
+    elif _POPCOUNT[pairs] >= 2:
+        two_pairs = top2[pairs]
+        category, primary, kickers = 2, two_pairs, top1[rank_mask & ~two_pairs]
+    elif pairs:
+        category, primary, kickers = 1, pairs, top3[rank_mask & ~pairs]
+    else:
+        category, primary, kickers = 0, top5[rank_mask], 0
+
+    return (category << 26) | (primary << 13) | kickers, CATEGORIES[category]
+
+
+def hand_draws(hole: Sequence[str], board: Sequence[str]) -> Dict[str, bool]:
+    """Draws de uma mão (mesma regra de draws_batch)"""
+    hole_suits = [0, 0, 0, 0]
+    board_suits = [0, 0, 0, 0]
+
+    for cards, masks in ((hole, hole_suits), (board, board_suits)):
+        for card in cards:
+            index = card_index(card)
+            if index >= 0:
+                masks[index & 3] |= 1 << (index >> 2)
+
+    combined = [h | b for h, b in zip(hole_suits, board_suits)]
+    board_cards = sum(_POPCOUNT[mask] for mask in board_suits)
+
+    if not 3 <= board_cards <= 4:
+        return dict.fromkeys(DRAW_FLAGS, False)
+
+    made_flush = any(_POPCOUNT[mask] >= 5 for mask in combined)
+    flush_draw = not made_flush and any(
+        _POPCOUNT[mask] == 4 and hole_mask
+        for mask, hole_mask in zip(combined, hole_suits)
+    )
+
+    board_ranks = board_suits[0] | board_suits[1] | board_suits[2] | board_suits[3]
+    combined_ranks = combined[0] | combined[1] | combined[2] | combined[3]
+    outs = _POPCOUNT[_STRAIGHT_OUTS[combined_ranks] & ~_STRAIGHT_OUTS[board_ranks]]
+
+    return {
+        'flush_draw': flush_draw,
+        'oesd': outs >= 2,
+        'gutshot': outs == 1,
+        'combo_draw': flush_draw and outs >= 1,
+    }
+
+
+def draw_label(draws: Optional[Dict]) -> str:
+    """Draw mais forte de um dict de DRAW_FLAGS ('none' se nenhum)"""
+    if isinstance(draws, dict):
+        for flag in ('combo_draw', 'flush_draw', 'oesd', 'gutshot'):
+            if draws.get(flag):
+                return flag
+    return 'none'
@@ -1,7 +1,14 @@
 """
 Index Builder - Constrói e gerencia índices FAISS
 
-Cria índices particionados por vilão para busca eficiente
+Cria índices particionados por vilão para busca eficiente. O layout dos
+vetores vem do feature schema gravado no diretório de índices; índices de
+outro schema são recusados na construção e na carga.
+
+Com embedding 'weighted' no schema, os vetores entram no índice com cada
+bloco normalizado e escalado por sqrt(peso) (mais o crédito por bloco
+ausente, ver similarity.py) e a busca usa produto interno; a busca pode
+reranquear os candidatos pela similaridade ponderada exata.
 """
 
 import faiss
@@ -14,6 +21,17 @@ import json
 from loguru import logger
 import pickle
 
+from src.vectorization.feature_schema import FeatureSchema
+from src.vectorization.similarity import BlockLayout, WeightedSimilarityKernel
+from src.vectorization.vectorizer import FeatureConfig
+
+# Candidatos buscados por resultado quando a busca reranqueia (k * RERANK_FACTOR)
+RERANK_FACTOR = 4
+
+# Qualidade da busca HNSW (benchmarks/recall_benchmark.py: 64 -> 128 sobe o
+# recall@10 de ~0.87 para ~0.95 no embedding weighted, ~0.03 ms a mais)
+HNSW_EF_SEARCH = 128
+
 
 @dataclass
 class IndexMetadata:
@@ -25,6 +43,7 @@ class IndexMetadata:
     created_at: str
     decision_point_ids: List[str]  # Mapeamento de IDs
     stats: Dict
+    schema_hash: Optional[str] = None  # Feature schema dos vetores (None em índices antigos)
 
     def to_dict(self) -> Dict:
         return asdict(self)
@@ -47,28 +66,55 @@ class IndexBuilder:
     Constrói e gerencia índices FAISS particionados por vilão
     """
 
-    def __init__(self, indices_dir: Path, dimension: int = 104):
+    def __init__(
+        self,
+        indices_dir: Path,
+        dimension: Optional[int] = None,
+        schema: Optional[FeatureSchema] = None
+    ):
         """
         Args:
             indices_dir: Diretório para salvar índices
-            dimension: Dimensão dos vetores
+            dimension: Dimensão esperada dos vetores (só validação; vem do schema)
+            schema: Feature schema dos vetores. Se None, usa o gravado em
+                indices_dir ou, sem artefato, o da FeatureConfig padrão
         """
         self.indices_dir = Path(indices_dir)
         self.indices_dir.mkdir(parents=True, exist_ok=True)
 
-        self.dimension = dimension
+        # Schema gravado junto dos índices existentes (None se não houver)
+        self.stored_schema = FeatureSchema.load(self.indices_dir) if FeatureSchema.exists(self.indices_dir) else None
+
+        if schema is None:
+            schema = self.stored_schema
+        if schema is None:
+            logger.warning(f"Nenhum feature schema em {self.indices_dir}, usando a FeatureConfig padrão")
+            schema = FeatureSchema.from_config(FeatureConfig())
+
+        if dimension is not None and dimension != schema.total_dimensions:
+            raise ValueError(
+                f"Dimensão {dimension} não corresponde ao feature schema "
+                f"{schema.schema_hash[:12]} ({schema.total_dimensions} dims)"
+            )
+
+        self.schema = schema
+        self.dimension = schema.total_dimensions
+        self.layout = BlockLayout(schema, self.dimension)
         self.indices = {}  # {villain_name: faiss.Index}
         self.metadata = {}  # {villain_name: IndexMetadata}
+        self.decision_ids = {}  # {villain_name: [decision_id]}
 
         logger.info(f"IndexBuilder inicializado")
         logger.info(f"Diretório de índices: {self.indices_dir}")
         logger.info(f"Dimensão dos vetores: {self.dimension}")
+        logger.info(f"Feature schema: {self.schema.schema_hash[:12]} (embedding {self.schema.embedding})")
 
     def build_indices_from_df(
         self,
         df: pd.DataFrame,
         index_type: str = "HNSW",
-        hnsw_m: int = 32
+        hnsw_m: int = 32,
+        replace: bool = False
     ):
         """
         Constrói índices FAISS a partir de DataFrame com decision points
@@ -80,7 +126,14 @@ class IndexBuilder:
                 - decision_id
             index_type: Tipo de índice ("HNSW", "Flat", "IVF")
             hnsw_m: Parâmetro M para HNSW (conexões por nó)
+            replace: Apagar índices de outro feature schema em vez de recusar
+
+        Raises:
+            ValueError: Se o diretório tem índices de outro schema (sem replace)
+                ou algum vetor não tem a dimensão do schema
         """
+        self._prepare_schema(replace)
+
         logger.info(f"\nConstruindo índices FAISS ({index_type})...")
         logger.info(f"Total de decision points: {len(df)}")
 
@@ -98,8 +151,8 @@ class IndexBuilder:
 
             logger.info(f"Decision points: {len(villain_df)}")
 
-            # Extrair vetores
-            vectors = self._extract_vectors_from_df(villain_df)
+            # Extrair vetores (alinhados com os decision IDs) no embedding do schema
+            vectors = self._embed(self._extract_vectors_from_df(villain_df))
 
             if len(vectors) == 0:
                 logger.warning(f"Nenhum vetor válido para {villain}, pulando...")
@@ -126,6 +179,52 @@ class IndexBuilder:
         logger.info(f"Total de índices: {len(self.indices)}")
         logger.info(f"Localização: {self.indices_dir}")
 
+    def _prepare_schema(self, replace: bool):
+        """
+        Confere o schema gravado no diretório e grava o atual
+
+        Índices de outro schema (ou antigos, de outra dimensão) são recusados;
+        com replace=True são apagados antes da construção.
+        """
+        stale = [
+            villain for villain in self.list_available_villains()
+            if not self._is_compatible(self._read_metadata(villain))
+        ]
+        schema_changed = self.stored_schema is not None and not self.stored_schema.is_compatible(self.schema)
+
+        if (stale or schema_changed) and not replace:
+            stored = self.stored_schema.schema_hash[:12] if self.stored_schema else "sem schema"
+            raise ValueError(
+                f"{self.indices_dir} tem índices de outro feature schema ({stored}, "
+                f"{len(stale)} índices incompatíveis) e o atual é {self.schema.schema_hash[:12]}; "
+                f"use replace=True (--replace-indices) ou outro diretório"
+            )
+
+        if schema_changed:
+            stale = self.list_available_villains()
+        for villain in stale:
+            logger.warning(f"Removendo índice de outro feature schema: {villain}")
+            for suffix in (".faiss", "_metadata.json", "_ids.pkl"):
+                (self.indices_dir / f"{villain}{suffix}").unlink(missing_ok=True)
+            self.indices.pop(villain, None)
+            self.metadata.pop(villain, None)
+            self.decision_ids.pop(villain, None)
+
+        self.schema.save(self.indices_dir)
+        self.stored_schema = self.schema
+
+    def _read_metadata(self, villain_name: str) -> Optional[IndexMetadata]:
+        metadata_path = self.indices_dir / f"{villain_name}_metadata.json"
+        return IndexMetadata.load(metadata_path) if metadata_path.exists() else None
+
+    def _is_compatible(self, metadata: Optional[IndexMetadata]) -> bool:
+        """Índice gravado com o schema atual (antigos sem hash: raw, só a dimensão)"""
+        if metadata is None:
+            return False
+        if metadata.schema_hash is None:
+            return self.schema.embedding == 'raw' and metadata.dimension == self.dimension
+        return metadata.schema_hash == self.schema.schema_hash
+
     def _extract_vectors_from_df(self, df: pd.DataFrame) -> np.ndarray:
         """
         Extrai vetores do DataFrame
@@ -134,31 +233,36 @@ class IndexBuilder:
             df: DataFrame com coluna 'context_vector'
 
         Returns:
-            Array numpy de shape [n_samples, dimension]
-        """
-        vectors = []
-
-        for idx, row in df.iterrows():
-            vec = row.get('context_vector')
+            Array numpy de shape [n_samples, dimension], uma linha por decision point
 
-            # Converter para numpy array se necessário
-            if isinstance(vec, list):
-                vec = np.array(vec, dtype=np.float32)
-            elif isinstance(vec, str):
-                # Pode estar serializado como string
-                try:
-                    vec = np.array(json.loads(vec), dtype=np.float32)
-                except:
-                    logger.warning(f"Não foi possível parsear vetor do índice {idx}")
-                    continue
-
-            if vec is not None and len(vec) == self.dimension:
-                vectors.append(vec)
+        Raises:
+            ValueError: Se algum vetor falta, não parseia ou tem outra dimensão
+        """
+        vectors = df['context_vector'].tolist()
+
+        # Pode estar serializado como string
+        vectors = [json.loads(vec) if isinstance(vec, str) else vec for vec in vectors]
+
+        invalid = [
+            i for i, vec in enumerate(vectors)
+            if vec is None or np.ndim(vec) != 1 or len(vec) != self.dimension
+        ]
+        if invalid:
+            raise ValueError(
+                f"{len(invalid)} de {len(vectors)} vetores sem a dimensão do feature schema "
+                f"{self.schema.schema_hash[:12]} ({self.dimension}); revetorize com o schema atual"
+            )
 
         if len(vectors) == 0:
             return np.array([], dtype=np.float32).reshape(0, self.dimension)
 
-        return np.array(vectors, dtype=np.float32)
+        return np.stack(vectors).astype(np.float32, copy=False)
+
+    def _embed(self, vectors: np.ndarray, query: bool = False) -> np.ndarray:
+        """Vetores do Vectorizer -> espaço do índice (embedding do schema)"""
+        if self.schema.embedding == 'weighted':
+            return self.layout.embed(vectors, self.schema.missing_block_credit, query=query)
+        return vectors
 
     def _create_faiss_index(
         self,
@@ -190,11 +294,11 @@ class IndexBuilder:
 
             # Configurações
             index.hnsw.efConstruction = 200  # Qualidade da construção
-            index.hnsw.efSearch = 64         # Qualidade da busca
+            index.hnsw.efSearch = HNSW_EF_SEARCH  # Qualidade da busca
 
             logger.info(f"  HNSW M: {hnsw_m}")
             logger.info(f"  efConstruction: 200")
-            logger.info(f"  efSearch: 64")
+            logger.info(f"  efSearch: {HNSW_EF_SEARCH}")
 
         elif index_type == "Flat":
             # Flat (busca exata, mais lento mas preciso)
@@ -276,7 +380,8 @@ class IndexBuilder:
             index_type=type(index).__name__,
             created_at=datetime.now().isoformat(),
             decision_point_ids=decision_ids[:100],  # Primeiros 100 para referência
-            stats=stats
+            stats=stats,
+            schema_hash=self.schema.schema_hash
         )
 
         # Salvar metadata
@@ -286,6 +391,7 @@ class IndexBuilder:
         # Armazenar em memória
         self.indices[villain_name] = index
         self.metadata[villain_name] = metadata
+        self.decision_ids[villain_name] = decision_ids
 
     def load_index(self, villain_name: str) -> Tuple[faiss.Index, IndexMetadata, List[str]]:
         """
@@ -296,6 +402,10 @@ class IndexBuilder:
 
         Returns:
             (index, metadata, decision_ids)
+
+        Raises:
+            FileNotFoundError: Se não há índice para o vilão
+            ValueError: Se o índice foi gravado com outro feature schema
         """
         index_path = self.indices_dir / f"{villain_name}.faiss"
         metadata_path = self.indices_dir / f"{villain_name}_metadata.json"
@@ -310,6 +420,15 @@ class IndexBuilder:
         # Carregar metadata
         metadata = IndexMetadata.load(metadata_path)
 
+        if not self._is_compatible(metadata):
+            raise ValueError(
+                f"Índice de {villain_name} foi gravado com outro feature schema "
+                f"({(metadata.schema_hash or 'sem hash')[:12]}, {metadata.dimension} dims); "
+                f"o atual é {self.schema.schema_hash[:12]} ({self.dimension} dims)"
+            )
+        if metadata.schema_hash is None:
+            logger.warning(f"Índice de {villain_name} sem schema_hash (antigo); aceito pela dimensão")
+
         # Carregar IDs
         with open(ids_path, 'rb') as f:
             decision_ids = pickle.load(f)
@@ -324,41 +443,76 @@ class IndexBuilder:
         self,
         villain_name: str,
         query_vector: np.ndarray,
-        k: int = 50
+        k: int = 50,
+        rerank: bool = False
     ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """
         Busca k-nearest neighbors
 
         Args:
             villain_name: Nome do vilão
-            query_vector: Vetor de query [dimension]
+            query_vector: Vetor de query [dimension] (saída do Vectorizer)
             k: Número de vizinhos a retornar
+            rerank: Buscar k * RERANK_FACTOR candidatos e reordená-los pela
+                similaridade ponderada exata (calculate_weighted_similarity)
 
         Returns:
-            (distances, indices, decision_ids)
+            (distances, indices, decision_ids). distances é a distância L2
+            (embedding raw), o produto interno (weighted) ou, com rerank, a
+            similaridade ponderada exata; nos dois últimos, maior = mais similar
         """
         # Carregar índice se não estiver em memória
         if villain_name not in self.indices:
             index, metadata, decision_ids = self.load_index(villain_name)
             self.indices[villain_name] = index
             self.metadata[villain_name] = metadata
+            self.decision_ids[villain_name] = decision_ids
         else:
             index = self.indices[villain_name]
-            # Carregar IDs
-            ids_path = self.indices_dir / f"{villain_name}_ids.pkl"
-            with open(ids_path, 'rb') as f:
-                decision_ids = pickle.load(f)
+            decision_ids = self.decision_ids[villain_name]
 
         # Reshape query vector
         query_vector = query_vector.reshape(1, -1).astype(np.float32)
 
-        # Buscar
-        distances, indices = index.search(query_vector, k)
+        if query_vector.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query vector com {query_vector.shape[1]} dimensões; "
+                f"o feature schema tem {self.dimension}"
+            )
+
+        # Buscar no espaço do índice
+        query_embedding = self._embed(query_vector, query=True)
+        distances, indices = index.search(query_embedding, k * RERANK_FACTOR if rerank else k)
+        distances, indices = distances[0], indices[0]
+
+        if self.schema.embedding == 'weighted':
+            # L2² com normas iguais no índice -> produto interno
+            norm2 = self.layout.embedding_norm2(self.schema.missing_block_credit)
+            distances = (float(np.dot(query_embedding[0], query_embedding[0])) + norm2 - distances) / 2
+
+        # FAISS completa com -1 quando há menos de k vetores
+        found = indices >= 0
+        distances, indices = distances[found], indices[found]
+
+        if rerank and len(indices):
+            # Rerank exato: normalização por bloco igual para vetores raw e weighted
+            candidates = self._reconstruct(index, indices)[:, :self.dimension]
+            kernel = WeightedSimilarityKernel(candidates, self.schema)
+            distances, order = kernel.top_k(query_vector[0], k)
+            indices = indices[order]
 
         # Mapear índices para decision IDs
-        result_ids = [decision_ids[idx] for idx in indices[0] if idx < len(decision_ids)]
+        result_ids = [decision_ids[idx] for idx in indices if idx < len(decision_ids)]
+
+        return distances, indices, result_ids
+
+    def _reconstruct(self, index: faiss.Index, positions: np.ndarray) -> np.ndarray:
+        """Vetores gravados no índice (espaço do índice) nas posições dadas"""
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None and not ivf.direct_map.type:
+            ivf.make_direct_map()
 
-        return distances[0], indices[0], result_ids
+        return index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
 
     def list_available_villains(self) -> List[str]:
         """
@@ -385,6 +539,7 @@ class IndexBuilder:
         summary = {
             "total_indices": 0,
             "total_vectors": 0,
+            "schema_hash": self.schema.schema_hash,
             "villains": []
         }
 
@@ -400,7 +555,8 @@ class IndexBuilder:
                 summary["villains"].append({
                     "name": villain,
                     "vectors": metadata.total_vectors,
-                    "created_at": metadata.created_at
+                    "created_at": metadata.created_at,
+                    "compatible": self._is_compatible(metadata)
                 })
 
         return summary
@@ -434,7 +590,7 @@ if __name__ == "__main__":
     logger.info(f"Vilões únicos: {df['villain_name'].nunique()}")
 
     # Criar IndexBuilder
-    builder = IndexBuilder(indices_dir=INDICES_DIR, dimension=104)
+    builder = IndexBuilder(indices_dir=INDICES_DIR)
 
     # Construir índices
     builder.build_indices_from_df(df, index_type="HNSW", hnsw_m=32)
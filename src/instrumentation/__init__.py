@@ -0,0 +1,8 @@
+"""
+Instrumentation module - Stage timers, per-file latency and profiling hooks
+"""
+
+from .stage_timer import Instrumentation
+from .profiler import profile_run
+
+__all__ = ["Instrumentation", "profile_run"]
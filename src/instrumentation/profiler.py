@@ -0,0 +1,54 @@
+"""
+Profiler - Hook opcional de cProfile por execução do pipeline
+
+Desligado por padrão. Com um caminho de saída, grava o perfil bruto
+(.prof, para snakeviz/pstats) e um relatório texto com as funções de
+maior tempo acumulado.
+"""
+
+import cProfile
+import io
+import pstats
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from loguru import logger
+
+
+@contextmanager
+def profile_run(output_path: Optional[Path], top: int = 40) -> Iterator[Optional[cProfile.Profile]]:
+    """
+    Perfila o bloco com cProfile e grava o relatório ao sair
+
+    Args:
+        output_path: Base dos arquivos de saída (<base>.prof e <base>.txt);
+            None desliga o profiler
+        top: Funções listadas no relatório texto
+
+    Yields:
+        O cProfile.Profile ativo (None se desligado)
+    """
+    if output_path is None:
+        yield None
+        return
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+        prof_path = output_path.with_suffix(".prof")
+        profiler.dump_stats(prof_path)
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        report_path = output_path.with_suffix(".txt")
+        report_path.write_text(report.getvalue(), encoding="utf-8")
+
+        logger.info(f"Perfil gravado em {prof_path} (relatório: {report_path})")
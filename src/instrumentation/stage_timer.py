@@ -0,0 +1,130 @@
+"""
+Stage Timer - Tempo por etapa e latência por arquivo
+
+Acumula o tempo gasto em cada etapa (read/split, convert, write, load,
+extract...) e monta um histograma da latência por arquivo, guardando os
+arquivos mais lentos. É barato o bastante para ficar sempre ligado:
+os loops quentes usam `add` com perf_counter, sem context manager.
+"""
+
+import heapq
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from loguru import logger
+
+
+# Limites superiores (ms) dos buckets do histograma de latência por arquivo
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Instrumentation:
+    """
+    Timers por etapa + histograma de latência por arquivo
+    """
+
+    def __init__(self, slowest: int = 10):
+        """
+        Args:
+            slowest: Quantos arquivos mais lentos guardar
+        """
+        self.slowest = slowest
+
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.histogram: List[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.files = 0
+        self._slowest: List[tuple] = []  # min-heap de (segundos, arquivo, mãos)
+
+    # ============================================
+    # REGISTRO
+    # ============================================
+
+    def add(self, stage: str, seconds: float, count: int = 1):
+        """Soma `seconds` (e `count` chamadas) à etapa"""
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {"seconds": 0.0, "calls": 0}
+        entry["seconds"] += seconds
+        entry["calls"] += count
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Cronometra um bloco como uma chamada da etapa"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def seconds(self, stage: str) -> float:
+        """Tempo acumulado da etapa (0 se nunca registrada)"""
+        entry = self.stages.get(stage)
+        return entry["seconds"] if entry else 0.0
+
+    def record_file(self, name: str, seconds: float, hands: int = 0):
+        """Registra a latência de um arquivo no histograma e no ranking dos mais lentos"""
+        self.files += 1
+
+        ms = seconds * 1000
+        bucket = len(LATENCY_BUCKETS_MS)
+        for i, limit in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= limit:
+                bucket = i
+                break
+        self.histogram[bucket] += 1
+
+        item = (seconds, str(name), hands)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def merge(self, other: Dict):
+        """Incorpora um snapshot (to_dict) de outro processo"""
+        for stage, entry in other.get("stages", {}).items():
+            self.add(stage, entry["seconds"], entry["calls"])
+
+        for i, count in enumerate(other.get("histogram", {}).values()):
+            self.histogram[i] += count
+        self.files += other.get("files", 0)
+
+        for item in other.get("slowest_files", []):
+            entry = (item["seconds"], item["file"], item["hands"])
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    # ============================================
+    # RELATÓRIO
+    # ============================================
+
+    def to_dict(self) -> Dict:
+        """Snapshot serializável em JSON"""
+        labels = [f"<={limit}ms" for limit in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+
+        return {
+            "stages": {stage: dict(entry) for stage, entry in self.stages.items()},
+            "files": self.files,
+            "histogram": dict(zip(labels, self.histogram)),
+            "slowest_files": [
+                {"file": name, "seconds": seconds, "hands": hands}
+                for seconds, name, hands in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def log_summary(self, title: Optional[str] = None):
+        """Loga o tempo por etapa e os arquivos mais lentos"""
+        if title:
+            logger.info(title)
+
+        total = sum(entry["seconds"] for entry in self.stages.values())
+        for stage, entry in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"]):
+            share = entry["seconds"] / total * 100 if total > 0 else 0.0
+            logger.info(f"  {stage:<12} {entry['seconds']:>9.3f}s  {share:5.1f}%  ({entry['calls']} chamadas)")
+
+        if self._slowest:
+            logger.info(f"  Arquivos mais lentos ({self.files} arquivos):")
+            for seconds, name, hands in sorted(self._slowest, reverse=True)[:5]:
+                logger.info(f"    {seconds * 1000:>9.1f} ms  {hands:>6} mãos  {name}")
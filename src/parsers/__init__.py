@@ -3,5 +3,7 @@ Parsers module - Multi-format hand history parsers
 """
 
 from .unified_parser import UnifiedParser
+from .ingest_manifest import IngestManifest
+from .hand_index import HandIdIndex
 
-__all__ = ["UnifiedParser"]
+__all__ = ["UnifiedParser", "IngestManifest", "HandIdIndex"]
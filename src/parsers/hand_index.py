@@ -0,0 +1,106 @@
+"""
+Hand ID Index - Conjunto persistente dos hand_ids já ingeridos
+
+IDs numéricos (iPoker gamecode, PokerStars Hand #) ficam em um array
+uint64 ordenado, consultado por busca binária; IDs não numéricos caem num
+conjunto exato de strings. O UnifiedParser consulta o índice antes de
+converter cada mão para pular duplicatas ao custo apenas do parse.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Set
+
+import numpy as np
+from loguru import logger
+
+
+class HandIdIndex:
+    """
+    Índice de hand_ids persistido em .npz
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Arquivo .npz do índice (criado no primeiro save)
+        """
+        self.path = Path(path)
+
+        self._sorted = np.empty(0, dtype=np.uint64)
+        self._pending: Set[int] = set()     # Numéricos adicionados desde o último merge
+        self._other: Set[str] = set()       # IDs não numéricos (fallback exato)
+
+        self.load()
+
+    def load(self):
+        """Carrega o índice do disco (se existir)"""
+        if not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path) as data:
+                self._sorted = data['numeric'].astype(np.uint64, copy=False)
+                self._other = set(data['other'].tolist())
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Índice de hand_ids inválido em {self.path}, recriando: {e}")
+            self._sorted = np.empty(0, dtype=np.uint64)
+            self._other = set()
+
+    def save(self):
+        """Incorpora os IDs pendentes e salva de forma atômica"""
+        self._merge_pending()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, numeric=self._sorted, other=np.array(sorted(self._other), dtype=str))
+
+        os.replace(tmp_path, self.path)
+
+    def add(self, hand_id: str):
+        """Registra um hand_id"""
+        key = _numeric_key(hand_id)
+        if key is None:
+            self._other.add(hand_id)
+        else:
+            self._pending.add(key)
+
+    def add_many(self, hand_ids: Iterable[str]):
+        """Registra vários hand_ids"""
+        for hand_id in hand_ids:
+            self.add(hand_id)
+
+    def __contains__(self, hand_id: str) -> bool:
+        key = _numeric_key(hand_id)
+        if key is None:
+            return hand_id in self._other
+
+        if key in self._pending:
+            return True
+
+        idx = int(np.searchsorted(self._sorted, np.uint64(key)))
+        return idx < len(self._sorted) and int(self._sorted[idx]) == key
+
+    def __len__(self) -> int:
+        self._merge_pending()
+        return len(self._sorted) + len(self._other)
+
+    def _merge_pending(self):
+        if not self._pending:
+            return
+
+        pending = np.fromiter(self._pending, dtype=np.uint64, count=len(self._pending))
+        self._sorted = np.union1d(self._sorted, pending)
+        self._pending = set()
+
+
+def _numeric_key(hand_id: str) -> Optional[int]:
+    """Chave uint64 de um hand_id numérico (None se não couber sem ambiguidade)"""
+    if (
+        hand_id.isascii() and hand_id.isdigit() and len(hand_id) <= 19
+        and (hand_id[0] != '0' or hand_id == '0')
+    ):
+        return int(hand_id)
+    return None
@@ -0,0 +1,138 @@
+"""
+Ingest Manifest - Registro persistente dos arquivos de origem já processados
+
+Cada entrada é indexada pelo caminho do arquivo e guarda tamanho, mtime e
+hash do conteúdo, além dos hand_ids gerados e se o processamento falhou
+(partial: falhou depois de já gravar parte das mãos).
+O UnifiedParser consulta o manifest para reprocessar apenas arquivos novos
+ou alterados.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from loguru import logger
+
+
+class IngestManifest:
+    """
+    Manifest de ingestão persistido em JSON
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Arquivo JSON do manifest (criado no primeiro save)
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Carrega o manifest do disco (se existir)"""
+        if not self.path.exists():
+            self.entries = {}
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get('files', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifest inválido em {self.path}, recriando: {e}")
+            self.entries = {}
+
+    def save(self):
+        """Salva o manifest de forma atômica (arquivo temporário + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.entries}, f, indent=2)
+
+        os.replace(tmp_path, self.path)
+
+    def needs_parse(self, file_path: Path, retry_failed: bool = False) -> bool:
+        """
+        Verifica se um arquivo precisa ser (re)processado
+
+        Args:
+            file_path: Arquivo de origem
+            retry_failed: Reprocessar arquivos que falharam anteriormente
+
+        Returns:
+            True se o arquivo é novo, mudou, ou falhou (com retry_failed)
+        """
+        entry = self.entries.get(self._key(file_path))
+        if entry is None:
+            return True
+
+        stat = Path(file_path).stat()
+
+        if stat.st_size != entry['size']:
+            return True
+
+        if stat.st_mtime_ns != entry['mtime_ns']:
+            # Mesmo tamanho mas mtime diferente: confirmar pelo conteúdo
+            if _content_hash(file_path) != entry['sha256']:
+                return True
+            entry['mtime_ns'] = stat.st_mtime_ns
+
+        if entry['failed']:
+            return retry_failed
+
+        return False
+
+    def record(self, file_path: Path, hand_ids: List[str], failed: bool):
+        """
+        Registra o resultado do processamento de um arquivo
+
+        Args:
+            file_path: Arquivo de origem
+            hand_ids: IDs das mãos geradas a partir do arquivo (numa falha,
+                as gravadas antes do erro)
+            failed: Se o processamento falhou
+
+        Num arquivo reprocessado (alterado ou retry de falha), as mãos já
+        ingeridas são puladas como duplicadas e não voltam em hand_ids;
+        por isso os IDs se somam aos da entrada anterior.
+        """
+        key = self._key(file_path)
+        stat = Path(file_path).stat()
+
+        previous = self.entries.get(key, {}).get('hand_ids', [])
+        hand_ids = list(dict.fromkeys([*previous, *hand_ids]))
+
+        self.entries[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': _content_hash(file_path),
+            'hand_ids': hand_ids,
+            'failed': failed,
+            'partial': failed and bool(hand_ids),
+            'ingested_at': datetime.now().isoformat()
+        }
+
+    def hand_ids(self, file_path: Path) -> Optional[List[str]]:
+        """Hand IDs registrados para um arquivo (None se desconhecido)"""
+        entry = self.entries.get(self._key(file_path))
+        return entry['hand_ids'] if entry else None
+
+    def _key(self, file_path: Path) -> str:
+        return str(Path(file_path).resolve())
+
+
+def _content_hash(file_path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
@@ -7,14 +7,209 @@ Suporta:
 - ZIP (archives)
 """
 
+import io
+import mmap
+import os
 import re
+import time
 import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Iterator, Optional, Tuple
 from enum import Enum
 import tomli_w
 from loguru import logger
 
+from .ingest_manifest import IngestManifest
+from .hand_index import HandIdIndex
+from src.storage.hand_store import HandStore
+from src.instrumentation.stage_timer import Instrumentation
+
+
+SUPPORTED_EXTENSIONS = {".xml", ".txt", ".log", ".zip", ".phh"}
+
+# Bytes lidos do início de um arquivo/membro para detectar o formato
+_SNIFF_BYTES = 512
+
+_UTF8_BOM = b'\xef\xbb\xbf'
+
+# Etapas cronometradas por mão; o restante do tempo de um arquivo é read_split
+_PER_HAND_STAGES = ('convert', 'write', 'sink')
+
+# ============================================
+# PADRÕES PRÉ-COMPILADOS - iPoker TXT
+# ============================================
+
+_IPOKER_GAME_RE = re.compile(r'GAME #(\d+)')
+_IPOKER_SEAT_RE = re.compile(r'Seat (\d+): (\S+) \(€?([\d,\.]+) in chips\)\s*(DEALER)?')
+_IPOKER_BOARD_RE = re.compile(r'\*\*\* (FLOP|TURN|RIVER) \*\*\* \[([^\]]+)\]')
+_IPOKER_HU_SEAT_RE = re.compile(r'^Seat \d+: \S+', re.MULTILINE)
+
+# Uma linha de ação/resultado: "Jogador: <verbo> [valor]"
+# O grupo nomeado que casar por último (lastgroup) indica o tipo de token
+_IPOKER_LINE_RE = re.compile(
+    r'(?P<player>\S+): (?:'
+    r'Post (?P<post>Ante|SB|BB) €?(?P<post_amount>[\d,\.]+)'
+    r'|(?P<simple>Fold|Check)'
+    r'|(?P<verb>Call|Raise(?:\s+\(NF\))?|Bet|All-in(?:\(raise\))?) €?(?P<amount>[\d,\.]+)'
+    r'|wins €?(?P<win>[\d,\.]+)'
+    r'|Shows \[(?P<shows>[^\]]+)\]'
+    r')'
+)
+
+_IPOKER_POST_TYPES = {'Ante': 'ante', 'SB': 'sb', 'BB': 'bb'}
+_IPOKER_AMOUNT_TYPES = {'Cal': 'call', 'Rai': 'raise', 'Bet': 'bet', 'All': 'allin'}
+
+# ============================================
+# PADRÕES PRÉ-COMPILADOS - PokerStars TXT
+# ============================================
+
+# Nomes no PokerStars podem ter espaços ("LOSE SOME MONEY")
+_POKERSTARS_HU_SEAT_RE = re.compile(r'^Seat \d+: .+? \(\$?[\d,\.]+ in chips', re.MULTILINE)
+_POKERSTARS_HAND_ID_RE = re.compile(r'PokerStars Hand #(\d+)')
+_POKERSTARS_HEADER_RE = re.compile(r'PokerStars Hand #(\d+):[^(]*\(\$?([\d,\.]+)/\$?([\d,\.]+)')
+_POKERSTARS_SEAT_RE = re.compile(r'Seat (\d+): (.+?) \(\$?([\d,\.]+) in chips')
+_POKERSTARS_BUTTON_RE = re.compile(r'Seat #(\d+) is the button')
+_POKERSTARS_CARDS_RE = re.compile(r'\[([^\]]+)\]')
+_POKERSTARS_COLLECTED_RE = re.compile(r'(.+) collected \$?[\d,\.]+ from (?:main |side )?pot')
+_POKERSTARS_UNCALLED_RE = re.compile(r'Uncalled bet \(\$?([\d,\.]+)\) returned to (.+)')
+
+# Parte da linha após "Jogador: "
+_POKERSTARS_ACTION_RE = re.compile(
+    r'(?:posts (?P<post>small blind|big blind|the ante) \$?(?P<post_amount>[\d,\.]+)'
+    r'|(?P<simple>folds|checks)'
+    r'|(?P<verb>calls|bets) \$?(?P<amount>[\d,\.]+)'
+    r'|raises \$?[\d,\.]+ to \$?(?P<raise_to>[\d,\.]+)'
+    r'|shows \[(?P<shows>[^\]]+)\]'
+    r')(?P<all_in> and is all-in)?'
+)
+
+_POKERSTARS_POST_TYPES = {'small blind': 'sb', 'big blind': 'bb', 'the ante': 'ante'}
+_POKERSTARS_SIMPLE_TYPES = {'folds': 'fold', 'checks': 'check'}
+_POKERSTARS_AMOUNT_TYPES = {'calls': 'call', 'bets': 'bet'}
+
+# ============================================
+# TABELAS - iPoker XML
+# ============================================
+
+# <action type="..."> -> ação PHH ('allin' é resolvido para bet/call/raise)
+_IPOKER_XML_ACTIONS = {
+    '0': 'fold',
+    '1': 'sb',
+    '2': 'bb',
+    '3': 'call',
+    '4': 'check',
+    '5': 'bet',
+    '7': 'allin',
+    '15': 'ante',
+    '23': 'raise',
+}
+
+_IPOKER_XML_BOARD_TYPES = {'Flop', 'Turn', 'River'}
+
+# Inicial do marcador "*** FLOP/TURN/RIVER ***" -> índice da street em street_offsets
+_STREET_MARKERS = {'F': 1, 'T': 2, 'R': 3}
+
+
+def _source_name(source) -> str:
+    """Nome legível de uma fonte (Path, membro de ZIP ou outro stream)"""
+    if isinstance(source, (str, Path)):
+        return str(source)
+    return getattr(source, 'name', None) or repr(source)
+
+
+def _parse_amount(value: str) -> float:
+    """Converte valor monetário ('1,420', '€0.25') para float"""
+    return float(value.replace(',', ''))
+
+
+def _chip_increment(action: str, amount: float, put: float, street_bet: float) -> Tuple[str, float]:
+    """
+    Ação iPoker (XML ou TXT) -> (ação PHH, fichas colocadas no pote)
+
+    O valor de um raise é o total do jogador na street e vira incremento;
+    'allin' (valor já incremental) vira bet, call ou raise conforme o valor
+    a pagar na street.
+
+    Args:
+        action: Ação decodificada ('raise', 'allin', 'call', ...)
+        amount: Valor da ação no histórico
+        put: Fichas do jogador na street antes da ação
+        street_bet: Maior aposta da street antes da ação
+    """
+    if action == 'raise':
+        return action, max(amount - put, 0.0)
+
+    if action == 'allin':
+        if street_bet == 0:
+            return 'bet', amount
+        if put + amount <= street_bet:
+            return 'call', amount
+        return 'raise', amount
+
+    return action, amount
+
+
+def _street_offsets(starts: List[Optional[int]], n_actions: int) -> List[int]:
+    """
+    Offsets [preflop, flop, turn, river] do início de cada street em `actions`
+
+    Streets não alcançadas começam onde a seguinte (ou o fim da lista)
+    começa, então actions[offsets[i]:offsets[i + 1]] é sempre a street i.
+
+    Args:
+        starts: Índice da primeira ação de cada street (None = não alcançada)
+        n_actions: Total de ações da mão
+    """
+    offsets = [0, 0, 0, 0]
+    next_start = n_actions
+
+    for i in range(3, 0, -1):
+        if starts[i] is not None:
+            next_start = starts[i]
+        offsets[i] = next_start
+
+    return offsets
+
+
+def _normalize_newlines(text: str) -> str:
+    """Quebras '\r\n' e '\r' viram '\n' (universal newlines do modo texto)"""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _iter_hand_spans(buf, marker: bytes) -> Iterator[Tuple[int, int]]:
+    """
+    Localiza as mãos de um buffer (bytes ou mmap) sem copiá-lo
+
+    Uma mão começa em cada linha iniciada por `marker` e vai até a próxima;
+    texto antes da primeira mão (e o BOM UTF-8) é ignorado.
+
+    Args:
+        buf: Conteúdo do arquivo
+        marker: Prefixo de linha que abre uma mão
+
+    Yields:
+        (offset, length) de cada mão
+    """
+    size = len(buf)
+    start = len(_UTF8_BOM) if buf[:len(_UTF8_BOM)] == _UTF8_BOM else 0
+    needle = b'\n' + marker
+
+    if buf[start:start + len(marker)] == marker:
+        pos = start
+    else:
+        found = buf.find(needle, start)
+        pos = found + 1 if found != -1 else -1
+
+    while pos != -1:
+        found = buf.find(needle, pos)
+        end = found + 1 if found != -1 else size
+        yield pos, end - pos
+        pos = end if found != -1 else -1
+
 
 class HandFormat(Enum):
     """Formatos de hand history suportados"""
@@ -22,6 +217,7 @@ class HandFormat(Enum):
     TXT_IPOKER = "txt_ipoker"
     TXT_POKERSTARS = "txt_pokerstars"
     PHH = "phh"
+    ZIP = "zip"
     UNKNOWN = "unknown"
 
 
@@ -30,13 +226,50 @@ class UnifiedParser:
     Parser unificado que detecta formato automaticamente e converte para PHH
     """
 
-    def __init__(self, output_dir: Path):
+    def __init__(
+        self,
+        output_dir: Optional[Path],
+        manifest_path: Optional[Path] = None,
+        store_dir: Optional[Path] = None,
+        hand_index_path: Optional[Path] = None,
+        hand_sink: Optional[Callable[[Dict], None]] = None
+    ):
         """
         Args:
             output_dir: Diretório para salvar arquivos PHH convertidos
+                (None = não grava PHH; útil com hand_sink)
+            manifest_path: Manifest de ingestão (ativa o modo incremental em parse_directory)
+            store_dir: Hand store colunar; se informado, as mãos vão para o store
+                em vez de um arquivo .phh por mão
+            hand_index_path: Índice persistente de hand_ids; mãos já ingeridas
+                são puladas antes da conversão. Com store_dir é sempre usado
+                (padrão: store_dir/hand_index.npz), já que o store só acrescenta
+                shards e não sobrescreve mãos como os arquivos .phh
+            hand_sink: Callback chamado com cada mão convertida (dict PHH), no
+                processo atual; permite consumir as mãos sem reler do disco
         """
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.hand_sink = hand_sink
+
+        self.manifest = IngestManifest(manifest_path) if manifest_path else None
+        self.store = HandStore(store_dir) if store_dir else None
+
+        if self.store is not None and not hand_index_path:
+            hand_index_path = self.store.root / "hand_index.npz"
+
+        self.hand_index = None
+        if hand_index_path:
+            self.hand_index = HandIdIndex(hand_index_path)
+            if not self.hand_index.path.exists():
+                # Gravado já aqui para os workers não repetirem a varredura
+                self._seed_hand_index()
+                self.hand_index.save()
+
+        # Shards gravados pelos processos worker (modo store + paralelo)
+        self._worker_shards: List[Path] = []
 
         self.stats = {
             "total_files": 0,
@@ -44,9 +277,15 @@ class UnifiedParser:
             "hu_hands": 0,
             "converted": 0,
             "errors": 0,
+            "partial_files": 0,
+            "skipped_unchanged": 0,
+            "duplicates": 0,
             "by_format": {}
         }
 
+        # Tempo por etapa e latência por arquivo (fora de stats: não são contadores)
+        self.instrumentation = Instrumentation()
+
     def detect_format(self, file_path: Path) -> HandFormat:
         """
         Detecta formato do arquivo baseado em extensão e conteúdo
@@ -54,32 +293,52 @@ class UnifiedParser:
         Args:
             file_path: Caminho do arquivo
 
+        Returns:
+            HandFormat enum
+        """
+        head = b''
+
+        # Só é preciso ler o início do arquivo quando a extensão não basta
+        if file_path.suffix.lower() not in (".xml", ".phh", ".zip"):
+            with open(file_path, 'rb') as f:
+                head = f.read(_SNIFF_BYTES)
+
+        return self._detect_format_from_head(file_path.name, head)
+
+    def _detect_format_from_head(self, name: str, head: bytes) -> HandFormat:
+        """
+        Detecta formato a partir do nome e dos primeiros bytes do conteúdo
+
+        Usado tanto para arquivos em disco quanto para membros de ZIP.
+
+        Args:
+            name: Nome do arquivo (ou do membro do ZIP)
+            head: Primeiros bytes do conteúdo
+
         Returns:
             HandFormat enum
         """
         # Por extensão
-        ext = file_path.suffix.lower()
+        ext = Path(name).suffix.lower()
 
         if ext == ".xml":
             return HandFormat.XML_IPOKER
 
-        if ext in [".txt", ".log"]:
-            # Verificar conteúdo para distinguir PokerStars de iPoker
-            with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                first_line = f.readline()
-
-                if "PokerStars Hand #" in first_line:
-                    return HandFormat.TXT_POKERSTARS
-                elif "GAME #" in first_line:
-                    return HandFormat.TXT_IPOKER
-
         if ext == ".phh":
             return HandFormat.PHH
 
-        if ext == ".zip":
-            # ZIP pode conter múltiplos formatos
-            # Será processado separadamente
-            pass
+        if ext == ".zip" or head.startswith(b'PK\x03\x04'):
+            return HandFormat.ZIP
+
+        # Por conteúdo: distinguir PokerStars de iPoker pela primeira linha
+        first_line = head.decode('utf-8-sig', errors='ignore').lstrip().split('\n', 1)[0]
+
+        if "PokerStars Hand #" in first_line:
+            return HandFormat.TXT_POKERSTARS
+        elif "GAME #" in first_line:
+            return HandFormat.TXT_IPOKER
+        elif first_line.startswith('<?xml') or first_line.startswith('<session'):
+            return HandFormat.XML_IPOKER
 
         return HandFormat.UNKNOWN
 
@@ -93,6 +352,21 @@ class UnifiedParser:
 
         Returns:
             Lista de caminhos para arquivos PHH gerados
+            (no modo store: shards do hand store gravados)
+        """
+        outputs = self._collect_outputs(self._parse_path(file_path, filters))
+
+        if self.hand_index is not None:
+            self.hand_index.save()
+
+        return outputs
+
+    def _parse_path(self, file_path: Path, filters: Optional[Dict]) -> List[str]:
+        """
+        Detecta o formato de um arquivo em disco e o processa
+
+        Returns:
+            IDs das mãos convertidas
         """
         file_path = Path(file_path)
 
@@ -100,96 +374,275 @@ class UnifiedParser:
             logger.error(f"Arquivo não encontrado: {file_path}")
             return []
 
+        start = time.perf_counter()
+        per_hand_before = sum(self.instrumentation.seconds(s) for s in _PER_HAND_STAGES)
+
         # Detectar formato
         format_type = self.detect_format(file_path)
         logger.info(f"Processando {file_path.name} | Formato: {format_type.value}")
 
+        hand_ids = self._parse_source(format_type, file_path, filters)
+
+        # Leitura + separação das mãos (e detecção/filtros) = o que sobra do tempo do arquivo
+        elapsed = time.perf_counter() - start
+        per_hand = sum(self.instrumentation.seconds(s) for s in _PER_HAND_STAGES) - per_hand_before
+        self.instrumentation.add('read_split', max(elapsed - per_hand, 0.0))
+        self.instrumentation.record_file(str(file_path), elapsed, len(hand_ids))
+
+        return hand_ids
+
+    def _parse_source(self, format_type: HandFormat, source, filters: Optional[Dict]) -> List[str]:
+        """
+        Despacha uma fonte (arquivo em disco ou stream binário) para o parser do formato
+
+        Args:
+            format_type: Formato detectado
+            source: Path ou file-like binário (ex: membro de ZIP)
+            filters: Filtros para aplicar
+
+        Returns:
+            IDs das mãos convertidas
+        """
         self.stats["total_files"] += 1
         self.stats["by_format"][format_type.value] = \
             self.stats["by_format"].get(format_type.value, 0) + 1
 
         # Processar baseado no formato
         if format_type == HandFormat.XML_IPOKER:
-            return self._parse_xml_ipoker(file_path, filters)
+            return self._parse_xml_ipoker(source, filters)
 
         elif format_type == HandFormat.TXT_IPOKER:
-            return self._parse_txt_ipoker(file_path, filters)
+            return self._parse_txt_ipoker(source, filters)
 
         elif format_type == HandFormat.TXT_POKERSTARS:
-            return self._parse_txt_pokerstars(file_path, filters)
+            return self._parse_txt_pokerstars(source, filters)
 
         elif format_type == HandFormat.PHH:
             # Já está em PHH, apenas copiar se passar filtros
-            return self._copy_phh_if_valid(file_path, filters)
+            return self._copy_phh_if_valid(source, filters)
 
-        elif file_path.suffix.lower() == ".zip":
-            return self._parse_zip_archive(file_path, filters)
+        elif format_type == HandFormat.ZIP:
+            return self._parse_zip_archive(source, filters)
 
         else:
-            logger.warning(f"Formato não suportado: {file_path}")
+            logger.warning(f"Formato não suportado: {_source_name(source)}")
             return []
 
-    def parse_directory(self, input_dir: Path, filters: Optional[Dict] = None) -> List[Path]:
+    def parse_directory(
+        self,
+        input_dir: Path,
+        filters: Optional[Dict] = None,
+        workers: Optional[int] = 1,
+        chunk_size: int = 32,
+        retry_failed: bool = False
+    ) -> List[Path]:
         """
         Processa todos os arquivos de um diretório recursivamente
 
+        Com manifest configurado, apenas arquivos novos ou alterados são
+        processados (e os que falharam antes, se retry_failed=True).
+
         Args:
             input_dir: Diretório de input
             filters: Filtros para aplicar
+            workers: Número de processos (1 = sequencial, None = todos os núcleos)
+            chunk_size: Arquivos enviados a cada processo por tarefa
+            retry_failed: Reprocessar arquivos que falharam em execuções anteriores
 
         Returns:
-            Lista de todos os arquivos PHH gerados
+            Lista dos arquivos PHH gerados nesta execução
+            (no modo store: shards do hand store gravados)
         """
         input_dir = Path(input_dir)
-        all_phh_files = []
 
-        # Buscar todos os arquivos suportados
-        supported_extensions = [".xml", ".txt", ".log", ".zip", ".phh"]
+        # Buscar todos os arquivos suportados (uma única passada na árvore)
+        input_files = self._collect_input_files(input_dir)
+
+        if self.manifest is not None:
+            pending = [f for f in input_files if self.manifest.needs_parse(f, retry_failed)]
+            self.stats['skipped_unchanged'] += len(input_files) - len(pending)
+            input_files = pending
 
-        for ext in supported_extensions:
-            for file_path in input_dir.rglob(f"*{ext}"):
-                if file_path.is_file():
-                    phh_files = self.parse_file(file_path, filters)
-                    all_phh_files.extend(phh_files)
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers > 1 and self.hand_sink is not None:
+            # O callback vive neste processo; workers não o enxergam
+            logger.warning("hand_sink configurado: processando sequencialmente")
+            workers = 1
+
+        all_hand_ids = []
+
+        try:
+            if workers > 1 and len(input_files) > 1:
+                results = self._parse_files_parallel(input_files, filters, workers, chunk_size)
+            else:
+                results = (
+                    (file_path,) + self._parse_file_tracked(file_path, filters)
+                    for file_path in input_files
+                )
+
+            for file_path, hand_ids, failed in results:
+                all_hand_ids.extend(hand_ids)
+                if self.manifest is not None:
+                    self.manifest.record(file_path, hand_ids, failed)
+                if self.hand_index is not None:
+                    # Workers consultam o índice carregado do disco; o pai consolida
+                    self.hand_index.add_many(hand_ids)
+
+            outputs = self._collect_outputs(all_hand_ids)
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
+            if self.hand_index is not None:
+                self.hand_index.save()
 
         logger.info(f"\n{'='*60}")
         logger.info(f"RESUMO DO PROCESSAMENTO")
         logger.info(f"{'='*60}")
         logger.info(f"Total de arquivos processados: {self.stats['total_files']}")
+        if self.manifest is not None:
+            logger.info(f"Arquivos inalterados (pulados): {self.stats['skipped_unchanged']}")
         logger.info(f"Total de mãos encontradas: {self.stats['total_hands']}")
+        if self.hand_index is not None:
+            logger.info(f"Mãos duplicadas (puladas): {self.stats['duplicates']}")
         logger.info(f"Mãos HU filtradas: {self.stats['hu_hands']}")
         logger.info(f"Mãos convertidas: {self.stats['converted']}")
         logger.info(f"Erros: {self.stats['errors']}")
+        if self.stats['partial_files']:
+            logger.info(f"Arquivos com falha parcial (mãos anteriores ao erro mantidas): {self.stats['partial_files']}")
         logger.info(f"\nPor formato:")
         for fmt, count in self.stats['by_format'].items():
             logger.info(f"  {fmt}: {count} arquivo(s)")
+        self.instrumentation.log_summary("\nTempo por etapa:")
         logger.info(f"{'='*60}\n")
 
-        return all_phh_files
+        return outputs
+
+    def _parse_file_tracked(
+        self, file_path: Path, filters: Optional[Dict]
+    ) -> Tuple[List[str], bool]:
+        """
+        Processa um arquivo e indica se houve erro durante o processamento
+
+        Returns:
+            (IDs das mãos convertidas, falhou)
+        """
+        errors_before = self.stats['errors']
+        hand_ids = self._parse_path(file_path, filters)
+        return hand_ids, self.stats['errors'] > errors_before
+
+    def _collect_outputs(self, hand_ids: List[str]) -> List[Path]:
+        """
+        Caminhos de saída das mãos convertidas
+
+        No modo PHH, um arquivo por mão. No modo store, grava o shard pendente
+        e retorna os shards gravados (incluindo os dos processos worker).
+        """
+        if self.store is None:
+            if self.output_dir is None:
+                return []
+            return [self.output_dir / f"{hand_id}.phh" for hand_id in hand_ids]
+
+        self.store.flush()
+        shards = self._worker_shards + self.store.pop_written()
+        self._worker_shards = []
+        return shards
+
+    def _collect_input_files(self, input_dir: Path) -> List[Path]:
+        """
+        Lista os arquivos suportados de um diretório em uma única passada
+
+        Args:
+            input_dir: Diretório de input
+
+        Returns:
+            Lista ordenada de arquivos com extensão suportada
+        """
+        input_files = []
+
+        for root, _, file_names in os.walk(input_dir):
+            for file_name in file_names:
+                if os.path.splitext(file_name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    input_files.append(Path(root) / file_name)
+
+        input_files.sort()
+        return input_files
+
+    def _parse_files_parallel(
+        self,
+        input_files: List[Path],
+        filters: Optional[Dict],
+        workers: int,
+        chunk_size: int
+    ) -> Iterator[Tuple[Path, List[str], bool]]:
+        """
+        Distribui os arquivos entre processos e consolida os stats
+
+        Args:
+            input_files: Arquivos a processar
+            filters: Filtros para aplicar
+            workers: Número de processos
+            chunk_size: Arquivos por tarefa
+
+        Yields:
+            (arquivo de origem, IDs das mãos convertidas, falhou) à medida que os lotes terminam
+        """
+        chunk_size = max(1, chunk_size)
+        chunks = [
+            input_files[i:i + chunk_size]
+            for i in range(0, len(input_files), chunk_size)
+        ]
+
+        logger.info(
+            f"Processando {len(input_files)} arquivos em {workers} processos "
+            f"({len(chunks)} lotes de até {chunk_size})"
+        )
+
+        parser_kwargs = self._worker_kwargs()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_parse_files_chunk, parser_kwargs, chunk, filters)
+                for chunk in chunks
+            ]
+
+            for future in as_completed(futures):
+                file_results, worker_stats, worker_timings, worker_shards = future.result()
+                _merge_stats(self.stats, worker_stats)
+                self.instrumentation.merge(worker_timings)
+                self._worker_shards.extend(worker_shards)
+                yield from file_results
+
+    def _worker_kwargs(self) -> Dict:
+        """Argumentos para recriar este parser dentro de um processo worker"""
+        return {
+            'output_dir': self.output_dir,
+            'store_dir': self.store.root if self.store is not None else None,
+            'hand_index_path': self.hand_index.path if self.hand_index is not None else None
+        }
 
     # ============================================
     # PARSERS ESPECÍFICOS POR FORMATO
     # ============================================
 
-    def _parse_xml_ipoker(self, file_path: Path, filters: Optional[Dict]) -> List[Path]:
+    def _parse_xml_ipoker(self, source, filters: Optional[Dict]) -> List[str]:
         """
         Parser para XML do iPoker
 
-        Delega para o parser existente (simplificado aqui)
+        Processa o arquivo em modo streaming (iterparse): cada <game> é
+        convertido e descartado antes da leitura do próximo, então o uso de
+        memória não cresce com o tamanho da sessão.
         """
-        try:
-            import xml.etree.ElementTree as ET
+        hand_ids = []
 
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-
-            # Contar mãos
-            games = root.findall('.//game')
-            self.stats['total_hands'] += len(games)
+        try:
+            for game, hero in self._iter_xml_games(source):
+                self.stats['total_hands'] += 1
 
-            phh_files = []
+                if self._is_duplicate(game.get('gamecode', '')):
+                    continue
 
-            for game in games:
                 # Verificar se é HU
                 if filters and filters.get('heads_up_only', False):
                     players = game.findall('.//player')
@@ -199,44 +652,87 @@ class UnifiedParser:
                 self.stats['hu_hands'] += 1
 
                 # Converter para PHH
-                phh_data = self._xml_game_to_phh(game)
+                start = time.perf_counter()
+                phh_data = self._xml_game_to_phh(game, hero)
+                self.instrumentation.add('convert', time.perf_counter() - start)
 
                 if phh_data:
-                    # Salvar PHH
-                    hand_id = phh_data['metadata']['hand_id']
-                    phh_path = self.output_dir / f"{hand_id}.phh"
+                    hand_ids.append(self._emit_hand(phh_data))
 
-                    with open(phh_path, 'wb') as f:
-                        tomli_w.dump(phh_data, f)
+            return hand_ids
 
-                    phh_files.append(phh_path)
-                    self.stats['converted'] += 1
+        except Exception as e:
+            self._source_error(f"XML {_source_name(source)}", e, hand_ids)
+            return hand_ids
 
-            return phh_files
+    def _source_error(self, description: str, error: Exception, hand_ids: List[str]):
+        """
+        Registra um erro no meio de uma fonte
 
-        except Exception as e:
-            logger.error(f"Erro ao processar XML {file_path}: {e}")
-            self.stats['errors'] += 1
-            return []
+        As mãos emitidas antes do erro já foram gravadas e indexadas, então
+        continuam no retorno do parser: o arquivo fica como falha parcial
+        (failed no manifest, com os hand_ids gravados) em vez de sem mãos.
+        """
+        self.stats['errors'] += 1
+
+        if hand_ids:
+            self.stats['partial_files'] += 1
+            logger.error(f"Erro ao processar {description} após {len(hand_ids)} mãos (falha parcial): {error}")
+        else:
+            logger.error(f"Erro ao processar {description}: {error}")
+
+    def _iter_xml_games(self, source) -> Iterator[Tuple[ET.Element, str]]:
+        """
+        Itera sobre os elementos <game> de um XML iPoker sem carregar a árvore inteira
+
+        Cada <game> é entregue completo; depois que o consumidor termina,
+        o elemento é limpo e desanexado da raiz.
+
+        Args:
+            source: Caminho ou file-like do XML
+
+        Yields:
+            (elemento <game>, hero da sessão em <general><nickname>)
+        """
+        context = ET.iterparse(source, events=('start', 'end'))
+        root = None
+        hero = ''
+
+        for event, elem in context:
+            if event == 'start':
+                if root is None:
+                    root = elem
+                continue
 
-    def _parse_txt_pokerstars(self, file_path: Path, filters: Optional[Dict]) -> List[Path]:
+            if elem.tag == 'nickname' and not hero:
+                # Cabeçalho da sessão: lido antes do primeiro root.clear()
+                hero = (elem.text or '').strip()
+
+            elif elem.tag == 'game':
+                yield elem, hero
+
+                # Liberar a mão já convertida (e qualquer irmão já processado)
+                elem.clear()
+                root.clear()
+
+    def _parse_txt_pokerstars(self, source, filters: Optional[Dict]) -> List[str]:
         """
         Parser para TXT do PokerStars
 
-        Usa o parser existente test_pokerstars_parser.py como base
+        Mãos separadas lazily sobre o arquivo mapeado; cada uma convertida
+        por _pokerstars_hand_to_phh
         """
-        try:
-            # Ler arquivo
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                content = f.read()
+        hand_ids = []
 
-            # Separar mãos
-            hands = self._split_pokerstars_hands(content)
-            self.stats['total_hands'] += len(hands)
+        try:
+            # Mãos decodificadas uma a uma (arquivo mapeado em memória)
+            for hand_text in self._iter_pokerstars_hands(source):
+                self.stats['total_hands'] += 1
 
-            phh_files = []
+                hand_id = _POKERSTARS_HAND_ID_RE.match(hand_text)
+                if hand_id and self._is_duplicate(hand_id.group(1)):
+                    continue
 
-            for hand_text in hands:
                 # Verificar se é HU
                 if filters and filters.get('heads_up_only', False):
                     if not self._is_heads_up_pokerstars(hand_text):
@@ -245,42 +741,34 @@ class UnifiedParser:
                 self.stats['hu_hands'] += 1
 
                 # Converter para PHH
+                start = time.perf_counter()
                 phh_data = self._pokerstars_hand_to_phh(hand_text)
+                self.instrumentation.add('convert', time.perf_counter() - start)
 
                 if phh_data:
-                    # Salvar PHH
-                    hand_id = phh_data['metadata']['hand_id']
-                    phh_path = self.output_dir / f"{hand_id}.phh"
+                    hand_ids.append(self._emit_hand(phh_data))
 
-                    with open(phh_path, 'wb') as f:
-                        tomli_w.dump(phh_data, f)
-
-                    phh_files.append(phh_path)
-                    self.stats['converted'] += 1
-
-            return phh_files
+            return hand_ids
 
         except Exception as e:
-            logger.error(f"Erro ao processar TXT {file_path}: {e}")
-            self.stats['errors'] += 1
-            return []
+            self._source_error(f"TXT {_source_name(source)}", e, hand_ids)
+            return hand_ids
 
-    def _parse_txt_ipoker(self, file_path: Path, filters: Optional[Dict]) -> List[Path]:
+    def _parse_txt_ipoker(self, source, filters: Optional[Dict]) -> List[str]:
         """
         Parser para TXT do iPoker (formato GAME #)
         """
-        try:
-            # Ler arquivo
-            with open(file_path, 'r', encoding='utf-8-sig') as f:
-                content = f.read()
+        hand_ids = []
 
-            # Separar mãos
-            hands = self._split_ipoker_hands(content)
-            self.stats['total_hands'] += len(hands)
+        try:
+            # Mãos decodificadas uma a uma (arquivo mapeado em memória)
+            for hand_text in self._iter_ipoker_hands(source):
+                self.stats['total_hands'] += 1
 
-            phh_files = []
+                hand_id = _IPOKER_GAME_RE.match(hand_text)
+                if hand_id and self._is_duplicate(hand_id.group(1)):
+                    continue
 
-            for hand_text in hands:
                 # Verificar se é HU
                 if filters and filters.get('heads_up_only', False):
                     if not self._is_heads_up_ipoker(hand_text):
@@ -289,82 +777,84 @@ class UnifiedParser:
                 self.stats['hu_hands'] += 1
 
                 # Converter para PHH
+                start = time.perf_counter()
                 phh_data = self._ipoker_hand_to_phh(hand_text)
+                self.instrumentation.add('convert', time.perf_counter() - start)
 
                 if phh_data:
-                    # Salvar PHH
-                    hand_id = phh_data['metadata']['hand_id']
-                    phh_path = self.output_dir / f"{hand_id}.phh"
-
-                    with open(phh_path, 'wb') as f:
-                        tomli_w.dump(phh_data, f)
-
-                    phh_files.append(phh_path)
-                    self.stats['converted'] += 1
+                    hand_ids.append(self._emit_hand(phh_data))
 
-            return phh_files
+            return hand_ids
 
         except Exception as e:
-            logger.error(f"Erro ao processar iPoker TXT {file_path}: {e}")
-            self.stats['errors'] += 1
-            return []
+            self._source_error(f"iPoker TXT {_source_name(source)}", e, hand_ids)
+            return hand_ids
 
-    def _parse_zip_archive(self, zip_path: Path, filters: Optional[Dict]) -> List[Path]:
+    def _parse_zip_archive(self, source, filters: Optional[Dict]) -> List[str]:
         """
-        Extrai e processa arquivos de um ZIP
+        Processa os arquivos de um ZIP sem extraí-los para disco
+
+        Cada membro é aberto com ZipFile.open e entregue em streaming ao
+        parser do formato, detectado pelos primeiros bytes do membro.
+        ZIPs aninhados são processados recursivamente da mesma forma.
 
         Args:
-            zip_path: Caminho para arquivo ZIP
+            source: Caminho ou file-like do arquivo ZIP
             filters: Filtros para aplicar
 
         Returns:
-            Lista de arquivos PHH gerados
+            IDs das mãos convertidas
         """
-        try:
-            import tempfile
-            import shutil
+        all_hand_ids = []
 
-            all_phh_files = []
-
-            # Criar diretório temporário
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
+        try:
+            with zipfile.ZipFile(source, 'r') as zip_ref:
+                for info in zip_ref.infolist():
+                    if info.is_dir():
+                        continue
 
-                # Extrair ZIP
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_path)
+                    with zip_ref.open(info) as member:
+                        format_type = self._detect_format_from_head(
+                            info.filename, member.peek(_SNIFF_BYTES)[:_SNIFF_BYTES]
+                        )
+                        logger.info(
+                            f"Processando {_source_name(source)}:{info.filename} | "
+                            f"Formato: {format_type.value}"
+                        )
 
-                logger.info(f"ZIP extraído: {zip_path.name}")
+                        stream = member
+                        if format_type == HandFormat.ZIP and info.compress_type != zipfile.ZIP_STORED:
+                            # ZipFile precisa de seek; num membro comprimido cada seek para
+                            # trás reinicia a descompressão, então o ZIP interno vai para memória
+                            stream = io.BytesIO(member.read())
+                            stream.name = info.filename
 
-                # Processar arquivos extraídos
-                for file_path in temp_path.rglob('*'):
-                    if file_path.is_file():
-                        phh_files = self.parse_file(file_path, filters)
-                        all_phh_files.extend(phh_files)
+                        all_hand_ids.extend(self._parse_source(format_type, stream, filters))
 
-            return all_phh_files
+            return all_hand_ids
 
         except Exception as e:
-            logger.error(f"Erro ao processar ZIP {zip_path}: {e}")
-            self.stats['errors'] += 1
-            return []
+            self._source_error(f"ZIP {_source_name(source)}", e, all_hand_ids)
+            return all_hand_ids
 
-    def _copy_phh_if_valid(self, phh_path: Path, filters: Optional[Dict]) -> List[Path]:
+    def _copy_phh_if_valid(self, source, filters: Optional[Dict]) -> List[str]:
         """
-        Copia arquivo PHH se passar nos filtros
+        Copia arquivo PHH (ou importa para o hand store) se passar nos filtros
 
         Args:
-            phh_path: Caminho para arquivo PHH
+            source: Caminho ou file-like do arquivo PHH
             filters: Filtros para aplicar
 
         Returns:
-            Lista com o caminho do arquivo (se válido) ou vazia
+            Lista com o hand_id (se válido) ou vazia
         """
         try:
             import tomli
 
-            with open(phh_path, 'rb') as f:
-                phh_data = tomli.load(f)
+            raw = self._read_bytes(source)
+            start = time.perf_counter()
+            phh_data = tomli.loads(raw.decode('utf-8'))
+            self.instrumentation.add('convert', time.perf_counter() - start)
 
             # Aplicar filtros
             if filters and filters.get('heads_up_only', False):
@@ -373,66 +863,270 @@ class UnifiedParser:
                     return []
 
             self.stats['total_hands'] += 1
-            self.stats['hu_hands'] += 1
 
-            # Copiar para output_dir
-            import shutil
-            dest_path = self.output_dir / phh_path.name
-            shutil.copy2(phh_path, dest_path)
+            if self._is_duplicate(str(phh_data.get('metadata', {}).get('hand_id', ''))):
+                return []
 
-            self.stats['converted'] += 1
-            return [dest_path]
+            self.stats['hu_hands'] += 1
+
+            return [self._emit_hand(phh_data, raw=raw)]
 
         except Exception as e:
-            logger.error(f"Erro ao validar PHH {phh_path}: {e}")
+            logger.error(f"Erro ao validar PHH {_source_name(source)}: {e}")
             self.stats['errors'] += 1
             return []
 
+    def _emit_hand(self, phh_data: Dict, raw: Optional[bytes] = None) -> str:
+        """
+        Grava uma mão convertida no destino configurado
+
+        Args:
+            phh_data: Dicionário PHH
+            raw: Conteúdo TOML original (evita re-serializar PHH já existente)
+
+        Returns:
+            hand_id da mão gravada
+        """
+        hand_id = str(phh_data['metadata']['hand_id'])
+        start = time.perf_counter()
+
+        if self.store is not None:
+            self.store.append(phh_data)
+        elif self.output_dir is not None:
+            phh_path = self.output_dir / f"{hand_id}.phh"
+            with open(phh_path, 'wb') as f:
+                if raw is not None:
+                    f.write(raw)
+                else:
+                    tomli_w.dump(phh_data, f)
+
+        if self.hand_index is not None:
+            self.hand_index.add(hand_id)
+
+        written = time.perf_counter()
+        self.instrumentation.add('write', written - start)
+
+        if self.hand_sink is not None:
+            self.hand_sink(phh_data)
+            self.instrumentation.add('sink', time.perf_counter() - written)
+
+        self.stats['converted'] += 1
+        return hand_id
+
+    def _is_duplicate(self, hand_id: str) -> bool:
+        """Verifica (e contabiliza) se a mão já foi ingerida, antes de convertê-la"""
+        if self.hand_index is None or not hand_id or hand_id not in self.hand_index:
+            return False
+
+        self.stats['duplicates'] += 1
+        return True
+
+    def _seed_hand_index(self):
+        """Popula um índice novo com as mãos que já estão no destino"""
+        if self.store is not None:
+            self.hand_index.add_many(self.store.hand_ids())
+        elif self.output_dir is not None:
+            self.hand_index.add_many(p.stem for p in self.output_dir.glob("*.phh"))
+
+        if len(self.hand_index):
+            logger.info(f"Índice de hand_ids criado com {len(self.hand_index)} mãos existentes")
+
+    def _iter_hand_texts(self, source, marker: str) -> Iterator[str]:
+        """
+        Itera sobre as mãos de um arquivo TXT, decodificando uma mão por vez
+
+        Arquivos em disco são mapeados em memória (mmap) e percorridos por
+        spans (offset, length); streams (ex: membros de ZIP) são lidos linha a
+        linha. Em ambos os casos só a mão corrente fica em memória como str,
+        com quebras de linha normalizadas para '\n' (como no open() em modo
+        texto; históricos exportados no Windows usam '\r\n').
+
+        Args:
+            source: Caminho ou file-like binário
+            marker: Início de linha que abre uma nova mão (ex: 'GAME #')
+
+        Yields:
+            Texto de cada mão
+        """
+        if not isinstance(source, (str, Path)):
+            yield from self._iter_stream_hand_texts(source, marker)
+            return
+
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                for offset, length in _iter_hand_spans(buf, marker.encode('utf-8')):
+                    yield _normalize_newlines(buf[offset:offset + length].decode('utf-8'))
+
+    def _iter_stream_hand_texts(self, stream, marker: str) -> Iterator[str]:
+        """Fallback de _iter_hand_texts para streams sem mmap (linha a linha)"""
+        wrapper = io.TextIOWrapper(stream, encoding='utf-8-sig')
+        current_hand = []
+
+        try:
+            for line in wrapper:
+                if line.startswith(marker):
+                    if current_hand:
+                        yield ''.join(current_hand)
+                    current_hand = [line]
+                elif current_hand:  # Texto antes da primeira mão é ignorado
+                    current_hand.append(line)
+
+            if current_hand:
+                yield ''.join(current_hand)
+        finally:
+            # Não fechar o stream original junto com o wrapper
+            wrapper.detach()
+
+    def _read_bytes(self, source) -> bytes:
+        """Lê o conteúdo binário de um Path ou stream"""
+        if isinstance(source, (str, Path)):
+            return Path(source).read_bytes()
+        return source.read()
+
     # ============================================
     # HELPERS - CONVERTERS
     # ============================================
 
-    def _xml_game_to_phh(self, game_element) -> Optional[Dict]:
+    def _xml_game_to_phh(self, game_element, hero: str = '') -> Optional[Dict]:
         """
         Converte elemento <game> do XML iPoker para formato PHH
 
-        (Simplificado - versão completa usaria o código de etl_process.ipynb)
+        Uma única passada pelos filhos do <game>: jogadores em <general>,
+        depois cada <round> (0 = blinds/antes, 1 = preflop, 2-4 = flop, turn,
+        river) com suas <cards> e <action>. O tipo de cada ação é decodificado
+        por _IPOKER_XML_ACTIONS.
+
+        `amount` é sempre o valor colocado no pote pela ação: o `sum` de um
+        raise no XML é o total na street e vira incremento aqui. All-ins
+        (tipo 7) viram bet/call/raise conforme o valor a pagar; qualquer ação
+        que esgote o stack recebe `all_in = true`.
+
+        Args:
+            game_element: Elemento <game>
+            hero: Nickname do hero na sessão
+
+        Returns:
+            Dicionário PHH ou None em caso de erro
         """
         try:
-            # Extrair metadados
             hand_id = game_element.get('gamecode', '')
 
-            # Extrair jogadores
             players = []
-            for player_elem in game_element.findall('.//player'):
-                players.append({
-                    'name': player_elem.get('name', ''),
-                    'seat': int(player_elem.get('seat', '0')),
-                    'stack': float(player_elem.get('chips', '0')),
-                    'is_btn': player_elem.get('dealer', '') == 'true'
-                })
-
-            # Estrutura PHH básica
-            phh_data = {
+            stacks = {}
+            winners = []
+            board = []
+            pocket_cards = {}
+            actions = []
+
+            sb = bb = ante = 0.0
+            invested = {}       # Fichas na mão (inclui ante), para detectar all-in
+            committed = {}      # Fichas na street atual (blinds contam no preflop)
+            street_bet = 0.0    # Maior aposta da street atual
+            street_starts = [0, None, None, None]
+
+            for child in game_element:
+                if child.tag == 'general':
+                    for player_elem in child.iter('player'):
+                        name = player_elem.get('name', '')
+                        stack = _parse_amount(player_elem.get('chips') or '0')
+                        stacks[name] = stack
+
+                        players.append({
+                            'name': name,
+                            'seat': int(player_elem.get('seat', '0')),
+                            'stack': stack,
+                            'is_btn': player_elem.get('dealer') == '1'
+                        })
+
+                        if _parse_amount(player_elem.get('win') or '0') > 0:
+                            winners.append(name)
+                    continue
+
+                if child.tag != 'round':
+                    continue
+
+                round_no = int(child.get('no', '0'))
+                if round_no >= 2:
+                    # Nova street postflop
+                    committed = {}
+                    street_bet = 0.0
+                    street = min(round_no - 1, 3)
+                    if street_starts[street] is None:
+                        street_starts[street] = len(actions)
+
+                for elem in child:
+                    if elem.tag == 'cards':
+                        cards = (elem.text or '').split()
+                        cards_type = elem.get('type')
+
+                        if cards_type == 'Pocket':
+                            if cards and 'X' not in cards:
+                                pocket_cards[elem.get('player', '')] = [
+                                    self._normalize_card(c) for c in cards
+                                ]
+                        elif cards_type in _IPOKER_XML_BOARD_TYPES:
+                            board.extend(self._normalize_card(c) for c in cards)
+                        continue
+
+                    if elem.tag != 'action':
+                        continue
+
+                    action = _IPOKER_XML_ACTIONS.get(elem.get('type'))
+                    if action is None:
+                        logger.debug(f"Tipo de ação desconhecido no game {hand_id}: {elem.get('type')}")
+                        continue
+
+                    player = elem.get('player', '')
+                    amount = _parse_amount(elem.get('sum') or '0')
+                    put = committed.get(player, 0.0)
+
+                    if action == 'ante':
+                        ante = ante or amount
+                    else:
+                        action, amount = _chip_increment(action, amount, put, street_bet)
+                        if action == 'sb':
+                            sb = amount
+                        elif action == 'bb':
+                            bb = amount
+
+                        committed[player] = put + amount
+                        street_bet = max(street_bet, committed[player])
+
+                    invested[player] = invested.get(player, 0.0) + amount
+
+                    entry = {'player': player, 'action': action, 'amount': amount}
+                    if amount > 0 and invested[player] >= stacks.get(player, float('inf')):
+                        entry['all_in'] = True
+                    actions.append(entry)
+
+            # Cartas fechadas só aparecem no showdown; a do hero sempre é conhecida
+            shown = []
+            if any(player != hero for player in pocket_cards):
+                shown = [
+                    {'player': player, 'cards': cards}
+                    for player, cards in pocket_cards.items()
+                ]
+
+            return {
                 'metadata': {
                     'hand_id': hand_id,
                     'game': 'NLHE',
                     'room': 'iPoker',
-                    'sb': 0.0,
-                    'bb': 0.0,
-                    'ante': 0.0,
-                    'hero': ''
+                    'sb': sb,
+                    'bb': bb,
+                    'ante': ante,
+                    'hero': hero
                 },
                 'players': players,
-                'actions': [],
-                'showdown': {'winners': [], 'hands': []}
+                'board': board,
+                'actions': actions,
+                'street_offsets': _street_offsets(street_starts, len(actions)),
+                'showdown': {'winners': winners, 'hands': shown}
             }
 
-            # TODO: Implementação completa de parsing de ações
-            # Por ora, retornar estrutura básica
-
-            return phh_data
-
         except Exception as e:
             logger.debug(f"Erro ao converter XML game: {e}")
             return None
@@ -441,67 +1135,189 @@ class UnifiedParser:
         """
         Converte texto de mão do PokerStars para formato PHH
 
-        (Simplificado - versão completa usaria test_pokerstars_parser.py)
+        Máquina de estados de passada única pelas linhas da mão:
+        cabeçalho/assentos -> streets (*** HOLE CARDS/FLOP/TURN/RIVER ***)
+        -> SHOW DOWN -> SUMMARY. Cada linha de ação casa com um único regex
+        pré-compilado (_POKERSTARS_ACTION_RE).
+
+        `amount` é o valor colocado no pote pela ação ("raises X to Y" vira
+        o incremento sobre o que o jogador já tinha na street), como no
+        conversor XML. "Uncalled bet (X) returned to Y" desconta X da última
+        ação de Y; vencedores vêm de "collected X from [main |side ]pot".
+
+        Args:
+            hand_text: Texto da mão
+
+        Returns:
+            Dict com dados PHH ou None se erro
         """
         try:
-            # Extrair hand ID
-            hand_id_match = re.search(r"PokerStars Hand #(\d+):", hand_text)
-            if not hand_id_match:
+            lines = hand_text.splitlines()
+
+            header = _POKERSTARS_HEADER_RE.match(lines[0]) if lines else None
+            if not header:
                 return None
 
-            hand_id = hand_id_match.group(1)
+            hand_id = header.group(1)
+            sb = _parse_amount(header.group(2))
+            bb = _parse_amount(header.group(3))
+            ante = 0.0
+            hero = ''
 
-            # Estrutura PHH básica
-            phh_data = {
+            players = []
+            seat_names = {}
+            button_seat = None
+            board = []
+            actions = []
+            winners = []
+            shown = {}
+
+            committed = {}      # Fichas na street atual (blinds contam no preflop)
+            street_starts = [0, None, None, None]
+            in_summary = False
+
+            for line in lines[1:]:
+                if line.startswith('*** '):
+                    if line.startswith('*** FLOP') or line.startswith('*** TURN') \
+                            or line.startswith('*** RIVER'):
+                        # "*** TURN *** [Kh 9s Js] [3d]": a carta nova está no último colchete
+                        board.extend(_POKERSTARS_CARDS_RE.findall(line)[-1].split())
+                        committed = {}
+                        street = _STREET_MARKERS[line[4]]
+                        if street_starts[street] is None:
+                            street_starts[street] = len(actions)
+                    elif line.startswith('*** SUMMARY'):
+                        in_summary = True
+                    continue
+
+                if in_summary:
+                    # "Seat 3: Tipatushka (button) (small blind) mucked [7h Ah]"
+                    cards = _POKERSTARS_CARDS_RE.search(line) if line.startswith('Seat ') else None
+                    if cards:
+                        name = seat_names.get(int(line[5:line.index(':')]))
+                        if name and name not in shown:
+                            shown[name] = cards.group(1).split()
+                    continue
+
+                if not actions and line.startswith('Seat '):
+                    seat = _POKERSTARS_SEAT_RE.match(line)
+                    if seat:
+                        seat_no = int(seat.group(1))
+                        seat_names[seat_no] = seat.group(2)
+                        players.append({
+                            'name': seat.group(2),
+                            'seat': seat_no,
+                            'stack': _parse_amount(seat.group(3)),
+                            'is_btn': seat_no == button_seat
+                        })
+                    continue
+
+                if line.startswith('Table '):
+                    button = _POKERSTARS_BUTTON_RE.search(line)
+                    button_seat = int(button.group(1)) if button else None
+                    continue
+
+                if line.startswith('Dealt to '):
+                    cards = _POKERSTARS_CARDS_RE.search(line)
+                    hero = line[9:cards.start() - 1] if cards else line[9:].strip()
+                    continue
+
+                collected = _POKERSTARS_COLLECTED_RE.fullmatch(line)
+                if collected:
+                    # "X collected 120 from pot" / "from main pot" / "from side pot"
+                    winner = collected.group(1)
+                    if winner not in winners:
+                        winners.append(winner)
+                    continue
+
+                uncalled = _POKERSTARS_UNCALLED_RE.fullmatch(line)
+                if uncalled:
+                    # Devolução sai da última ação do jogador (o bet/raise não pago)
+                    returned = _parse_amount(uncalled.group(1))
+                    player = uncalled.group(2)
+                    for entry in reversed(actions):
+                        if entry['player'] == player:
+                            entry['amount'] = max(entry['amount'] - returned, 0.0)
+                            break
+                    committed[player] = max(committed.get(player, 0.0) - returned, 0.0)
+                    continue
+
+                player, sep, rest = line.partition(': ')
+                if not sep:
+                    continue
+
+                match = _POKERSTARS_ACTION_RE.match(rest)
+                if not match:
+                    continue
+
+                if match.group('shows'):
+                    shown[player] = match.group('shows').split()
+                    continue
+
+                put = committed.get(player, 0.0)
+
+                if match.group('post'):
+                    action = _POKERSTARS_POST_TYPES[match.group('post')]
+                    amount = _parse_amount(match.group('post_amount'))
+                    if action == 'ante':
+                        ante = ante or amount
+                elif match.group('simple'):
+                    action = _POKERSTARS_SIMPLE_TYPES[match.group('simple')]
+                    amount = 0.0
+                elif match.group('verb'):
+                    action = _POKERSTARS_AMOUNT_TYPES[match.group('verb')]
+                    amount = _parse_amount(match.group('amount'))
+                else:
+                    action = 'raise'
+                    amount = _parse_amount(match.group('raise_to')) - put
+
+                if action != 'ante':
+                    # Ante não conta para o valor a pagar na street
+                    committed[player] = put + amount
+
+                entry = {'player': player, 'action': action, 'amount': amount}
+                if match.group('all_in'):
+                    entry['all_in'] = True
+                actions.append(entry)
+
+            return {
                 'metadata': {
                     'hand_id': hand_id,
                     'game': 'NLHE',
                     'room': 'PokerStars',
-                    'sb': 0.0,
-                    'bb': 0.0,
-                    'ante': 0.0,
-                    'hero': ''
+                    'sb': sb,
+                    'bb': bb,
+                    'ante': ante,
+                    'hero': hero
                 },
-                'players': [],
-                'actions': [],
-                'showdown': {'winners': [], 'hands': []}
+                'players': players,
+                'board': board,
+                'actions': actions,
+                'street_offsets': _street_offsets(street_starts, len(actions)),
+                'showdown': {
+                    'winners': winners,
+                    'hands': [
+                        {'player': player, 'cards': cards}
+                        for player, cards in shown.items()
+                    ]
+                }
             }
 
-            # TODO: Implementação completa de parsing
-            # Por ora, retornar estrutura básica
-
-            return phh_data
-
         except Exception as e:
             logger.debug(f"Erro ao converter PokerStars hand: {e}")
             return None
 
-    def _split_pokerstars_hands(self, content: str) -> List[str]:
+    def _iter_pokerstars_hands(self, source) -> Iterator[str]:
         """
-        Separa arquivo PokerStars em mãos individuais
+        Separa arquivo PokerStars em mãos individuais (lazy)
 
         Args:
-            content: Conteúdo completo do arquivo
+            source: Caminho ou file-like binário
 
-        Returns:
-            Lista de strings, cada uma contendo uma mão
+        Yields:
+            Texto de cada mão
         """
-        hands = []
-        current_hand = []
-
-        for line in content.split('\n'):
-            if line.startswith('PokerStars Hand #'):
-                if current_hand:
-                    hands.append('\n'.join(current_hand))
-                current_hand = [line]
-            else:
-                current_hand.append(line)
-
-        # Adicionar última mão
-        if current_hand:
-            hands.append('\n'.join(current_hand))
-
-        return hands
+        return self._iter_hand_texts(source, 'PokerStars Hand #')
 
     def _is_heads_up_pokerstars(self, hand_text: str) -> bool:
         """
@@ -514,41 +1330,21 @@ class UnifiedParser:
             True se é HU, False caso contrário
         """
         # Contar "Seat X: PlayerName (stack in chips)"
-        seats_with_chips = re.findall(
-            r'^Seat \d+: \S+ \(\d+ in chips\)',
-            hand_text,
-            re.MULTILINE
-        )
+        seats_with_chips = _POKERSTARS_HU_SEAT_RE.findall(hand_text)
 
         return len(seats_with_chips) == 2
 
-    def _split_ipoker_hands(self, content: str) -> List[str]:
+    def _iter_ipoker_hands(self, source) -> Iterator[str]:
         """
-        Separa arquivo iPoker em mãos individuais
+        Separa arquivo iPoker em mãos individuais (lazy)
 
         Args:
-            content: Conteúdo completo do arquivo
+            source: Caminho ou file-like binário
 
-        Returns:
-            Lista de strings, cada uma contendo uma mão
+        Yields:
+            Texto de cada mão
         """
-        hands = []
-        current_hand = []
-
-        for line in content.split('\n'):
-            if line.startswith('GAME #'):
-                if current_hand:
-                    hands.append('\n'.join(current_hand))
-                current_hand = [line]
-            else:
-                if current_hand:  # Só adicionar se já começou uma mão
-                    current_hand.append(line)
-
-        # Adicionar última mão
-        if current_hand:
-            hands.append('\n'.join(current_hand))
-
-        return hands
+        return self._iter_hand_texts(source, 'GAME #')
 
     def _is_heads_up_ipoker(self, hand_text: str) -> bool:
         """
@@ -561,11 +1357,7 @@ class UnifiedParser:
             True se é HU (2 jogadores ativos), False caso contrário
         """
         # Contar "Seat X: PlayerName (€XXX in chips)" - jogadores ativos
-        seats = re.findall(
-            r'^Seat \d+: \S+',
-            hand_text,
-            re.MULTILINE
-        )
+        seats = _IPOKER_HU_SEAT_RE.findall(hand_text)
 
         return len(seats) == 2
 
@@ -573,6 +1365,15 @@ class UnifiedParser:
         """
         Converte texto de mão do iPoker para formato PHH
 
+        Tokenizador de passada única: cada linha é despachada pelo prefixo
+        (GAME, Seat, ***, Dealt to) ou por um único regex pré-compilado de
+        ações, montando jogadores, blinds, ações, board e showdown juntos.
+
+        `amount` segue o conversor XML (_chip_increment): fichas colocadas no
+        pote pela ação, com "Raise €X" (total na street) convertido em
+        incremento e "All-in" resolvido para bet/call/raise com `all_in = true`;
+        qualquer ação que esgote o stack também recebe `all_in = true`.
+
         Args:
             hand_text: Texto da mão no formato iPoker
 
@@ -580,107 +1381,117 @@ class UnifiedParser:
             Dict com dados PHH ou None se erro
         """
         try:
-            # Extrair hand ID
-            hand_id_match = re.search(r'GAME #(\d+)', hand_text)
-            if not hand_id_match:
-                return None
-            hand_id = hand_id_match.group(1)
-
-            # Extrair hero (Dealt to)
-            hero_match = re.search(r'Dealt to (\S+)', hand_text)
-            hero = hero_match.group(1) if hero_match else ''
-
-            # Extrair jogadores
+            hand_id = None
+            hero = None
             players = []
-            seat_pattern = r'Seat (\d+): (\S+) \(€?([\d,\.]+) in chips\)\s*(DEALER)?'
-            for match in re.finditer(seat_pattern, hand_text):
-                seat_num = int(match.group(1))
-                name = match.group(2)
-                stack_str = match.group(3).replace(',', '')
-                stack = float(stack_str)
-                is_btn = bool(match.group(4))
-
-                players.append({
-                    'name': name,
-                    'seat': seat_num,
-                    'stack': stack,
-                    'is_btn': is_btn
-                })
-
-            # Extrair blinds e antes
-            sb_match = re.search(r'Post SB €?([\d,\.]+)', hand_text)
-            bb_match = re.search(r'Post BB €?([\d,\.]+)', hand_text)
-            ante_match = re.search(r'Post Ante €?([\d,\.]+)', hand_text)
-
-            sb = float(sb_match.group(1).replace(',', '')) if sb_match else 0.0
-            bb = float(bb_match.group(1).replace(',', '')) if bb_match else 0.0
-            ante = float(ante_match.group(1).replace(',', '')) if ante_match else 0.0
-
-            # Extrair ações
             actions = []
+            blinds = {}
+            flop = turn = river = None
+            street_starts = [0, None, None, None]
+            winners = []
+            shown_hands = []
 
-            # Padrões de ação
-            action_patterns = [
-                (r'(\S+): Post Ante €?([\d,\.]+)', 'ante'),
-                (r'(\S+): Post SB €?([\d,\.]+)', 'sb'),
-                (r'(\S+): Post BB €?([\d,\.]+)', 'bb'),
-                (r'(\S+): Fold', 'fold'),
-                (r'(\S+): Check', 'check'),
-                (r'(\S+): Call €?([\d,\.]+)', 'call'),
-                (r'(\S+): Raise(?:\s+\(NF\))? €?([\d,\.]+)', 'raise'),
-                (r'(\S+): Bet €?([\d,\.]+)', 'bet'),
-                (r'(\S+): All-in(?:\(raise\))? €?([\d,\.]+)', 'allin'),
-            ]
+            stacks = {}
+            invested = {}       # Fichas na mão (inclui ante), para detectar all-in
+            committed = {}      # Fichas na street atual (blinds contam no preflop)
+            street_bet = 0.0    # Maior aposta da street atual
 
             for line in hand_text.split('\n'):
-                for pattern, action_type in action_patterns:
-                    match = re.search(pattern, line)
+                if line.startswith('GAME #'):
+                    if hand_id is None:
+                        match = _IPOKER_GAME_RE.match(line)
+                        hand_id = match.group(1) if match else None
+                    continue
+
+                if line.startswith('Seat '):
+                    match = _IPOKER_SEAT_RE.match(line)
                     if match:
-                        player = match.group(1)
-                        amount = 0.0
-                        if len(match.groups()) > 1:
-                            amount = float(match.group(2).replace(',', ''))
-
-                        actions.append({
-                            'player': player,
-                            'action': action_type,
-                            'amount': amount
+                        stack = _parse_amount(match.group(3))
+                        stacks[match.group(2)] = stack
+                        players.append({
+                            'name': match.group(2),
+                            'seat': int(match.group(1)),
+                            'stack': stack,
+                            'is_btn': bool(match.group(4))
                         })
-                        break
+                    continue
 
-            # Extrair board cards
-            flop_match = re.search(r'\*\*\* FLOP \*\*\* \[([^\]]+)\]', hand_text)
-            turn_match = re.search(r'\*\*\* TURN \*\*\* \[([^\]]+)\]', hand_text)
-            river_match = re.search(r'\*\*\* RIVER \*\*\* \[([^\]]+)\]', hand_text)
+                if line.startswith('***'):
+                    match = _IPOKER_BOARD_RE.match(line)
+                    if match:
+                        street, cards = match.groups()
+                        street_idx = _STREET_MARKERS[street[0]]
+                        if street_starts[street_idx] is None:
+                            street_starts[street_idx] = len(actions)
+                            committed = {}
+                            street_bet = 0.0
+                        if street == 'FLOP' and flop is None:
+                            flop = cards
+                        elif street == 'TURN' and turn is None:
+                            turn = cards
+                        elif street == 'RIVER' and river is None:
+                            river = cards
+                    continue
+
+                if line.startswith('Dealt to '):
+                    if hero is None:
+                        hero = line[9:].split(' ', 1)[0]
+                    continue
+
+                match = _IPOKER_LINE_RE.search(line)
+                if not match:
+                    continue
+
+                player = match.group('player')
+                kind = match.lastgroup
+
+                if kind == 'post_amount':
+                    action_type = _IPOKER_POST_TYPES[match.group('post')]
+                    amount = _parse_amount(match.group('post_amount'))
+                    blinds.setdefault(action_type, amount)
+                elif kind == 'simple':
+                    action_type = match.group('simple').lower()
+                    amount = 0.0
+                elif kind == 'amount':
+                    action_type = _IPOKER_AMOUNT_TYPES[match.group('verb')[:3]]
+                    amount = _parse_amount(match.group('amount'))
+                elif kind == 'win':
+                    winners.append(player)
+                    continue
+                else:
+                    shown_hands.append({
+                        'player': player,
+                        'cards': [self._normalize_card(c) for c in match.group('shows').split()]
+                    })
+                    continue
+
+                put = committed.get(player, 0.0)
+                all_in = action_type == 'allin'
+
+                if action_type != 'ante':
+                    # Ante não conta para o valor a pagar na street
+                    action_type, amount = _chip_increment(action_type, amount, put, street_bet)
+                    committed[player] = put + amount
+                    street_bet = max(street_bet, committed[player])
+
+                invested[player] = invested.get(player, 0.0) + amount
+
+                entry = {'player': player, 'action': action_type, 'amount': amount}
+                if all_in or (amount > 0 and invested[player] >= stacks.get(player, float('inf'))):
+                    entry['all_in'] = True
+                actions.append(entry)
+
+            if hand_id is None:
+                return None
 
+            # Board cards
             board = []
-            if flop_match:
-                flop_cards = flop_match.group(1).split()
-                board.extend([self._normalize_card(c) for c in flop_cards])
-            if turn_match:
-                turn_card = turn_match.group(1).strip()
-                board.append(self._normalize_card(turn_card))
-            if river_match:
-                river_card = river_match.group(1).strip()
-                board.append(self._normalize_card(river_card))
-
-            # Extrair showdown
-            winners = []
-            shown_hands = []
-
-            winner_pattern = r'(\S+): wins €?([\d,\.]+)'
-            for match in re.finditer(winner_pattern, hand_text):
-                winners.append(match.group(1))
-
-            shows_pattern = r'(\S+): Shows \[([^\]]+)\]'
-            for match in re.finditer(shows_pattern, hand_text):
-                player = match.group(1)
-                cards_str = match.group(2)
-                cards = [self._normalize_card(c) for c in cards_str.split()]
-                shown_hands.append({
-                    'player': player,
-                    'cards': cards
-                })
+            if flop is not None:
+                board.extend([self._normalize_card(c) for c in flop.split()])
+            if turn is not None:
+                board.append(self._normalize_card(turn.strip()))
+            if river is not None:
+                board.append(self._normalize_card(river.strip()))
 
             # Estrutura PHH completa
             phh_data = {
@@ -688,14 +1499,15 @@ class UnifiedParser:
                     'hand_id': hand_id,
                     'game': 'NLHE',
                     'room': 'iPoker',
-                    'sb': sb,
-                    'bb': bb,
-                    'ante': ante,
-                    'hero': hero
+                    'sb': blinds.get('sb', 0.0),
+                    'bb': blinds.get('bb', 0.0),
+                    'ante': blinds.get('ante', 0.0),
+                    'hero': hero or ''
                 },
                 'players': players,
                 'board': board,
                 'actions': actions,
+                'street_offsets': _street_offsets(street_starts, len(actions)),
                 'showdown': {
                     'winners': winners,
                     'hands': shown_hands
@@ -741,6 +1553,40 @@ class UnifiedParser:
         return f"{rank}{normalized_suit}"
 
 
+# ============================================
+# WORKERS (PROCESSAMENTO PARALELO)
+# ============================================
+
+def _parse_files_chunk(
+    parser_kwargs: Dict, file_paths: List[Path], filters: Optional[Dict]
+) -> Tuple[List[Tuple[Path, List[str], bool]], Dict, Dict, List[Path]]:
+    """
+    Processa um lote de arquivos em um processo worker
+
+    Returns:
+        ([(arquivo, IDs das mãos convertidas, falhou), ...], stats do parser do worker,
+         instrumentação do worker, shards do hand store gravados pelo worker)
+    """
+    parser = UnifiedParser(**parser_kwargs)
+    file_results = []
+
+    for file_path in file_paths:
+        hand_ids, failed = parser._parse_file_tracked(file_path, filters)
+        file_results.append((file_path, hand_ids, failed))
+
+    shards = parser._collect_outputs([]) if parser.store is not None else []
+    return file_results, parser.stats, parser.instrumentation.to_dict(), shards
+
+
+def _merge_stats(target: Dict, source: Dict):
+    """Soma (recursivamente) os contadores de `source` em `target`"""
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge_stats(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
 # ============================================
 # SCRIPT DE TESTE
 # ============================================
@@ -4,13 +4,18 @@ Simplifies index building after file uploads
 """
 
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 from loguru import logger
+import pandas as pd
 
 from src.indexing.build_indices import IndexBuilder as CoreIndexBuilder
+from src.vectorization.feature_schema import FeatureSchema
 from src.vectorization.vectorizer import Vectorizer
 
 
+DECISION_POINTS_FILE = Path("dataset/decision_points/decision_points_vectorized.parquet")
+
+
 class IndexBuilder:
     """
     Simplified IndexBuilder service for file uploads
@@ -18,20 +23,28 @@ class IndexBuilder:
     Rebuilds all FAISS indices after new PHH files are added
     """
 
-    def __init__(self, phh_dir: Path, indices_dir: Path):
+    def __init__(
+        self,
+        phh_dir: Path,
+        indices_dir: Path,
+        decision_points_file: Path = DECISION_POINTS_FILE
+    ):
         """
         Args:
             phh_dir: Directory containing PHH files
             indices_dir: Directory to store FAISS indices
+            decision_points_file: Vectorized decision points parquet
+                (read back for incremental builds)
         """
         self.phh_dir = Path(phh_dir)
         self.indices_dir = Path(indices_dir)
+        self.decision_points_file = Path(decision_points_file)
 
         # Ensure directories exist
         self.phh_dir.mkdir(parents=True, exist_ok=True)
         self.indices_dir.mkdir(parents=True, exist_ok=True)
 
-    def build_all_indices(self) -> Dict:
+    def build_all_indices(self, new_decision_points: Optional[pd.DataFrame] = None) -> Dict:
         """
         Rebuild all FAISS indices from PHH files
 
@@ -40,6 +53,12 @@ class IndexBuilder:
         2. Vectorization: Decision Points → Vectors
         3. FAISS Indexing: Vectors → Indices
 
+        Args:
+            new_decision_points: Decision points already extracted from newly
+                ingested hands (fused parse mode). When given and a previous
+                decision points file exists, they are merged with it instead
+                of re-extracting every PHH file.
+
         Returns:
             Statistics about index building
         """
@@ -48,16 +67,18 @@ class IndexBuilder:
 
             # Import required modules
             from src.context.context_extractor import ContextExtractor
-            from src.vectorization.vectorizer import Vectorizer
-            import pandas as pd
 
             # ============================================
             # ETAPA 1: CONTEXT EXTRACTION
             # ============================================
-            logger.info("STEP 1/3: Extracting decision points from PHH files...")
+            if new_decision_points is not None and self.decision_points_file.exists():
+                logger.info("STEP 1/3: Merging new decision points with the existing ones...")
+                df_decision_points = self._merge_decision_points(new_decision_points)
+            else:
+                logger.info("STEP 1/3: Extracting decision points from PHH files...")
 
-            extractor = ContextExtractor()
-            df_decision_points = extractor.extract_from_directory(self.phh_dir)
+                extractor = ContextExtractor()
+                df_decision_points = extractor.extract_from_directory(self.phh_dir)
 
             if len(df_decision_points) == 0:
                 logger.warning("No decision points extracted. No indices will be built.")
@@ -75,8 +96,16 @@ class IndexBuilder:
             # ============================================
             logger.info("STEP 2/3: Vectorizing decision points...")
 
-            vectorizer = Vectorizer()
-            vectorizer.fit(df_decision_points)
+            # Reuse the feature schema stored with the indices (no refit);
+            # the first build fits a vectorizer and writes the schema
+            if FeatureSchema.exists(self.indices_dir):
+                schema = FeatureSchema.load(self.indices_dir)
+                vectorizer = schema.to_vectorizer()
+                logger.info(f"Using stored feature schema {schema.schema_hash[:12]}")
+            else:
+                vectorizer = Vectorizer()
+                vectorizer.fit(df_decision_points)
+                schema = FeatureSchema.from_vectorizer(vectorizer, embedding="weighted")
 
             vectors = vectorizer.vectorize_batch(df_decision_points)
             df_decision_points['context_vector'] = list(vectors)
@@ -88,7 +117,7 @@ class IndexBuilder:
             # ============================================
             logger.info("Saving vectorized decision points to parquet...")
 
-            decision_points_file = Path("dataset/decision_points/decision_points_vectorized.parquet")
+            decision_points_file = self.decision_points_file
             decision_points_file.parent.mkdir(parents=True, exist_ok=True)
             df_decision_points.to_parquet(decision_points_file, index=False)
 
@@ -101,7 +130,7 @@ class IndexBuilder:
 
             builder = CoreIndexBuilder(
                 indices_dir=self.indices_dir,
-                dimension=99
+                schema=schema
             )
 
             builder.build_indices_from_df(
@@ -133,3 +162,26 @@ class IndexBuilder:
                 "status": "error",
                 "error": str(e)
             }
+
+    def _merge_decision_points(self, new_decision_points: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append new decision points to the saved ones
+
+        Vectors are dropped (the merged set is re-vectorized with the stored
+        feature schema) and re-ingested hands replace their previous rows by
+        decision_id.
+        """
+        existing = pd.read_parquet(self.decision_points_file)
+        existing = existing.drop(columns=['context_vector'], errors='ignore')
+
+        if len(new_decision_points) == 0:
+            return existing
+
+        existing = existing[~existing['decision_id'].isin(new_decision_points['decision_id'])]
+        merged = pd.concat([existing, new_decision_points], ignore_index=True)
+
+        logger.info(
+            f"Merged {len(new_decision_points)} new decision points "
+            f"into {len(existing)} existing ones"
+        )
+        return merged
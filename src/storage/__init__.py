@@ -0,0 +1,7 @@
+"""
+Storage module - Packed columnar hand store
+"""
+
+from .hand_store import HandStore
+
+__all__ = ["HandStore"]
@@ -0,0 +1,462 @@
+"""
+Hand Store - Armazenamento colunar compactado de mãos
+
+Substitui o modelo "um arquivo TOML por mão" por shards Parquet (zstd).
+Cada shard é um diretório com três tabelas:
+
+- hands.parquet:   uma linha por mão (metadata, board, showdown, offsets)
+- players.parquet: uma linha por jogador (hand_idx aponta para a mão no shard)
+- actions.parquet: uma linha por ação, na ordem da mão
+
+As mãos entram pelo `append` (mesmo dict PHH produzido pelo UnifiedParser)
+e saem pelo `iter_hands`, que reconstrói os dicts shard a shard. Na leitura,
+um hand_id repetido em shards posteriores é ignorado (vale a primeira cópia).
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+
+HANDS_SCHEMA = pa.schema([
+    ("hand_id", pa.string()),
+    ("room", pa.string()),
+    ("game", pa.string()),
+    ("sb", pa.float64()),
+    ("bb", pa.float64()),
+    ("ante", pa.float64()),
+    ("hero", pa.string()),
+    ("board", pa.list_(pa.string())),
+    ("winners", pa.list_(pa.string())),
+    ("shown", pa.list_(pa.struct([
+        ("player", pa.string()),
+        ("cards", pa.list_(pa.string())),
+    ]))),
+    ("players_offset", pa.int64()),
+    ("players_count", pa.int32()),
+    ("actions_offset", pa.int64()),
+    ("actions_count", pa.int32()),
+    ("street_offsets", pa.list_(pa.int32())),  # Início de [preflop, flop, turn, river] em actions
+    ("extra", pa.string()),  # JSON com campos fora do schema (PHH legado)
+])
+
+PLAYERS_SCHEMA = pa.schema([
+    ("hand_idx", pa.int32()),
+    ("name", pa.string()),
+    ("seat", pa.int32()),
+    ("stack", pa.float64()),
+    ("is_btn", pa.bool_()),
+])
+
+ACTIONS_SCHEMA = pa.schema([
+    ("hand_idx", pa.int32()),
+    ("player", pa.string()),
+    ("action", pa.string()),
+    ("amount", pa.float64()),
+    ("attrs", pa.string()),  # JSON com chaves extras da ação (ex: street do PHH legado)
+])
+
+TABLE_SCHEMAS = {"hands": HANDS_SCHEMA, "players": PLAYERS_SCHEMA, "actions": ACTIONS_SCHEMA}
+
+# Chaves mapeadas para colunas; o restante vai para `extra` / `attrs`
+_METADATA_KEYS = ("hand_id", "room", "game", "sb", "bb", "ante", "hero")
+_TOP_LEVEL_KEYS = ("metadata", "players", "board", "actions", "street_offsets", "showdown")
+_ACTION_KEYS = ("player", "action", "amount")
+
+
+class HandStore:
+    """
+    Store de mãos em shards Parquet com API de append e iterador rápido
+    """
+
+    def __init__(self, root: Path, shard_size: int = 50_000, compression: str = "zstd"):
+        """
+        Args:
+            root: Diretório do store (criado se não existir)
+            shard_size: Mãos por shard (flush automático ao atingir)
+            compression: Codec Parquet
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self.shard_size = shard_size
+        self.compression = compression
+
+        self._written: List[Path] = []
+        self._shard_counter = 0
+        self._reset_buffers()
+
+    # ============================================
+    # ESCRITA
+    # ============================================
+
+    def append(self, phh: Dict):
+        """
+        Adiciona uma mão (dict PHH) ao buffer do shard atual
+
+        Args:
+            phh: Dicionário PHH
+        """
+        metadata = phh.get('metadata', {})
+        showdown = phh.get('showdown', {})
+        hand_idx = len(self._hands['hand_id'])
+
+        hands = self._hands
+        hands['hand_id'].append(str(metadata.get('hand_id', '')))
+        hands['room'].append(metadata.get('room', ''))
+        hands['game'].append(metadata.get('game', ''))
+        hands['sb'].append(float(metadata.get('sb', 0.0)))
+        hands['bb'].append(float(metadata.get('bb', 0.0)))
+        hands['ante'].append(float(metadata.get('ante', 0.0)))
+        hands['hero'].append(metadata.get('hero', ''))
+        hands['board'].append(list(phh.get('board', [])))
+        hands['winners'].append(list(showdown.get('winners', [])))
+        hands['shown'].append([
+            {'player': h.get('player', ''), 'cards': list(h.get('cards', []))}
+            for h in showdown.get('hands', [])
+        ])
+
+        # Jogadores
+        players = phh.get('players', [])
+        hands['players_offset'].append(len(self._players['name']))
+        hands['players_count'].append(len(players))
+
+        for player in players:
+            self._players['hand_idx'].append(hand_idx)
+            self._players['name'].append(player.get('name', ''))
+            self._players['seat'].append(int(player.get('seat', 0)))
+            self._players['stack'].append(float(player.get('stack', 0.0)))
+            self._players['is_btn'].append(bool(player.get('is_btn', False)))
+
+        # Ações
+        actions = phh.get('actions', [])
+        hands['actions_offset'].append(len(self._actions['player']))
+        hands['actions_count'].append(len(actions))
+
+        # PHH legado não tem offsets (None): o extrator cai para a chave 'street' das ações
+        street_offsets = phh.get('street_offsets')
+        hands['street_offsets'].append(list(street_offsets) if street_offsets is not None else None)
+
+        for action in actions:
+            self._actions['hand_idx'].append(hand_idx)
+            self._actions['player'].append(action.get('player'))
+            self._actions['action'].append(action.get('action'))
+            self._actions['amount'].append(float(action.get('amount', 0.0)))
+            self._actions['attrs'].append(_leftover_json(action, _ACTION_KEYS))
+
+        # Campos fora do schema (preservados para reimportar PHH legado sem perdas)
+        extra = {k: v for k, v in phh.items() if k not in _TOP_LEVEL_KEYS}
+        extra_metadata = {k: v for k, v in metadata.items() if k not in _METADATA_KEYS}
+        extra_showdown = {k: v for k, v in showdown.items() if k not in ('winners', 'hands')}
+        if extra_metadata:
+            extra['metadata'] = extra_metadata
+        if extra_showdown:
+            extra['showdown'] = extra_showdown
+        hands['extra'].append(json.dumps(extra) if extra else None)
+
+        if hand_idx + 1 >= self.shard_size:
+            self.flush()
+
+    def flush(self) -> Optional[Path]:
+        """
+        Grava as mãos em buffer como um novo shard
+
+        Returns:
+            Diretório do shard gravado (None se o buffer estava vazio)
+        """
+        if not self._hands['hand_id']:
+            return None
+
+        self._shard_counter += 1
+        shard_name = f"part-{time.time_ns():020d}-{os.getpid()}-{self._shard_counter:05d}"
+        tmp_dir = self.root / f".{shard_name}.tmp"
+        tmp_dir.mkdir()
+
+        for name, columns, schema in (
+            ("hands", self._hands, HANDS_SCHEMA),
+            ("players", self._players, PLAYERS_SCHEMA),
+            ("actions", self._actions, ACTIONS_SCHEMA),
+        ):
+            table = pa.Table.from_pydict(columns, schema=schema)
+            pq.write_table(table, tmp_dir / f"{name}.parquet", compression=self.compression)
+
+        # Rename atômico: leitores nunca veem shard incompleto
+        shard_dir = self.root / shard_name
+        os.replace(tmp_dir, shard_dir)
+
+        logger.debug(f"Shard gravado: {shard_dir.name} ({len(self._hands['hand_id'])} mãos)")
+
+        self._written.append(shard_dir)
+        self._reset_buffers()
+        return shard_dir
+
+    def pop_written(self) -> List[Path]:
+        """Retorna (e esquece) os shards gravados desde a última chamada"""
+        written, self._written = self._written, []
+        return written
+
+    def import_phh_directory(self, phh_dir: Path) -> int:
+        """
+        Importa arquivos .phh (formato TOML legado) para o store
+
+        Args:
+            phh_dir: Diretório com arquivos .phh
+
+        Returns:
+            Número de mãos importadas
+        """
+        import tomli
+
+        imported = 0
+
+        for phh_path in sorted(Path(phh_dir).glob("*.phh")):
+            try:
+                with open(phh_path, 'rb') as f:
+                    self.append(tomli.load(f))
+                imported += 1
+            except Exception as e:
+                logger.error(f"Erro ao importar {phh_path}: {e}")
+
+        self.flush()
+        logger.info(f"Importadas {imported} mãos PHH de {phh_dir}")
+        return imported
+
+    def _reset_buffers(self):
+        self._hands = {name: [] for name in HANDS_SCHEMA.names}
+        self._players = {name: [] for name in PLAYERS_SCHEMA.names}
+        self._actions = {name: [] for name in ACTIONS_SCHEMA.names}
+
+    # ============================================
+    # LEITURA
+    # ============================================
+
+    def shards(self) -> List[Path]:
+        """Shards gravados, em ordem de criação"""
+        return sorted(
+            p for p in self.root.iterdir()
+            if p.is_dir() and p.name.startswith("part-")
+        )
+
+    def read_table(self, name: str, columns: Optional[List[str]] = None) -> pa.Table:
+        """
+        Lê uma tabela ('hands', 'players' ou 'actions') de todos os shards
+
+        Args:
+            name: Nome da tabela
+            columns: Subconjunto de colunas (None = todas)
+
+        Returns:
+            pyarrow.Table concatenada
+        """
+        tables = [
+            shard_tables[name]
+            for _, shard_tables in self.iter_shard_tables({name: columns})
+        ]
+
+        if not tables:
+            schema = TABLE_SCHEMAS[name]
+            if columns is not None:
+                schema = pa.schema([schema.field(c) for c in columns])
+            return schema.empty_table()
+
+        # Shards antigos podem não ter colunas novas (ex: street_offsets): vêm
+        # como null. Alinhado à mão em vez de promote_options (pyarrow >= 14)
+        # ou promote=True (removido depois): funciona no pyarrow 13 fixado
+        schema = pa.unify_schemas([table.schema for table in tables])
+        return pa.concat_tables([_align_to_schema(table, schema) for table in tables])
+
+    def hand_ids(self) -> List[str]:
+        """IDs de todas as mãos gravadas"""
+        return self.read_table("hands", columns=["hand_id"]).column("hand_id").to_pylist()
+
+    def __len__(self) -> int:
+        return len(self.hand_ids())
+
+    def iter_shard_tables(
+        self, columns: Optional[Dict[str, Optional[List[str]]]] = None
+    ) -> Iterator[Tuple[Path, Dict[str, pa.Table]]]:
+        """
+        Itera sobre as tabelas de cada shard, sem mãos repetidas
+
+        Mãos cujo hand_id já apareceu (em um shard anterior ou antes no
+        mesmo shard) são removidas, com os jogadores e ações delas; hand_idx
+        e os offsets são renumerados. Colunas pedidas que um shard antigo
+        não tem são omitidas.
+
+        Args:
+            columns: {tabela: colunas ou None (todas)}; só as tabelas
+                informadas são lidas (None = as três, completas)
+
+        Yields:
+            (diretório do shard, {tabela: pyarrow.Table})
+        """
+        if columns is None:
+            columns = {name: None for name in TABLE_SCHEMAS}
+
+        seen: Set[str] = set()
+
+        for shard in self.shards():
+            tables = {}
+            for name, names in columns.items():
+                path = shard / f"{name}.parquet"
+                if names is not None:
+                    # hand_idx é necessário para remover jogadores/ações de mãos repetidas
+                    if name != 'hands' and 'hand_idx' not in names:
+                        names = ['hand_idx'] + list(names)
+                    available = pq.read_schema(path).names
+                    names = [c for c in names if c in available]
+                tables[name] = pq.read_table(path, columns=names)
+
+            hands = tables.get('hands')
+            if hands is None or 'hand_id' not in hands.column_names:
+                hands = pq.read_table(shard / "hands.parquet", columns=["hand_id"])
+            hand_ids = hands.column("hand_id").to_pylist()
+            yield shard, _drop_repeated_hands(tables, hand_ids, seen)
+
+    def iter_hands(self) -> Iterator[Dict]:
+        """
+        Itera sobre todas as mãos gravadas como dicts PHH
+
+        Cada shard é lido uma vez, coluna a coluna; apenas um shard fica em
+        memória por vez.
+
+        Yields:
+            Dicionário PHH
+        """
+        for _, tables in self.iter_shard_tables():
+            yield from self._iter_shard(tables)
+
+    def _iter_shard(self, tables: Dict[str, pa.Table]) -> Iterator[Dict]:
+        hands = _columns(tables['hands'])
+        players = _columns(tables['players'])
+        actions = _columns(tables['actions'])
+        no_offsets = [None] * len(hands['hand_id'])
+
+        for i in range(len(hands['hand_id'])):
+            p_start = hands['players_offset'][i]
+            p_end = p_start + hands['players_count'][i]
+            a_start = hands['actions_offset'][i]
+            a_end = a_start + hands['actions_count'][i]
+
+            phh = {
+                'metadata': {
+                    'hand_id': hands['hand_id'][i],
+                    'game': hands['game'][i],
+                    'room': hands['room'][i],
+                    'sb': hands['sb'][i],
+                    'bb': hands['bb'][i],
+                    'ante': hands['ante'][i],
+                    'hero': hands['hero'][i],
+                },
+                'players': [
+                    {
+                        'name': players['name'][j],
+                        'seat': players['seat'][j],
+                        'stack': players['stack'][j],
+                        'is_btn': players['is_btn'][j],
+                    }
+                    for j in range(p_start, p_end)
+                ],
+                'board': hands['board'][i],
+                'actions': [
+                    _action_dict(actions, j)
+                    for j in range(a_start, a_end)
+                ],
+                'showdown': {
+                    'winners': hands['winners'][i],
+                    'hands': hands['shown'][i],
+                },
+            }
+
+            # Shards anteriores aos offsets não têm a coluna
+            street_offsets = hands.get('street_offsets', no_offsets)[i]
+            if street_offsets is not None:
+                phh['street_offsets'] = street_offsets
+
+            if hands['extra'][i] is not None:
+                extra = json.loads(hands['extra'][i])
+                phh['metadata'].update(extra.pop('metadata', {}))
+                phh['showdown'].update(extra.pop('showdown', {}))
+                phh.update(extra)
+
+            yield phh
+
+
+def _drop_repeated_hands(tables: Dict[str, pa.Table], hand_ids: List[str], seen: Set[str]) -> Dict[str, pa.Table]:
+    """
+    Remove de um shard as mãos com hand_id já visto (e marca os novos em seen)
+
+    hand_id vazio (PHH legado sem id) nunca é tratado como repetido.
+    """
+    keep = np.ones(len(hand_ids), dtype=bool)
+    for i, hand_id in enumerate(hand_ids):
+        if hand_id in seen:
+            keep[i] = False
+        elif hand_id:
+            seen.add(hand_id)
+
+    if keep.all():
+        return tables
+
+    # Posição nova de cada mão mantida
+    new_idx = np.cumsum(keep) - 1
+
+    result = {}
+    for name, table in tables.items():
+        if name == 'hands':
+            table = table.filter(pa.array(keep))
+            for offset, count in (('players_offset', 'players_count'), ('actions_offset', 'actions_count')):
+                if offset in table.column_names and count in table.column_names:
+                    counts = table.column(count).to_numpy()
+                    starts = np.cumsum(counts) - counts
+                    table = table.set_column(
+                        table.column_names.index(offset), offset, pa.array(starts, type=pa.int64())
+                    )
+        elif 'hand_idx' in table.column_names:
+            hand_idx = table.column('hand_idx').to_numpy()
+            table = table.filter(pa.array(keep[hand_idx]))
+            table = table.set_column(
+                table.column_names.index('hand_idx'), 'hand_idx',
+                pa.array(new_idx[table.column('hand_idx').to_numpy()], type=table.schema.field('hand_idx').type)
+            )
+        result[name] = table
+
+    return result
+
+
+def _align_to_schema(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Tabela com as colunas de schema, na ordem dele; colunas ausentes viram null"""
+    columns = [
+        table.column(field.name) if field.name in table.column_names else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _columns(table: pa.Table) -> Dict[str, list]:
+    """Converte uma tabela Arrow em {coluna: lista Python}"""
+    return {name: table.column(name).to_pylist() for name in table.column_names}
+
+
+def _action_dict(actions: Dict[str, list], j: int) -> Dict:
+    action = {}
+    if actions['player'][j] is not None:
+        action['player'] = actions['player'][j]
+    if actions['action'][j] is not None:
+        action['action'] = actions['action'][j]
+    action['amount'] = actions['amount'][j]
+    if actions['attrs'][j] is not None:
+        action.update(json.loads(actions['attrs'][j]))
+    return action
+
+
+def _leftover_json(data: Dict, known_keys) -> Optional[str]:
+    leftover = {k: v for k, v in data.items() if k not in known_keys}
+    return json.dumps(leftover) if leftover else None
@@ -3,5 +3,7 @@ Vectorization module - Transform decision points into searchable vectors
 """
 
 from .vectorizer import Vectorizer, FeatureConfig
+from .feature_schema import FeatureSchema, FEATURE_SCHEMA_FILE
+from .similarity import WeightedSimilarityKernel
 
-__all__ = ["Vectorizer", "FeatureConfig"]
+__all__ = ["Vectorizer", "FeatureConfig", "FeatureSchema", "FEATURE_SCHEMA_FILE", "WeightedSimilarityKernel"]
@@ -0,0 +1,282 @@
+"""
+Feature Schema - Artefato versionado do layout dos vetores
+
+Gravado ao lado dos índices FAISS (feature_schema.json), descreve o que
+os vetores indexados significam: dimensões e offsets de cada bloco, pesos,
+estado do scaler e um hash do schema. Pipeline, IndexBuilder e API carregam
+o artefato em vez de refazer o fit ou supor o tamanho do vetor.
+
+O hash cobre a versão dos encoders, o layout (blocos em ordem + dimensões),
+os pesos e o embedding do índice. O estado do scaler fica fora: muda a cada
+fit e não altera os vetores gravados.
+
+Embeddings do índice:
+- raw: vetores do Vectorizer como estão, distância L2
+- weighted: blocos normalizados * sqrt(peso) + crédito por bloco ausente,
+  produto interno (aproxima a similaridade ponderada do Vectorizer; ver
+  similarity.py)
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .vectorizer import SCALER_FEATURES, FeatureConfig, Vectorizer
+
+
+FEATURE_SCHEMA_FILE = "feature_schema.json"
+
+# Incrementar quando um encoder mudar o significado de um bloco
+ENCODING_VERSION = 1
+
+EMBEDDINGS = ('raw', 'weighted')
+
+# Crédito τ de um bloco ausente no candidato (embedding weighted). Medido com
+# benchmarks/recall_benchmark.py: ~0.9 maximiza o recall@10 sem rerank
+DEFAULT_MISSING_BLOCK_CREDIT = 0.9
+
+
+class FeatureSchema:
+    """
+    Layout, pesos e scaler de um conjunto de vetores
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        dimensions: Dict[str, int],
+        weights: Dict[str, float],
+        scaler: Optional[Dict] = None,
+        encoding_version: int = ENCODING_VERSION,
+        created_at: Optional[str] = None,
+        embedding: str = 'raw',
+        missing_block_credit: float = DEFAULT_MISSING_BLOCK_CREDIT
+    ):
+        """
+        Args:
+            dimensions: Dimensão de cada bloco, na ordem do vetor
+            weights: Peso de cada bloco (similarity scoring)
+            scaler: Estado do StandardScaler (None se não fitted)
+            encoding_version: Versão dos encoders do Vectorizer
+            created_at: Timestamp ISO (agora se None)
+            embedding: Transformação dos vetores no índice ('raw' ou 'weighted')
+            missing_block_credit: Crédito τ de bloco ausente (só 'weighted')
+        """
+        if embedding not in EMBEDDINGS:
+            raise ValueError(f"Embedding desconhecido: {embedding} (opções: {', '.join(EMBEDDINGS)})")
+
+        self.dimensions = {category: int(dim) for category, dim in dimensions.items()}
+        self.weights = {category: float(weight) for category, weight in weights.items()}
+        self.scaler = scaler
+        self.encoding_version = int(encoding_version)
+        self.created_at = created_at or datetime.now().isoformat()
+        self.embedding = embedding
+        self.missing_block_credit = float(missing_block_credit)
+
+    # ============================================
+    # LAYOUT
+    # ============================================
+
+    @property
+    def indices(self) -> Dict[str, Tuple[int, int]]:
+        """Offsets [início, fim) de cada bloco"""
+        indices = {}
+        current_idx = 0
+
+        for category, dim in self.dimensions.items():
+            indices[category] = (current_idx, current_idx + dim)
+            current_idx += dim
+
+        return indices
+
+    @property
+    def total_dimensions(self) -> int:
+        """Total de dimensões do vetor"""
+        return sum(self.dimensions.values())
+
+    @property
+    def metric(self) -> str:
+        """Métrica das distâncias da busca: 'L2' (raw, menor = mais similar) ou 'IP' (weighted, maior = mais similar)"""
+        return 'IP' if self.embedding == 'weighted' else 'L2'
+
+    @property
+    def schema_hash(self) -> str:
+        """SHA-256 do JSON canônico de encoders + layout + pesos + embedding"""
+        content = {
+            'encoding_version': self.encoding_version,
+            'dimensions': list(self.dimensions.items()),
+            'weights': sorted(self.weights.items()),
+        }
+        # 'raw' fica fora para manter o hash dos artefatos anteriores ao embedding
+        if self.embedding != 'raw':
+            content['embedding'] = self.embedding
+            content['missing_block_credit'] = self.missing_block_credit
+
+        canonical = json.dumps(content, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def is_compatible(self, other: 'FeatureSchema') -> bool:
+        """Vetores de um schema servem para o outro (mesmo hash)"""
+        return self.schema_hash == other.schema_hash
+
+    # ============================================
+    # CONVERSÕES
+    # ============================================
+
+    @classmethod
+    def from_config(
+        cls,
+        config: FeatureConfig,
+        scaler: Optional[Dict] = None,
+        embedding: str = 'raw',
+        missing_block_credit: float = DEFAULT_MISSING_BLOCK_CREDIT
+    ) -> 'FeatureSchema':
+        """Schema de uma FeatureConfig"""
+        return cls(
+            dimensions=config.dimensions,
+            weights=config.weights,
+            scaler=scaler,
+            embedding=embedding,
+            missing_block_credit=missing_block_credit
+        )
+
+    @classmethod
+    def from_vectorizer(
+        cls,
+        vectorizer: Vectorizer,
+        embedding: str = 'raw',
+        missing_block_credit: float = DEFAULT_MISSING_BLOCK_CREDIT
+    ) -> 'FeatureSchema':
+        """Schema de um Vectorizer, incluindo o scaler se já fitted"""
+        scaler = None
+
+        if vectorizer.is_fitted:
+            fitted = vectorizer.scaler
+            scaler = {
+                'features': list(SCALER_FEATURES),
+                'mean': fitted.mean_.tolist(),
+                'var': fitted.var_.tolist(),
+                'scale': fitted.scale_.tolist(),
+                'n_samples_seen': np.asarray(fitted.n_samples_seen_).tolist(),
+            }
+
+        return cls.from_config(
+            vectorizer.config,
+            scaler=scaler,
+            embedding=embedding,
+            missing_block_credit=missing_block_credit
+        )
+
+    def to_config(self) -> FeatureConfig:
+        """FeatureConfig com o layout e os pesos do schema"""
+        return FeatureConfig(weights=dict(self.weights), dimensions=dict(self.dimensions))
+
+    def to_vectorizer(self) -> Vectorizer:
+        """
+        Vectorizer pronto para uso (scaler restaurado, sem refazer o fit)
+
+        Raises:
+            ValueError: Se o layout não é o dos encoders atuais
+        """
+        current = FeatureConfig()
+        if self.encoding_version != ENCODING_VERSION or self.dimensions != current.dimensions:
+            raise ValueError(
+                f"Feature schema {self.schema_hash[:12]} (encoders v{self.encoding_version}, "
+                f"{self.total_dimensions} dims) não corresponde ao Vectorizer atual "
+                f"(encoders v{ENCODING_VERSION}, {current.total_dimensions} dims); "
+                f"revetorize e reconstrua os índices"
+            )
+
+        vectorizer = Vectorizer(self.to_config())
+
+        if self.scaler is not None:
+            fitted = vectorizer.scaler
+            fitted.mean_ = np.array(self.scaler['mean'], dtype=np.float64)
+            fitted.var_ = np.array(self.scaler['var'], dtype=np.float64)
+            fitted.scale_ = np.array(self.scaler['scale'], dtype=np.float64)
+            fitted.n_samples_seen_ = np.asarray(self.scaler['n_samples_seen'])
+            fitted.n_features_in_ = len(self.scaler['features'])
+            vectorizer.is_fitted = True
+
+        return vectorizer
+
+    # ============================================
+    # PERSISTÊNCIA
+    # ============================================
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': self.VERSION,
+            'schema_hash': self.schema_hash,
+            'encoding_version': self.encoding_version,
+            'total_dimensions': self.total_dimensions,
+            'embedding': self.embedding,
+            'metric': self.metric,
+            'missing_block_credit': self.missing_block_credit,
+            'dimensions': self.dimensions,
+            'indices': {category: list(bounds) for category, bounds in self.indices.items()},
+            'weights': self.weights,
+            'scaler': self.scaler,
+            'created_at': self.created_at,
+        }
+
+    def save(self, indices_dir: Path) -> Path:
+        """Salva o schema em indices_dir de forma atômica (arquivo temporário + rename)"""
+        path = Path(indices_dir) / FEATURE_SCHEMA_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+        os.replace(tmp_path, path)
+        logger.info(f"Feature schema salvo: {path} ({self.schema_hash[:12]})")
+
+        return path
+
+    @classmethod
+    def load(cls, indices_dir: Path) -> 'FeatureSchema':
+        """
+        Carrega o schema gravado em indices_dir
+
+        Raises:
+            FileNotFoundError: Se não há artefato
+            ValueError: Versão desconhecida ou hash que não bate com o conteúdo
+        """
+        path = Path(indices_dir) / FEATURE_SCHEMA_FILE
+
+        if not path.exists():
+            raise FileNotFoundError(f"Feature schema não encontrado: {path}")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('version', 0) > cls.VERSION:
+            raise ValueError(f"Versão de feature schema não suportada: {data.get('version')}")
+
+        schema = cls(
+            dimensions=data['dimensions'],
+            weights=data['weights'],
+            scaler=data.get('scaler'),
+            encoding_version=data.get('encoding_version', ENCODING_VERSION),
+            created_at=data.get('created_at'),
+            embedding=data.get('embedding', 'raw'),
+            missing_block_credit=data.get('missing_block_credit', DEFAULT_MISSING_BLOCK_CREDIT)
+        )
+
+        if data.get('schema_hash') != schema.schema_hash:
+            raise ValueError(f"Hash do feature schema não confere com o conteúdo de {path}")
+
+        return schema
+
+    @classmethod
+    def exists(cls, indices_dir: Path) -> bool:
+        """Há um artefato em indices_dir"""
+        return (Path(indices_dir) / FEATURE_SCHEMA_FILE).exists()
@@ -0,0 +1,231 @@
+"""
+Similarity - Similaridade ponderada por bloco em lote
+
+Mesma métrica do Vectorizer.calculate_weighted_similarity: para cada bloco
+(categoria) com norma > 0 nos dois vetores, soma peso * cosseno do bloco e
+divide pela soma dos pesos desses blocos (0 se nenhum bloco conta).
+
+O kernel é montado uma vez por conjunto de candidatos (ex: um índice):
+- candidatos normalizados por bloco (blocos zerados ficam zerados)
+- máscara (N, blocos) de blocos com norma > 0
+
+Com isso, para Q queries normalizadas e escaladas pelo peso de cada dimensão:
+    numerador   = queries_ponderadas @ candidatos_normalizados.T     (Q, N)
+    denominador = (pesos * máscara_query) @ máscara_candidatos.T     (Q, N)
+
+Embedding ponderado (para o índice): cada bloco normalizado e multiplicado
+por sqrt(peso). O produto interno de dois embeddings é exatamente o
+numerador acima. Falta o denominador: na métrica exata um bloco ausente no
+candidato é neutro, no produto interno conta como divergente. Por isso o
+embedding ganha uma dimensão por bloco que dá crédito τ (missing_credit)
+a cada bloco presente na query e ausente no candidato:
+
+    produto interno = s * W_S + τ * (W_Q - W_S)
+
+(s = score exato, W_S = pesos dos blocos presentes nos dois, W_Q = pesos
+dos blocos da query, constante por query). Ordena igual à métrica exata
+quando s ≈ τ, ou seja, é mais preciso justamente no topo do ranking.
+
+Do lado do índice, uma última dimensão completa a norma² até a constante
+M = soma dos pesos * max(1, τ) (na query ela é 0). Com todas as normas
+iguais, ordenar por distância L2 é o mesmo que por produto interno:
+    ||q - x||² = ||q||² + M - 2 * q·x
+e o HNSW navega bem melhor que com produto interno em normas variadas.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class BlockLayout:
+    """
+    Blocos com peso de um vetor e a normalização por bloco
+    """
+
+    def __init__(self, config, dimension: int):
+        """
+        Args:
+            config: FeatureConfig ou FeatureSchema (usa indices e weights)
+            dimension: Dimensão dos vetores
+        """
+        self.dimension = dimension
+        self.categories = list(config.weights)
+
+        # Bloco de cada dimensão; dimensões sem peso vão para o bloco extra (descartado)
+        blocks = len(self.categories)
+        self.block_of_dim = np.full(self.dimension, blocks, dtype=np.int64)
+        self.weights = np.zeros(blocks, dtype=np.float32)
+
+        for b, category in enumerate(self.categories):
+            start, end = config.indices[category]
+            if end > self.dimension:
+                raise ValueError(
+                    f"Bloco {category} [{start}, {end}) fora de vetores com {self.dimension} dimensões"
+                )
+            self.block_of_dim[start:end] = b
+            self.weights[b] = config.weights[category]
+
+        self.dim_weights = np.append(self.weights, 0.0).astype(np.float32)[self.block_of_dim]
+        self._membership = np.zeros((self.dimension, blocks + 1), dtype=np.float32)
+        self._membership[np.arange(self.dimension), self.block_of_dim] = 1.0
+        self._sqrt_dim_weights = np.sqrt(self.dim_weights)
+
+    def normalize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vetores com cada bloco de norma 1 (ou zerado) e a máscara (n, blocos) de blocos não nulos"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.sqrt((vectors * vectors) @ self._membership)
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        inverse[:, -1] = 0.0
+
+        normalized = vectors * inverse[:, self.block_of_dim]
+        mask = (norms[:, :-1] > 0).astype(np.float32)
+
+        return normalized, mask
+
+    def block_cosines(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Cossenos (n, blocos) entre linhas já normalizadas de a e b"""
+        return (a * b) @ self._membership[:, :-1]
+
+    @property
+    def embedding_dimension(self) -> int:
+        """Dimensão do embedding ponderado (vetor + uma por bloco + norma)"""
+        return self.dimension + len(self.categories) + 1
+
+    def embedding_norm2(self, missing_credit: float) -> float:
+        """Norma² comum a todos os embeddings do lado do índice"""
+        return float(self.weights.sum()) * max(1.0, missing_credit)
+
+    def embed(self, vectors: np.ndarray, missing_credit: float = 0.0, query: bool = False) -> np.ndarray:
+        """
+        Embedding ponderado: blocos normalizados * sqrt(peso) + crédito por bloco
+
+        Produto interno entre o embedding de uma query e o de um candidato =
+        soma de peso * cosseno dos blocos não nulos nos dois vetores, mais
+        missing_credit * peso de cada bloco da query ausente no candidato.
+        Dimensões sem peso ficam zeradas; do lado do índice, a última
+        dimensão leva a norma² a embedding_norm2 (busca por L2).
+
+        Args:
+            vectors: Vetor (dimensão,) ou matriz (n, dimensão)
+            missing_credit: Crédito τ de um bloco ausente no candidato
+            query: Lado da query (crédito nos blocos presentes) ou do índice
+                (crédito nos blocos ausentes)
+
+        Returns:
+            float32 (embedding_dimension,) ou (n, embedding_dimension)
+        """
+        single = np.ndim(vectors) == 1
+        normalized, mask = self.normalize(np.atleast_2d(vectors))
+
+        credit = np.sqrt(self.weights * np.float32(missing_credit))
+        blocks = mask if query else 1.0 - mask
+        embedded = np.hstack([
+            normalized * self._sqrt_dim_weights,
+            blocks * credit,
+            np.zeros((len(normalized), 1), dtype=np.float32)
+        ]).astype(np.float32)
+
+        if not query:
+            norm2 = (embedded * embedded).sum(axis=1)
+            embedded[:, -1] = np.sqrt(np.maximum(self.embedding_norm2(missing_credit) - norm2, 0.0))
+
+        return embedded[0] if single else embedded
+
+
+class WeightedSimilarityKernel:
+    """
+    Scores de similaridade ponderada de queries contra N candidatos
+    """
+
+    def __init__(self, candidates: np.ndarray, config):
+        """
+        Args:
+            candidates: Vetores (N, dimensão) no layout do config (brutos ou
+                já no embedding ponderado: a normalização por bloco é a mesma)
+            config: FeatureConfig ou FeatureSchema (usa indices e weights)
+        """
+        candidates = np.asarray(candidates, dtype=np.float32)
+        if candidates.ndim != 2:
+            raise ValueError(f"Candidatos devem ser uma matriz (N, dimensão), recebido shape {candidates.shape}")
+
+        self.layout = BlockLayout(config, candidates.shape[1])
+        self.dimension = self.layout.dimension
+        self.categories = self.layout.categories
+
+        # Pré-calculado uma vez por conjunto de candidatos
+        self.normalized, self.mask = self.layout.normalize(candidates)
+        self.mask_t = np.ascontiguousarray(self.mask.T)
+        self.weights = self.layout.weights
+        self.dim_weights = self.layout.dim_weights
+
+    def __len__(self) -> int:
+        return len(self.normalized)
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Similaridade ponderada de cada query contra todos os candidatos
+
+        Args:
+            queries: Vetor (dimensão,) ou matriz (Q, dimensão)
+
+        Returns:
+            Scores float32 (N,) para uma query ou (Q, N)
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+
+        if queries.shape[1] != self.dimension:
+            raise ValueError(f"Query com {queries.shape[1]} dimensões; candidatos têm {self.dimension}")
+
+        normalized, mask = self.layout.normalize(queries)
+
+        numerator = (normalized * self.dim_weights) @ self.normalized.T
+        denominator = (mask * self.weights) @ self.mask_t
+        scores = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+        return scores[0] if single else scores
+
+    def top_k(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k candidatos mais similares de cada query, em ordem decrescente de score
+
+        Returns:
+            (scores, posições) com shape (k,) para uma query ou (Q, k);
+            k é limitado ao número de candidatos
+        """
+        scores = self.scores(queries)
+        k = min(k, scores.shape[-1])
+
+        if k < scores.shape[-1]:
+            candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+
+        top_scores = np.take_along_axis(scores, candidates, axis=-1)
+        order = np.argsort(-top_scores, axis=-1, kind='stable')
+
+        return (
+            np.take_along_axis(top_scores, order, axis=-1),
+            np.take_along_axis(candidates, order, axis=-1)
+        )
+
+    def block_scores(self, query: np.ndarray, positions: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Cosseno de cada bloco entre uma query e alguns candidatos (para explicar resultados)
+
+        Returns:
+            {categoria: cossenos (len(positions),)}; NaN onde o bloco não conta
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        normalized, mask = self.layout.normalize(query)
+        positions = np.asarray(positions, dtype=np.int64)
+
+        cosines = self.layout.block_cosines(self.normalized[positions], normalized)
+        counted = (self.mask[positions] * mask) > 0
+
+        return {
+            category: np.where(counted[:, b], cosines[:, b], np.nan)
+            for b, category in enumerate(self.categories)
+        }
@@ -14,9 +14,201 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import json
+import itertools
 from loguru import logger
 from sklearn.preprocessing import StandardScaler
 
+from src.context.board_texture import (
+    TEXTURE_FLAGS, board_texture_code, texture_codes_batch, texture_vectors
+)
+from src.context.hand_evaluator import DRAW_FLAGS, card_index
+
+from .similarity import WeightedSimilarityKernel
+
+
+# ============================================
+# VOCABULÁRIOS (compartilhados pelos encoders escalares e pelo lote)
+# ============================================
+
+STREETS = ['preflop', 'flop', 'turn', 'river']
+
+POSITIONS = ['IP', 'OOP', 'BTN', 'BB']
+
+# Ordem importa: o primeiro tipo contido no token vence
+ACTION_TYPES = [
+    'check', 'call', 'bet', 'raise', 'fold',
+    'bet_small', 'bet_medium', 'bet_large',
+    'raise_small', 'raise_medium', 'raise_large',
+    'all_in'
+]
+
+HAND_STRENGTHS = [
+    'HIGH_CARD', 'ONE_PAIR', 'TWO_PAIR', 'THREE_OF_A_KIND',
+    'STRAIGHT', 'FLUSH', 'FULL_HOUSE', 'FOUR_OF_A_KIND',
+    'STRAIGHT_FLUSH'
+]
+
+HERO_ACTIONS = [
+    'fold', 'check', 'call', 'bet', 'raise',
+    'all_in', 'limp', 'iso'
+]
+
+RANK_VALUES = {
+    '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7,
+    '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
+}
+
+BOARD_SUITS = ['c', 'd', 'h', 's']
+
+# Limites dos buckets: SPR [x < 2, < 5, < 10, resto], bet sizing [x <= 33, 50, 75, 100, resto]
+SPR_BINS = [2, 5, 10]
+BET_SIZE_BINS = [33, 50, 75, 100]
+
+RECENT_ACTIONS = 5
+
+# Features numéricas do StandardScaler (ordem das colunas)
+SCALER_FEATURES = ['pot_bb', 'eff_stack_bb']
+
+
+# ============================================
+# HELPERS DO LOTE
+# ============================================
+
+def _scatter(matrix: np.ndarray, rows: np.ndarray, columns: np.ndarray, values=1.0):
+    """matrix[rows, columns] = values por índice plano (matrix C-contígua)"""
+    matrix.reshape(-1)[rows * matrix.shape[1] + columns] = values
+
+
+def _set_one_hot(matrix: np.ndarray, start: int, codes: np.ndarray):
+    """Liga a coluna start + código de cada linha; código -1 não liga nada"""
+    rows = np.flatnonzero(codes >= 0)
+    _scatter(matrix, rows, start + codes[rows])
+
+
+def _category_codes(values: pd.Series, categories: List[str]) -> np.ndarray:
+    """Índice de cada valor em `categories` (-1 se ausente, None ou NaN)"""
+    index = {category: i for i, category in enumerate(categories)}
+    codes, uniques = pd.factorize(values)
+    return _lookup(codes, list(uniques), lambda value: index.get(value, -1), -1, np.int64)
+
+
+def _buckets(values: pd.Series, bins: List[float], right: bool = False) -> np.ndarray:
+    """
+    Buckets como nos encoders escalares: None -> 0, demais -> 1 + np.digitize
+
+    NaN cai no último bucket, igual às comparações escalares (todas falsas).
+    """
+    if values.dtype == object:
+        missing = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+        numbers = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    else:
+        missing = np.zeros(len(values), dtype=bool)
+        numbers = values.to_numpy(dtype=np.float64)
+
+    return np.where(missing, 0, 1 + np.digitize(numbers, bins, right=right))
+
+
+def _flatten(values: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List, np.ndarray]:
+    """
+    Coluna de listas -> itens concatenados com linha e posição de cada um
+
+    None/NaN contam como listas vazias. Os itens são fatorados uma vez
+    (pd.factorize), então as tabelas por item único ficam pequenas.
+
+    Returns:
+        (rows, positions, codes, uniques, lengths)
+    """
+    sequences = values.tolist()
+    try:
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    except TypeError:
+        sequences = [v if isinstance(v, (list, tuple, np.ndarray)) else () for v in sequences]
+        lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+
+    # Arrays (vindos do Parquet/Arrow) concatenam em C, só os não vazios;
+    # listas são mais rápidas via chain
+    flat = np.empty(int(lengths.sum()), dtype=object)
+    if len(flat) and isinstance(sequences[0], np.ndarray):
+        flat[:] = np.concatenate(list(itertools.compress(sequences, lengths)))
+    elif len(flat):
+        flat[:] = list(itertools.chain.from_iterable(sequences))
+    codes, uniques = pd.factorize(flat)
+
+    rows = np.repeat(np.arange(len(sequences)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(flat)) - starts[rows]
+
+    return rows, positions, codes, list(uniques), lengths
+
+
+def _lookup(codes: np.ndarray, uniques: List, fn, default, dtype) -> np.ndarray:
+    """Aplica `fn` a cada item único e espalha pelos códigos; código -1 recebe `default`"""
+    table = np.array([fn(item) for item in uniques] + [default], dtype=dtype)
+    return table[codes]
+
+
+def _action_type(token) -> int:
+    """Primeiro ACTION_TYPE contido no token (-1 se nenhum)"""
+    if isinstance(token, str):
+        lowered = token.lower()
+        for i, action_type in enumerate(ACTION_TYPES):
+            if action_type in lowered:
+                return i
+    return -1
+
+
+def _hero_action(token) -> int:
+    """-2 se o token não é do hero; senão índice em HERO_ACTIONS (-1 se fora da lista)"""
+    if not isinstance(token, str) or 'HERO_' not in token:
+        return -2
+    action_type = token.split('_')[1]
+    return HERO_ACTIONS.index(action_type) if action_type in HERO_ACTIONS else -1
+
+
+def _board_card_features(card) -> List[float]:
+    """As 4 dimensões de uma carta em _encode_board_cards (rank + 3 naipes)"""
+    features = [0.0, 0.0, 0.0, 0.0]
+
+    if isinstance(card, str) and len(card) == 2:
+        features[0] = RANK_VALUES.get(card[0], 0) / 14.0
+        suit = card[1].lower()
+        if suit in BOARD_SUITS[:3]:
+            features[1 + BOARD_SUITS.index(suit)] = 1.0
+
+    return features
+
+
+def _dict_flags(values: np.ndarray, flags) -> np.ndarray:
+    """
+    Coluna de dicts (ou JSON) -> matriz bool (n, len(flags))
+
+    Um `map(dict.get)` por flag em vez de uma chamada Python por linha; a
+    verdade de cada valor segue `if d.get(flag)` dos encoders escalares e
+    valores que não são dicts contam como vazios.
+    """
+    result = np.zeros((len(values), len(flags)), dtype=bool)
+
+    rows = np.flatnonzero(pd.notna(values))
+    dicts = values[rows].tolist()
+    if set(map(type, dicts)) - {dict}:
+        dicts = [
+            value if isinstance(value, dict)
+            else json.loads(value) if isinstance(value, str)
+            else {}
+            for value in dicts
+        ]
+
+    # Só dicts com algum valor verdadeiro (no preflop a textura vem toda None)
+    truthy = np.fromiter(map(any, map(dict.values, dicts)), dtype=bool, count=len(dicts))
+    candidates = rows[truthy]
+    dicts = list(itertools.compress(dicts, truthy))
+
+    for j, flag in enumerate(flags):
+        present = np.array(list(map(dict.get, dicts, itertools.repeat(flag))), dtype=object)
+        result[candidates, j] = present.astype(bool)
+
+    return result
+
 
 @dataclass
 class FeatureConfig:
@@ -109,16 +301,12 @@ class Vectorizer:
         """
         logger.info("Fitting scaler com dados de treinamento...")
 
-        # Extrair features numéricas para fit
-        numeric_features = []
-
-        for _, row in decision_points_df.iterrows():
-            pot_bb = row.get('pot_bb', 0)
-            eff_stack_bb = row.get('eff_stack_bb', 0)
+        # Features numéricas por coluna (ausente -> 0, como no dict por linha)
+        numeric_features = decision_points_df.reindex(
+            columns=SCALER_FEATURES, fill_value=0
+        ).to_numpy(dtype=np.float64)
 
-            numeric_features.append([pot_bb, eff_stack_bb])
-
-        if numeric_features:
+        if len(numeric_features):
             self.scaler.fit(numeric_features)
             self.is_fitted = True
             logger.success("Scaler fitted com sucesso")
@@ -150,7 +338,7 @@ class Vectorizer:
 
         # 3. Board Texture (10 dim) - Multi-hot
         board_texture = dp.get('board_texture', {})
-        texture_vec = self._encode_board_texture(board_texture)
+        texture_vec = self._encode_board_texture(board_texture, dp.get('board_cards'))
         start, end = self.config.indices['board_texture']
         vector[start:end] = texture_vec
 
@@ -228,7 +416,13 @@ class Vectorizer:
 
     def vectorize_batch(self, decision_points_df: pd.DataFrame) -> np.ndarray:
         """
-        Vetoriza múltiplos decision points
+        Vetoriza múltiplos decision points coluna a coluna
+
+        Preenche uma matriz (n, total_dimensions) pré-alocada bloco por bloco:
+        códigos categóricos espalhados direto nas colunas one-hot, np.digitize
+        para os buckets de SPR e bet sizing, e tabelas por token/carta única
+        (fatorados uma vez) para sequências e board. O resultado é idêntico a
+        vectorize_decision_point linha a linha.
 
         Args:
             decision_points_df: DataFrame com decision points
@@ -236,22 +430,91 @@ class Vectorizer:
         Returns:
             Array numpy de shape [n_samples, total_dimensions]
         """
-        vectors = []
+        df = decision_points_df
+        n = len(df)
+        matrix = np.zeros((n, self.config.total_dimensions), dtype=np.float32)
+
+        if n == 0:
+            return matrix
+
+        def column(name, default):
+            if name in df.columns:
+                return df[name]
+            return pd.Series([default] * n, index=df.index)
+
+        def start(category):
+            return self.config.indices[category][0]
+
+        # 1-2. Street e posição do vilão
+        _set_one_hot(matrix, start('street'), _category_codes(column('street', 'preflop'), STREETS))
+        _set_one_hot(matrix, start('position'), _category_codes(column('villain_position', 'OOP'), POSITIONS))
+
+        # 3 e 10. Board: cartas fatoradas uma vez, (n, largura) de índices de carta única
+        rows, positions, codes, uniques, board_lengths = _flatten(column('board_cards', []))
+        slots = np.full((n, max(int(board_lengths.max()), 3)), -1, dtype=np.int64)
+        _scatter(slots, rows, positions, codes)
+
+        boards = np.array([card_index(card) for card in uniques] + [-1], dtype=np.int64)[slots]
+        texture_codes = texture_codes_batch(boards).astype(np.int64)
+
+        # Sem cartas: flags do dict (decision points antigos)
+        no_board = np.flatnonzero(board_lengths == 0)
+        textures = column('board_texture', {}).to_numpy(dtype=object)
+        flags = _dict_flags(textures[no_board], TEXTURE_FLAGS)
+        texture_codes[no_board] = flags @ (1 << np.arange(len(TEXTURE_FLAGS)))
+
+        begin, end = self.config.indices['board_texture']
+        matrix[:, begin:end] = texture_vectors(texture_codes)
+
+        card_features = np.array([_board_card_features(card) for card in uniques] + [[0.0] * 4], dtype=np.float32)
+        begin, end = self.config.indices['board_cards']
+        matrix[:, begin:end] = card_features[slots[:, :3]].reshape(n, 12)
+
+        # 4. SPR
+        _set_one_hot(matrix, start('spr'), _buckets(column('spr', None), SPR_BINS))
 
-        for idx, row in decision_points_df.iterrows():
-            dp_dict = row.to_dict()
+        # 5, 12 e 14. Sequência da street: tokens fatorados uma vez
+        rows, positions, codes, uniques, seq_lengths = _flatten(column('current_street_sequence', []))
 
-            # Parse JSON fields se necessário
-            if isinstance(dp_dict.get('board_texture'), str):
-                dp_dict['board_texture'] = json.loads(dp_dict['board_texture'])
+        recent = positions - np.maximum(seq_lengths[rows] - RECENT_ACTIONS, 0)
+        action_types = _lookup(codes, uniques, _action_type, -1, np.int64)
+        hit = np.flatnonzero((recent >= 0) & (action_types >= 0))
+        _scatter(matrix, rows[hit], start('action_sequence') + (recent[hit] * 6 + action_types[hit]) % 30)
 
-            if isinstance(dp_dict.get('villain_draws'), str):
-                dp_dict['villain_draws'] = json.loads(dp_dict['villain_draws'])
+        # Última ação do hero por linha (itens já em ordem de linha/posição)
+        hero_actions = _lookup(codes, uniques, _hero_action, -2, np.int64)
+        hero_items = np.flatnonzero(hero_actions > -2)
+        hero_rows = rows[hero_items]
+        last = np.append(hero_rows[1:] != hero_rows[:-1], True)[:len(hero_rows)]
+        hero_codes = np.full(n, -1, dtype=np.int64)
+        hero_codes[hero_rows[last]] = hero_actions[hero_items[last]]
+        _set_one_hot(matrix, start('previous_hero_action'), hero_codes)
 
-            vector = self.vectorize_decision_point(dp_dict)
-            vectors.append(vector)
+        begin = start('action_count')
+        matrix[:, begin] = seq_lengths / 10.0
+        matrix[:, begin + 1] = column('action_number_in_street', 0).to_numpy(dtype=np.float64) / 20.0
 
-        return np.array(vectors, dtype=np.float32)
+        # 6. Aggressor (qualquer valor fora de hero/villain conta como None)
+        aggressor_codes = _category_codes(column('current_aggressor', None), ['hero', 'villain'])
+        _set_one_hot(matrix, start('aggressor'), np.where(aggressor_codes < 0, 2, aggressor_codes))
+
+        # 7-8. Pot e stack
+        matrix[:, start('pot_size')] = np.log1p(column('pot_bb', 0).to_numpy(dtype=np.float64)) / 10.0
+        matrix[:, start('stack_size')] = column('eff_stack_bb', 0).to_numpy(dtype=np.float64) / 100.0
+
+        # 9. Draws
+        begin, end = self.config.indices['draws']
+        matrix[:, begin:end] = _dict_flags(column('villain_draws', {}).to_numpy(dtype=object), DRAW_FLAGS)
+
+        # 11. Hand strength
+        _set_one_hot(matrix, start('hand_strength'),
+                     _category_codes(column('villain_hand_strength', None), HAND_STRENGTHS))
+
+        # 13. Bet sizing
+        _set_one_hot(matrix, start('bet_sizing'),
+                     _buckets(column('villain_bet_size_pot_pct', None), BET_SIZE_BINS, right=True))
+
+        return matrix
 
     # ============================================
     # ENCODING FUNCTIONS
@@ -259,44 +522,39 @@ class Vectorizer:
 
     def _encode_street(self, street: str) -> np.ndarray:
         """One-hot encoding de street"""
-        streets = ['preflop', 'flop', 'turn', 'river']
         vec = np.zeros(4, dtype=np.float32)
 
-        if street in streets:
-            vec[streets.index(street)] = 1.0
+        if street in STREETS:
+            vec[STREETS.index(street)] = 1.0
 
         return vec
 
     def _encode_position(self, villain_pos: str, hero_pos: str) -> np.ndarray:
         """One-hot encoding de posição"""
-        positions = ['IP', 'OOP', 'BTN', 'BB']
         vec = np.zeros(4, dtype=np.float32)
 
         # Codificar posição do vilão
-        if villain_pos in positions:
-            vec[positions.index(villain_pos)] = 1.0
+        if villain_pos in POSITIONS:
+            vec[POSITIONS.index(villain_pos)] = 1.0
 
         return vec
 
-    def _encode_board_texture(self, texture: Dict) -> np.ndarray:
-        """Multi-hot encoding de board texture"""
-        vec = np.zeros(10, dtype=np.float32)
-
-        # Flags booleanas
-        flags = [
-            'monotone',      # 0
-            'two_tone',      # 1
-            'rainbow',       # 2
-            'paired',        # 3
-            'trips',         # 4
-            'connected',     # 5
-            'disconnected',  # 6
-            'high_broadway', # 7
-            'low',           # 8
-            'wet'            # 9
-        ]
+    def _encode_board_texture(self, texture: Dict, board_cards=None) -> np.ndarray:
+        """
+        Multi-hot encoding de board texture
+
+        Com as cartas do board usa a tabela de textura (mesma do extrator);
+        sem elas, os flags do dict (decision points antigos).
+        """
+        if board_cards is not None and not isinstance(board_cards, str) and len(board_cards):
+            return texture_vectors([board_texture_code(board_cards)])[0]
 
-        for i, flag in enumerate(flags):
+        vec = np.zeros(len(TEXTURE_FLAGS), dtype=np.float32)
+
+        if not isinstance(texture, dict):
+            return vec
+
+        for i, flag in enumerate(TEXTURE_FLAGS):
             if texture.get(flag, False):
                 vec[i] = 1.0
 
@@ -329,22 +587,14 @@ class Vectorizer:
         vec = np.zeros(30, dtype=np.float32)
 
         # Usar últimas 5 ações
-        recent_actions = sequence[-5:] if len(sequence) > 5 else sequence
-
-        # Hash simples: mapear ações para índices
-        action_types = [
-            'check', 'call', 'bet', 'raise', 'fold',
-            'bet_small', 'bet_medium', 'bet_large',
-            'raise_small', 'raise_medium', 'raise_large',
-            'all_in'
-        ]
+        recent_actions = sequence[-RECENT_ACTIONS:] if len(sequence) > RECENT_ACTIONS else sequence
 
         for i, action_str in enumerate(recent_actions):
             # Extrair tipo de ação do formato "HERO_bet_8"
-            for action_type in action_types:
+            for action_type in ACTION_TYPES:
                 if action_type in action_str.lower():
                     # Ativar dimensão correspondente
-                    idx = (i * 6 + action_types.index(action_type)) % 30
+                    idx = (i * 6 + ACTION_TYPES.index(action_type)) % 30
                     vec[idx] = 1.0
                     break
 
@@ -380,10 +630,8 @@ class Vectorizer:
         vec = np.zeros(4, dtype=np.float32)
 
         if draws:
-            vec[0] = 1.0 if draws.get('flush_draw', False) else 0.0
-            vec[1] = 1.0 if draws.get('oesd', False) else 0.0
-            vec[2] = 1.0 if draws.get('gutshot', False) else 0.0
-            vec[3] = 1.0 if draws.get('combo_draw', False) else 0.0
+            for i, flag in enumerate(DRAW_FLAGS):
+                vec[i] = 1.0 if draws.get(flag, False) else 0.0
 
         return vec
 
@@ -395,25 +643,18 @@ class Vectorizer:
         """
         vec = np.zeros(12, dtype=np.float32)
 
-        rank_values = {
-            '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7,
-            '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14
-        }
-
-        suits = ['c', 'd', 'h', 's']
-
         # Processar primeiras 3 cartas (flop)
         for i, card in enumerate(board_cards[:3]):
             if len(card) == 2:
                 rank, suit = card[0], card[1].lower()
 
                 # Rank value normalizado [0, 1]
-                rank_val = rank_values.get(rank, 0) / 14.0
+                rank_val = RANK_VALUES.get(rank, 0) / 14.0
                 vec[i * 4] = rank_val
 
                 # Suit one-hot (3 dimensões restantes)
-                if suit in suits:
-                    suit_idx = suits.index(suit)
+                if suit in BOARD_SUITS:
+                    suit_idx = BOARD_SUITS.index(suit)
                     if suit_idx < 3:  # Usar apenas 3 das 4 dimensões
                         vec[i * 4 + 1 + suit_idx] = 1.0
 
@@ -423,14 +664,8 @@ class Vectorizer:
         """One-hot encoding de hand strength"""
         vec = np.zeros(9, dtype=np.float32)
 
-        strengths = [
-            'HIGH_CARD', 'ONE_PAIR', 'TWO_PAIR', 'THREE_OF_A_KIND',
-            'STRAIGHT', 'FLUSH', 'FULL_HOUSE', 'FOUR_OF_A_KIND',
-            'STRAIGHT_FLUSH'
-        ]
-
-        if strength in strengths:
-            vec[strengths.index(strength)] = 1.0
+        if strength in HAND_STRENGTHS:
+            vec[HAND_STRENGTHS.index(strength)] = 1.0
 
         return vec
 
@@ -448,13 +683,8 @@ class Vectorizer:
         """One-hot encoding de hero action"""
         vec = np.zeros(8, dtype=np.float32)
 
-        actions = [
-            'fold', 'check', 'call', 'bet', 'raise',
-            'all_in', 'limp', 'iso'
-        ]
-
-        if action in actions:
-            vec[actions.index(action)] = 1.0
+        if action in HERO_ACTIONS:
+            vec[HERO_ACTIONS.index(action)] = 1.0
 
         return vec
 
@@ -488,6 +718,8 @@ class Vectorizer:
         """
         Calcula similaridade ponderada entre dois vetores
 
+        Para reranquear ou explicar muitos candidatos use similarity_kernel.
+
         Args:
             vec1, vec2: Vetores de decisão
 
@@ -515,6 +747,15 @@ class Vectorizer:
 
         return total_score / total_weight if total_weight > 0 else 0.0
 
+    def similarity_kernel(self, candidates: np.ndarray) -> WeightedSimilarityKernel:
+        """
+        Kernel em lote da mesma similaridade ponderada contra N candidatos
+
+        Monte uma vez por conjunto de candidatos (ex: vetores de um índice) e
+        chame scores / top_k para uma ou Q queries.
+        """
+        return WeightedSimilarityKernel(candidates, self.config)
+
 
 # ============================================
 # SCRIPT DE TESTE
@@ -31,7 +31,7 @@ def test_search():
     logger.info(f"✅ {len(df)} decision points carregados")
 
     # Create IndexBuilder
-    builder = IndexBuilder(indices_dir=INDICES_DIR, dimension=99)
+    builder = IndexBuilder(indices_dir=INDICES_DIR)
 
     # Get summary
     summary = builder.get_summary()
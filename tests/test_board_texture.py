@@ -0,0 +1,98 @@
+"""
+Unit Tests for the precomputed board-texture table
+"""
+
+import pytest
+import sys
+import itertools
+import numpy as np
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.context.board_texture import (
+    TEXTURE_FLAGS, analyze_board, board_texture_code, texture_code,
+    texture_codes_batch, texture_flags, texture_key, texture_vectors
+)
+from src.context.hand_evaluator import card_index
+from src.vectorization.vectorizer import Vectorizer
+
+
+def flags_on(board):
+    return {flag for flag, value in analyze_board(board).items() if value is True}
+
+
+class TestTextureFlags:
+    """Flags for classic boards"""
+
+    @pytest.mark.parametrize("board,expected", [
+        (['Ah', 'Kh', 'Qh'], {'monotone', 'connected', 'high_broadway', 'wet'}),
+        (['9s', '8s', '2d'], {'two_tone', 'wet'}),
+        (['2c', '7d', 'Qh'], {'rainbow', 'disconnected'}),
+        (['7c', '7d', '7h'], {'rainbow', 'paired', 'trips', 'disconnected', 'low'}),
+        (['Ac', '2d', '3h'], {'rainbow', 'connected', 'wet'}),
+        (['Kd', 'Td', '4c', '4s'], {'paired', 'high_broadway', 'wet'}),
+        (['5c', '6c', '7c', '8d', 'Ah'], {'connected', 'wet'}),
+    ])
+    def test_flags(self, board, expected):
+        assert flags_on(board) == expected
+
+    def test_dict_layout(self):
+        texture = analyze_board(['Ah', 'Kd', '7c'])
+        assert list(texture) == list(TEXTURE_FLAGS) + ['board_size']
+        assert texture['board_size'] == 3
+
+    def test_empty_board(self):
+        assert analyze_board([]) == {}
+        assert board_texture_code([]) == 0
+
+    def test_code_round_trip(self):
+        code = board_texture_code(['Ah', 'Kh', 'Qh'])
+        assert texture_flags(code) == {k: v for k, v in analyze_board(['Ah', 'Kh', 'Qh']).items() if k != 'board_size'}
+
+
+class TestTextureTable:
+    """Canonical keys and the batch lookup"""
+
+    def test_suit_isomorphic_flops_share_a_key(self):
+        swapped = str.maketrans('hdcs', 'schd')
+        board = ['Ah', 'Kd', '7h']
+        other = [card.translate(swapped) for card in board]
+        assert texture_key([card_index(c) for c in board]) == texture_key([card_index(c) for c in other])
+
+    def test_canonical_flop_count(self):
+        keys = {texture_key(flop) for flop in itertools.combinations(range(52), 3)}
+        # Never more keys than the 1755 suit-isomorphic flop classes
+        assert len(keys) <= 1755
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(3)
+        boards = np.full((3000, 5), -1)
+        for i in range(len(boards)):
+            size = 3 + i % 3
+            boards[i, :size] = rng.permutation(52)[:size]
+
+        codes = texture_codes_batch(boards)
+        assert codes.tolist() == [texture_code(row) for row in boards.tolist()]
+
+    def test_vectors_follow_flag_order(self):
+        code = board_texture_code(['7c', '7d', '7h'])
+        vector = texture_vectors([code])[0]
+        assert [TEXTURE_FLAGS[i] for i in np.flatnonzero(vector)] == ['rainbow', 'paired', 'trips', 'disconnected', 'low']
+
+
+class TestVectorizerTexture:
+    """The vectorizer reads the same table as the extractor"""
+
+    def test_board_cards_use_table(self):
+        vectorizer = Vectorizer()
+        vec = vectorizer._encode_board_texture({}, ['Ah', 'Kh', 'Qh'])
+        expected = [float(analyze_board(['Ah', 'Kh', 'Qh'])[flag]) for flag in TEXTURE_FLAGS]
+        assert vec.tolist() == expected
+
+    def test_legacy_dict_without_cards(self):
+        vec = Vectorizer()._encode_board_texture({'monotone': True, 'paired': True})
+        assert vec[TEXTURE_FLAGS.index('monotone')] == 1.0
+        assert vec[TEXTURE_FLAGS.index('paired')] == 1.0
+        assert vec.sum() == 2.0
@@ -0,0 +1,255 @@
+"""
+Unit Tests for the columnar extraction engine
+"""
+
+import pytest
+import sys
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.context.columnar import ColumnarExtractor
+from src.context.context_extractor import ContextExtractor, DECISION_POINT_SCHEMA, decision_point_columns
+from src.parsers.unified_parser import UnifiedParser
+from tests.test_hand_store import make_hand
+from tests.test_unified_parser import XML_SESSION, XML_FULL_GAME, IPOKER_TXT_HAND, POKERSTARS_HAND
+
+
+def per_hand_frame(hands, villain_name=None):
+    """Reference output: the dict-walking extractor"""
+    extractor = ContextExtractor()
+    decision_points = []
+    for phh in hands:
+        decision_points.extend(extractor.extract_from_phh(phh, villain_name))
+    return pd.DataFrame([dp.to_dict() for dp in decision_points])
+
+
+def as_rows(df):
+    """
+    Any decision point frame through DECISION_POINT_SCHEMA, back as plain
+    Python values (lists, dicts, None), so both engines compare cell by cell
+    """
+    table = pa.Table.from_pandas(df, schema=DECISION_POINT_SCHEMA, preserve_index=False)
+    return pd.DataFrame(table.to_pylist(), columns=DECISION_POINT_SCHEMA.names)
+
+
+def assert_same_rows(result, expected):
+    pd.testing.assert_frame_equal(as_rows(result), as_rows(expected), check_dtype=False)
+
+
+class TestColumnarParity:
+    """The columnar engine must reproduce ContextExtractor row by row"""
+
+    @pytest.fixture
+    def store_dir(self, tmp_path):
+        root = tmp_path / "input"
+        root.mkdir()
+        (root / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        (root / "b.xml").write_text(XML_FULL_GAME, encoding="utf-8")
+        (root / "c.txt").write_text(IPOKER_TXT_HAND, encoding="utf-8")
+        (root / "d.txt").write_text(POKERSTARS_HAND, encoding="utf-8")
+
+        store_dir = tmp_path / "store"
+        UnifiedParser(output_dir=None, store_dir=store_dir).parse_directory(root)
+        return store_dir
+
+    def test_store_matches_per_hand_engine(self, store_dir):
+        expected = ContextExtractor().extract_from_store(store_dir, columnar=False)
+        result = ColumnarExtractor().extract_from_store(store_dir)
+
+        assert len(result) > 0
+        assert_same_rows(result, expected)
+
+    def test_store_table_follows_schema(self, store_dir):
+        table = ContextExtractor().extract_table_from_store(store_dir)
+        result = ColumnarExtractor().extract_from_store(store_dir)
+
+        assert table.schema.equals(DECISION_POINT_SCHEMA)
+        assert_same_rows(table.to_pandas(), result)
+
+    def test_frame_round_trips_through_parquet(self, store_dir, tmp_path):
+        result = ColumnarExtractor().extract_from_store(store_dir)
+
+        result.to_parquet(tmp_path / "dp.parquet", index=False)
+        loaded = pd.read_parquet(tmp_path / "dp.parquet")
+
+        assert_same_rows(loaded, result)
+
+    def test_hands_with_villain_override(self):
+        hands = [make_hand(str(i)) for i in range(3)]
+        hands[1]['actions'].append({'player': 'Villain', 'action': 'bet', 'amount': 60.0})
+        hands[2]['metadata']['bb'] = 0.0  # Linha descartada nas duas engines
+
+        for villain_name in (None, 'Hero'):
+            expected = per_hand_frame(hands, villain_name)
+            result = ColumnarExtractor(batch_size=2).extract_from_hands(hands, villain_name)
+            assert_same_rows(result, expected)
+
+
+class TestColumnarValues:
+    """Test the grouped cumulative computations directly"""
+
+    def test_pot_spr_and_aggressors(self):
+        hand = make_hand('1')
+        hand['actions'] += [
+            {'player': 'Hero', 'action': 'raise', 'amount': 60.0},
+            {'player': 'Villain', 'action': 'call', 'amount': 60.0},
+        ]
+
+        df = ColumnarExtractor().extract_from_hands([hand])
+
+        # Pot before each call: 10 + 20 + 40 = 70 chips, then 90 + 60 = 150; eff = 500 / 20
+        assert df['pot_bb'].tolist() == [3.5, 7.5]
+        assert df['spr'].tolist() == [25.0 / 3.5, 25.0 / 7.5]
+        assert df['villain_bet_size_pot_pct'].tolist() == [1.0 / 3.5 * 100, 3.0 / 7.5 * 100]
+        assert df['decision_id'].tolist() == ['1_0', '1_1']
+        # Sequences and aggressors only see the actions before each decision
+        assert df['current_aggressor'].tolist() == ['hero', 'hero']
+        assert df['preflop_aggressor'].tolist() == ['hero', 'hero']
+        assert df['preflop_sequence'][0] == ['HERO_sb', 'VILLAIN_bb', 'HERO_raise_40']
+        assert df['current_street_sequence'][1] == [
+            'HERO_sb', 'VILLAIN_bb', 'HERO_raise_40', 'VILLAIN_call', 'HERO_raise_60'
+        ]
+
+    def test_postflop_streets_from_offsets(self):
+        hand = make_hand('1')
+        hand['actions'] += [
+            {'player': 'Villain', 'action': 'check', 'amount': 0.0},
+            {'player': 'Hero', 'action': 'bet', 'amount': 30.0},
+            {'player': 'Villain', 'action': 'call', 'amount': 30.0},
+        ]
+        hand['street_offsets'] = [0, 4, 7, 7]
+
+        expected = per_hand_frame([hand])
+        df = ColumnarExtractor().extract_from_hands([hand])
+        assert_same_rows(df, expected)
+
+        assert df['street'].tolist() == ['preflop', 'flop', 'flop']
+        assert df['decision_id'].tolist() == ['1_0', '1_1', '1_2']
+        assert df['pot_bb'].tolist() == [3.5, 4.5, 6.0]
+        assert df['board_cards'].tolist()[1] == ['7d', 'Th', 'Ks']
+        assert df['current_street_sequence'].tolist()[2] == ['VILLAIN_check', 'HERO_bet_30']
+        assert df['current_aggressor'].fillna('none').tolist() == ['hero', 'none', 'hero']
+        assert df['villain_position'].tolist() == ['BB', 'OOP', 'OOP']
+
+    def test_postflop_pot_excludes_later_actions(self):
+        # Blinds 5/10, limped pot of 20; flop: Villain bets 10, Hero raises 40, Villain calls 30
+        hand = make_hand('1')
+        hand['metadata'].update(sb=5.0, bb=10.0)
+        hand['actions'] = [
+            {'player': 'Hero', 'action': 'sb', 'amount': 5.0},
+            {'player': 'Villain', 'action': 'bb', 'amount': 10.0},
+            {'player': 'Hero', 'action': 'call', 'amount': 5.0},
+            {'player': 'Villain', 'action': 'check', 'amount': 0.0},
+            {'player': 'Villain', 'action': 'bet', 'amount': 10.0},
+            {'player': 'Hero', 'action': 'raise', 'amount': 40.0},
+            {'player': 'Villain', 'action': 'call', 'amount': 30.0},
+        ]
+        hand['street_offsets'] = [0, 4, 7, 7]
+
+        expected = per_hand_frame([hand])
+        df = ColumnarExtractor().extract_from_hands([hand])
+        assert_same_rows(df, expected)
+
+        flop = df[df['street'] == 'flop']
+        assert flop['villain_action'].tolist() == ['bet', 'call']
+        assert flop['pot_bb'].tolist() == [2.0, 7.0]
+        assert flop['spr'].tolist() == [50.0 / 2.0, 50.0 / 7.0]
+        assert flop['villain_bet_size_pot_pct'].tolist() == [50.0, 3.0 / 7.0 * 100]
+
+    def test_sequences_stop_before_the_decision(self):
+        # Preflop: Hero raises, Villain calls; flop: Hero bets 60, Villain raises, Hero calls
+        hand = make_hand('1')
+        hand['actions'] += [
+            {'player': 'Hero', 'action': 'bet', 'amount': 60.0},
+            {'player': 'Villain', 'action': 'raise', 'amount': 180.0},
+            {'player': 'Hero', 'action': 'call', 'amount': 120.0},
+        ]
+        hand['street_offsets'] = [0, 4, 7, 7]
+
+        expected = per_hand_frame([hand])
+        df = ColumnarExtractor().extract_from_hands([hand])
+        assert_same_rows(df, expected)
+
+        preflop, flop = df.iloc[0], df.iloc[1]
+        assert (preflop['villain_action'], flop['villain_action']) == ('call', 'raise')
+
+        assert preflop['preflop_sequence'] == ['HERO_sb', 'VILLAIN_bb', 'HERO_raise_40']
+        assert preflop['current_street_sequence'] == ['HERO_sb', 'VILLAIN_bb', 'HERO_raise_40']
+        assert preflop['preflop_aggressor'] == 'hero'
+        assert preflop['current_aggressor'] == 'hero'
+
+        assert flop['preflop_sequence'] == ['HERO_sb', 'VILLAIN_bb', 'HERO_raise_40', 'VILLAIN_call']
+        assert flop['current_street_sequence'] == ['HERO_bet_60']
+        assert flop['preflop_aggressor'] == 'hero'
+        assert flop['current_aggressor'] == 'hero'
+
+    def test_legacy_street_key_fallback(self):
+        hand = make_hand('1')
+        hand['actions'] += [
+            {'player': 'Villain', 'action': 'check', 'amount': 0.0, 'street': 'flop'},
+            {'player': 'Hero', 'action': 'bet', 'amount': 30.0, 'street': 'flop'},
+            {'player': 'Villain', 'action': 'fold', 'amount': 0.0, 'street': 'flop'},
+        ]
+
+        expected = per_hand_frame([hand])
+        df = ColumnarExtractor().extract_from_hands([hand])
+        assert_same_rows(df, expected)
+        assert df['street'].tolist() == ['preflop', 'flop', 'flop']
+
+
+class TestAllPlayers:
+    """Multi-perspective extraction: every seated player in one pass"""
+
+    @pytest.fixture
+    def hands(self):
+        hands = [make_hand(str(i)) for i in range(3)]
+        hands[1]['street_offsets'] = [0, 4, 6, 6]
+        hands[1]['actions'] += [
+            {'player': 'Villain', 'action': 'check', 'amount': 0.0},
+            {'player': 'Hero', 'action': 'bet', 'amount': 30.0},
+        ]
+        hands[2]['players'].append({'name': 'Third', 'seat': 3, 'stack': 300.0, 'is_btn': False})
+        hands[2]['actions'].insert(2, {'player': 'Third', 'action': 'fold', 'amount': 0.0})
+        return hands
+
+    def test_every_seat_gets_decisions(self, hands):
+        extractor = ContextExtractor(all_players=True)
+        dps = [dp for phh in hands for dp in extractor.extract_from_phh(phh)]
+
+        assert {dp.villain_name for dp in dps} == {'Hero', 'Villain', 'Third'}
+        assert len({dp.decision_id for dp in dps}) == len(dps)
+        assert extractor.stats['hands_processed'] == 3
+
+        hero_rows = [dp for dp in dps if dp.villain_name == 'Hero' and dp.hand_id == '0']
+        assert hero_rows[0].preflop_sequence[:2] == ['VILLAIN_sb', 'HERO_bb']
+        assert hero_rows[0].villain_position == 'BTN'
+
+    @staticmethod
+    def as_objects(df):
+        """Object columns with None for missing values (pandas infers str columns from mixed lists)"""
+        return df.astype(object).where(df.notna(), None)
+
+    def all_players_frame(self, hands):
+        extractor = ContextExtractor(all_players=True)
+        return pd.DataFrame(decision_point_columns([dp for phh in hands for dp in extractor.extract_from_phh(phh)]))
+
+    def test_villain_rows_match_single_mode(self, hands):
+        extractor = ContextExtractor()
+        single = pd.DataFrame(decision_point_columns([dp for phh in hands for dp in extractor.extract_from_phh(phh)]))
+        multi = self.all_players_frame(hands)
+        multi = multi[multi['villain_name'] == 'Villain'].reset_index(drop=True)
+
+        assert multi['decision_id'].tolist() == [f"{d.split('_')[0]}_Villain_{d.split('_')[1]}" for d in single['decision_id']]
+        pd.testing.assert_frame_equal(
+            self.as_objects(multi.drop(columns='decision_id')), self.as_objects(single.drop(columns='decision_id'))
+        )
+
+    def test_columnar_matches_per_hand_engine(self, hands):
+        expected = self.all_players_frame(hands)
+        result = ColumnarExtractor(batch_size=2, all_players=True).extract_from_hands(hands)
+
+        assert_same_rows(result, expected)
@@ -0,0 +1,180 @@
+"""
+Unit Tests for the persisted feature schema and its use by the IndexBuilder
+"""
+
+import pytest
+import sys
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.indexing.build_indices import IndexBuilder, IndexMetadata
+from src.vectorization.feature_schema import FEATURE_SCHEMA_FILE, FeatureSchema
+from src.vectorization.similarity import WeightedSimilarityKernel
+from src.vectorization.vectorizer import FeatureConfig, Vectorizer
+
+
+def fitted_vectorizer():
+    vectorizer = Vectorizer()
+    vectorizer.fit(pd.DataFrame({'pot_bb': [2.0, 10.0, 40.0], 'eff_stack_bb': [20.0, 15.0, 5.0]}))
+    return vectorizer
+
+
+def vector_frame(dimension, villains=('alice', 'bob'), per_villain=20, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for villain in villains:
+        for i in range(per_villain):
+            rows.append({
+                'villain_name': villain,
+                'decision_id': f'{villain}_{i}',
+                'context_vector': rng.random(dimension).astype(np.float32),
+            })
+    return pd.DataFrame(rows)
+
+
+class TestFeatureSchema:
+    """Layout, hash and persistence"""
+
+    def test_layout_matches_config(self):
+        config = FeatureConfig()
+        schema = FeatureSchema.from_config(config)
+        assert schema.total_dimensions == config.total_dimensions == 99
+        assert schema.indices == config.indices
+
+    def test_round_trip_restores_fitted_scaler(self, tmp_path):
+        vectorizer = fitted_vectorizer()
+        FeatureSchema.from_vectorizer(vectorizer).save(tmp_path)
+
+        loaded = FeatureSchema.load(tmp_path)
+        restored = loaded.to_vectorizer()
+
+        assert restored.is_fitted
+        assert loaded.schema_hash == FeatureSchema.from_vectorizer(vectorizer).schema_hash
+        sample = [[5.0, 12.0]]
+        assert np.array_equal(restored.scaler.transform(sample), vectorizer.scaler.transform(sample))
+
+    def test_hash_ignores_scaler_but_not_weights(self):
+        plain = FeatureSchema.from_config(FeatureConfig())
+        fitted = FeatureSchema.from_vectorizer(fitted_vectorizer())
+        assert plain.schema_hash == fitted.schema_hash
+
+        config = FeatureConfig()
+        config.weights['street'] = 1.0
+        assert FeatureSchema.from_config(config).schema_hash != plain.schema_hash
+
+    def test_hash_covers_embedding(self):
+        raw = FeatureSchema.from_config(FeatureConfig())
+        weighted = FeatureSchema.from_config(FeatureConfig(), embedding='weighted')
+        other_credit = FeatureSchema.from_config(FeatureConfig(), embedding='weighted', missing_block_credit=0.5)
+
+        assert len({raw.schema_hash, weighted.schema_hash, other_credit.schema_hash}) == 3
+        assert (weighted.metric, raw.metric) == ('IP', 'L2')
+
+        with pytest.raises(ValueError):
+            FeatureSchema.from_config(FeatureConfig(), embedding='cosine')
+
+    def test_edited_artifact_is_rejected(self, tmp_path):
+        FeatureSchema.from_config(FeatureConfig()).save(tmp_path)
+        path = tmp_path / FEATURE_SCHEMA_FILE
+        data = json.loads(path.read_text())
+        data['dimensions']['street'] = 5
+        path.write_text(json.dumps(data))
+
+        with pytest.raises(ValueError):
+            FeatureSchema.load(tmp_path)
+
+    def test_other_layout_cannot_build_vectorizer(self):
+        dimensions = dict(FeatureConfig().dimensions, action_sequence=35)
+        schema = FeatureSchema(dimensions=dimensions, weights=FeatureConfig().weights)
+        with pytest.raises(ValueError):
+            schema.to_vectorizer()
+
+
+class TestIndexBuilderSchema:
+    """Indices are built and loaded against the stored schema"""
+
+    def test_build_writes_schema_and_hash(self, tmp_path):
+        schema = FeatureSchema.from_vectorizer(fitted_vectorizer())
+        builder = IndexBuilder(tmp_path, schema=schema)
+        builder.build_indices_from_df(vector_frame(99), index_type="Flat")
+
+        assert FeatureSchema.load(tmp_path).scaler == schema.scaler
+        assert IndexMetadata.load(tmp_path / "alice_metadata.json").schema_hash == schema.schema_hash
+
+        reopened = IndexBuilder(tmp_path)
+        assert reopened.dimension == 99
+        distances, _, ids = reopened.search('bob', np.zeros(99, dtype=np.float32), k=3)
+        assert len(ids) == 3
+
+    def test_wrong_dimension_vectors_are_refused(self, tmp_path):
+        df = vector_frame(99)
+        df.at[3, 'context_vector'] = np.zeros(104, dtype=np.float32)
+
+        with pytest.raises(ValueError):
+            IndexBuilder(tmp_path).build_indices_from_df(df, index_type="Flat")
+
+    def test_other_schema_is_refused_unless_replaced(self, tmp_path):
+        IndexBuilder(tmp_path).build_indices_from_df(vector_frame(99), index_type="Flat")
+
+        config = FeatureConfig()
+        config.weights['street'] = 1.0
+        other = FeatureSchema.from_config(config)
+
+        with pytest.raises(ValueError):
+            IndexBuilder(tmp_path, schema=other).build_indices_from_df(
+                vector_frame(99, villains=('carol',)), index_type="Flat"
+            )
+
+        # Loading an index stamped with the old hash is refused too
+        with pytest.raises(ValueError):
+            IndexBuilder(tmp_path, schema=other).load_index('alice')
+
+        IndexBuilder(tmp_path, schema=other).build_indices_from_df(
+            vector_frame(99, villains=('carol',)), index_type="Flat", replace=True
+        )
+        assert IndexBuilder(tmp_path).list_available_villains() == ['carol']
+        assert FeatureSchema.load(tmp_path).schema_hash == other.schema_hash
+
+    @pytest.mark.parametrize("index_type", ["Flat", "HNSW", "IVF"])
+    def test_weighted_embedding_search_and_rerank(self, tmp_path, index_type):
+        df = vector_frame(99, villains=('alice',), per_villain=300)
+        schema = FeatureSchema.from_config(FeatureConfig(), embedding='weighted')
+        builder = IndexBuilder(tmp_path, schema=schema)
+        builder.build_indices_from_df(df, index_type=index_type)
+
+        vectors = np.stack(df['context_vector'])
+        kernel = WeightedSimilarityKernel(vectors, FeatureConfig())
+        query = vectors[7]
+
+        # Scores come back as inner products (higher is closer)
+        scores, positions, ids = IndexBuilder(tmp_path).search('alice', query, k=5)
+        assert len(ids) == 5 and np.all(np.diff(scores) <= 1e-4)
+
+        # Rerank returns the exact weighted similarity of the reranked candidates
+        scores, positions, ids = builder.search('alice', query, k=5, rerank=True)
+        np.testing.assert_allclose(scores, kernel.scores(query)[positions], atol=1e-5)
+        assert ids[0] == 'alice_7' and scores[0] == pytest.approx(1.0)
+
+    def test_legacy_index_is_refused_by_weighted_schema(self, tmp_path):
+        IndexBuilder(tmp_path).build_indices_from_df(vector_frame(99), index_type="Flat")
+
+        # Strip the hash, as in indices written before the feature schema existed
+        metadata_path = tmp_path / "alice_metadata.json"
+        metadata = json.loads(metadata_path.read_text())
+        metadata.pop('schema_hash')
+        metadata_path.write_text(json.dumps(metadata))
+        (tmp_path / FEATURE_SCHEMA_FILE).unlink()
+
+        assert IndexBuilder(tmp_path).load_index('alice')[1].schema_hash is None
+        weighted = FeatureSchema.from_config(FeatureConfig(), embedding='weighted')
+        with pytest.raises(ValueError):
+            IndexBuilder(tmp_path, schema=weighted).load_index('alice')
+
+    def test_dimension_must_match_schema(self, tmp_path):
+        with pytest.raises(ValueError):
+            IndexBuilder(tmp_path, dimension=104)
@@ -0,0 +1,140 @@
+"""
+Unit Tests for the table-driven hand evaluator
+"""
+
+import pytest
+import sys
+import itertools
+import numpy as np
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.context.hand_evaluator import (
+    RANKS, SUITS, classify_batch, draw_label, draws_batch, encode_cards,
+    evaluate, evaluate_batch, hand_draws
+)
+from src.context.context_extractor import ContextExtractor
+from tests.test_hand_store import make_hand
+
+DECK = [rank + suit for rank in RANKS for suit in SUITS]
+
+
+class TestEvaluate:
+    """Categories and ordering of made hands"""
+
+    @pytest.mark.parametrize("cards,label", [
+        (['As', 'Kd', '9h', '7c', '3s', '2d', '4h'], 'HIGH_CARD'),
+        (['As', 'Ad', '9h', '7c', '3s', '2d', 'Jh'], 'ONE_PAIR'),
+        (['As', 'Ad', '9h', '9c', '3s', '3d', 'Jh'], 'TWO_PAIR'),
+        (['7s', '7d', '7h', 'Ac', '3s'], 'THREE_OF_A_KIND'),
+        (['As', '2d', '3h', '4c', '5s', 'Kd'], 'STRAIGHT'),
+        (['2s', '9s', 'Js', '4s', 'Ks', 'Kd', 'Kh'], 'FLUSH'),
+        (['Ks', 'Kd', 'Kh', 'Qc', 'Qs', 'Qd', '2h'], 'FULL_HOUSE'),
+        (['9s', '9d', '9h', '9c', 'As'], 'FOUR_OF_A_KIND'),
+        (['5h', '6h', '7h', '8h', '9h', '9d', '9c'], 'STRAIGHT_FLUSH'),
+    ])
+    def test_categories(self, cards, label):
+        assert evaluate(cards)[1] == label
+
+    def test_score_ordering(self):
+        ladder = [
+            ['As', 'Kd', '9h', '7c', '3s'],
+            ['2s', '2d', '9h', '7c', '3s'],
+            ['As', 'Ad', '9h', '7c', '3s'],
+            ['As', 'Ad', 'Kh', 'Kc', '3s'],
+            ['As', '2d', '3h', '4c', '5s'],
+            ['6s', '2d', '3h', '4c', '5s'],
+            ['Ts', 'Jd', 'Qh', 'Kc', 'As'],
+            ['2h', '5h', '9h', 'Jh', 'Kh'],
+            ['3s', '3d', '3h', '2c', '2s'],
+            ['2s', '2d', '2h', '2c', '3s'],
+            ['As', '2s', '3s', '4s', '5s'],
+        ]
+        scores = [evaluate(cards)[0] for cards in ladder]
+        assert scores == sorted(scores)
+        assert len(set(scores)) == len(scores)
+
+    def test_kicker_breaks_ties(self):
+        assert evaluate(['As', 'Ad', 'Kh', '7c', '3s'])[0] > evaluate(['As', 'Ad', 'Qh', '7c', '3s'])[0]
+        assert evaluate(['As', 'Ad', 'Kh', '7c', '3s'])[0] == evaluate(['Ac', 'Ah', 'Ks', '7d', '3h'])[0]
+
+    def test_best_five_of_seven(self):
+        seven = ['As', 'Ad', 'Kh', 'Kc', 'Qs', 'Qd', '2h']
+        best = max(evaluate(list(five))[0] for five in itertools.combinations(seven, 5))
+        assert evaluate(seven)[0] == best
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(7)
+        for width in (5, 6, 7):
+            hands = [[DECK[i] for i in rng.permutation(52)[:width]] for _ in range(500)]
+            scores, _ = evaluate_batch(encode_cards(hands, width))
+            assert scores.tolist() == [evaluate(hand)[0] for hand in hands]
+
+
+class TestDraws:
+    """Flush and straight draws on flop/turn"""
+
+    def test_flush_draw(self):
+        draws = hand_draws(['Ah', '5h'], ['Kh', '9h', '2c'])
+        assert draws['flush_draw'] and not draws['combo_draw']
+        assert draw_label(draws) == 'flush_draw'
+
+    def test_board_flush_draw_needs_hole_card(self):
+        assert not hand_draws(['Ac', '5d'], ['Kh', '9h', '2h', '3h'])['flush_draw']
+
+    def test_open_ended_and_gutshot(self):
+        assert hand_draws(['8c', '9d'], ['Th', 'Js', '2c'])['oesd']
+        gutshot = hand_draws(['8c', '9d'], ['Qh', 'Js', '2c'])
+        assert gutshot['gutshot'] and not gutshot['oesd']
+
+    def test_combo_draw(self):
+        draws = hand_draws(['8h', '9h'], ['Th', 'Jh', '2c'])
+        assert draws['combo_draw']
+        assert draw_label(draws) == 'combo_draw'
+
+    def test_no_draws_on_river(self):
+        assert draw_label(hand_draws(['8h', '9h'], ['Th', 'Jh', '2c', '3d', '4s'])) == 'none'
+
+    def test_batch_matches_scalar(self):
+        rng = np.random.default_rng(11)
+        hands = [[DECK[i] for i in rng.permutation(52)[:2 + 3 + i % 2]] for i in range(500)]
+        flags = draws_batch(encode_cards([h[:2] for h in hands], 2), encode_cards([h[2:] for h in hands], 5))
+        assert [list(row) for row in flags.tolist()] == [list(hand_draws(h[:2], h[2:]).values()) for h in hands]
+
+
+class TestClassifyBatch:
+    """Text API used by the extractors"""
+
+    def test_labels_and_draws(self):
+        labels, draws = classify_batch(
+            [['Ah', 'Kh'], ['Qs', 'Qd'], [], ['7c', '2d']],
+            [['Th', 'Jh', '2c'], ['Qh', '5c', '5d', '9s', '2h'], ['Th', 'Jh', '2c'], []]
+        )
+        assert labels == ['HIGH_CARD', 'FULL_HOUSE', None, 'HIGH_CARD']
+        assert draws[0]['flush_draw'] and draws[0]['gutshot']
+        assert draws[2] is None and draws[3] is None
+
+    def test_empty_batch(self):
+        assert classify_batch([], []) == ([], [])
+
+
+class TestExtractorIntegration:
+    """Villain strength is filled from shown cards"""
+
+    def test_showdown_fills_villain_strength(self):
+        phh = make_hand("1")
+        phh['showdown']['hands'].append({'player': 'Villain', 'cards': ['Kd', 'Qd']})
+
+        dps = ContextExtractor().extract_from_phh(phh, 'Villain')
+
+        assert dps
+        assert all(dp.villain_hand == ['Kd', 'Qd'] for dp in dps)
+        assert all(dp.villain_hand_strength is not None for dp in dps)
+
+    def test_unknown_cards_leave_strength_empty(self):
+        dps = ContextExtractor().extract_from_phh(make_hand("1"), 'Villain')
+
+        assert dps
+        assert all(dp.villain_hand_strength is None for dp in dps)
@@ -0,0 +1,330 @@
+"""
+Unit Tests for the columnar Hand Store
+"""
+
+import pytest
+import sys
+import json
+import tomli_w
+import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.storage.hand_store import HandStore
+from src.parsers.unified_parser import UnifiedParser
+from src.context.board_texture import analyze_board
+from src.context.context_extractor import (
+    ContextExtractor, DECISION_POINT_SCHEMA, decision_context_json, decision_points_to_batch
+)
+from tests.test_unified_parser import XML_SESSION, IPOKER_TXT_HAND
+
+
+def make_hand(hand_id: str) -> dict:
+    """Small HU hand in the parser's PHH layout"""
+    return {
+        'metadata': {
+            'hand_id': hand_id, 'game': 'NLHE', 'room': 'iPoker',
+            'sb': 10.0, 'bb': 20.0, 'ante': 0.0, 'hero': 'Hero'
+        },
+        'players': [
+            {'name': 'Hero', 'seat': 1, 'stack': 500.0, 'is_btn': True},
+            {'name': 'Villain', 'seat': 2, 'stack': 500.0, 'is_btn': False},
+        ],
+        'board': ['7d', 'Th', 'Ks'],
+        'actions': [
+            {'player': 'Hero', 'action': 'sb', 'amount': 10.0},
+            {'player': 'Villain', 'action': 'bb', 'amount': 20.0},
+            {'player': 'Hero', 'action': 'raise', 'amount': 40.0},
+            {'player': 'Villain', 'action': 'call', 'amount': 20.0},
+        ],
+        'showdown': {
+            'winners': ['Hero'],
+            'hands': [{'player': 'Hero', 'cards': ['As', 'Kh']}],
+        },
+    }
+
+
+class TestHandStore:
+    """Test append / iterate round trips"""
+
+    def test_round_trip(self, tmp_path):
+        store = HandStore(tmp_path / "store")
+        hands = [make_hand(str(i)) for i in range(5)]
+
+        for hand in hands:
+            store.append(hand)
+        store.flush()
+
+        assert list(HandStore(tmp_path / "store").iter_hands()) == hands
+        assert len(store) == 5
+
+    def test_shards_rotate_at_shard_size(self, tmp_path):
+        store = HandStore(tmp_path / "store", shard_size=2)
+
+        for i in range(5):
+            store.append(make_hand(str(i)))
+        store.flush()
+
+        assert len(store.shards()) == 3
+        assert store.hand_ids() == ['0', '1', '2', '3', '4']
+        assert store.read_table("actions").num_rows == 20
+
+    def test_repeated_hand_ids_are_read_once(self, tmp_path):
+        store = HandStore(tmp_path / "store", shard_size=2)
+        repeated = make_hand('1')
+        repeated['actions'] = repeated['actions'][:2]
+        hands = [make_hand('0'), make_hand('1'), repeated, make_hand('2')]
+
+        for hand in hands:
+            store.append(hand)
+        store.flush()
+
+        assert len(store.shards()) == 2
+        assert list(store.iter_hands()) == [hands[0], hands[1], hands[3]]
+        assert store.hand_ids() == ['0', '1', '2']
+        assert len(store) == 3
+        assert store.read_table("actions").num_rows == 12
+
+        columnar = ContextExtractor().extract_table_from_store(tmp_path / "store")
+        expected = [dp for hand in (hands[0], hands[1], hands[3]) for dp in ContextExtractor().extract_from_phh(hand)]
+        assert columnar.column("decision_id").to_pylist() == [dp.decision_id for dp in expected]
+
+    def test_street_offsets_round_trip(self, tmp_path):
+        store = HandStore(tmp_path / "store")
+        with_offsets = make_hand('1')
+        with_offsets['street_offsets'] = [0, 4, 4, 4]
+        legacy = make_hand('2')
+
+        store.append(with_offsets)
+        store.append(legacy)
+        store.flush()
+
+        assert list(store.iter_hands()) == [with_offsets, legacy]
+        assert store.read_table("hands").column("street_offsets").to_pylist() == [[0, 4, 4, 4], None]
+
+    def test_read_table_across_shards_missing_a_column(self, tmp_path):
+        store = HandStore(tmp_path / "store", shard_size=1)
+        for i in range(2):
+            store.append(make_hand(str(i)))
+        store.flush()
+
+        # First shard written before street_offsets existed
+        old = store.shards()[0] / "hands.parquet"
+        pq.write_table(pq.read_table(old).drop(["street_offsets"]), old)
+
+        table = store.read_table("hands")
+        assert table.column("street_offsets").to_pylist() == [None, None]
+        assert table.column("hand_id").to_pylist() == ['0', '1']
+
+    def test_import_legacy_phh_keeps_extra_fields(self, tmp_path):
+        """Legacy files carry keys outside the store schema; they survive the import"""
+        legacy = make_hand('900')
+        legacy['metadata']['timestamp'] = '2025-06-16 01:28:37'
+        legacy['table'] = {'name': 'Spin 1', 'size': 3}
+        legacy['actions'][0]['street'] = 'preflop'
+
+        phh_dir = tmp_path / "phh"
+        phh_dir.mkdir()
+        with open(phh_dir / "900.phh", 'wb') as f:
+            tomli_w.dump(legacy, f)
+        (phh_dir / "broken.phh").write_text("not = [toml", encoding="utf-8")
+
+        store = HandStore(tmp_path / "store")
+        assert store.import_phh_directory(phh_dir) == 1
+        assert list(store.iter_hands()) == [legacy]
+
+
+class TestStoreOutput:
+    """Test UnifiedParser / ContextExtractor on top of the store"""
+
+    @pytest.fixture
+    def input_dir(self, tmp_path):
+        root = tmp_path / "input"
+        root.mkdir()
+        (root / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        (root / "b.txt").write_text(IPOKER_TXT_HAND, encoding="utf-8")
+        return root
+
+    def test_parser_writes_store_instead_of_phh(self, tmp_path, input_dir):
+        parser = UnifiedParser(output_dir=tmp_path / "phh", store_dir=tmp_path / "store")
+        shards = parser.parse_directory(input_dir, filters={'heads_up_only': True})
+
+        assert len(shards) == 1
+        assert list((tmp_path / "phh").glob("*.phh")) == []
+        assert sorted(HandStore(tmp_path / "store").hand_ids()) == ['1001', '1003', '5001']
+
+    def test_parallel_workers_share_store(self, tmp_path, input_dir):
+        parser = UnifiedParser(output_dir=tmp_path / "phh", store_dir=tmp_path / "store")
+        shards = parser.parse_directory(input_dir, workers=2, chunk_size=1)
+
+        assert len(shards) == 2
+        assert sorted(HandStore(tmp_path / "store").hand_ids()) == ['1001', '1002', '1003', '5001']
+
+    def test_reparse_into_same_store_adds_no_hands(self, tmp_path, input_dir):
+        UnifiedParser(output_dir=None, store_dir=tmp_path / "store").parse_directory(input_dir)
+        store = HandStore(tmp_path / "store")
+        hands, rows = len(store), ContextExtractor().extract_table_from_store(store.root).num_rows
+
+        parser = UnifiedParser(output_dir=None, store_dir=tmp_path / "store")
+        assert parser.parse_directory(input_dir) == []
+        assert parser.stats['duplicates'] == hands
+
+        assert len(store) == hands
+        assert ContextExtractor().extract_table_from_store(store.root).num_rows == rows
+
+    def test_store_streams_shards_to_parquet(self, tmp_path, input_dir):
+        UnifiedParser(output_dir=None, store_dir=tmp_path / "store").parse_directory(
+            input_dir, workers=2, chunk_size=1
+        )
+        output = tmp_path / "dp.parquet"
+
+        rows = ContextExtractor().extract_store_to_parquet(tmp_path / "store", output)
+
+        written = pq.ParquetFile(output)
+        assert written.schema_arrow.equals(DECISION_POINT_SCHEMA)
+        assert written.num_row_groups == len(HandStore(tmp_path / "store").shards()) == 2
+        assert written.read().equals(ContextExtractor().extract_table_from_store(tmp_path / "store"))
+        assert rows == written.metadata.num_rows > 0
+
+    def test_extract_from_store_matches_phh_directory(self, tmp_path, input_dir):
+        UnifiedParser(output_dir=tmp_path / "phh").parse_directory(input_dir)
+        UnifiedParser(output_dir=tmp_path / "unused", store_dir=tmp_path / "store").parse_directory(input_dir)
+
+        from_files = ContextExtractor().extract_from_directory(tmp_path / "phh")
+        from_store = ContextExtractor().extract_from_store(tmp_path / "store")
+
+        key = ['decision_id', 'street', 'villain_action', 'pot_bb']
+        assert len(from_store) == len(from_files) > 0
+        assert (
+            from_store.sort_values(key).reset_index(drop=True)[key]
+            .equals(from_files.sort_values(key).reset_index(drop=True)[key])
+        )
+
+
+class TestFusedExtraction:
+    """Test parser → extractor without the PHH round trip"""
+
+    @pytest.fixture
+    def input_dir(self, tmp_path):
+        root = tmp_path / "input"
+        root.mkdir()
+        (root / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        (root / "b.txt").write_text(IPOKER_TXT_HAND, encoding="utf-8")
+        return root
+
+    def test_fused_matches_phh_round_trip(self, tmp_path, input_dir):
+        UnifiedParser(output_dir=tmp_path / "phh").parse_directory(input_dir)
+        from_files = ContextExtractor().extract_from_directory(tmp_path / "phh")
+
+        parser = UnifiedParser(output_dir=None)
+        fused = ContextExtractor().extract_from_parser(parser, input_dir)
+
+        key = ['decision_id', 'street', 'villain_action', 'pot_bb']
+        assert len(fused) == len(from_files) > 0
+        assert (
+            fused.sort_values(key).reset_index(drop=True)[key]
+            .equals(from_files.sort_values(key).reset_index(drop=True)[key])
+        )
+        assert parser.hand_sink is None
+
+    def test_fused_single_file_with_phh_side_output(self, tmp_path, input_dir):
+        parser = UnifiedParser(output_dir=tmp_path / "phh", hand_index_path=tmp_path / "index.npz")
+        extractor = ContextExtractor()
+
+        first = extractor.extract_from_parser(parser, input_dir / "b.txt")
+        again = extractor.extract_from_parser(parser, input_dir / "b.txt")
+
+        assert len(first) > 0
+        assert len(again) == 0  # Duplicatas são puladas antes da extração
+        assert sorted(p.stem for p in (tmp_path / "phh").glob("*.phh")) == ['5001']
+
+
+class TestChunkedExtraction:
+    """Test batched/parallel extraction of a PHH directory"""
+
+    @pytest.fixture
+    def phh_dir(self, tmp_path):
+        root = tmp_path / "input"
+        root.mkdir()
+        (root / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        (root / "b.txt").write_text(IPOKER_TXT_HAND, encoding="utf-8")
+
+        UnifiedParser(output_dir=tmp_path / "phh").parse_directory(root)
+        return tmp_path / "phh"
+
+    def test_parallel_matches_sequential(self, phh_dir):
+        sequential = ContextExtractor().extract_from_directory(phh_dir)
+
+        extractor = ContextExtractor()
+        parallel = extractor.extract_from_directory(phh_dir, workers=2, chunk_size=1)
+
+        assert len(sequential) > 0
+        pd.testing.assert_frame_equal(parallel, sequential)
+        assert extractor.stats["decision_points"] == len(sequential)
+
+    def test_streams_row_groups_to_parquet(self, tmp_path, phh_dir):
+        expected = ContextExtractor().extract_from_directory(phh_dir)
+        output_file = tmp_path / "dp" / "decision_points.parquet"
+
+        rows = ContextExtractor().extract_directory_to_parquet(
+            phh_dir, output_file, workers=2, chunk_size=1
+        )
+
+        written = pq.ParquetFile(output_file)
+        assert rows == written.metadata.num_rows == len(expected)
+        assert written.metadata.num_row_groups > 1
+        assert written.schema_arrow == DECISION_POINT_SCHEMA
+
+        df = pd.read_parquet(output_file)
+        assert list(df["decision_id"]) == list(expected["decision_id"])
+        assert not output_file.with_name(output_file.name + ".tmp").exists()
+
+
+class TestCompactDecisionPoint:
+    """Slots, shared/interned sequences and on-demand texture/context"""
+
+    @pytest.fixture
+    def decision_points(self):
+        hand = make_hand("1")
+        hand['street_offsets'] = [0, 4, 7, 7]
+        hand['actions'] += [
+            {'player': 'Villain', 'action': 'check', 'amount': 0.0},
+            {'player': 'Hero', 'action': 'bet', 'amount': 30.0},
+            {'player': 'Villain', 'action': 'call', 'amount': 30.0},
+        ]
+        other = make_hand("2")
+        return ContextExtractor().extract_from_phh(hand), ContextExtractor().extract_from_phh(other)
+
+    def test_no_instance_dict(self, decision_points):
+        dp = decision_points[0][0]
+        assert not hasattr(dp, '__dict__')
+        assert 'context_json' not in dp.to_dict()
+
+    def test_sequences_are_shared_and_interned(self, decision_points):
+        first, other = decision_points
+        # Postflop decisions share the hand's preflop list
+        assert first[1].preflop_sequence is first[-1].preflop_sequence
+        assert first[0].preflop_sequence[0] is other[0].preflop_sequence[0]
+
+    def test_texture_from_code(self, decision_points):
+        preflop, flop = decision_points[0][0], decision_points[0][-1]
+        assert preflop.board_texture == {}
+        assert flop.board_texture == analyze_board(['7d', 'Th', 'Ks'])
+
+    def test_arrow_texture_matches_dicts(self, decision_points):
+        dps = decision_points[0]
+        batch = decision_points_to_batch(dps)
+        textures = batch.column(batch.schema.get_field_index('board_texture')).to_pylist()
+        assert textures[-1] == dps[-1].board_texture
+        assert set(textures[0].values()) == {None}
+
+    def test_context_json_on_demand(self, decision_points):
+        dp = decision_points[0][-1]
+        context = json.loads(dp.context_json)
+        assert context['street'] == 'flop'
+        assert context['board'] == ['7d', 'Th', 'Ks']
+        assert decision_context_json(dp.to_dict()) == dp.context_json
+
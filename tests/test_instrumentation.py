@@ -0,0 +1,68 @@
+"""
+Unit Tests for stage timers / profiling hooks
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.instrumentation import Instrumentation, profile_run
+from src.parsers.unified_parser import UnifiedParser
+from tests.test_unified_parser import XML_SESSION, IPOKER_TXT_HAND
+
+
+class TestInstrumentation:
+    """Test timers, histogram and worker merge"""
+
+    def test_histogram_and_slowest_files(self):
+        timer = Instrumentation(slowest=2)
+        for name, seconds in [("a", 0.0005), ("b", 0.030), ("c", 0.004), ("d", 9.0)]:
+            timer.record_file(name, seconds, hands=1)
+
+        report = timer.to_dict()
+        assert report["files"] == 4
+        assert report["histogram"]["<=1ms"] == 1
+        assert report["histogram"]["<=5ms"] == 1
+        assert report["histogram"]["<=50ms"] == 1
+        assert report["histogram"][">5000ms"] == 1
+        assert [f["file"] for f in report["slowest_files"]] == ["d", "b"]
+
+    def test_merge_worker_snapshot(self):
+        worker = Instrumentation()
+        worker.add("convert", 1.5, count=3)
+        worker.record_file("slow.xml", 2.0, hands=10)
+
+        parent = Instrumentation()
+        parent.add("convert", 0.5)
+        parent.merge(worker.to_dict())
+
+        assert parent.stages["convert"] == {"seconds": 2.0, "calls": 4}
+        assert parent.to_dict()["slowest_files"][0]["file"] == "slow.xml"
+
+    def test_profile_run_writes_report(self, tmp_path):
+        with profile_run(tmp_path / "run.log"):
+            sum(range(1000))
+
+        assert (tmp_path / "run.prof").exists()
+        assert "function calls" in (tmp_path / "run.txt").read_text()
+
+
+class TestParserInstrumentation:
+    """Test the stages recorded by UnifiedParser"""
+
+    def test_stages_and_files_recorded(self, tmp_path):
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        (input_dir / "b.txt").write_text(IPOKER_TXT_HAND, encoding="utf-8")
+
+        parser = UnifiedParser(output_dir=tmp_path / "phh")
+        parser.parse_directory(input_dir)
+
+        report = parser.instrumentation.to_dict()
+        assert report["files"] == 2
+        assert report["stages"]["convert"]["calls"] == parser.stats["converted"]
+        assert report["stages"]["write"]["calls"] == parser.stats["converted"]
+        assert report["stages"]["read_split"]["calls"] == 2
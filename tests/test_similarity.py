@@ -0,0 +1,125 @@
+"""
+Unit Tests for the batched block-weighted similarity kernel
+"""
+
+import pytest
+import sys
+import numpy as np
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.vectorization.feature_schema import FeatureSchema
+from src.vectorization.similarity import BlockLayout, WeightedSimilarityKernel
+from src.vectorization.vectorizer import FeatureConfig, Vectorizer
+
+
+def sparse_vectors(count, dimension=99, seed=0):
+    """Random vectors with whole blocks zeroed, like one-hot blocks that never fire"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((count, dimension)).astype(np.float32)
+    vectors[rng.random((count, dimension)) < 0.5] = 0.0
+    config = FeatureConfig()
+    for row in vectors:
+        for start, end in config.indices.values():
+            if rng.random() < 0.3:
+                row[start:end] = 0.0
+    return vectors
+
+
+class TestWeightedSimilarityKernel:
+    """Batch scores match calculate_weighted_similarity"""
+
+    @pytest.fixture
+    def vectorizer(self):
+        return Vectorizer()
+
+    def test_scores_match_scalar(self, vectorizer):
+        candidates = sparse_vectors(300)
+        queries = sparse_vectors(4, seed=1)
+        scores = vectorizer.similarity_kernel(candidates).scores(queries)
+
+        expected = np.array([
+            [vectorizer.calculate_weighted_similarity(q, c) for c in candidates] for q in queries
+        ])
+        assert scores.shape == (4, 300)
+        np.testing.assert_allclose(scores, expected, atol=1e-6)
+
+    def test_single_query_and_zero_vectors(self, vectorizer):
+        candidates = sparse_vectors(20)
+        candidates[5] = 0.0
+        kernel = vectorizer.similarity_kernel(candidates)
+
+        scores = kernel.scores(candidates[0])
+        assert scores.shape == (20,)
+        assert scores[5] == 0.0
+        assert scores[0] == pytest.approx(1.0)
+        assert not kernel.scores(np.zeros(99)).any()
+
+    def test_top_k_is_sorted_exact_selection(self, vectorizer):
+        candidates = sparse_vectors(500, seed=2)
+        queries = sparse_vectors(3, seed=3)
+        kernel = vectorizer.similarity_kernel(candidates)
+
+        top_scores, positions = kernel.top_k(queries, 10)
+        full = kernel.scores(queries)
+
+        assert positions.shape == (3, 10)
+        assert np.all(np.diff(top_scores, axis=1) <= 0)
+        for q in range(3):
+            assert np.array_equal(top_scores[q], np.sort(full[q])[::-1][:10])
+
+        # k larger than the candidate set
+        assert kernel.top_k(queries[0], 1000)[1].shape == (500,)
+
+    def test_block_scores_explain_total(self, vectorizer):
+        candidates = sparse_vectors(10, seed=4)
+        kernel = vectorizer.similarity_kernel(candidates)
+        blocks = kernel.block_scores(candidates[0], [1, 2])
+
+        weights = vectorizer.config.weights
+        for i, position in enumerate([1, 2]):
+            counted = {c: v[i] for c, v in blocks.items() if not np.isnan(v[i])}
+            total = sum(weights[c] * v for c, v in counted.items()) / sum(weights[c] for c in counted)
+            assert total == pytest.approx(kernel.scores(candidates[0])[position], abs=1e-6)
+
+    def test_accepts_feature_schema(self):
+        candidates = sparse_vectors(50, seed=5)
+        schema = FeatureSchema.from_config(FeatureConfig())
+        kernel = WeightedSimilarityKernel(candidates, schema)
+        assert kernel.scores(candidates[:2]).shape == (2, 50)
+
+        with pytest.raises(ValueError):
+            kernel.scores(np.zeros(98))
+
+
+class TestWeightedEmbedding:
+    """Inner product of the embeddings reproduces the weighted score terms"""
+
+    @pytest.fixture
+    def layout(self):
+        return BlockLayout(FeatureConfig(), 99)
+
+    @pytest.mark.parametrize("credit", [0.0, 0.9])
+    def test_inner_product_formula(self, layout, credit):
+        candidates = sparse_vectors(200, seed=6)
+        queries = sparse_vectors(5, seed=7)
+        kernel = WeightedSimilarityKernel(candidates, FeatureConfig())
+
+        inner = layout.embed(queries, credit, query=True) @ layout.embed(candidates, credit).T
+
+        _, query_mask = layout.normalize(queries)
+        shared = (query_mask * layout.weights) @ kernel.mask.T
+        query_weight = (query_mask * layout.weights).sum(axis=1, keepdims=True)
+        expected = kernel.scores(queries) * shared + credit * (query_weight - shared)
+
+        np.testing.assert_allclose(inner, expected, rtol=1e-5, atol=1e-4)
+
+    def test_index_side_has_constant_norm(self, layout):
+        embedded = layout.embed(sparse_vectors(100, seed=8), 0.9)
+        assert embedded.shape == (100, layout.embedding_dimension)
+        np.testing.assert_allclose((embedded ** 2).sum(axis=1), layout.embedding_norm2(0.9), rtol=1e-5)
+
+    def test_query_side_has_no_norm_padding(self, layout):
+        assert layout.embed(sparse_vectors(1)[0], 0.9, query=True)[-1] == 0.0
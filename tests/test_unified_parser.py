@@ -0,0 +1,693 @@
+"""
+Unit Tests for Unified Parser
+"""
+
+import io
+import pytest
+import sys
+import zipfile
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.parsers.unified_parser import UnifiedParser, _iter_hand_spans
+from src.parsers.hand_index import HandIdIndex
+from src.context.context_extractor import DECISION_ACTIONS
+
+
+XML_SESSION = """<?xml version="1.0" encoding="UTF-8"?>
+<session sessioncode="1">
+<general>
+<nickname>Hero</nickname>
+</general>
+<game gamecode="1001"><general><startdate>2025-06-16 01:28:37</startdate>
+<players><player seat="1" name="Hero" chips="500" dealer="1" win="40" bet="20" muck="0"/>
+<player seat="2" name="Villain" chips="500" dealer="0" win="0" bet="20" muck="1"/>
+</players>
+</general>
+<round no="0"><action no="1" player="Hero" type="1" sum="10"/>
+<action no="2" player="Villain" type="2" sum="20"/>
+</round>
+<round no="1"><cards type="Pocket" player="Hero">SA HK</cards>
+<cards type="Pocket" player="Villain">X X</cards>
+<action no="3" player="Hero" type="3" sum="10"/>
+<action no="4" player="Villain" type="4" sum="0"/>
+</round>
+</game>
+<game gamecode="1002"><general><startdate>2025-06-16 01:29:37</startdate>
+<players><player seat="1" name="Hero" chips="480" dealer="0" win="0" bet="20" muck="1"/>
+<player seat="2" name="Villain" chips="520" dealer="1" win="0" bet="0" muck="1"/>
+<player seat="3" name="Third" chips="500" dealer="0" win="30" bet="10" muck="1"/>
+</players>
+</general>
+</game>
+<game gamecode="1003"><general><startdate>2025-06-16 01:30:37</startdate>
+<players><player seat="1" name="Hero" chips="460" dealer="1" win="0" bet="10" muck="1"/>
+<player seat="2" name="Villain" chips="540" dealer="0" win="30" bet="20" muck="1"/>
+</players>
+</general>
+</game>
+</session>
+"""
+
+IPOKER_TXT_HAND = """GAME #5001: Holdem NL Tournament 2025-06-16 01:28:37
+Seat 1: Hero (€1,500 in chips) DEALER
+Seat 2: Villain (€500 in chips)
+Hero: Post SB €10
+Villain: Post BB €20
+*** HOLE CARDS ***
+Dealt to Hero [SA HK]
+Hero: Raise €40
+Villain: Call €20
+*** FLOP *** [D7 H10 SK]
+Villain: Check
+Hero: Bet €30
+Villain: All-in(raise) €440
+Hero: Call €410
+*** TURN *** [C2]
+*** RIVER *** [S3]
+*** SHOW DOWN ***
+Villain: Shows [DK DQ]
+Hero: Shows [SA HK]
+Hero: wins €1,000
+"""
+
+
+class TestXmlIPoker:
+    """Test iPoker XML parsing"""
+
+    @pytest.fixture
+    def xml_file(self, tmp_path):
+        """Write a small iPoker session to disk"""
+        path = tmp_path / "session.xml"
+        path.write_text(XML_SESSION, encoding="utf-8")
+        return path
+
+    @pytest.fixture
+    def parser(self, tmp_path):
+        return UnifiedParser(output_dir=tmp_path / "phh")
+
+    def test_parse_xml_counts_all_games(self, parser, xml_file):
+        """Every <game> is counted, HU filter keeps only 2-player games"""
+        phh_files = parser.parse_file(xml_file, filters={'heads_up_only': True})
+
+        assert parser.stats['total_hands'] == 3
+        assert parser.stats['hu_hands'] == 2
+        assert sorted(p.stem for p in phh_files) == ['1001', '1003']
+        assert all(p.exists() for p in phh_files)
+
+    def test_iter_xml_games_streams_one_game_at_a_time(self, parser, xml_file):
+        """Games are yielded whole and cleared after being consumed"""
+        seen = []
+        previous = None
+
+        for game, hero in parser._iter_xml_games(xml_file):
+            if previous is not None:
+                # The previous game was released before reading this one
+                assert len(previous) == 0
+            seen.append((game.get('gamecode'), len(game.findall('.//player')), hero))
+            previous = game
+
+        assert seen == [('1001', 2, 'Hero'), ('1002', 3, 'Hero'), ('1003', 2, 'Hero')]
+
+
+XML_FULL_GAME = """<session sessioncode="2">
+<general><nickname>Hero</nickname></general>
+<game gamecode="7001"><general><startdate>2025-06-16 01:28:37</startdate>
+<round>1</round>
+<players><player seat="3" name="Hero" chips="1,420" dealer="1" win="1,050" bet="525" muck="0"/>
+<player seat="6" name="Villain" chips="525" dealer="0" win="0" bet="525" muck="1"/>
+</players>
+</general>
+<round no="0"><action no="1" player="Hero" type="15" sum="5"/>
+<action no="2" player="Villain" type="15" sum="5"/>
+<action no="3" player="Hero" type="1" sum="20"/>
+<action no="4" player="Villain" type="2" sum="40"/>
+</round>
+<round no="1"><cards type="Pocket" player="Hero">SA H10</cards>
+<cards type="Pocket" player="Villain">X X</cards>
+<action no="5" player="Hero" type="23" sum="120"/>
+<action no="6" player="Villain" type="3" sum="80"/>
+</round>
+<round no="2"><cards type="Flop">D6 H10 DA</cards>
+<action no="7" player="Villain" type="4" sum="0"/>
+<action no="8" player="Hero" type="5" sum="100"/>
+<action no="9" player="Villain" type="7" sum="400"/>
+<action no="10" player="Hero" type="3" sum="300"/>
+</round>
+<round no="3"><cards type="Turn">C10</cards></round>
+<round no="4"><cards type="River">D3</cards>
+<cards type="Pocket" player="Villain">S7 DQ</cards>
+</round>
+</game>
+</session>
+"""
+
+
+class TestXmlConverter:
+    """Test full iPoker XML conversion"""
+
+    @pytest.fixture
+    def phh(self, tmp_path):
+        path = tmp_path / "full.xml"
+        path.write_text(XML_FULL_GAME, encoding="utf-8")
+        parser = UnifiedParser(output_dir=tmp_path)
+        game, hero = next(parser._iter_xml_games(path))
+        return parser._xml_game_to_phh(game, hero)
+
+    def test_metadata_and_players(self, phh):
+        assert phh['metadata']['hero'] == 'Hero'
+        assert (phh['metadata']['sb'], phh['metadata']['bb'], phh['metadata']['ante']) == (20.0, 40.0, 5.0)
+        assert phh['players'] == [
+            {'name': 'Hero', 'seat': 3, 'stack': 1420.0, 'is_btn': True},
+            {'name': 'Villain', 'seat': 6, 'stack': 525.0, 'is_btn': False},
+        ]
+
+    def test_actions_are_chip_increments(self, phh):
+        assert [(a['player'], a['action'], a['amount'], a.get('all_in', False)) for a in phh['actions']] == [
+            ('Hero', 'ante', 5.0, False),
+            ('Villain', 'ante', 5.0, False),
+            ('Hero', 'sb', 20.0, False),
+            ('Villain', 'bb', 40.0, False),
+            ('Hero', 'raise', 100.0, False),   # sum = total na street (120)
+            ('Villain', 'call', 80.0, False),
+            ('Villain', 'check', 0.0, False),
+            ('Hero', 'bet', 100.0, False),
+            ('Villain', 'raise', 400.0, True),  # tipo 7 acima do valor a pagar
+            ('Hero', 'call', 300.0, False),
+        ]
+
+    def test_street_offsets(self, phh):
+        # Rounds 0-1 são preflop; turn e river sem ações começam no fim da lista
+        assert phh['street_offsets'] == [0, 6, 10, 10]
+
+    def test_board_and_showdown(self, phh):
+        assert phh['board'] == ['6d', 'Th', 'Ad', 'Tc', '3d']
+        assert phh['showdown'] == {
+            'winners': ['Hero'],
+            'hands': [
+                {'player': 'Hero', 'cards': ['As', 'Th']},
+                {'player': 'Villain', 'cards': ['7s', 'Qd']},
+            ],
+        }
+
+
+class TestTxtIPoker:
+    """Test iPoker TXT conversion"""
+
+    @pytest.fixture
+    def phh(self, tmp_path):
+        parser = UnifiedParser(output_dir=tmp_path)
+        return parser._ipoker_hand_to_phh(IPOKER_TXT_HAND)
+
+    def test_metadata_and_players(self, phh):
+        assert phh['metadata']['hand_id'] == '5001'
+        assert phh['metadata']['hero'] == 'Hero'
+        assert phh['metadata']['sb'] == 10.0
+        assert phh['metadata']['bb'] == 20.0
+        assert phh['players'] == [
+            {'name': 'Hero', 'seat': 1, 'stack': 1500.0, 'is_btn': True},
+            {'name': 'Villain', 'seat': 2, 'stack': 500.0, 'is_btn': False},
+        ]
+
+    def test_actions_in_order(self, phh):
+        assert [(a['player'], a['action'], a['amount']) for a in phh['actions']] == [
+            ('Hero', 'sb', 10.0),
+            ('Villain', 'bb', 20.0),
+            ('Hero', 'raise', 30.0),     # Raise €40 = total na street
+            ('Villain', 'call', 20.0),
+            ('Villain', 'check', 0.0),
+            ('Hero', 'bet', 30.0),
+            ('Villain', 'raise', 440.0),  # All-in(raise) resolvido pelo valor a pagar
+            ('Hero', 'call', 410.0),
+        ]
+        assert [a.get('all_in', False) for a in phh['actions']] == [False] * 6 + [True, False]
+        assert all(a['action'] in {*DECISION_ACTIONS, 'sb', 'bb'} for a in phh['actions'])
+
+    def test_street_offsets(self, phh):
+        assert phh['street_offsets'] == [0, 4, 8, 8]
+
+    def test_board_and_showdown(self, phh):
+        assert phh['board'] == ['7d', 'Th', 'Ks', '2c', '3s']
+        assert phh['showdown']['winners'] == ['Hero']
+        assert phh['showdown']['hands'] == [
+            {'player': 'Villain', 'cards': ['Kd', 'Qd']},
+            {'player': 'Hero', 'cards': ['As', 'Kh']},
+        ]
+
+
+class TestParseDirectory:
+    """Test directory ingestion"""
+
+    @pytest.fixture
+    def input_dir(self, tmp_path):
+        """Tree with several sessions spread across sub-directories"""
+        root = tmp_path / "input"
+        for i in range(4):
+            sub = root / f"day{i % 2}"
+            sub.mkdir(parents=True, exist_ok=True)
+            xml = XML_SESSION.replace('gamecode="100', f'gamecode="{i}00')
+            (sub / f"session{i}.xml").write_text(xml, encoding="utf-8")
+        (root / "notes.md").write_text("ignore me", encoding="utf-8")
+        return root
+
+    def test_collect_input_files_single_walk(self, tmp_path, input_dir):
+        parser = UnifiedParser(output_dir=tmp_path / "phh")
+        files = parser._collect_input_files(input_dir)
+
+        assert len(files) == 4
+        assert all(f.suffix == ".xml" for f in files)
+
+    def test_parallel_matches_sequential(self, tmp_path, input_dir):
+        """Process pool output and merged stats match the sequential run"""
+        filters = {'heads_up_only': True}
+
+        sequential = UnifiedParser(output_dir=tmp_path / "seq")
+        seq_files = sequential.parse_directory(input_dir, filters=filters)
+
+        parallel = UnifiedParser(output_dir=tmp_path / "par")
+        par_files = parallel.parse_directory(input_dir, filters=filters, workers=2, chunk_size=1)
+
+        assert sorted(p.name for p in par_files) == sorted(p.name for p in seq_files)
+        assert parallel.stats == sequential.stats
+        assert parallel.stats['by_format'] == {'xml_ipoker': 4}
+
+
+class TestIncrementalIngest:
+    """Test manifest-driven incremental ingestion"""
+
+    @pytest.fixture
+    def input_dir(self, tmp_path):
+        root = tmp_path / "input"
+        root.mkdir()
+        (root / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        return root
+
+    def _parser(self, tmp_path):
+        return UnifiedParser(
+            output_dir=tmp_path / "phh",
+            manifest_path=tmp_path / "phh" / "ingest_manifest.json"
+        )
+
+    def test_second_run_skips_unchanged_files(self, tmp_path, input_dir):
+        first = self._parser(tmp_path)
+        assert len(first.parse_directory(input_dir)) == 3
+
+        second = self._parser(tmp_path)
+        assert second.parse_directory(input_dir) == []
+        assert second.stats['skipped_unchanged'] == 1
+        assert second.stats['total_files'] == 0
+
+        hand_ids = second.manifest.hand_ids(input_dir / "a.xml")
+        assert sorted(hand_ids) == ['1001', '1002', '1003']
+
+    def test_new_and_changed_files_are_parsed(self, tmp_path, input_dir):
+        self._parser(tmp_path).parse_directory(input_dir)
+
+        (input_dir / "b.xml").write_text(
+            XML_SESSION.replace('gamecode="100', 'gamecode="200'), encoding="utf-8"
+        )
+        (input_dir / "a.xml").write_text(
+            XML_SESSION.replace('gamecode="1003"', 'gamecode="1004"'), encoding="utf-8"
+        )
+
+        parser = self._parser(tmp_path)
+        phh_files = parser.parse_directory(input_dir)
+
+        assert parser.stats['total_files'] == 2
+        assert '1004' in {p.stem for p in phh_files}
+
+    def test_failed_files_only_retried_on_request(self, tmp_path, input_dir):
+        (input_dir / "broken.xml").write_text("<session><game", encoding="utf-8")
+        self._parser(tmp_path).parse_directory(input_dir)
+
+        parser = self._parser(tmp_path)
+        parser.parse_directory(input_dir)
+        assert parser.stats['total_files'] == 0
+
+        parser = self._parser(tmp_path)
+        parser.parse_directory(input_dir, retry_failed=True)
+        assert parser.stats['total_files'] == 1
+        assert parser.stats['errors'] == 1
+
+    def test_error_mid_file_keeps_hands_already_written(self, tmp_path, input_dir):
+        # Cut inside the third game: the first two are emitted before iterparse fails
+        truncated = XML_SESSION[:XML_SESSION.index('gamecode="1003"')] + '><broken'
+        (input_dir / "a.xml").write_text(truncated, encoding="utf-8")
+
+        parser = self._parser(tmp_path)
+        phh_files = parser.parse_directory(input_dir)
+
+        assert sorted(p.stem for p in phh_files) == ['1001', '1002']
+        assert parser.stats['errors'] == 1
+        assert parser.stats['partial_files'] == 1
+
+        entry = parser.manifest.entries[str((input_dir / "a.xml").resolve())]
+        assert sorted(entry['hand_ids']) == ['1001', '1002']
+        assert entry['failed'] and entry['partial']
+
+    def test_reparsed_file_keeps_hands_skipped_as_duplicates(self, tmp_path, input_dir):
+        def parser():
+            return UnifiedParser(
+                output_dir=tmp_path / "phh",
+                manifest_path=tmp_path / "phh" / "ingest_manifest.json",
+                hand_index_path=tmp_path / "phh" / "hand_index.npz"
+            )
+
+        truncated = XML_SESSION[:XML_SESSION.index('gamecode="1003"')] + '><broken'
+        (input_dir / "a.xml").write_text(truncated, encoding="utf-8")
+        parser().parse_directory(input_dir)
+
+        # The export grows: 1001/1002 come back as duplicates, only 1003 is new
+        (input_dir / "a.xml").write_text(XML_SESSION, encoding="utf-8")
+        retried = parser()
+        assert [p.stem for p in retried.parse_directory(input_dir)] == ['1003']
+        assert retried.stats['duplicates'] == 2
+
+        entry = retried.manifest.entries[str((input_dir / "a.xml").resolve())]
+        assert sorted(entry['hand_ids']) == ['1001', '1002', '1003']
+        assert not entry['failed'] and not entry['partial']
+
+
+class TestZipIngest:
+    """Test in-memory ZIP ingestion"""
+
+    @pytest.fixture
+    def archive(self, tmp_path):
+        """ZIP with an XML session, an iPoker TXT file and a nested deflated ZIP"""
+        inner = io.BytesIO()
+        with zipfile.ZipFile(inner, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(
+                "nested/session.xml",
+                XML_SESSION.replace('gamecode="100', 'gamecode="300')
+            )
+
+        path = tmp_path / "bulk.zip"
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("sessions/a.xml", XML_SESSION)
+            # Sem extensão: formato detectado pelos primeiros bytes
+            zf.writestr("exports/hand_5001", IPOKER_TXT_HAND)
+            zf.writestr("inner.zip", inner.getvalue())
+        return path
+
+    def test_members_parsed_without_extracting(self, tmp_path, archive, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError("ZIP members must not be extracted to disk")
+
+        monkeypatch.setattr(zipfile.ZipFile, "extractall", fail)
+        monkeypatch.setattr(zipfile.ZipFile, "extract", fail)
+
+        parser = UnifiedParser(output_dir=tmp_path / "phh")
+        phh_files = parser.parse_file(archive, filters={'heads_up_only': True})
+
+        assert sorted(p.stem for p in phh_files) == ['1001', '1003', '3001', '3003', '5001']
+        assert parser.stats['errors'] == 0
+        assert parser.stats['by_format'] == {'zip': 2, 'xml_ipoker': 2, 'txt_ipoker': 1}
+
+    def test_detect_format_from_head(self, tmp_path):
+        parser = UnifiedParser(output_dir=tmp_path)
+
+        assert parser._detect_format_from_head("x", b"\xef\xbb\xbfPokerStars Hand #1: ...").value == "txt_pokerstars"
+        assert parser._detect_format_from_head("x", b"GAME #1: Holdem").value == "txt_ipoker"
+        assert parser._detect_format_from_head("x", b"<?xml version='1.0'?>").value == "xml_ipoker"
+        assert parser._detect_format_from_head("x", b"PK\x03\x04...").value == "zip"
+        assert parser._detect_format_from_head("notes.txt", b"hello").value == "unknown"
+
+
+class TestHandSplitter:
+    """Test lazy (offset, length) hand splitting"""
+
+    def test_spans_skip_bom_and_preamble(self):
+        buf = b'\xef\xbb\xbfheader line\nGAME #1: a\nx\n\nGAME #2: b\ny\n'
+        spans = list(_iter_hand_spans(buf, b'GAME #'))
+
+        assert [buf[o:o + n] for o, n in spans] == [b'GAME #1: a\nx\n\n', b'GAME #2: b\ny\n']
+
+    def test_spans_marker_mid_line_is_not_a_hand(self):
+        buf = b'GAME #1: see GAME #2\nend'
+        assert list(_iter_hand_spans(buf, b'GAME #')) == [(0, len(buf))]
+
+    def test_mmap_and_stream_agree(self, tmp_path):
+        path = tmp_path / "hands.txt"
+        path.write_bytes(('﻿' + IPOKER_TXT_HAND + '\n' + IPOKER_TXT_HAND.replace('5001', '5002')).encode('utf-8'))
+        parser = UnifiedParser(output_dir=tmp_path)
+
+        from_mmap = list(parser._iter_ipoker_hands(path))
+        with open(path, 'rb') as f:
+            from_stream = list(parser._iter_ipoker_hands(f))
+
+        assert from_mmap == from_stream
+        assert [h.split(':')[0] for h in from_mmap] == ['GAME #5001', 'GAME #5002']
+
+    def test_crlf_file_matches_lf(self, tmp_path):
+        text = IPOKER_TXT_HAND + '\n' + IPOKER_TXT_HAND.replace('5001', '5002')
+        lf_path = tmp_path / "lf.txt"
+        lf_path.write_bytes(text.encode('utf-8'))
+        crlf_path = tmp_path / "crlf.txt"
+        crlf_path.write_bytes(text.replace('\n', '\r\n').encode('utf-8'))
+        parser = UnifiedParser(output_dir=tmp_path)
+
+        expected = list(parser._iter_ipoker_hands(lf_path))
+        from_mmap = list(parser._iter_ipoker_hands(crlf_path))
+        with open(crlf_path, 'rb') as f:
+            from_stream = list(parser._iter_ipoker_hands(f))
+
+        assert from_mmap == from_stream == expected
+        assert not any('\r' in hand for hand in from_mmap)
+        assert [parser._ipoker_hand_to_phh(h) for h in from_mmap] == \
+            [parser._ipoker_hand_to_phh(h) for h in expected]
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.txt"
+        path.touch()
+        parser = UnifiedParser(output_dir=tmp_path)
+
+        assert list(parser._iter_pokerstars_hands(path)) == []
+
+
+POKERSTARS_HAND = """PokerStars Hand #251352982551: Tournament #3774751555, $4.60+$0.40 USD Hold'em No Limit - Level V (50/100) - 2024/07/06 0:21:19 ET
+Table '3774751555 1' 3-max Seat #3 is the button
+Seat 2: FresHHerB (2,810 in chips)
+Seat 3: LOSE SOME MONEY (690 in chips)
+FresHHerB: posts the ante 10
+LOSE SOME MONEY: posts the ante 10
+LOSE SOME MONEY: posts small blind 50
+FresHHerB: posts big blind 100
+*** HOLE CARDS ***
+Dealt to FresHHerB [7c 9d]
+LOSE SOME MONEY: raises 150 to 250
+FresHHerB: calls 150
+*** FLOP *** [Kh 9s Js]
+FresHHerB: checks
+LOSE SOME MONEY: bets 430 and is all-in
+FresHHerB: calls 430
+*** TURN *** [Kh 9s Js] [3d]
+*** RIVER *** [Kh 9s Js 3d] [5d]
+*** SHOW DOWN ***
+FresHHerB: shows [7c 9d] (a pair of Nines)
+LOSE SOME MONEY: mucks hand
+FresHHerB collected 1380 from pot
+*** SUMMARY ***
+Total pot 1380 | Rake 0
+Board [Kh 9s Js 3d 5d]
+Seat 2: FresHHerB (big blind) showed [7c 9d] and won (1380) with a pair of Nines
+Seat 3: LOSE SOME MONEY (button) (small blind) mucked [7h Ah]
+"""
+
+
+class TestPokerStarsConverter:
+    """Test single-pass PokerStars conversion"""
+
+    @pytest.fixture
+    def phh(self, tmp_path):
+        parser = UnifiedParser(output_dir=tmp_path)
+        return parser._pokerstars_hand_to_phh(POKERSTARS_HAND)
+
+    def test_metadata_and_players(self, phh):
+        assert phh['metadata']['hand_id'] == '251352982551'
+        assert phh['metadata']['hero'] == 'FresHHerB'
+        assert (phh['metadata']['sb'], phh['metadata']['bb'], phh['metadata']['ante']) == (50.0, 100.0, 10.0)
+        assert phh['players'] == [
+            {'name': 'FresHHerB', 'seat': 2, 'stack': 2810.0, 'is_btn': False},
+            {'name': 'LOSE SOME MONEY', 'seat': 3, 'stack': 690.0, 'is_btn': True},
+        ]
+
+    def test_actions_are_chip_increments(self, phh):
+        assert [(a['player'], a['action'], a['amount'], a.get('all_in', False)) for a in phh['actions']] == [
+            ('FresHHerB', 'ante', 10.0, False),
+            ('LOSE SOME MONEY', 'ante', 10.0, False),
+            ('LOSE SOME MONEY', 'sb', 50.0, False),
+            ('FresHHerB', 'bb', 100.0, False),
+            ('LOSE SOME MONEY', 'raise', 200.0, False),  # raises 150 to 250
+            ('FresHHerB', 'call', 150.0, False),
+            ('FresHHerB', 'check', 0.0, False),
+            ('LOSE SOME MONEY', 'bet', 430.0, True),
+            ('FresHHerB', 'call', 430.0, False),
+        ]
+        assert sum(a['amount'] for a in phh['actions']) == 1380.0
+
+    def test_street_offsets(self, phh):
+        assert phh['street_offsets'] == [0, 6, 9, 9]
+
+    def test_board_and_showdown(self, phh):
+        assert phh['board'] == ['Kh', '9s', 'Js', '3d', '5d']
+        assert phh['showdown'] == {
+            'winners': ['FresHHerB'],
+            'hands': [
+                {'player': 'FresHHerB', 'cards': ['7c', '9d']},
+                {'player': 'LOSE SOME MONEY', 'cards': ['7h', 'Ah']},
+            ],
+        }
+
+    def test_heads_up_with_spaced_names(self, tmp_path):
+        parser = UnifiedParser(output_dir=tmp_path)
+        assert parser._is_heads_up_pokerstars(POKERSTARS_HAND)
+
+    def test_side_pots_and_uncalled_bet(self, tmp_path):
+        hand = """PokerStars Hand #254118740092: Tournament #3840410902, $4.60+$0.40 USD Hold'em No Limit - Level III (20/40) - 2024/12/31 3:42:26 BRT [2024/12/31 1:42:26 ET]
+Table '3840410902 1' 3-max Seat #3 is the button
+Seat 1: luis stone24 (30 in chips)
+Seat 2: Tipatushka (370 in chips)
+Seat 3: FresHHerB (1100 in chips)
+luis stone24: posts small blind 20
+Tipatushka: posts big blind 40
+*** HOLE CARDS ***
+Dealt to FresHHerB [Js Jc]
+FresHHerB: raises 40 to 80
+luis stone24: calls 10 and is all-in
+Tipatushka: folds
+Uncalled bet (40) returned to FresHHerB
+*** FLOP *** [8d Jh 8c]
+*** TURN *** [8d Jh 8c] [Qc]
+*** RIVER *** [8d Jh 8c Qc] [Td]
+*** SHOW DOWN ***
+FresHHerB: shows [Js Jc] (a full house, Jacks full of Eights)
+FresHHerB collected 20 from side pot
+luis stone24: shows [5d 6h] (a pair of Eights)
+FresHHerB collected 90 from main pot
+*** SUMMARY ***
+Total pot 110 Main pot 90. Side pot 20. | Rake 0
+"""
+        phh = UnifiedParser(output_dir=tmp_path)._pokerstars_hand_to_phh(hand)
+
+        assert phh['showdown']['winners'] == ['FresHHerB']
+        assert phh['actions'][2] == {'player': 'FresHHerB', 'action': 'raise', 'amount': 40.0}
+        assert sum(a['amount'] for a in phh['actions']) == 110.0
+
+
+# Mesma mão de XML_FULL_GAME nos dois formatos texto
+IPOKER_TXT_FULL_GAME = """GAME #7001: Holdem NL Tournament 2025-06-16 01:28:37
+Seat 3: Hero (€1,420 in chips) DEALER
+Seat 6: Villain (€525 in chips)
+Hero: Post Ante €5
+Villain: Post Ante €5
+Hero: Post SB €20
+Villain: Post BB €40
+*** HOLE CARDS ***
+Dealt to Hero [SA H10]
+Hero: Raise €120
+Villain: Call €80
+*** FLOP *** [D6 H10 DA]
+Villain: Check
+Hero: Bet €100
+Villain: All-in(raise) €400
+Hero: Call €300
+*** TURN *** [C10]
+*** RIVER *** [D3]
+*** SHOW DOWN ***
+Villain: Shows [S7 DQ]
+Hero: Shows [SA H10]
+Hero: wins €1,050
+"""
+
+POKERSTARS_FULL_GAME = """PokerStars Hand #7001: Tournament #1, $4.60+$0.40 USD Hold'em No Limit - Level I (20/40) - 2025/06/16 1:28:37 ET
+Table '1 1' 2-max Seat #3 is the button
+Seat 3: Hero (1,420 in chips)
+Seat 6: Villain (525 in chips)
+Hero: posts the ante 5
+Villain: posts the ante 5
+Hero: posts small blind 20
+Villain: posts big blind 40
+*** HOLE CARDS ***
+Dealt to Hero [As Th]
+Hero: raises 80 to 120
+Villain: calls 80
+*** FLOP *** [6d Th Ad]
+Villain: checks
+Hero: bets 100
+Villain: raises 300 to 400 and is all-in
+Hero: calls 300
+*** TURN *** [6d Th Ad] [Tc]
+*** RIVER *** [6d Th Ad Tc] [3d]
+*** SHOW DOWN ***
+Villain: shows [7s Qd]
+Hero: shows [As Th]
+Hero collected 1050 from pot
+*** SUMMARY ***
+Total pot 1050 | Rake 0
+"""
+
+
+class TestCrossFormatActions:
+    """The same hand must convert to the same actions in every format"""
+
+    @staticmethod
+    def _actions(phh):
+        return [(a['player'], a['action'], a['amount'], a.get('all_in', False)) for a in phh['actions']]
+
+    def test_xml_txt_and_pokerstars_agree(self, tmp_path):
+        path = tmp_path / "full.xml"
+        path.write_text(XML_FULL_GAME, encoding="utf-8")
+        parser = UnifiedParser(output_dir=tmp_path)
+        game, hero = next(parser._iter_xml_games(path))
+
+        xml = parser._xml_game_to_phh(game, hero)
+        txt = parser._ipoker_hand_to_phh(IPOKER_TXT_FULL_GAME)
+        stars = parser._pokerstars_hand_to_phh(POKERSTARS_FULL_GAME)
+
+        assert self._actions(txt) == self._actions(xml)
+        assert self._actions(stars) == self._actions(xml)
+        assert xml['street_offsets'] == txt['street_offsets'] == stars['street_offsets']
+        assert xml['board'] == txt['board'] == stars['board']
+
+
+class TestHandIdIndex:
+    """Test persistent hand-id dedupe"""
+
+    def test_index_round_trip(self, tmp_path):
+        index = HandIdIndex(tmp_path / "hand_index.npz")
+        index.add_many(['11514729865', '42', 'abc-1', '007'])
+
+        assert '42' in index and 'abc-1' in index and '007' in index
+        assert '7' not in index
+        index.save()
+
+        reloaded = HandIdIndex(tmp_path / "hand_index.npz")
+        assert len(reloaded) == 4
+        assert '11514729865' in reloaded and '007' in reloaded
+        assert '11514729866' not in reloaded
+
+    def test_reupload_skips_known_hands(self, tmp_path):
+        session = tmp_path / "session.xml"
+        session.write_text(XML_SESSION, encoding="utf-8")
+        index_path = tmp_path / "phh" / "hand_index.npz"
+
+        first = UnifiedParser(output_dir=tmp_path / "phh", hand_index_path=index_path)
+        assert len(first.parse_file(session)) == 3
+
+        second = UnifiedParser(output_dir=tmp_path / "phh", hand_index_path=index_path)
+        assert second.parse_file(session) == []
+        assert second.stats['duplicates'] == 3
+        assert second.stats['converted'] == 0
+
+    def test_new_index_is_seeded_from_existing_output(self, tmp_path):
+        session = tmp_path / "session.xml"
+        session.write_text(XML_SESSION, encoding="utf-8")
+        UnifiedParser(output_dir=tmp_path / "phh").parse_file(session)
+
+        parser = UnifiedParser(
+            output_dir=tmp_path / "phh", hand_index_path=tmp_path / "phh" / "hand_index.npz"
+        )
+        assert parser.parse_file(session) == []
+        assert parser.stats['duplicates'] == 3
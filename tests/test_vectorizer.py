@@ -0,0 +1,121 @@
+"""
+Unit Tests for the column-wise Vectorizer.vectorize_batch
+"""
+
+import pytest
+import sys
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.context.board_texture import analyze_board
+from src.context.hand_evaluator import RANKS, SUITS
+from src.vectorization.vectorizer import HAND_STRENGTHS, STREETS, Vectorizer
+
+DECK = [rank + suit for rank in RANKS for suit in SUITS]
+
+TOKENS = [
+    'HERO_check', 'HERO_call', 'HERO_bet_8', 'HERO_raise_40', 'HERO_all_in_250', 'HERO_limp',
+    'VILLAIN_check', 'VILLAIN_call', 'VILLAIN_bet_12', 'VILLAIN_raise_60', 'VILLAIN_fold', 'domikan1_sb'
+]
+
+
+def random_rows(count, seed=0):
+    """Decision point dicts covering every block of the vector"""
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for _ in range(count):
+        street_idx = int(rng.integers(4))
+        board = [DECK[i] for i in rng.permutation(52)[:(0, 3, 4, 5)[street_idx]]]
+        sequence = [TOKENS[i] for i in rng.integers(len(TOKENS), size=int(rng.integers(9)))]
+        shown = street_idx > 0 and rng.random() < 0.5
+
+        rows.append({
+            'street': STREETS[street_idx],
+            'action_number_in_street': len(sequence),
+            'pot_bb': float(rng.uniform(2, 200)),
+            'eff_stack_bb': float(rng.uniform(1, 100)),
+            'spr': float(rng.choice([0.5, 2.0, 4.9, 5.0, 9.99, 10.0, 30.0])),
+            'villain_position': ['IP', 'OOP', 'BTN', 'BB', 'SB'][int(rng.integers(5))],
+            'current_street_sequence': sequence,
+            'current_aggressor': [None, 'hero', 'villain'][int(rng.integers(3))],
+            'board_cards': board,
+            'board_texture': analyze_board(board),
+            'villain_hand_strength': HAND_STRENGTHS[int(rng.integers(9))] if shown else None,
+            'villain_draws': {'flush_draw': True, 'oesd': False, 'gutshot': bool(rng.random() < 0.5),
+                              'combo_draw': False} if shown else None,
+            'villain_bet_size_pot_pct': float(rng.choice([10, 33, 33.5, 50, 75, 100, 150])),
+        })
+
+    return rows
+
+
+def per_row(vectorizer, df):
+    """Reference: the original iterrows loop"""
+    vectors = []
+    for _, row in df.iterrows():
+        dp = row.to_dict()
+        for key in ('board_texture', 'villain_draws'):
+            if isinstance(dp.get(key), str):
+                dp[key] = json.loads(dp[key])
+        vectors.append(vectorizer.vectorize_decision_point(dp))
+    return np.array(vectors, dtype=np.float32)
+
+
+def assert_same(batch, expected):
+    assert batch.dtype == np.float32
+    assert batch.shape == expected.shape
+    assert np.array_equal(batch, expected, equal_nan=True)
+
+
+class TestVectorizeBatch:
+    """Batch output is identical to the per-row path"""
+
+    @pytest.fixture
+    def vectorizer(self):
+        return Vectorizer()
+
+    def test_matches_per_row(self, vectorizer):
+        df = pd.DataFrame(random_rows(500))
+        assert_same(vectorizer.vectorize_batch(df), per_row(vectorizer, df))
+
+    def test_matches_per_row_after_parquet(self, vectorizer, tmp_path):
+        # Parquet round trip: list cells come back as arrays, missing floats as NaN
+        rows = random_rows(300, seed=1)
+        for row in rows[::7]:
+            row['spr'] = None
+            row['villain_bet_size_pot_pct'] = None
+        pd.DataFrame(rows).to_parquet(tmp_path / "dp.parquet")
+        df = pd.read_parquet(tmp_path / "dp.parquet")
+
+        assert_same(vectorizer.vectorize_batch(df), per_row(vectorizer, df))
+
+    def test_legacy_json_and_missing_values(self, vectorizer):
+        df = pd.DataFrame([
+            {'street': 'flop', 'board_cards': [], 'board_texture': json.dumps({'monotone': True, 'wet': True}),
+             'villain_draws': json.dumps({'oesd': True}), 'spr': None, 'villain_bet_size_pot_pct': None,
+             'current_street_sequence': ['HERO_bet_8', 'VILLAIN_raise_20', 'HERO_all_in_50'],
+             'current_aggressor': 'villain', 'pot_bb': 10.0, 'eff_stack_bb': 50.0},
+            {'street': 'turn', 'board_cards': ['Ah', 'Kh', 'Qh', '2c'], 'board_texture': {},
+             'villain_draws': {}, 'spr': 3.0, 'villain_bet_size_pot_pct': 80.0,
+             'current_street_sequence': [], 'current_aggressor': None, 'pot_bb': 0.0, 'eff_stack_bb': 0.0},
+        ])
+
+        assert_same(vectorizer.vectorize_batch(df), per_row(vectorizer, df))
+
+    def test_missing_columns_use_defaults(self, vectorizer):
+        df = pd.DataFrame({'street': ['river', 'preflop'], 'pot_bb': [5.0, 1.5]})
+        expected = np.array([
+            vectorizer.vectorize_decision_point(row) for row in df.to_dict('records')
+        ], dtype=np.float32)
+
+        assert_same(vectorizer.vectorize_batch(df), expected)
+
+    def test_empty_frame(self, vectorizer):
+        vectors = vectorizer.vectorize_batch(pd.DataFrame(random_rows(3)).iloc[:0])
+        assert vectors.shape == (0, vectorizer.config.total_dimensions)